@@ -1 +1,8 @@
-from .base import BaseClass
\ No newline at end of file
+from .base import BaseClass
+from .clock import Clock
+from .clock import VirtualClock
+from .clock import system_clock
+from .logs import Lazy
+from .logs import JsonFormatter
+from .logs import setup_logging
+from .logs import set_levels
\ No newline at end of file
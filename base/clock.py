@@ -0,0 +1,44 @@
+import threading
+import time
+
+from .base import BaseClass
+
+class Clock(BaseClass):
+
+    # the wall clock - classes take a clock instead of calling time directly,
+    # so simulations and regression tests can run them on a virtual clock
+
+    def time(self) -> float:
+        return time.time()
+
+    def ms(self) -> int:
+        return int(self.time() * 1000)
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+class VirtualClock(Clock):
+
+    # a clock which only moves with sleep and advance, sleeping returns at once
+
+    def __init__(self, start: float = 1672531200.0):
+
+        self._now: float = start
+        self._lock = threading.Lock()
+
+    def time(self) -> float:
+        return self._now
+
+    def sleep(self, seconds: float):
+        self.advance(seconds)
+
+    def advance(self, seconds: float):
+        with self._lock:
+            self._now += max(seconds, 0)
+
+    def set(self, now: float):
+        with self._lock:
+            self._now = now
+
+# the clock used if none is given
+system_clock = Clock()
@@ -0,0 +1,116 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+
+from .base import BaseClass
+
+# Logging of the bots: the modules log to loggers named by their modules
+# (logging.getLogger(__name__)), so the levels can be set per subsystem
+# ('botlib', 'exchange_adapters', 'datafeeds', 'order_models', ... or a single
+# module like 'botlib.order_store'). The messages are formatted lazily with
+# %-style arguments, a disabled level costs the call only. setup_logging puts
+# a queue between the bot threads and the output: the records are written by
+# a listener thread, a slow terminal or disk doesn't block a main cycle.
+#
+#   listener = setup_logging(logging.INFO, levels={ 'exchange_adapters': logging.WARNING }, json_format=True)
+
+DEFAULT_FORMAT = '%(asctime)s %(levelname)s [%(process)d] %(message)s'
+
+# the attributes of every log record, the others are extra fields
+RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | { 'message', 'asctime' }
+
+class Lazy(BaseClass):
+
+    # an argument of a log message which is only computed if the message is
+    # written, e.g. logger.debug('%s orders: %s', prefix, Lazy(lambda: [ o['id'] for o in orders ]))
+
+    def __init__(self, func):
+        self._func = func
+
+    def __str__(self) -> str:
+        return str(self._func())
+
+class JsonFormatter(logging.Formatter):
+
+    # one JSON object per line with the time, level, logger, message and the
+    # extra fields of the record (logger.info('...', extra={ 'symbol': symbol }))
+
+    def format(self, record: logging.LogRecord) -> str:
+
+        entry = { 'time': record.created, 'level': record.levelname, 'logger': record.name,
+                  'thread': record.threadName, 'message': record.getMessage() }
+
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRS:
+                entry[key] = value
+
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default=str)
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+
+    # never blocks the logging thread: if the queue is full (the output can't
+    # keep up) the record is dropped and counted
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped: int = 0
+
+    def enqueue(self, record: logging.LogRecord):
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class LogListener(logging.handlers.QueueListener):
+
+    # writes the records of the queue in its thread, stop can be called more
+    # than once (by the caller and at exit) and waits for a full queue
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+
+        if self._thread is not None:
+            super().stop()
+
+def set_levels(levels: dict):
+
+    for name, level in (levels or {}).items():
+        logging.getLogger(name).setLevel(level)
+
+# configures the root logger, returns the started QueueListener (None without
+# queue), it is stopped at exit to flush the remaining records
+def setup_logging(level: int = logging.INFO, levels: dict = None, json_format: bool = False,
+                  fmt: str = DEFAULT_FORMAT, stream = None, use_queue: bool = True,
+                  queue_size: int = 10000) -> LogListener:
+
+    handler = logging.StreamHandler(stream if stream is not None else sys.stderr)
+    handler.setFormatter(JsonFormatter() if json_format else logging.Formatter(fmt))
+
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.setLevel(level)
+
+    set_levels(levels)
+
+    if not use_queue:
+        root.addHandler(handler)
+        return None
+
+    records = queue.Queue(queue_size)
+    root.addHandler(DroppingQueueHandler(records))
+
+    listener = LogListener(records, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    return listener
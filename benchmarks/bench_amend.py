@@ -0,0 +1,85 @@
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from botlib import BaseBot
+from exchange_adapters import SimulatedAdapter
+from signal_generators import ExtendedSignalGenerator
+
+# Benchmark of re-pricing take profit and stop loss orders by amend (edit_order)
+# versus cancel + create on the SimulatedExchange. Each trade opens a long
+# position, moves the price up in steps and re-prices the stop loss and the
+# take profit on every step, then closes the position. Printed per trade:
+# order requests (create, cancel, edit), the round trips saved by amends as
+# counted by the bot (amend_stats) and the time of the re-pricing calls.
+#
+# usage: python -m benchmarks.bench_amend [--trades 20] [--steps 20]
+
+SYMBOL = 'ETH/USD:USD'
+ORDER_CALLS = [ 'create_order', 'cancel_order', 'edit_order' ]
+
+class RepricingBot(BaseBot):
+
+    def __init__(self, exchange_adapter):
+        super().__init__(exchange_adapter, SYMBOL, ExtendedSignalGenerator(), ticks=1)
+
+def trade(bot: RepricingBot, ea: SimulatedAdapter, steps: int) -> float:
+
+    price = 1000.0
+    ea.exchange.set_price(SYMBOL, price)
+    ea.exchange.create_order(SYMBOL, 'market', 'buy', 10)
+    bot.refresh_open_position()
+
+    elapsed = 0.0
+    for step in range(steps):
+        price += 1.0
+        ea.exchange.set_price(SYMBOL, price)
+
+        bot.refresh_active_orders()
+        start = time.perf_counter()
+        bot.maintain_sl_order(price - 5.0)
+        bot.maintain_tp_order(price + 5.0)
+        elapsed += time.perf_counter() - start
+
+    ea.cancel_all_orders(SYMBOL)
+    ea.exchange.create_order(SYMBOL, 'market', 'sell', 10, None, { 'reduceOnly': True })
+    bot.refresh_open_position()
+
+    return elapsed
+
+def run(amend: bool, trades: int, steps: int) -> tuple:
+
+    ea = SimulatedAdapter()
+    if not amend:
+        ea.amend_types = []
+
+    bot = RepricingBot(ea)
+    times = []
+
+    for _ in range(trades):
+        times.append(trade(bot, ea, steps))
+
+    requests = sum(ea.exchange.calls.get(c, 0) for c in ORDER_CALLS)
+    return requests / trades, np.array(times) / steps * 1000, bot.amend_stats()
+
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.WARNING)
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.bench_amend')
+    parser.add_argument('--trades', type=int, default=20, help='trades per run')
+    parser.add_argument('--steps', type=int, default=20, help='re-pricings of stop loss and take profit per trade')
+    args = parser.parse_args()
+
+    trades = args.trades
+    steps = args.steps
+
+    print(f'{trades} trades, stop loss and take profit re-priced {steps} times per trade')
+
+    for amend in [ False, True ]:
+        [ requests, t, stats ] = run(amend, trades, steps)
+        print(f"{'amend' if amend else 'cancel+create':14s} order requests per trade {requests:6.1f}  "
+              f"round trips saved per trade {stats['per_trade_mean']:6.1f}  "
+              f"re-pricing mean {t.mean():6.3f} ms per step  (amends {stats['amends']}, fallbacks {stats['fallbacks']})")
@@ -0,0 +1,97 @@
+import argparse
+import subprocess
+import sys
+import time
+import timeit
+import numpy as np
+import pandas as pd
+
+from signal_generators import indicators
+
+# Benchmark of the NumPy indicators against pandas_ta:
+#  - import time of pandas_ta and of the signal generators (fresh interpreter each)
+#  - compute time per refresh (300 bars) of each indicator and per new bar
+#  - the results are compared bit by bit if pandas_ta is installed
+#
+# usage: python -m benchmarks.bench_indicators [--bars 300]
+
+IMPORT_BASELINE = 'import numpy, pandas, ccxt'
+
+def import_time(module: str, repeat: int = 5) -> float:
+
+    code = f'{IMPORT_BASELINE}; import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)'
+    times = []
+
+    for i in range(repeat):
+        r = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+        if r.returncode != 0:
+            return None
+        times.append(float(r.stdout.strip()))
+
+    return min(times)
+
+def candles(num_bars: int, seed: int = 42) -> pd.DataFrame:
+
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, num_bars))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) + rng.random(num_bars)
+    low = np.minimum(open_, close) - rng.random(num_bars)
+    volume = rng.random(num_bars) * 1000
+
+    index = pd.date_range('2023-01-01', periods=num_bars, freq='5min')
+    return pd.DataFrame({ 'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume }, index=index)
+
+def cases(df: pd.DataFrame) -> dict:
+
+    o, h, l, c, v = df['open'], df['high'], df['low'], df['close'], df['volume']
+
+    return {
+        'ema_50': (lambda: indicators.ema(c, 50), lambda ta: ta.ema(c, length=50)),
+        'rsi_9': (lambda: indicators.rsi(c, 9), lambda ta: ta.rsi(c, length=9)),
+        'atr_9': (lambda: indicators.atr(h, l, c, 9), lambda ta: ta.atr(h, l, c, length=9)),
+        'natr_9': (lambda: indicators.natr(h, l, c, 9), lambda ta: ta.natr(h, l, c, length=9)),
+        'pvo_5_10_9': (lambda: indicators.pvo(v, 5, 10, 9), lambda ta: ta.pvo(v, fast=5, slow=10, signal=9)),
+        'ha': (lambda: indicators.ha(o, h, l, c), lambda ta: ta.ha(o, h, l, c)),
+    }
+
+def same(a, b) -> bool:
+
+    if isinstance(a, dict):
+        return all(np.array_equal(a[col], b[col].values, equal_nan=True) for col in a)
+
+    return np.array_equal(a, b.values, equal_nan=True)
+
+def best_of(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.bench_indicators')
+    parser.add_argument('--bars', type=int, default=300, help='bars of the feed per refresh')
+    num_bars = parser.parse_args().bars
+
+    try:
+        import pandas_ta as ta
+    except ImportError:
+        ta = None
+
+    print(f'=== Import time (s), after {IMPORT_BASELINE} ===')
+    for module in [ 'pandas_ta', 'signal_generators' ]:
+        t = import_time(module)
+        print(f'{module:<20} {"not installed" if t is None else f"{t:.4f}"}')
+
+    df = candles(num_bars)
+
+    print(f'=== Compute time per refresh of {num_bars} bars (ms) ===')
+    print(f'{"indicator":<12} {"numpy":>10} {"pandas_ta":>10} {"speedup":>8} {"per bar (us)":>13} {"identical":>10}')
+
+    for name, (np_func, ta_func) in cases(df).items():
+        t_np = best_of(np_func, 20)
+
+        if ta is not None:
+            t_ta = best_of(lambda: ta_func(ta), 20)
+            identical = same(np_func(), ta_func(ta))
+            print(f'{name:<12} {t_np * 1000:>10.3f} {t_ta * 1000:>10.3f} {t_ta / t_np:>8.1f} {t_np / num_bars * 1e6:>13.2f} {str(identical):>10}')
+        else:
+            print(f'{name:<12} {t_np * 1000:>10.3f} {"-":>10} {"-":>8} {t_np / num_bars * 1e6:>13.2f} {"-":>10}')
@@ -0,0 +1,107 @@
+import argparse
+import io
+import logging
+import os
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+import numpy as np
+
+from base import setup_logging
+from .suite import Stack
+
+# Benchmark of the logging cost per tick of the bots: the main cycles of a bot
+# on the scenario of the suite with the log levels and handlers below, the
+# cpu time of the bot thread per tick (time.thread_time, so the listener thread
+# writing the records of the queue is not counted). The output goes to a file.
+#   - warning        debug and info disabled, the cost of the disabled calls
+#   - info-stream    info written by a StreamHandler in the bot thread (basicConfig)
+#   - info-queue     info through the queue of setup_logging
+#   - debug-stream / debug-queue  the same with debug
+#   - json-queue     debug as JSON lines through the queue
+# and a micro benchmark of a disabled debug call with the order changes of a
+# sync (the list of 1000 changes) formatted eagerly (f-string) and lazily.
+#
+# usage: python -m benchmarks.bench_logging [--bot simple_dca|simple_tpsl] [--steps 300] [--repeat 3]
+
+CONFIGS = {
+    'warning':      { 'level': logging.WARNING, 'use_queue': False },
+    'info-stream':  { 'level': logging.INFO,    'use_queue': False },
+    'info-queue':   { 'level': logging.INFO,    'use_queue': True },
+    'debug-stream': { 'level': logging.DEBUG,   'use_queue': False },
+    'debug-queue':  { 'level': logging.DEBUG,   'use_queue': True },
+    'json-queue':   { 'level': logging.DEBUG,   'use_queue': True, 'json_format': True },
+}
+
+def bench_ticks(bot_name: str, config: dict, steps: int, warmup: int = 30) -> dict:
+
+    with tempfile.TemporaryDirectory() as tmp_dir, open(os.path.join(tmp_dir, 'bot.log'), 'w') as stream:
+        listener = setup_logging(stream=stream, **config)
+
+        stack = Stack()
+        bot = stack.bot(bot_name, 'ext_mm')
+        start_size = stream.tell()
+
+        samples = []
+        with redirect_stdout(io.StringIO()):
+            for i in range(warmup + steps):
+                stack.advance()
+                start = time.thread_time()
+                try:
+                    bot.main_cycle()
+                except Exception:
+                    pass
+                if i >= warmup:
+                    samples.append(time.thread_time() - start)
+
+        if listener is not None:
+            listener.stop()
+        size = stream.tell() - start_size
+
+    logging.getLogger().handlers.clear()
+
+    a = np.array(samples) * 1e6
+    return { 'mean_us': float(a.mean()), 'median_us': float(np.median(a)), 'log_bytes_per_tick': size / steps }
+
+def bench_disabled_debug(number: int = 2000) -> dict:
+
+    logger = logging.getLogger('benchmarks.bench_logging')
+    logger.setLevel(logging.INFO)
+    changes = [ { 'type': 'new', 'order': { 'id': str(i) } } for i in range(1000) ]
+    prefix = '(OrderStore._notify) symbol ETH/USD:USD:'
+
+    def eager():
+        logger.debug(f"{prefix} Order changes: {[ (c['type'], c['order']['id']) for c in changes ]}")
+
+    def lazy():
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('%s Order changes: %s', prefix, [ (c['type'], c['order']['id']) for c in changes ])
+
+    results = {}
+    for name, func in [ ('eager', eager), ('lazy', lazy) ]:
+        start = time.thread_time()
+        for _ in range(number):
+            func()
+        results[name] = (time.thread_time() - start) / number * 1e6
+
+    return results
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.bench_logging')
+    parser.add_argument('--bot', choices=[ 'simple_dca', 'simple_tpsl' ], default='simple_dca')
+    parser.add_argument('--steps', type=int, default=300, help='main cycles per run')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per config, the best is printed')
+    args = parser.parse_args()
+
+    print(f'{args.bot}: cpu time of the bot thread per tick, {args.steps} ticks')
+
+    for name, config in CONFIGS.items():
+        runs = [ bench_ticks(args.bot, config, args.steps) for _ in range(args.repeat) ]
+        best = min(runs, key=lambda r: r['mean_us'])
+        print(f"{name:14s} mean {best['mean_us']:8.1f} us  median {best['median_us']:8.1f} us  "
+              f"log {best['log_bytes_per_tick']:8.0f} bytes per tick")
+
+    d = bench_disabled_debug()
+    print(f"disabled debug of 1000 order changes: eager {d['eager']:8.1f} us  lazy {d['lazy']:8.3f} us per call")
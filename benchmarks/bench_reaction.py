@@ -0,0 +1,157 @@
+import argparse
+import logging
+import random
+import threading
+import time
+
+import numpy as np
+
+from botlib import BaseBot
+from botlib import TrailingStopEngine
+from botlib.events import ExchangeListener
+from botlib.events import PollingWatcher
+from exchange_adapters import SimulatedAdapter
+from signal_generators import ExtendedSignalGenerator
+
+# Benchmark of the reaction time of a bot to fills and price moves on the
+# SimulatedExchange, from the change on the exchange to the end of its handling:
+#  - tick:     the fixed tick main loop (a full cycle every ticks seconds)
+#  - polling:  the event loop with a PollingWatcher (interval in seconds)
+#  - push:     the event loop with an ExchangeListener (like a websocket feed)
+#  - engine:   the fixed tick main loop with a TrailingStopEngine following the
+#              pushed top of book in its own thread
+# The bot holds a long position with a trailing stop, the price makes a random
+# walk and every 10th step a resting buy order is filled
+#
+# For the event loops the reaction times per event type measured by the bot
+# itself (from the detection of the event) are printed too, for the engine
+# the reaction times of its top of book updates and exits
+#
+# usage: python -m benchmarks.bench_reaction [--steps 200] [--ticks 1.0]
+
+SYMBOL = 'ETH/USD:USD'
+
+class TrailingBot(BaseBot):
+
+    def __init__(self, exchange_adapter, ticks: float):
+
+        super().__init__(exchange_adapter, SYMBOL, ExtendedSignalGenerator(), ticks=ticks)
+        self.handled: list = []
+
+    def inposition_handler(self):
+        self.maintain_trail_sl(self._entryPrice * 1.002, 50)
+
+    def main_cycle(self) -> bool:
+        result = super().main_cycle()
+        self.handled.append(time.perf_counter())
+        return result
+
+    def fill_handler(self):
+        super().fill_handler()
+        self.handled.append(time.perf_counter())
+
+    def price_handler(self, ask: float, bid: float) -> bool:
+        result = super().price_handler(ask, bid)
+        self.handled.append(time.perf_counter())
+        return result
+
+class TimedEngine(TrailingStopEngine):
+
+    def on_price(self, ask: float, bid: float, created: float = None) -> bool:
+        result = super().on_price(ask, bid, created)
+        self._bot.handled.append(time.perf_counter())
+        return result
+
+def setup():
+
+    ea = SimulatedAdapter()
+    ea.exchange.set_price(SYMBOL, 1000.0)
+    ea.exchange.create_order(SYMBOL, 'market', 'buy', 10)
+
+    return ea
+
+# moves the price, every 10th step through a resting buy order - returns the change times
+def drive(ea, num_steps: int, delay: float) -> list:
+
+    changes = []
+    price = 1000.0
+
+    for step in range(num_steps):
+        time.sleep(delay * random.uniform(0.5, 1.5))
+
+        if step % 10 == 9:
+            ea.exchange.create_order(SYMBOL, 'limit', 'buy', 1, price - 1, { 'timeInForce': 'PostOnly' })
+            price -= 2
+        else:
+            price = round(price + random.uniform(-1, 1.2), 2)
+
+        changes.append(time.perf_counter())
+        ea.exchange.set_price(SYMBOL, price)
+
+    return changes
+
+# reaction time of each change: time to the first handling after it
+def reactions(changes: list, handled: list) -> np.ndarray:
+
+    handled = np.array(handled)
+    times = []
+    for c in changes:
+        after = handled[handled >= c]
+        if len(after) > 0:
+            times.append(after[0] - c)
+
+    return np.array(times)
+
+def run(mode: str, num_steps: int, ticks: float, delay: float) -> tuple[np.ndarray, dict]:
+
+    ea = setup()
+    bot = TrailingBot(ea, ticks)
+
+    engine = None
+    if mode == 'engine':
+        engine = TimedEngine(bot).start()
+
+    if mode in [ 'tick', 'engine' ]:
+        thread = threading.Thread(target=bot.main_loop, daemon=True)
+    else:
+        source = ExchangeListener(ea.exchange, SYMBOL) if mode == 'push' else PollingWatcher(ea, SYMBOL, interval=ticks)
+        thread = threading.Thread(target=bot.event_loop, args=([ source ],), daemon=True)
+
+    thread.start()
+    time.sleep(0.5)
+
+    changes = drive(ea, num_steps, delay)
+    time.sleep(ticks + 0.5)
+    bot.stop_event_loop()
+
+    if engine is not None:
+        engine.stop()
+        return reactions(changes, bot.handled), engine.reaction_stats()
+
+    return reactions(changes, bot.handled), bot.reaction_stats()
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.bench_reaction')
+    parser.add_argument('--steps', type=int, default=200, help='price changes per mode')
+    parser.add_argument('--ticks', type=float, default=1.0, help='ticks of the main loop and polling interval in seconds')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    random.seed(1)
+
+    num_steps = args.steps
+    ticks = args.ticks
+    delay = 0.02
+
+    print(f'{num_steps} price changes every ~{delay * 1000:.0f} ms, ticks / polling interval {ticks} s')
+
+    for mode in [ 'tick', 'polling', 'push', 'engine' ]:
+        [ t, stats ] = run(mode, num_steps, ticks, delay)
+        t = t * 1000
+        print(f'{mode:8s} reaction mean {t.mean():8.2f} ms  p50 {np.percentile(t, 50):8.2f} ms  '
+              f'p99 {np.percentile(t, 99):8.2f} ms  max {t.max():8.2f} ms')
+
+        # reaction times measured by the bot from the detection of the event
+        for type, s in stats.items():
+            print(f'         {type:8s} {s["count"]:5d} events  mean {s["mean"] * 1000:8.2f} ms  p99 {s["p99"] * 1000:8.2f} ms')
@@ -0,0 +1,94 @@
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from multiprocessing.connection import Client
+
+from signalbus import SignalPublisher
+from signalbus import SignalSubscriber
+
+# Benchmark of the signal bus: one publisher and a number of subscriber
+# processes, each of them like a bot with a RemoteSignalGenerator
+#  - publish to consume latency per subscriber (mean, p99, max)
+#  - one slow subscriber, which reads a message every 10 ms only, shows the
+#    conflation of pending signals instead of an unbounded queue
+#
+# usage: python -m benchmarks.bench_signalbus [--subscribers 10] [--messages 1000]
+
+AUTHKEY = b'bench'
+
+def consume(address: str, num_messages: int, delay: float, results):
+
+    subscriber = SignalSubscriber(address, topics=['bench'], authkey=AUTHKEY).start()
+    subscriber.wait_for('bench', num_messages, timeout=30)
+    results.put((delay, subscriber.received, subscriber.latency_stats()))
+    subscriber.close()
+
+# reads the socket directly and slowly, the publisher has to hold the messages back
+def consume_slowly(address: str, num_messages: int, delay: float, results):
+
+    conn = Client(address, family='AF_UNIX', authkey=AUTHKEY)
+    conn.send({ 'subscribe': ['bench'] })
+
+    received, latencies = 0, []
+    while True:
+        time.sleep(delay)
+        message = conn.recv()
+        received += 1
+        latencies.append(time.time() - message['published'])
+        if message['version'] >= num_messages:
+            break
+
+    latencies.sort()
+    results.put((delay, received, { 'mean': sum(latencies) / len(latencies), 
+                                    'p99': latencies[int(0.99 * (len(latencies) - 1))], 
+                                    'max': latencies[-1] }))
+    conn.close()
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.bench_signalbus')
+    parser.add_argument('--subscribers', type=int, default=10, help='subscriber processes, the last one is slow')
+    parser.add_argument('--messages', type=int, default=1000, help='signal versions published')
+    args = parser.parse_args()
+
+    num_subscribers = args.subscribers
+    num_messages = args.messages
+
+    address = os.path.join(tempfile.mkdtemp(), 'signalbus.sock')
+    publisher = SignalPublisher(address, authkey=AUTHKEY)
+    publisher.start()
+
+    results = multiprocessing.Queue()
+    delays = [ 0.0 ] * (num_subscribers - 1) + [ 0.01 ]
+    processes = [ multiprocessing.Process(target=consume_slowly if d > 0 else consume, args=(address, num_messages, d, results)) 
+                  for d in delays ]
+    for p in processes:
+        p.start()
+
+    while publisher.subscribers < num_subscribers:
+        time.sleep(0.01)
+
+    # each message is a new version of the signal, 1 ms apart
+    start = time.perf_counter()
+    for i in range(num_messages):
+        publisher.publish('bench', { 'buy': { 'li': 1000.0 + i, 'sl': 990.0, 'tp': 1010.0 } })
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+
+    collected = [ results.get(timeout=60) for p in processes ]
+    for p in processes:
+        p.join()
+
+    print(f'=== {num_messages} signal versions to {num_subscribers} subscribers in {elapsed:.2f} s ===')
+    print(f'{"subscriber":<12} {"received":>9} {"mean (ms)":>10} {"p99 (ms)":>10} {"max (ms)":>10}')
+    for delay, received, stats in sorted(collected, key=lambda r: r[0]):
+        name = 'slow' if delay > 0 else 'fast'
+        print(f'{name:<12} {received:>9} {stats["mean"] * 1000:>10.3f} {stats["p99"] * 1000:>10.3f} {stats["max"] * 1000:>10.3f}')
+
+    print('=== Publisher delivery per subscriber ===')
+    for s in publisher.stats():
+        print(s)
+
+    publisher.close()
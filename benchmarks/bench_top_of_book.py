@@ -0,0 +1,95 @@
+import argparse
+import json
+import logging
+import time
+
+import numpy as np
+
+from exchange_adapters import BitgetAdapter
+from exchange_adapters import PhemexAdapter
+from exchange_adapters import SimulatedAdapter
+from exchange_adapters import SimulatedExchange
+
+# Benchmark of the ways to get the top of book, latency and response size:
+#  - full:      fetch_order_book without limit (ask_bid before the top of book path)
+#  - depth:     fetch_order_book with the smallest depth of the exchange
+#  - ticker:    fetch_ticker bid and ask
+#  - ask_bids:  ask_bids of all symbols at once (fetch_bids_asks or fetch_tickers)
+#  - ask_bid:   the method chosen by the adapter
+# The public endpoints of phemex and bitget are used, no api keys needed, an
+# exchange which can not be reached is skipped. Response sizes are the bytes
+# of the http response, for the simulated adapter the size of the json result.
+#
+# usage: python -m benchmarks.bench_top_of_book [--rounds 20]
+
+EXCHANGES = {
+    'phemex': (lambda: PhemexAdapter({}, { 'type': 'swap', 'code': 'USD' }),
+               [ 'BTC/USD:BTC', 'ETH/USD:USD' ]),
+    'bitget': (lambda: BitgetAdapter({ 'apiKey': '', 'secret': '', 'password': '' }, { 'type': 'swap', 'code': 'USDT' }),
+               [ 'BTC/USDT:USDT', 'ETH/USDT:USDT' ]),
+    'simulated': (lambda: simulated(),
+                  [ 'BTC/USD:USD', 'ETH/USD:USD' ]),
+}
+
+def simulated() -> SimulatedAdapter:
+
+    ea = SimulatedAdapter(SimulatedExchange(markets={ 'BTC/USD:USD': { 'tick_size': 0.5 }, 'ETH/USD:USD': {} }))
+    ea.exchange.set_price('BTC/USD:USD', 20000.0)
+    ea.exchange.set_price('ETH/USD:USD', 1500.0)
+    return ea
+
+def response_size(ea, result) -> int:
+
+    response = getattr(ea._exchange, 'last_http_response', None)
+    if response is not None:
+        return len(response.encode())
+
+    return len(json.dumps(result, default=str).encode())
+
+def measure(ea, call, rounds: int) -> tuple:
+
+    times, sizes = [], []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = call()
+        times.append(time.perf_counter() - start)
+        sizes.append(response_size(ea, result))
+
+    return np.array(times) * 1000, np.array(sizes)
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.bench_top_of_book')
+    parser.add_argument('--rounds', type=int, default=20, help='requests per method')
+    rounds = parser.parse_args().rounds
+
+    logging.basicConfig(level=logging.WARNING)
+
+    for name, (factory, symbols) in EXCHANGES.items():
+
+        try:
+            ea = factory()
+        except Exception as e:
+            print(f'{name}: skipped - {type(e).__name__}: {e}')
+            continue
+
+        symbol = symbols[-1]
+        methods = {
+            'full': lambda: ea._exchange.fetch_order_book(symbol),
+            'depth': lambda: ea._exchange.fetch_order_book(symbol, limit=ea.top_of_book_limit),
+            'ticker': lambda: ea._exchange.fetch_ticker(symbol),
+            f'ask_bids({len(symbols)})': lambda: ea.ask_bids(symbols),
+            f'ask_bid ({ea.top_of_book_method})': lambda: ea.ask_bid(symbol),
+        }
+
+        print(f'{name} {symbol} (top of book limit {ea.top_of_book_limit}, {rounds} rounds)')
+
+        for method, call in methods.items():
+            try:
+                t, b = measure(ea, call, rounds)
+            except Exception as e:
+                print(f'  {method:16s} failed - {type(e).__name__}: {e}')
+                continue
+
+            print(f'  {method:16s} latency mean {t.mean():8.2f} ms  p50 {np.percentile(t, 50):8.2f} ms  '
+                  f'p99 {np.percentile(t, 99):8.2f} ms  response {b.mean():9.0f} bytes')
@@ -0,0 +1,320 @@
+import argparse
+import fnmatch
+import io
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+
+from base import BaseClass
+from exchange_adapters import SimulatedAdapter
+from order_models import DCAOrderModel
+from order_models import FixedTPSLModel
+from regression import synthetic_scenario
+from regression.golden_traces import BOTS
+from regression.golden_traces import GENERATORS
+from regression.golden_traces import offline_feeds
+from signal_generators import IndicatorRegistry
+
+# Benchmark suite of the bot stack on the SimulatedExchange with a VirtualClock
+# and the seeded range scenario of the regression suite, so runs are repeatable:
+#  micro:
+#   - model.*            DCAOrderModel.build_order_model and the getters of the
+#                        DCA and the fixed tp/sl model
+#   - <generator>.*      prepare_df (on the raw feeds) and signal of each generator
+#   - bot.*              refresh_active_orders with 1000 open orders, parse_signal
+#  macro:
+#   - tick.<bot>.<generator>  latency of a full main_cycle per minute of the scenario
+#   - scaling.<n>             n SimpleTPSLBots in one process on one exchange,
+#                             time per bot tick (and ticks per second)
+# Times are in microseconds (median, min, p95 and mean of the samples). The
+# results are written as JSON, with --baseline the medians are compared to a
+# previous result file and a benchmark slower by more than the threshold is
+# reported as regression (exit code 1).
+#
+# usage: python -m benchmarks.suite [--micro] [--macro] [--only pattern] [--output path]
+#                                   [--baseline path] [--threshold 0.25] [--bots 1,4,16] [--steps 200]
+
+SCENARIO = 'range'
+SEED = 3
+
+def stats(samples: list) -> dict:
+
+    a = np.array(samples) * 1e6
+    return { 'unit': 'us', 'samples': len(a), 'median': float(np.median(a)), 'min': float(a.min()),
+             'p95': float(np.percentile(a, 95)), 'mean': float(a.mean()) }
+
+# samples of the mean time of number calls, setup (not timed) before each sample
+def measure(func, number: int = 50, repeat: int = 9, setup=None) -> dict:
+
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+
+    return stats(samples)
+
+class Stack(BaseClass):
+
+    # a SimulatedExchange with the history of the scenario, an adapter and
+    # bots on it, stdout of the bots (model prints) is dropped
+
+    def __init__(self, symbols: list = None, days: int = 1):
+
+        self.scenario = synthetic_scenario(SCENARIO, SCENARIO, seed=SEED, days=days)
+        self.symbols = symbols or [ self.scenario.symbol ]
+        self.exchange = self.scenario.exchange(self.symbols)
+
+        self.ea = SimulatedAdapter(self.exchange)
+        self.data_dir = tempfile.mkdtemp()
+        self.prices = [ p for p, v in self.scenario.steps() ]
+        self.volumes = [ v for p, v in self.scenario.steps() ]
+        self.step = 0
+
+        self.advance()
+
+    def bot(self, bot_name: str, generator_name: str, symbol: str = None):
+
+        symbol = symbol or self.symbols[0]
+
+        sg = GENERATORS[generator_name](symbol)
+        sg.indicator_registry = IndicatorRegistry()
+        offline_feeds(sg, self.ea, symbol)
+
+        with redirect_stdout(io.StringIO()):
+            bot = BOTS[bot_name](self.ea, symbol, sg, self.data_dir)
+            bot.preparation_handler()
+
+        return bot
+
+    # one minute of the scenario
+    def advance(self):
+
+        self.exchange.clock.advance(self.scenario.step)
+        for symbol in self.symbols:
+            self.exchange.set_price(symbol, self.prices[self.step], volume=self.volumes[self.step])
+        self.step = (self.step + 1) % len(self.prices)
+
+# --- micro benchmarks ---
+
+def bench_models(stack: Stack) -> dict:
+
+    results = {}
+    symbol = stack.symbols[0]
+    price = stack.prices[0]
+
+    dca = DCAOrderModel(stack.ea, symbol, 'long', num_trades=3, price_dev=0.025, save_scale=2.0)
+    dca.file_path = stack.data_dir
+    build = lambda: dca.build_order_model(asset_price=price, risk_per_trade=10000.0, crv=1.0)
+
+    results['model.dca.build_order_model'] = measure(build, number=20)
+
+    size = float(dca.model_df['pos_size'].iloc[1])
+    results['model.dca.get_sl_price_size'] = measure(lambda: dca.get_sl_price_size())
+    results['model.dca.get_tp_price_size'] = measure(lambda: dca.get_tp_price_size(size))
+    results['model.dca.get_trsl_price_value'] = measure(lambda: dca.get_trsl_price_value(size))
+
+    tpsl = FixedTPSLModel(stack.ea, symbol, 'long', tp_perc=0.01, sl_perc=0.0066, tp_trigger_perc=0.005, tp_trail_perc=0.0045)
+    results['model.tpsl.get_order_size'] = measure(lambda: tpsl.get_order_size(price, 10000.0))
+    results['model.tpsl.get_sl_price_size'] = measure(lambda: tpsl.get_sl_price_size(10.0, price))
+    results['model.tpsl.get_tp_price_size'] = measure(lambda: tpsl.get_tp_price_size(10.0, price))
+    results['model.tpsl.get_trsl_price_value'] = measure(lambda: tpsl.get_trsl_price_value(10.0, price))
+
+    return results
+
+def bench_generator(stack: Stack, generator_name: str) -> dict:
+
+    bot = stack.bot('simple_tpsl', generator_name)
+    sg = bot.signal_generator()
+
+    # the raw feeds as loaded, prepare_df modifies them
+    sg.prepare_df = lambda: None
+    bot.load_data_feeds()
+    del sg.prepare_df
+    raw = { feed: f['df'].copy() if f.get('df') is not None else None for feed, f in sg.feeds.items() }
+
+    def setup():
+        for feed, df in raw.items():
+            sg.feeds[feed]['df'] = df.copy() if df is not None else None
+        sg.indicator_registry = IndicatorRegistry()
+
+    results = { f'{generator_name}.prepare_df': measure(sg.prepare_df, number=1, repeat=15, setup=setup) }
+
+    setup()
+    sg.prepare_df()
+    bid = stack.prices[stack.step]
+    ask = bid + 0.01
+
+    with redirect_stdout(io.StringIO()):
+        results[f'{generator_name}.signal'] = measure(lambda: sg.signal(ask, bid), number=20)
+
+    return results
+
+def bench_bot(stack: Stack, open_orders: int = 1000) -> dict:
+
+    bot = stack.bot('simple_tpsl', 'ext_mm')
+    symbol = stack.symbols[0]
+    bid = stack.prices[stack.step - 1]
+
+    for i in range(open_orders):
+        side = 'buy' if i % 2 == 0 else 'sell'
+        price = round(bid - 1.0 - i * 0.01, 2) if side == 'buy' else round(bid + 1.0 + i * 0.01, 2)
+        stack.exchange.create_order(symbol, 'limit', side, 1.0, price, { 'timeInForce': 'PostOnly' })
+
+    bot.refresh_active_orders()
+
+    signal = { 'buy': { 'li': bid * 0.999, 'sl': bid * 0.99, 'tp': bid * 1.01 } }
+
+    return { f'bot.refresh_active_orders.{open_orders}': measure(bot.refresh_active_orders, number=5),
+             'bot.parse_signal': measure(lambda: bot.parse_signal(signal, 'buy')) }
+
+# --- macro benchmarks ---
+
+def bench_tick(stack: Stack, bot_name: str, generator_name: str, steps: int, warmup: int = 30) -> dict:
+
+    bot = stack.bot(bot_name, generator_name)
+    samples = []
+
+    with redirect_stdout(io.StringIO()):
+        for i in range(warmup + steps):
+            stack.advance()
+            start = time.perf_counter()
+            try:
+                bot.main_cycle()
+            except Exception:
+                pass
+            if i >= warmup:
+                samples.append(time.perf_counter() - start)
+
+    return { f'tick.{bot_name}.{generator_name}': stats(samples) }
+
+def bench_scaling(num_bots: int, steps: int) -> dict:
+
+    stack = Stack(symbols=[ f'S{i}/USD:USD' for i in range(num_bots) ])
+    bots = [ stack.bot('simple_tpsl', 'ext_mm', symbol) for symbol in stack.symbols ]
+    samples = []
+
+    with redirect_stdout(io.StringIO()):
+        for _ in range(steps):
+            stack.advance()
+            start = time.perf_counter()
+            for bot in bots:
+                try:
+                    bot.main_cycle()
+                except Exception:
+                    pass
+            samples.append((time.perf_counter() - start) / num_bots)
+
+    result = stats(samples)
+    result['ticks_per_s'] = 1e6 / result['mean']
+
+    return { f'scaling.{num_bots}': result }
+
+# --- results ---
+
+def meta() -> dict:
+
+    try:
+        commit = subprocess.run([ 'git', 'rev-parse', '--short', 'HEAD' ], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    return { 'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': commit, 'python': platform.python_version(),
+             'platform': platform.platform(), 'numpy': np.__version__, 'pandas': pd.__version__ }
+
+# benchmarks slower than in the baseline by more than threshold (relative, on the medians)
+def regressions(results: dict, baseline: dict, threshold: float) -> list:
+
+    slower = []
+    for name, result in results.items():
+        if name in baseline and baseline[name]['median'] > 0:
+            ratio = result['median'] / baseline[name]['median']
+            if ratio > 1 + threshold:
+                slower.append((name, ratio))
+
+    return slower
+
+def run(args) -> dict:
+
+    macro = args.macro or not args.micro
+    micro = args.micro or not args.macro
+    selected = lambda name: args.only is None or fnmatch.fnmatch(name, args.only)
+
+    # the names of the benchmarks of each job, a job runs if one of them is selected
+    jobs = []
+    if micro:
+        jobs.append(([ 'model.dca.build_order_model', 'model.dca.get_sl_price_size', 'model.dca.get_tp_price_size',
+                       'model.dca.get_trsl_price_value', 'model.tpsl.get_order_size', 'model.tpsl.get_sl_price_size',
+                       'model.tpsl.get_tp_price_size', 'model.tpsl.get_trsl_price_value' ],
+                     lambda: bench_models(Stack())))
+        for generator_name in GENERATORS:
+            jobs.append(([ f'{generator_name}.prepare_df', f'{generator_name}.signal' ],
+                         lambda g=generator_name: bench_generator(Stack(), g)))
+        jobs.append(([ 'bot.refresh_active_orders.1000', 'bot.parse_signal' ], lambda: bench_bot(Stack())))
+    if macro:
+        for bot_name in BOTS:
+            for generator_name in GENERATORS:
+                jobs.append(([ f'tick.{bot_name}.{generator_name}' ],
+                             lambda b=bot_name, g=generator_name: bench_tick(Stack(), b, g, args.steps)))
+        for num_bots in [ int(n) for n in args.bots.split(',') ]:
+            jobs.append(([ f'scaling.{num_bots}' ], lambda n=num_bots: bench_scaling(n, args.steps)))
+
+    results = {}
+    for names, job in jobs:
+        if not any(selected(name) for name in names):
+            continue
+
+        for name, result in job().items():
+            if selected(name):
+                results[name] = result
+                extra = f"  {result['ticks_per_s']:10.1f} ticks/s" if 'ticks_per_s' in result else ''
+                print(f"{name:45s} median {result['median']:12.1f} us  p95 {result['p95']:12.1f} us{extra}", flush=True)
+
+    return results
+
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.CRITICAL)
+    warnings.filterwarnings('ignore', category=RuntimeWarning)
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.suite')
+    parser.add_argument('--micro', action='store_true', help='micro benchmarks only')
+    parser.add_argument('--macro', action='store_true', help='macro benchmarks only')
+    parser.add_argument('--only', help='fnmatch pattern of the benchmark names')
+    parser.add_argument('--output', default='bench_results.json', help='result file (JSON)')
+    parser.add_argument('--baseline', help='result file of a previous run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.25, help='relative slowdown of the median reported as regression')
+    parser.add_argument('--bots', default='1,4,16', help='numbers of bots per process of the scaling benchmark')
+    parser.add_argument('--steps', type=int, default=200, help='scenario minutes per macro benchmark')
+    args = parser.parse_args()
+
+    results = run(args)
+
+    with open(args.output, 'w') as f:
+        json.dump({ 'meta': meta(), 'threshold': args.threshold, 'results': results }, f, indent=1)
+    print(f'results written to {args.output}')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        slower = regressions(results, baseline['results'], args.threshold)
+        for name, ratio in slower:
+            print(f'REGRESSION {name}: median x{ratio:.2f} of {args.baseline}')
+        print(f"{len(slower)} regressions (threshold {args.threshold:.0%}) against {baseline['meta'].get('commit')} {baseline['meta'].get('time')}")
+
+        sys.exit(1 if slower else 0)
@@ -1,3 +1,7 @@
 from .basebot import BaseBot
 from .simple_tpsl_bot import SimpleTPSLBot
-from .simple_dca_bot import SimpleDCABot
\ No newline at end of file
+from .simple_dca_bot import SimpleDCABot
+from .tick_schedule import TickSchedule
+from .trailing_stop import TrailingStopEngine
+from .state_store import StateStore
+from .ledger import TradeLedger
\ No newline at end of file
@@ -1,26 +1,79 @@
 import logging
+import math
+import queue
+import threading
 import time
+from collections import deque
+
+import numpy as np
 
 from base import BaseClass
+from base import Clock
+from base import Lazy
+from datafeeds import FeedLoader
+from datafeeds import FeedScheduler
+from datafeeds import FeedWorker
 from exchange_adapters import ExchangeAdapter
 from signal_generators import ExtendedSignalGenerator
+from .events import PollingWatcher
+from .events import EVENT_TYPES
+from .events import FILL
+from .events import POSITION
+from .events import PRICE
+from .events import ORDER
+from .order_store import OrderStore
+from .tick_schedule import TickSchedule
+from .trailing_stop import trail_step
+from .state_store import StateStore
+from .ledger import TradeLedger
+from .ledger import is_trade
+from .tick_schedule import FLAT
+from .tick_schedule import ORDERS
+from .tick_schedule import IN_POSITION
+
+logger = logging.getLogger(__name__)
 
 class BaseBot(BaseClass):
 
     def __init__(self, exchange_adapter: ExchangeAdapter, symbol: str, 
                  signal_generator: ExtendedSignalGenerator, 
-                 ticks: int = 3, refresh_timeout: int = 120):
+                 ticks: int = 3, refresh_timeout: int = 120,
+                 feed_scheduler: FeedScheduler = None,
+                 background_feeds: bool = False, feed_budget: float = None, loop_budget: float = None,
+                 tick_schedule: TickSchedule = None, state_store: StateStore = None, ledger: TradeLedger = None):
 
         # ticks and refresh timeout in seconds
         self._ticks: int = ticks
         self._refresh_timeout: int = int(refresh_timeout * 1000) 
+
+        # with a tick schedule the interval between the main loop cycles adapts
+        # to the state of the bot and the distance of the price to its critical
+        # levels instead of the fixed ticks
+        self._tick_schedule: TickSchedule = tick_schedule
+        self._last_tick: float = None
         
         # _ea means for Exchange Adapter
         self._ea: ExchangeAdapter = exchange_adapter
+
+        # the bot runs on the time of the exchange adapter (a virtual clock in simulations)
+        self._clock: Clock = exchange_adapter.clock
         
         # _sg means Signal Generator
         self._sg: ExtendedSignalGenerator = signal_generator
         self._sg.verbose = False
+        self._sg.clock = self._clock
+
+        # downloads the data feeds just after each bar close
+        self._feed_loader: FeedLoader = FeedLoader(exchange_adapter, symbol, signal_generator, feed_scheduler)
+
+        # with background_feeds the feeds are loaded and prepared by a worker thread
+        # and the signals are computed on its latest snapshot of the generator.
+        # feed_budget and loop_budget are the latency budgets in seconds of a load
+        # cycle and of a main loop cycle (without the tick)
+        self._feed_worker: FeedWorker = FeedWorker(self._feed_loader, budget=feed_budget) if background_feeds else None
+        self._loop_budget: float = loop_budget
+        self._last_loop_duration: float = None
+        self._loop_overruns: int = 0
 
         # symbol to trade
         self._symbol: str = symbol
@@ -38,13 +91,47 @@ class BaseBot(BaseClass):
         self._last_sl_order_id: str = None
         self._last_trail_sl_price: float = None
         self._trailing_sl_triggered: bool = False
+        self._trail_trigger_price: float = None
+        self._trail_value: float = None
         self._exiting: bool = False
+        self._next_refresh: int = 0
+
+        # the trailing stop engine (see TrailingStopEngine) maintaining the
+        # trailing stop on every top of book, the order handling of the main
+        # cycle and of the engine exits are serialized by the lock
+        self._trailing_engine = None
+        self._lock = threading.RLock()
+
+        # prefixes of the log messages per method, formatted once (see log_prefix)
+        self._log_prefixes: dict = {}
+
+        # snapshots of the runtime state (see get_state) for a restart
+        self._state_store: StateStore = state_store
+
+        # local ledger of the own fills, the pnl of the trades and the stats
+        # per strategy (the signal generator) without requests per trade
+        self._ledger: TradeLedger = ledger
+
+        # event driven main loop: queue, stop flag and reaction times per event type
+        self._events: queue.Queue = queue.Queue()
+        self._stop_event_loop = threading.Event()
+        self._reaction_times: dict = { t: deque(maxlen=1000) for t in EVENT_TYPES }
         
-        # open orders by price and id dicts
-        self._open_limit_orders_by_price = { 'sell': {}, 'buy': {} }
-        self._open_limit_orders_by_id = { 'sell': {}, 'buy': {} }
-        self._open_stop_orders_by_price = { 'sell': {}, 'buy': {} }
-        self._open_stop_orders_by_id = { 'sell': {}, 'buy': {} }
+        # open orders by price level and id, kept up to date by the order store,
+        # the price levels are counted in ticks of the market
+        self._orders: OrderStore = OrderStore(symbol, self._ea.get_tick_size(symbol))
+        self._open_limit_orders_by_price = self._orders.limit_by_price
+        self._open_limit_orders_by_id = self._orders.limit_by_id
+        self._open_stop_orders_by_price = self._orders.stop_by_price
+        self._open_stop_orders_by_id = self._orders.stop_by_id
+
+        # take profit and stop loss orders amended in one request instead of
+        # cancelled and created: round trips saved in the current trade and
+        # in the closed trades
+        self._amends: int = 0
+        self._amend_fallbacks: int = 0
+        self._round_trips_saved: int = 0
+        self._round_trips_saved_per_trade: deque = deque(maxlen=1000)
 
     @property
     def ticks(self) -> int:
@@ -54,6 +141,60 @@ class BaseBot(BaseClass):
     def ticks(self, value: int):
         self._ticks = value
 
+    @property
+    def tick_schedule(self) -> TickSchedule:
+        return self._tick_schedule
+
+    @tick_schedule.setter
+    def tick_schedule(self, value: TickSchedule):
+        self._tick_schedule = value
+
+    @property
+    def last_tick(self) -> float:
+        return self._last_tick
+
+    @property
+    def trailing_engine(self):
+        return self._trailing_engine
+
+    @trailing_engine.setter
+    def trailing_engine(self, value):
+        self._trailing_engine = value
+
+    @property
+    def lock(self) -> threading.RLock:
+        return self._lock
+
+    # the prefix of the log messages of a method, the class and symbol don't
+    # change, so it is formatted on the first call only instead of every tick
+    def log_prefix(self, method: str) -> str:
+
+        prefix = self._log_prefixes.get(method)
+        if prefix is None:
+            prefix = self._log_prefixes[method] = f"({self.class_name()}.{method}) symbol {self.symbol}:"
+        return prefix
+
+    @property
+    def state_store(self) -> StateStore:
+        return self._state_store
+
+    @state_store.setter
+    def state_store(self, value: StateStore):
+        self._state_store = value
+
+    @property
+    def ledger(self) -> TradeLedger:
+        return self._ledger
+
+    @ledger.setter
+    def ledger(self, value: TradeLedger):
+        self._ledger = value
+
+    # the strategy of the trades in the ledger
+    @property
+    def strategy(self) -> str:
+        return self._sg.class_name()
+
     @property
     def refresh_timeout(self) -> int:
         return self._refresh_timeout
@@ -62,6 +203,34 @@ class BaseBot(BaseClass):
     def refresh_timeout(self, value: int):
         self._refresh_timeout = int(value * 1000)
 
+    @property
+    def feed_scheduler(self) -> FeedScheduler:
+        return self._feed_loader.feed_scheduler
+
+    @feed_scheduler.setter
+    def feed_scheduler(self, value: FeedScheduler):
+        self._feed_loader.feed_scheduler = value
+
+    @property
+    def feed_worker(self) -> FeedWorker:
+        return self._feed_worker
+
+    @property
+    def loop_budget(self) -> float:
+        return self._loop_budget
+
+    @loop_budget.setter
+    def loop_budget(self, value: float):
+        self._loop_budget = value
+
+    @property
+    def last_loop_duration(self) -> float:
+        return self._last_loop_duration
+
+    @property
+    def loop_overruns(self) -> int:
+        return self._loop_overruns
+
     @property
     def symbol(self) -> str:
         return self._symbol
@@ -69,6 +238,7 @@ class BaseBot(BaseClass):
     @symbol.setter
     def symbol(self, value):
         self._symbol = value
+        self._log_prefixes = {}
 
     @property
     def last_tp_order_id(self) -> str:
@@ -97,73 +267,183 @@ class BaseBot(BaseClass):
     # TODO- implement all other setters and getters
 
     def tick(self):
-        time.sleep(self.ticks)
+        self._clock.sleep(self.next_tick())
+
+    # seconds until the next main loop cycle: ticks or from the tick schedule
+    def next_tick(self) -> float:
+
+        if self._tick_schedule is None:
+            self._last_tick = self.ticks
+            return self._last_tick
+
+        state = self.tick_state()
+        levels = self.critical_levels() if state != FLAT else []
+        until_refresh = (self._next_refresh - self._clock.ms()) / 1000
+
+        price = None
+        if len(levels) > 0:
+            # the top of book seen in the cycle, a request only if it is older
+            # than the longest interval of the state
+            top = self._ea.last_ask_bid(self.symbol, max_age=self._tick_schedule.intervals[state][1])
+            [ ask, bid ] = top if top is not None else self._ea.ask_bid(self.symbol)
+            price = (ask + bid) / 2
+
+        self._last_tick = self._tick_schedule.interval(state, price, levels, until_refresh)
+        return self._last_tick
+
+    def tick_state(self) -> str:
+
+        if self._open_position_bool:
+            return IN_POSITION
+
+        return ORDERS if len(self._orders) > 0 else FLAT
+
+    # prices the bot has to react to quickly: the open limit orders (entries,
+    # take profits, dca orders), the stop orders and the trailing stop trigger
+    # or, once triggered, the trailing stop price
+    def critical_levels(self) -> list:
+
+        levels = []
+        for side in [ 'buy', 'sell' ]:
+            levels += [ o.get('price') for o in self._orders.limit_orders(side) ]
+            levels += [ o.get('stopPrice') for o in self._orders.stop_orders(side) ]
+
+        if self._open_position_bool and self._trail_trigger_price is not None:
+            levels.append(self._last_trail_sl_price if self._trailing_sl_triggered else self._trail_trigger_price)
+
+        return [ level for level in levels if level ]
 
     
     # All event handlers:
     
     def preparation_handler(self):
 
-        logging.debug(f'({self.class_name()}.preparation_handler) symbol {self.symbol}: Prepare to run the main loop')
+        logger.debug('%s Prepare to run the main loop', self.log_prefix('preparation_handler'))
         
     def restore_handler(self):
         
-        logging.debug(f'({self.class_name()}.restore_handler) symbol {self.symbol}: Restoring state after restart of the bot')
+        logger.debug('%s Restoring state after restart of the bot', self.log_prefix('restore_handler'))
 
     def housekeeping_handler(self):
-        log_prefix = f"({self.class_name()}.housekeeping) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('housekeeping')
         
-        logging.info(f'{log_prefix} I am not in a position - cleaning up previous orders, files or dataframes')
+        logger.info('%s I am not in a position - cleaning up previous orders, files or dataframes', log_prefix)
         
         if self.last_sl_order_id is not None:
 
             for dir in ['sell', 'buy']:
                 if self.last_sl_order_id in self._open_stop_orders_by_id[dir]:
-                    logging.info(f'{log_prefix} Cancel current SL order: {self.last_sl_order_id}')
+                    logger.info('%s Cancel current SL order: %s', log_prefix, self.last_sl_order_id)
                     try:
                         self._ea.cancel_order(self.last_sl_order_id, self.symbol)
                     except Exception as e:
-                        logging.exception(f'{log_prefix} WARN: Could not cancel existing SL order: {self.last_sl_order_id}')
+                        logger.exception('%s WARN: Could not cancel existing SL order: %s', log_prefix, self.last_sl_order_id)
                     else:
-                        logging.info(f'{log_prefix} Success: Canceled SL order: {self.last_sl_order_id}')
-                        del(self._open_stop_orders_by_id[dir][self.last_sl_order_id])
+                        logger.info('%s Success: Canceled SL order: %s', log_prefix, self.last_sl_order_id)
+                        self._orders.remove(self.last_sl_order_id)
                         self.last_sl_order_id = None
     
         if self.last_tp_order_id is not None:
 
             for dir in ['sell', 'buy']:
                 if self.last_tp_order_id in self._open_limit_orders_by_id[dir]:
-                    logging.info(f'{log_prefix} Cancel current TP order: {self.last_tp_order_id}')
+                    logger.info('%s Cancel current TP order: %s', log_prefix, self.last_tp_order_id)
                     try:
                         self._ea.cancel_order(self.last_tp_order_id, self.symbol)
                     except Exception as e:
-                        logging.exception(f'{log_prefix} WARN: Could not cancel existing TP order: {self.last_tp_order_id}')
+                        logger.exception('%s WARN: Could not cancel existing TP order: %s', log_prefix, self.last_tp_order_id)
                     else:
-                        logging.info(f'{log_prefix} Success: Canceled TP order: {self.last_tp_order_id}')                           
-                        del(self._open_limit_orders_by_id[dir][self.last_tp_order_id])
+                        logger.info('%s Success: Canceled TP order: %s', log_prefix, self.last_tp_order_id)                           
+                        self._orders.remove(self.last_tp_order_id)
                         self.last_tp_order_id = None
 
     def enter_position_handler(self):
 
-        logging.debug(f'({self.class_name()}.enter_position_handler) symbol {self.symbol}: I am not in a position - waiting for entry signals and new order checks!')
+        logger.debug('%s I am not in a position - waiting for entry signals and new order checks!', self.log_prefix('enter_position_handler'))
 
     def inposition_handler(self):
         
-        logging.debug(f'({self.class_name()}.inposition_handler) symbol {self.symbol}: I am in a position, current_size: {self._current_size}, long: {self._current_long}, entryPrice: {self._entryPrice}, leverage {self._position_leverage}')
+        logger.debug('%s I am in a position, current_size: %s, long: %s, entryPrice: %s, leverage %s', self.log_prefix('inposition_handler'),
+                     self._current_size, self._current_long, self._entryPrice, self._position_leverage)
         
     def exit_position_handler(self):
         
-        logging.debug(f'({self.class_name()}.exitposition_handler) symbol {self.symbol}: Exit position handler, current_size: {self._current_size}, long: {self._current_long}, entryPrice: {self._entryPrice}, leverage {self._position_leverage}')
+        logger.debug('%s Exit position handler, current_size: %s, long: %s, entryPrice: %s, leverage %s', self.log_prefix('exitposition_handler'),
+                     self._current_size, self._current_long, self._entryPrice, self._position_leverage)
 
 
     def finishtrade_handler(self):
-        log_prefix = f"({self.class_name()}.finishtrade_handler) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('finishtrade_handler')
+
+        logger.info('%s: Finish trade handler, current_size: %s, long: %s, entryPrice: %s, leverage %s', log_prefix, self._current_size, self._current_long, self._entryPrice, self._position_leverage)
+
+        # the pnl of the trade from the fills of the ledger, one request for
+        # the fills since the last sync instead of fetching the closing orders
+        if self._ledger is not None:
+            self.sync_ledger()
+            trade = self._ledger.last_trade(self._ea.id, self.symbol)
+            if trade is not None:
+                logger.info('%s: %s of last trade %s fees %s. Cumulative net PNL: %s', log_prefix,
+                            'Profit' if trade['pnl'] - trade['fees'] > 0 else 'Loss', trade['pnl'], trade['fees'], self._cum_pnl)
+
+    # the new own fills into the ledger - returns the trades they closed
+    def sync_ledger(self) -> list:
+        log_prefix = self.log_prefix('sync_ledger')
 
-        logging.info(f'{log_prefix}: Finish trade handler, current_size: {self._current_size}, long: {self._current_long}, entryPrice: {self._entryPrice}, leverage {self._position_leverage}')
+        if self._ledger is None:
+            return []
+
+        try:
+            trades = self._ledger.sync(self._ea, self.symbol, strategy=self.strategy)
+        except Exception as e:
+            logger.warning('%s WARN: Could not sync the ledger ... try next time: %s', log_prefix, e)
+            return []
+
+        self._cum_pnl = self._ledger.realized(self._ea.id, self.symbol)['net']
+        return trades
+
+    # a fill of a stream (ccxt trade structure) into the ledger, without a
+    # request. Fills without the trade id of the exchange and the fill price
+    # (e.g. derived from order updates) are left to the next sync_ledger,
+    # they would be recorded a second time by it
+    def ledger_fill(self, fill: dict) -> list:
+        log_prefix = self.log_prefix('ledger_fill')
+
+        if self._ledger is None or not is_trade(fill):
+            return []
+
+        try:
+            trades = self._ledger.ingest(self._ea.id, self.symbol, [ fill ], strategy=self.strategy,
+                                         contract_size=self._ea.get_contract_size(self.symbol))
+        except Exception as e:
+            logger.warning('%s WARN: Could not add the fill to the ledger ... left to the next sync: %s', log_prefix, e)
+            return []
+
+        self._cum_pnl = self._ledger.realized(self._ea.id, self.symbol)['net']
+        return trades
+
+    # realized (net of fees) and unrealized pnl of the symbol and the stats of
+    # the strategy from the ledger, the price of the unrealized pnl is the
+    # last ask / bid of the adapter - no request to the exchange
+    def pnl_report(self) -> dict:
+
+        if self._ledger is None:
+            return {}
+
+        unrealized = None
+        top = self._ea.last_ask_bid(self.symbol)
+        position = self._ledger.position(self._ea.id, self.symbol)
+        if top is not None and position is not None:
+            unrealized = self._ledger.unrealized(self._ea.id, self.symbol, top[1] if position['size'] > 0 else top[0])
+
+        return { 'realized': self._ledger.realized(self._ea.id, self.symbol), 'unrealized': unrealized,
+                 'stats': self._ledger.stats(self.strategy).get(self.strategy) }
 
     def refresh_open_position(self):
-        log_prefix = f"({self.class_name()}.refresh_open_position) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('refresh_open_position')
         
+        was_open = self._open_position_bool
+
         try:
             
             [ self._position, 
@@ -174,67 +454,180 @@ class BaseBot(BaseClass):
              self._position_leverage ] = self._ea.fetch_open_positions(self.symbol)
             
         except:
-            logging.warning(f'{log_prefix} WARN: Could not fetch open positions ... try next time')
+            logger.warning('%s WARN: Could not fetch open positions ... try next time', log_prefix)
+
+        else:
+            # the trade is closed
+            if was_open == True and self._open_position_bool == False:
+                self._round_trips_saved_per_trade.append(self._round_trips_saved)
+                self._round_trips_saved = 0
             
     
+    # the runtime state of the bot for a snapshot, child classes add their
+    # own state (models, order ids) to it
+    def get_state(self) -> dict:
+
+        return { 'symbol': self.symbol,
+                 'cum_pnl': self._cum_pnl,
+                 'last_tp_order_id': self._last_tp_order_id,
+                 'last_sl_order_id': self._last_sl_order_id,
+                 'trail': { 'trigger_price': self._trail_trigger_price, 'value': self._trail_value,
+                            'price': self._last_trail_sl_price, 'triggered': self._trailing_sl_triggered },
+                 'exiting': self._exiting,
+                 'next_refresh': self._next_refresh,
+                 'last_position': { 'open': self._last_open_position_bool, 'long': self._last_current_long,
+                                    'size': self._last_position_size },
+                 'feeds': { feed: self._sg.feeds[feed].get('watermark') for feed in self._sg.feeds },
+                 'amends': { 'amends': self._amends, 'fallbacks': self._amend_fallbacks,
+                             'round_trips_saved': self._round_trips_saved } }
+
+    def set_state(self, state: dict):
+
+        # the ledger outlives the snapshots
+        self._cum_pnl = state.get('cum_pnl', 0) if self._ledger is None else self._ledger.realized(self._ea.id, self.symbol)['net']
+        self._last_tp_order_id = state.get('last_tp_order_id')
+        self._last_sl_order_id = state.get('last_sl_order_id')
+
+        trail = state.get('trail', {})
+        self._trail_trigger_price = trail.get('trigger_price')
+        self._trail_value = trail.get('value')
+        self._last_trail_sl_price = trail.get('price')
+        self._trailing_sl_triggered = trail.get('triggered', False)
+
+        self._exiting = state.get('exiting', False)
+        self._next_refresh = state.get('next_refresh', 0)
+
+        last_position = state.get('last_position', {})
+        self._last_open_position_bool = last_position.get('open', False)
+        self._last_current_long = last_position.get('long')
+        self._last_position_size = last_position.get('size', 0)
+
+        for feed, watermark in state.get('feeds', {}).items():
+            if feed in self._sg.feeds and self._sg.feeds[feed].get('watermark') is None:
+                self._sg.feeds[feed]['watermark'] = watermark
+
+        amends = state.get('amends', {})
+        self._amends = amends.get('amends', 0)
+        self._amend_fallbacks = amends.get('fallbacks', 0)
+        self._round_trips_saved = amends.get('round_trips_saved', 0)
+
+    # snapshot of the state if the state store is due (or with force)
+    def checkpoint(self, force: bool = False) -> bool:
+
+        if self._state_store is None:
+            return False
+
+        return self._state_store.save(self.get_state(), force=force)
+
+    # resume from the snapshot of the state store and reconcile it with one
+    # fetch of the open orders and one of the position - returns True if a
+    # snapshot was restored
+    def restore_state(self) -> bool:
+        log_prefix = self.log_prefix('restore_state')
+
+        if self._state_store is None:
+            return False
+
+        state = self._state_store.load()
+        if state is None or state.get('symbol') != self.symbol:
+            return False
+
+        self.set_state(state)
+
+        self.refresh_active_orders()
+        self.refresh_open_position()
+        self.reconcile_state()
+
+        logger.info('%s Resumed from the snapshot: position open %s, tp order %s, sl order %s, trailing sl %s', log_prefix,
+                    self._open_position_bool, self._last_tp_order_id, self._last_sl_order_id, self._last_trail_sl_price)
+        return True
+
+    # drop the parts of a restored state the exchange does not confirm: orders
+    # which are gone and the trailing stop of a position which was closed or
+    # turned meanwhile
+    def reconcile_state(self):
+        log_prefix = self.log_prefix('reconcile_state')
+
+        if self._last_tp_order_id is not None and self._last_tp_order_id not in self._orders:
+            logger.info('%s Take profit order %s of the snapshot is not open anymore', log_prefix, self._last_tp_order_id)
+            self._last_tp_order_id = None
+
+        if self._last_sl_order_id is not None and self._last_sl_order_id not in self._orders:
+            logger.info('%s Stop loss order %s of the snapshot is not open anymore', log_prefix, self._last_sl_order_id)
+            self._last_sl_order_id = None
+
+        if self._open_position_bool == False or self._last_current_long != self._current_long:
+            self._trail_trigger_price = None
+            self._trail_value = None
+            self._last_trail_sl_price = None
+            self._trailing_sl_triggered = False
+
     def shutdown_handler(self):
-        log_prefix = f"({self.class_name()}.shutdown_handler) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('shutdown_handler')
 
-        logging.info(f'{log_prefix} Shutdown the bot ....')
+        logger.info('%s Shutdown the bot ....', log_prefix)
         
-        time.sleep(5)
+        if self._feed_worker is not None:
+            self._feed_worker.stop(timeout=30)
+
+        self._clock.sleep(5)
         # try to get a clean state ...
         self.refresh_active_orders()
         
         # only cancel orders and delete files when not on a position
         if self._open_position_bool == False:
             self.housekeeping_handler()
+
+        self.checkpoint(force=True)
             
-        logging.info(f'{log_prefix} Shutdown finished ....')
+        logger.info('%s Shutdown finished ....', log_prefix)
 
     # Load datafeeds
     def load_data_feeds(self):
         
-        log_prefix = f"({self.class_name()}.load_data_feeds) symbol {self.symbol}:"
-        
-        timestamp = int(time.time()*1000)
-        
-        for feed in self._sg.feeds:
-            tf = self._sg.feeds[feed]['timeframe']
-            nb = self._sg.feeds[feed]['num_bars']
-            oc = self._sg.feeds[feed]['only_closed']
-            re = int(self._sg.feeds[feed]['refresh_timeout'] * 1000)
-            if 'next_refresh' not in self._sg.feeds[feed] or timestamp >= self._sg.feeds[feed]['next_refresh']:
-                logging.info(f"{log_prefix} Obtaining datafeed {feed} timeframe: {tf} num_bars: {nb} only_closed: {oc}")
-                try:
-                    self._sg.feeds[feed]['df'] = self._ea.fetch_candles_df(self.symbol, 
-                                                                                timeframe=tf, 
-                                                                                num_bars=nb, 
-                                                                                only_closed=oc)
-                    
-                except Exception as e:
-                    logging.exception(f'{log_prefix} WARN: Could not load candles for {feed}')
-                    self._sg.feeds[feed]['df'] = None
-                else:
-                    self._sg.feeds[feed]['next_refresh'] = timestamp + re
-                    self._sg.prepare_df()
-                    logging.info(f"{log_prefix} Success datafeed {feed} obtained. Next refresh {self._sg.feeds[feed]['next_refresh']}")
+        self._feed_loader.symbol = self.symbol
 
-        
+        # the worker loads the feeds in the background, never wait for it here
+        if self._feed_worker is not None:
+            self._feed_worker.start()
+        else:
+            self._feed_loader.load_data_feeds()
 
-    
-    # wrapping the signal generator
+    # the generator to compute the signals on: the latest snapshot of the feed 
+    # worker (None before its first load) or the signal generator itself
+    def signal_generator(self) -> ExtendedSignalGenerator:
+
+        if self._feed_worker is None:
+            return self._sg
+
+        snapshot = self._feed_worker.snapshot
+        if snapshot is not None:
+            snapshot.verbose = self._sg.verbose
+
+        return snapshot
+
+    # wrapping the signal generator, the cached functions only
+    # differ from signal and exit_signal if the cache is enabled
     def signal(self, ask: float, bid: float):
         
-        return self._sg.signal(ask, bid)
+        sg = self.signal_generator()
+        if sg is None:
+            logger.info('(%s.signal) symbol %s: Data feeds not loaded yet - no signal', self.class_name(), self.symbol)
+            return {}
+
+        return sg.cached_signal(ask, bid)
     
     def exit_signal(self, ask: float, bid: float):
         
-        return self._sg.exit_signal(ask, bid)
+        sg = self.signal_generator()
+        if sg is None:
+            return {}
+
+        return sg.cached_exit_signal(ask, bid)
     
     # Parse a signal dict returned from an Extended Signal Generator
     def parse_signal(self, signal: dict, dir: str, default_li: float = None) -> tuple[float, float, float]:
-        log_prefix = f"({self.class_name()}.parse_signal) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('parse_signal')
         
         if dir in signal: 
         
@@ -253,35 +646,38 @@ class BaseBot(BaseClass):
 
     # General functions for order management:
     def matching_limit_order(self, side: str, price: float, amount: float) -> dict:
-        log_prefix = f"({self.class_name()}.maintain_tp_order) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('maintain_tp_order')
         
         if side != 'buy' and side != 'sell':
             raise ValueError(f'{log_prefix} Invalid side param {side}, must be either buy or sell')
 
         order = None
 
-        if price in self._open_limit_orders_by_price[side]:
-            if self._open_limit_orders_by_price[side][price]['amount'] == amount:
-                order = self._open_limit_orders_by_price[side][price]
+        # any order at the tick of price with the amount, not only the last one
+        for o in self._open_limit_orders_by_price[side].get(price):
+            if math.isclose(o['amount'], amount, rel_tol=1e-9):
+                order = o
+                break
         
         return order
 
     def matching_stop_order(self, side: str, stopprice: float, amount: float) -> dict:
-        log_prefix = f"({self.class_name()}.maintain_tp_order) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('maintain_tp_order')
 
         if side != 'buy' and side != 'sell':
             raise ValueError(f'{log_prefix} Invalid side param {side}, must be either buy or sell')
 
         order = None
 
-        if stopprice in self._open_stop_orders_by_price[side]:
-            if self._open_stop_orders_by_price[side][stopprice]['amount'] == amount:
-                order = self._open_stop_orders_by_price[side][stopprice]
+        for o in self._open_stop_orders_by_price[side].get(stopprice):
+            if math.isclose(o['amount'], amount, rel_tol=1e-9):
+                order = o
+                break
         
         return order
 
     def matching_order_by_id(self, order_id: str, type: str, side: str) -> bool:
-        log_prefix = f"({self.class_name()}.matching_order_by_id) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('matching_order_by_id')
 
         if side != 'buy' and side != 'sell':
             raise ValueError(f'{log_prefix} Invalid side param {side}, must be either buy or sell')
@@ -298,64 +694,79 @@ class BaseBot(BaseClass):
         return False
 
     def maintain_trail_sl(self, trigger_price: float, trail_value: float):
-        log_prefix = f"({self.class_name()}.maintain_sl_order) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('maintain_sl_order')
         
+        # remembered for the price_handler of the event loop
+        self._trail_trigger_price = trigger_price
+        self._trail_value = trail_value
+
+        # with a trailing stop engine the stop follows every top of book in its
+        # thread, here it is only armed for the position
+        if self._trailing_engine is not None:
+            self.arm_trailing_engine(trigger_price, trail_value)
+            return
+
         if self._open_position_bool == True:
             
             [ask, bid] = self._ea.ask_bid(self.symbol)
             
             prev_price = self._last_trail_sl_price
-            
-            if self._current_long == True:
-                
-                if bid >= trigger_price:
-                    if not self._trailing_sl_triggered:
-                        self._last_trail_sl_price = bid - trail_value # resetting
-                    self._trailing_sl_triggered = True
-                    
-                if self._last_trail_sl_price:
-                    
-                    if ask <= self._last_trail_sl_price and self._trailing_sl_triggered:
-                        self._exiting = True
-                        logging.info(f'{log_prefix} Ask {ask} below {self._last_trail_sl_price} - Exiting trailing stop')
-                        self.maintain_tp_order(ask)
-                        
-                    self._last_trail_sl_price = max(bid - trail_value, self._last_trail_sl_price)
-                else:
-                    self._last_trail_sl_price = bid - trail_value
-                    
-            else:
-                
-                if ask <= trigger_price:
-                    if not self._trailing_sl_triggered:
-                        self._last_trail_sl_price = ask + trail_value # resetting
-                    self._trailing_sl_triggered = True
-                
-                if self._last_trail_sl_price:
-                                        
-                    if bid >= self._last_trail_sl_price and self._trailing_sl_triggered:
-                        self._exiting = True
-                        logging.info(f'{log_prefix} Bid {bid} above {self._last_trail_sl_price} - Exiting trailing stop')
-                        self.maintain_tp_order(bid)
-                    
-                    self._last_trail_sl_price = min(ask + trail_value, self._last_trail_sl_price)
-                else:
-                    self._last_trail_sl_price = ask + trail_value
+
+            [ self._trailing_sl_triggered, stop_price, exit_price ] = trail_step(self._current_long, trigger_price, trail_value,
+                                                                                 self._trailing_sl_triggered, self._last_trail_sl_price,
+                                                                                 ask, bid)
+            if exit_price is not None:
+                self._exiting = True
+                logger.info('%s %s %s crossed the trailing stop - Exiting trailing stop', log_prefix, "Ask" if self._current_long else "Bid", exit_price)
+                self.maintain_tp_order(exit_price)
         
             # rounding to exchange
-            self._last_trail_sl_price = float(self._ea.price_to_precision(self.symbol, self._last_trail_sl_price))
+            self._last_trail_sl_price = float(self._ea.price_to_precision(self.symbol, stop_price))
 
             if prev_price != self._last_trail_sl_price:
-                logging.info(f'{log_prefix} Trailing SL triggered {self._trailing_sl_triggered} New trail_sl_price {self._last_trail_sl_price}')
+                logger.info('%s Trailing SL triggered %s New trail_sl_price %s', log_prefix, self._trailing_sl_triggered, self._last_trail_sl_price)
                     
         else:
             
             self._last_trail_sl_price = None
             self._trailing_sl_triggered = False
 
+    def arm_trailing_engine(self, trigger_price: float, trail_value: float):
+
+        if self._open_position_bool == True:
+            self._trailing_engine.arm(self._current_long, trigger_price, trail_value)
+            self._last_trail_sl_price = self._trailing_engine.stop_price
+            self._trailing_sl_triggered = self._trailing_engine.triggered
+        else:
+            self._trailing_engine.disarm()
+            self._last_trail_sl_price = None
+            self._trailing_sl_triggered = False
+
+    # exit of a hit trailing stop with a take profit order at price, called by
+    # the trailing stop engine from its thread - again with the new price while
+    # the top of book stays past the stop (the exit order is re-priced as the
+    # main cycle does without engine). Returns True if the exit order is in
+    # place or there is no position to exit anymore, False to retry
+    def exit_trailing_stop(self, price: float) -> bool:
+        log_prefix = self.log_prefix('exit_trailing_stop')
+
+        with self._lock:
+            if self._open_position_bool == False:
+                return True
+
+            logger.info('%s Exiting trailing stop at %s', log_prefix, price)
+            self._exiting = True
+            order = self.maintain_tp_order(price)
+
+            if order is not None or self._open_position_bool == False:
+                return True
+
+            buy_sell = 'sell' if self._current_long == True else 'buy'
+            return self.matching_limit_order(buy_sell, price, self._current_size) is not None
+
 
     def maintain_sl_order(self, stopprice, size=None):
-        log_prefix = f"({self.class_name()}.maintain_sl_order) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('maintain_sl_order')
 
         if size == None:
             size = self._current_size
@@ -367,7 +778,7 @@ class BaseBot(BaseClass):
         self.refresh_open_position()
         
         if self._open_position_bool == False:
-            logging.warning(f'{log_prefix} I am NOT in a position anymore ... exiting the function')
+            logger.warning('%s I am NOT in a position anymore ... exiting the function', log_prefix)
             return
 
         if self._open_position_bool == True:
@@ -378,28 +789,37 @@ class BaseBot(BaseClass):
 
             if order is None:
                 try:
-                    # cancel outdated sl order
+                    previous = None
                     if self.last_sl_order_id is not None and self.last_sl_order_id in self._open_stop_orders_by_id[buy_sell]:
-                        logging.info(f"{log_prefix} Cancelling existing {buy_sell} stop order because size differs from size {size} or price {stopprice}")
-                        o = { 'symbol': self.symbol, 
-                              'order_id': self.last_sl_order_id, 
-                              'direction': buy_sell, 
-                              'type': 'stop',
-                              'exchange_id': self._ea.id }
-                        self._ea.cancel_order_based_on_model(o)
+                        previous = self._open_stop_orders_by_id[buy_sell][self.last_sl_order_id]
+
+                    # amend the outdated sl order in place if the exchange can
+                    if previous is not None:
+                        order = self.amend_order(previous, stopprice, size)
+
+                    if order is None:
+                        # cancel outdated sl order
+                        if previous is not None:
+                            logger.info("%s Cancelling existing %s stop order because size differs from size %s or price %s", log_prefix, buy_sell, size, stopprice)
+                            o = { 'symbol': self.symbol, 
+                                  'order_id': self.last_sl_order_id, 
+                                  'direction': buy_sell, 
+                                  'type': 'stop',
+                                  'exchange_id': self._ea.id }
+                            self._ea.cancel_order_based_on_model(o)
                 
-                    logging.info(f'{log_prefix} Create {buy_sell} stop loss order of size {size} at {stopprice}')
+                        logger.info('%s Create %s stop loss order of size %s at %s', log_prefix, buy_sell, size, stopprice)
 
-                    order = self._ea.create_stop_loss_order_by_trigger_price(self.symbol, stopprice, size, buy_sell)
+                        order = self._ea.create_stop_loss_order_by_trigger_price(self.symbol, stopprice, size, buy_sell)
             
                 except Exception as err:
-                    logging.exception(f"{log_prefix} Unexpected {err=}, {type(err)=}")
+                    logger.exception("%s Unexpected err=%r, type(err)=%r", log_prefix, err, type(err))
                     raise err
                 else:
-                    logging.info(f"{log_prefix} Stop loss {buy_sell} order with id {order['id']} of size {size} at {stopprice} created")
+                    logger.info("%s Stop loss %s order with id %s of size %s at %s created", log_prefix, buy_sell, order['id'], size, stopprice)
 
             else:
-                logging.debug(f'{log_prefix} Matching active stop loss ({buy_sell}) order already exists at {stopprice}')
+                logger.debug('%s Matching active stop loss (%s) order already exists at %s', log_prefix, buy_sell, stopprice)
 
             self.last_sl_order_id = order['id']
 
@@ -407,7 +827,7 @@ class BaseBot(BaseClass):
 
         
     def maintain_tp_order(self, price, size=None):
-        log_prefix = f"({self.class_name()}.maintain_tp_order) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('maintain_tp_order')
         
         if size == None:
             size = self._current_size
@@ -417,11 +837,11 @@ class BaseBot(BaseClass):
         self.refresh_open_position()
         
         if self._open_position_bool == False:
-            logging.warning(f'{log_prefix} I am NOT in a position anymore ... exiting the function')
+            logger.warning('%s I am NOT in a position anymore ... exiting the function', log_prefix)
             return
 
         if self._exiting:
-            logging.info(f'{log_prefix} Exiting - trailing stop loss to take profit of size {self._current_size} at {price}')
+            logger.info('%s Exiting - trailing stop loss to take profit of size %s at %s', log_prefix, self._current_size, price)
 
         if self._open_position_bool == True:
 
@@ -435,223 +855,414 @@ class BaseBot(BaseClass):
                     # cancel outdated tp order
                     
                     if self._exiting:
-                        time.sleep(2)
+                        self._clock.sleep(2)
                         self.refresh_active_orders()
                     
+                    # amend an earlier order in place if the exchange can
+                    if self.last_tp_order_id is not None and self.last_tp_order_id in self._open_limit_orders_by_id[buy_sell]:
+                        order = self.amend_order(self._open_limit_orders_by_id[buy_sell][self.last_tp_order_id], price, self._current_size)
+                        if order is not None:
+                            self._last_tp_order_id = order['id']
+                            return order
+
                     # check if an earlier order exist ...
                     if self.last_tp_order_id is not None and self.last_tp_order_id in self._open_limit_orders_by_id[buy_sell]:
-                        logging.info(f"{log_prefix} Cancelling existing {buy_sell} take profit order because size differs from current_size {self._current_size} or price {price}")
+                        logger.info("%s Cancelling existing %s take profit order because size differs from current_size %s or price %s", log_prefix, buy_sell, self._current_size, price)
                         try:
                             self._ea.cancel_order(self.last_tp_order_id, self.symbol)
                         except Exception as e:
-                            logging.exception(f'{log_prefix} WARN: Could not cancel existing take profit order {self.last_tp_order_id} ... exiting')
+                            logger.exception('%s WARN: Could not cancel existing take profit order %s ... exiting', log_prefix, self.last_tp_order_id)
                             return
                         else:
-                            logging.info(f'{log_prefix} Success: Current take profit order {self.last_tp_order_id} cancelled')
+                            logger.info('%s Success: Current take profit order %s cancelled', log_prefix, self.last_tp_order_id)
                             self._last_tp_order_id = None
   
-                    logging.info(f'{log_prefix} Create opposite {buy_sell} order (take profit) of size {self._current_size} at {price}')
+                    logger.info('%s Create opposite %s order (take profit) of size %s at %s', log_prefix, buy_sell, self._current_size, price)
                     try:
                         if self._current_long == True:
                             order = self._ea.close_long_limit_order(self.symbol, self._current_size, price)
                         else:
                             order = self._ea.close_short_limit_order(self.symbol, self._current_size, price)
                     except Exception as e:
-                        logging.exception(f'{log_prefix} WARN: Could not create new take profit order ... exiting')
+                        logger.exception('%s WARN: Could not create new take profit order ... exiting', log_prefix)
                         return
                     else:
-                        logging.info(f"{log_prefix} Success: Opposite {buy_sell} order (take profit) with id {order['id']} of size {self._current_size} at {price} created")
+                        logger.info("%s Success: Opposite %s order (take profit) with id %s of size %s at %s created", log_prefix, buy_sell, order['id'], self._current_size, price)
                         self._last_tp_order_id = order['id']
                         return order
             
             else:
             
-                logging.debug(f'{log_prefix} Matching active opposite close ({buy_sell}) limit order already exists at {price}')
+                logger.debug('%s Matching active opposite close (%s) limit order already exists at %s', log_prefix, buy_sell, price)
 
 
-    def refresh_active_orders(self):
-        log_prefix = f"({self.class_name()}.refresh_active_orders) symbol {self.symbol}:"
+    # amend an open tp (limit) or sl (stop) order to price and size in one
+    # request instead of cancel and create - returns the amended order or None
+    # if the exchange can't amend it or the amend failed, then the caller
+    # cancels and creates the order
+    def amend_order(self, previous: dict, price: float, size: float) -> dict:
+        log_prefix = self.log_prefix('amend_order')
 
-        logging.debug(f'{log_prefix} Obtaining active orders and return in lists')
+        type = 'stop' if previous['type'] == 'Stop' else 'limit'
 
-        open_orders = []
+        if not self._ea.can_amend(type, previous, size):
+            self._amend_fallbacks += 1
+            return None
 
-        # active orders
-        self._open_orders_bool = False
-        self._open_ask_orders = [] # limit, sell
-        self._open_bid_orders = [] # limit, buy
-        self._open_sl_orders_long = [] # Stop, sell
-        self._open_sl_orders_short = [] # Stop, buy
+        logger.info("%s Amend %s %s order %s to size %s at %s", log_prefix, previous['side'], type, previous['id'], size, price)
+        try:
+            if type == 'stop':
+                order = self._ea.amend_stop_order(self.symbol, previous['id'], previous['side'], size, price)
+            else:
+                order = self._ea.amend_limit_order(self.symbol, previous['id'], previous['side'], size, price)
+        except Exception as e:
+            logger.warning("%s WARN: Could not amend %s order %s, cancel and create instead: %s", log_prefix, type, previous['id'], e)
+            self._amend_fallbacks += 1
+            return None
 
-        self._open_limit_orders_by_price = { 'sell': {}, 'buy': {} }
-        self._open_limit_orders_by_id = { 'sell': {}, 'buy': {} }
+        logger.info("%s Success: %s order %s amended to size %s at %s", log_prefix, type, order['id'], size, price)
 
-        self._open_stop_orders_by_price = { 'sell': {}, 'buy': {} }
-        self._open_stop_orders_by_id = { 'sell': {}, 'buy': {} }
+        # one request instead of two
+        self._amends += 1
+        self._round_trips_saved += 1
+
+        return order
+
+    # amends, fallbacks to cancel and create and round trips saved per closed trade
+    def amend_stats(self) -> dict:
+
+        per_trade = np.array(self._round_trips_saved_per_trade) if len(self._round_trips_saved_per_trade) > 0 else np.zeros(1)
+        return { 'amends': self._amends, 'fallbacks': self._amend_fallbacks, 
+                 'round_trips_saved': self._round_trips_saved + int(np.sum(self._round_trips_saved_per_trade)),
+                 'current_trade': self._round_trips_saved, 'trades': len(self._round_trips_saved_per_trade),
+                 'per_trade_mean': per_trade.mean(), 'per_trade_max': per_trade.max() }
+
+    # own open orders: the order store is synced with the open orders of the
+    # exchange and keeps the indexes up to date, the changes (new, filled, 
+    # amended, closed) are returned and available as order_changes
+    def refresh_active_orders(self) -> list:
+        log_prefix = self.log_prefix('refresh_active_orders')
 
-        last_tp_order_found = False
-        last_sl_order_found = False
-        
         try:
             open_orders = self._ea.fetch_open_orders(self.symbol) 
 
-            if len(open_orders) > 0:
-                ## pp.pprint (open_orders)
-                self._open_orders_bool = True
-                # print (f'(refresh_active_orders) INFO: Open orders for symbol {self.symbol}:')
-                # pp.pprint(open_orders)
+        except Exception as err:
+            logger.exception("%s Unexpected err=%r, type(err)=%r", log_prefix, err, type(err))
+            raise err
+
+        changes = self._orders.sync(open_orders)
+        self.orders_changed()
+
+        return changes
+
+    # a single order update of a stream
+    def order_update_handler(self, order: dict) -> list:
+
+        changes = self._orders.apply(order)
+        self.orders_changed()
+
+        return changes
+
+    def orders_changed(self):
+        log_prefix = self.log_prefix('orders_changed')
+
+        self._open_orders_bool = len(self._orders) > 0
+
+        if self._open_orders_bool:
+            # was either executed or deleted manually by trader
+            if self.last_tp_order_id not in self._orders:
+                self.last_tp_order_id = None
+
+            if self.last_sl_order_id not in self._orders:
+                self.last_sl_order_id = None
+
+        else:
+            logger.debug('%s No open orders for symbol %s', log_prefix, self.symbol)
+
+    @property
+    def order_changes(self) -> list:
+        return self._orders.last_changes
+
+    def open_limit_orders(self, side: str) -> list:
+        return self._orders.limit_orders(side)
+
+    def open_stop_orders(self, side: str) -> list:
+        return self._orders.stop_orders(side)
+
+    # check the duration of a main loop cycle against the loop budget
+    def loop_finished(self, loop_start: float):
+        log_prefix = self.log_prefix('loop_finished')
+
+        self._last_loop_duration = time.perf_counter() - loop_start
+
+        if self._loop_budget is not None and self._last_loop_duration > self._loop_budget:
+            self._loop_overruns += 1
+            logger.warning('%s WARN: Main loop took %.3f s - budget %s s', log_prefix, self._last_loop_duration, self._loop_budget)
+
+    # one cycle of the main loop: loads the feeds, refreshes orders and position
+    # and calls the event handlers - returns False if the bot has to wait after 
+    # an exit (the tick is skipped then)
+    def main_cycle(self) -> bool:
+
+        timestamp = self._clock.ms()
+
+        logger.debug('(%s.main_loop) Mainloop start', self.class_name())
+        
+        # load data feeds here to make sure child classes don't need to
+        # take care about it and only call the signal() function
+        self.load_data_feeds()
+
+        # the order handling does not interleave with exits of the trailing stop engine
+        with self._lock:
+
+            self.refresh_active_orders()
+
+            self.refresh_open_position()
+
+            if self._open_position_bool == False:
             
-                for order in open_orders:
-                    o_id = order['id']
+                # triggering orders to enter positions after timeout
+                if (timestamp < self._next_refresh):
+                
+                    logger.debug('(%s.main_loop) Waiting for refresh!', self.class_name())
 
-                    if o_id == self.last_tp_order_id:
-                        last_tp_order_found = True
+                else:
+                    logger.debug('(%s.main_loop) Do the refresh tasks!', self.class_name())
+                    self._next_refresh = timestamp + self.refresh_timeout
 
-                    if o_id == self.last_sl_order_id:
-                        last_sl_order_found = True
-                    
-                    o_type = order['type']
-                    o_side = order['side']
-                    o_amount = order['amount']
-                    o_filled = order['filled']
-                    o_remaining = order['remaining']
-                    o_price = order['price']
-                    o_timestamp = order['timestamp']
-                    o_stopprice = order['stopPrice']
-
-                    if o_type == 'limit' and o_side == 'sell':
-                        self._open_limit_orders_by_price['sell'][o_price]=order
-                        self._open_limit_orders_by_id['sell'][o_id]=order
-                        self._open_ask_orders.append(order)
+                    # call the finishtrade_handler to record trade data, e.g. pnl
+                    if self._last_open_position_bool == True:
                     
-                    if o_type == 'limit' and o_side == 'buy':
-                        self._open_limit_orders_by_price['buy'][o_price]=order
-                        self._open_limit_orders_by_id['buy'][o_id]=order
-                        self._open_bid_orders.append(order)
+                        self._clock.sleep(5)
+                        # try to get a clean state
+                        self.refresh_active_orders()
+                        self.finishtrade_handler()
+
+                        # resetting all main state variables
+                        self._last_open_position_bool = False
+                        self._trailing_sl_triggered = False
+                        self._trail_trigger_price = None
+                        self._last_trail_sl_price = None
+                        self._last_current_long = None
+                        self._last_position_size = None
+                        if self._trailing_engine is not None:
+                            self._trailing_engine.disarm()
+
+                    # call the housekeeping handler
+                    self.housekeeping_handler()
+                
+                    # Last trade was finished by exit handler ... force wait
+                    if self._exiting:
+                        logger.info('(%s.main_loop) Last trade was finished by exit handler ... force wait 3min!', self.class_name())
+                        self._exiting = False
+                        self._clock.sleep(180)
+                        return False
                     
-                    if o_type == 'Stop' and o_side == 'sell':
-                        self._open_stop_orders_by_price['sell'][o_stopprice]=order
-                        self._open_stop_orders_by_id['sell'][o_id]=order
-                        self._open_sl_orders_long.append(order)
-
-                    if o_type == 'Stop' and o_side == 'buy':
-                        self._open_stop_orders_by_price['buy'][o_stopprice]=order
-                        self._open_stop_orders_by_id['buy'][o_id]=order
-                        self._open_sl_orders_short.append(order)
-
-                    if o_type == 'Stop':
-                        logging.debug(f'{log_prefix} Order detected: {o_id} Type: {o_type} Side: {o_side} Price {o_stopprice} Filled: {o_filled} Remaining: {o_remaining} Timestamp: {o_timestamp}')
-                    else: 
-                        logging.debug(f'{log_prefix} Order detected: {o_id} Type: {o_type} Side: {o_side} Amount: {o_amount} at Price {o_price} Filled: {o_filled} Remaining: {o_remaining} Timestamp: {o_timestamp}')
-            
-                # was either executed or deleted manually by trader
-                if last_tp_order_found != True:
-                    self.last_tp_order_id = None
-
-                if last_sl_order_found != True:
-                    self.last_sl_order_id = None
+                    # self._exiting = False
+                
+                    # call enter_position handler to process entry signals ...
+                    # and enter the position
+                    self.enter_position_handler()
 
             else:
-                self._open_orders_bool = False
-                logging.debug(f'{log_prefix} No open orders for symbol {self.symbol}')
+                self.position_cycle()
 
-        except Exception as err:
-            logging.exception(f"{log_prefix} Unexpected {err=}, {type(err)=}")
-            raise err
+            self.checkpoint()
+
+        logger.debug('(%s.main_loop) Mainloop end', self.class_name())
+
+        return True
+
+    # the handlers of an open position, called with the lock held by the main
+    # cycle and for fills and position changes of the event loop
+    def position_cycle(self):
+
+        self._next_refresh = 0
+
+        # restore previous status after restart
+        self.restore_handler()
+
+        # exit_handler to process exit signals ...
+        self.exit_position_handler()
+
+        # in position handler ...
+        if not self._exiting:
+            self.inposition_handler()
+
+        # update state vars
+        # I dont want to touch them in child classes
+        self._last_position_size = self._current_size
+        self._last_open_position_bool = True
+        self._last_current_long = self._current_long
+
+    # called by the event loop for fills and position changes: orders and
+    # position are refreshed and the position handlers run, without loading the
+    # feeds and computing the entry signals of a full cycle. A closed position
+    # left the refresh due (_next_refresh is 0 in a position), the event loop
+    # runs the next full cycle at once to finish the trade
+    def fill_handler(self):
+
+        with self._lock:
+
+            self.refresh_active_orders()
 
+            self.refresh_open_position()
+
+            if self._open_position_bool:
+                self.position_cycle()
+
+            self.checkpoint()
 
     # the bot main loop calling the different event handlers
     # the goal is that child classes only implement the handlers
 
     def main_loop(self):
 
-        next_refresh = 0
+        self._next_refresh = 0
 
         self.preparation_handler()
 
+        self.restore_state()
+
         while True:
 
-            timestamp = int(time.time()*1000)
+            loop_start = time.perf_counter()
 
             try:
 
-                logging.debug(f'({self.class_name()}.main_loop) Mainloop start')
-                
-                # load data feeds here to make sure child classes don't need to
-                # take care about it and only call the signal() function
-                self.load_data_feeds()
+                if not self.main_cycle():
+                    continue
 
-                self.refresh_active_orders()
+                self.loop_finished(loop_start)
+                self.tick()
 
-                self.refresh_open_position()
+            except KeyboardInterrupt:
+                self.shutdown_handler()
+                return
 
-                if self._open_position_bool == False:
-                    
-                    # triggering orders to enter positions after timeout
-                    if (timestamp < next_refresh):
-                        
-                        logging.debug(f'({self.class_name()}.main_loop) Waiting for refresh!')
+    # called by the event loop for top of book changes while in a position, 
+    # the trailing stop is only maintained if the price crossed the trigger,
+    # crossed the trailing stop price or made a new high (low) which moves 
+    # the trailing stop price - returns True if it was maintained
+    def price_handler(self, ask: float, bid: float) -> bool:
 
-                    else:
-                        logging.debug(f'({self.class_name()}.main_loop) Do the refresh tasks!')
-                        next_refresh = timestamp + self.refresh_timeout
-
-                        # call the finishtrade_handler to record trade data, e.g. pnl
-                        if self._last_open_position_bool == True:
-                            
-                            time.sleep(5)
-                            # try to get a clean state
-                            self.refresh_active_orders()
-                            self.finishtrade_handler()
-
-                            # resetting all main state variables
-                            self._last_open_position_bool = False
-                            self._trailing_sl_triggered = False
-                            self._last_trail_sl_price = None
-                            self._last_current_long = None
-                            self._last_position_size = None
-
-                        # call the housekeeping handler
-                        self.housekeeping_handler()
-                        
-                        # Last trade was finished by exit handler ... force wait
-                        if self._exiting:
-                            logging.info(f'({self.class_name()}.main_loop) Last trade was finished by exit handler ... force wait 3min!')
-                            self._exiting = False
-                            time.sleep(180)
-                            continue
-                            
-                        # self._exiting = False
-                        
-                        # call enter_position handler to process entry signals ...
-                        # and enter the position
-                        self.enter_position_handler()
+        # a trailing stop engine follows the top of book itself
+        if not self._open_position_bool or self._exiting or self._trail_trigger_price is None or self._trailing_engine is not None:
+            return False
 
-                else:
-                    
-                    next_refresh = 0
-                    
-                    # restore previous status after restart
-                    self.restore_handler()
+        trailing = self._trailing_sl_triggered and self._last_trail_sl_price is not None
 
-                    # exit_handler to process exit signals ...
-                    self.exit_position_handler()
+        if self._current_long == True:
+            if trailing:
+                moved = ask <= self._last_trail_sl_price or bid - self._trail_value > self._last_trail_sl_price
+            else:
+                moved = bid >= self._trail_trigger_price
+        else:
+            if trailing:
+                moved = bid >= self._last_trail_sl_price or ask + self._trail_value < self._last_trail_sl_price
+            else:
+                moved = ask <= self._trail_trigger_price
 
-                    # in position handler ...
-                    if not self._exiting:
-                        self.inposition_handler()
-                    
-                    # update state vars
-                    # I dont want to touch them in child classes
-                    self._last_position_size = self._current_size
-                    self._last_open_position_bool = True
-                    self._last_current_long = self._current_long
+        if moved:
+            self.maintain_trail_sl(self._trail_trigger_price, self._trail_value)
 
-                    # print(f'({self.class_name()}.main_loop) Mainloop: self.last_tp_order_id {self.last_tp_order_id}')
+        return moved
 
-                logging.debug(f'({self.class_name()}.main_loop) Mainloop end')
-                self.tick()
+    # reaction time in seconds from the detection of an event to the end of its handling
+    def reaction_stats(self) -> dict:
 
-            except KeyboardInterrupt:
-                self.shutdown_handler()
-                return
+        stats = {}
+        for type, times in self._reaction_times.items():
+            if len(times) > 0:
+                t = np.array(times)
+                stats[type] = { 'count': len(t), 'mean': t.mean(), 'p50': np.percentile(t, 50), 
+                                'p99': np.percentile(t, 99), 'max': t.max() }
+        return stats
+
+    def stop_event_loop(self):
+        self._stop_event_loop.set()
+
+    # handle a batch of events: fills and position changes run the fill handler,
+    # price changes only the price handler with the latest top of book
+    def dispatch_events(self, events: list):
+
+        types = set(e['type'] for e in events)
+
+        # order updates of a stream only update the order store, fills of a
+        # stream (trades, not the order changes of a watcher) go to the ledger
+        for e in events:
+            if e['type'] == ORDER and e['data'].get('id') is not None:
+                self.order_update_handler(e['data'])
+            elif e['type'] == FILL:
+                self.ledger_fill(e['data'])
+
+        if FILL in types or POSITION in types:
+            self.fill_handler()
+        elif PRICE in types:
+            price = [ e for e in events if e['type'] == PRICE ][-1]['data']
+            self.price_handler(price['ask'], price['bid'])
+
+        done = time.perf_counter()
+        for e in events:
+            self._reaction_times[e['type']].append(done - e['created'])
+
+    # event driven main loop: instead of a full cycle every tick, the handlers run
+    # when the sources report a fill, a position change or a price move. A full
+    # cycle still runs every fallback seconds (polling fallback) and when the
+    # entry refresh is due while not in a position. Without sources a polling
+    # watcher with an interval of ticks seconds is used
+    def event_loop(self, sources: list = None, fallback: float = 30):
+        log_prefix = self.log_prefix('event_loop')
+
+        sources = sources if sources is not None else [ PollingWatcher(self._ea, self.symbol, interval=self.ticks, lock=self._lock) ]
+
+        self._next_refresh = 0
+        self._stop_event_loop.clear()
+
+        self.preparation_handler()
+
+        self.restore_state()
+
+        for source in sources:
+            source.start(self._events)
+
+        try:
+            self.main_cycle()
+            next_cycle = self._clock.time() + fallback
+
+            while not self._stop_event_loop.is_set():
+
+                now = self._clock.time()
+                deadline = next_cycle
+                if self._open_position_bool == False:
+                    deadline = min(deadline, self._next_refresh / 1000)
+
+                try:
+                    events = [ self._events.get(timeout=min(max(deadline - now, 0), 1.0)) ]
+                except queue.Empty:
+                    if self._clock.time() >= deadline:
+                        loop_start = time.perf_counter()
+                        self.main_cycle()
+                        self.loop_finished(loop_start)
+                        next_cycle = self._clock.time() + fallback
+                    continue
+
+                # coalesce everything which arrived meanwhile
+                while not self._events.empty():
+                    events.append(self._events.get_nowait())
+
+                logger.debug('%s Handling %s events: %s', log_prefix, len(events), Lazy(lambda: [ e['type'] for e in events ]))
+
+                loop_start = time.perf_counter()
+                self.dispatch_events(events)
+                self.loop_finished(loop_start)
+
+                if FILL in [ e['type'] for e in events ] or POSITION in [ e['type'] for e in events ]:
+                    next_cycle = self._clock.time() + fallback
+
+        except KeyboardInterrupt:
+            self.shutdown_handler()
+
+        finally:
+            for source in sources:
+                source.stop()
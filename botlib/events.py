@@ -0,0 +1,157 @@
+import logging
+import queue
+import threading
+import time
+
+from base import BaseClass
+
+logger = logging.getLogger(__name__)
+
+# events of the event driven main loop (BaseBot.event_loop):
+#  - fill:     an order was (partially) filled or disappeared from the open orders
+#  - position: size or side of the position changed
+#  - price:    the top of book changed
+#  - order:    an own order changed (streams only, data is the order)
+# an event is a dict with type, symbol, data and created (time.perf_counter()
+# when the source noticed it, used to measure the reaction time)
+
+FILL = 'fill'
+POSITION = 'position'
+PRICE = 'price'
+ORDER = 'order'
+
+EVENT_TYPES = [ FILL, POSITION, PRICE, ORDER ]
+
+def bot_event(type: str, symbol: str, data: dict = None) -> dict:
+    return { 'type': type, 'symbol': symbol, 'data': data or {}, 'created': time.perf_counter() }
+
+class EventSource(BaseClass):
+
+    # sources put events into the queue of the bot from their own thread or callbacks
+
+    def __init__(self, symbol: str):
+
+        self._symbol: str = symbol
+        self._queue: queue.Queue = None
+
+    @property
+    def symbol(self) -> str:
+        return self._symbol
+
+    def emit(self, type: str, data: dict = None):
+        if self._queue is not None:
+            self._queue.put(bot_event(type, self._symbol, data))
+
+    def start(self, events: queue.Queue):
+        self._queue = events
+
+    def stop(self):
+        self._queue = None
+
+class PollingWatcher(EventSource):
+
+    # the fallback source: polls open orders, position and top of book every
+    # interval seconds and emits an event for each change. The adapter is shared
+    # with the bot, a polling round holds lock (the lock of the bot) so its
+    # requests don't interleave with the order handling of the bot thread
+
+    def __init__(self, exchange_adapter, symbol: str, interval: float = 1.0,
+                 watch_orders: bool = True, watch_position: bool = True, watch_price: bool = True,
+                 lock: threading.RLock = None):
+
+        super().__init__(symbol)
+
+        self._ea = exchange_adapter
+        self._lock: threading.RLock = lock if lock is not None else threading.RLock()
+        self._interval: float = interval
+        self._watch = { FILL: watch_orders, POSITION: watch_position, PRICE: watch_price }
+
+        self._orders: dict = None
+        self._position: tuple = None
+        self._top: tuple = None
+
+        self._stop = threading.Event()
+        self._thread: threading.Thread = None
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    @interval.setter
+    def interval(self, value: float):
+        self._interval = value
+
+    def start(self, events: queue.Queue):
+
+        super().start(events)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+
+        self._stop.set()
+        super().stop()
+
+    def _run(self):
+        log_prefix = f"({self.class_name()}._run) symbol {self._symbol}:"
+
+        while not self._stop.is_set():
+            try:
+                with self._lock:
+                    self.poll()
+            except Exception as e:
+                logger.warning('%s WARN: Polling failed: %s', log_prefix, e)
+
+            self._stop.wait(self._interval)
+
+    # one polling round, the first round only records the state
+    def poll(self):
+
+        if self._watch[FILL]:
+            orders = { o['id']: o['filled'] for o in self._ea.fetch_open_orders(self._symbol) }
+            if self._orders is not None:
+                changed = [ id for id, filled in self._orders.items() if orders.get(id) != filled ]
+                if len(changed) > 0:
+                    self.emit(FILL, { 'orders': changed })
+            self._orders = orders
+
+        if self._watch[POSITION]:
+            [ _, open_position, size, long, entry_price, _ ] = self._ea.fetch_open_positions(self._symbol)
+            position = (open_position, size, long)
+            if self._position is not None and position != self._position:
+                self.emit(POSITION, { 'size': size, 'long': long, 'entry_price': entry_price })
+            self._position = position
+
+        if self._watch[PRICE]:
+            top = tuple(self._ea.ask_bid(self._symbol))
+            if self._top is not None and top != self._top:
+                self.emit(PRICE, { 'ask': top[0], 'bid': top[1] })
+            self._top = top
+
+class ExchangeListener(EventSource):
+
+    # turns the callbacks of an exchange with listeners (SimulatedExchange,
+    # streaming adapters) into bot events
+
+    EVENTS = { 'trade': FILL, 'position': POSITION, 'ticker': PRICE, 'order': ORDER }
+
+    def __init__(self, exchange, symbol: str):
+
+        super().__init__(symbol)
+        self._exchange = exchange
+
+    def start(self, events: queue.Queue):
+
+        super().start(events)
+        self._exchange.add_listener(self._on_event)
+
+    def stop(self):
+
+        self._exchange.remove_listener(self._on_event)
+        super().stop()
+
+    def _on_event(self, event: str, payload: dict):
+
+        if event in self.EVENTS and payload.get('symbol') == self._symbol:
+            self.emit(self.EVENTS[event], payload)
@@ -0,0 +1,307 @@
+import argparse
+import logging
+import math
+import os
+import sqlite3
+import threading
+
+from base import BaseClass
+
+logger = logging.getLogger(__name__)
+
+# Ledger of the own fills in a local sqlite database: the fills are ingested
+# once (by id) from fetch_my_trades with the watermark of the last sync or
+# from a stream, every new fill updates the position of its symbol (size,
+# average entry, realized pnl and fees) and a position going flat (or
+# flipping) closes a trade, which updates the stats of its strategy. So the
+# realized and unrealized pnl, the trades and the stats per strategy are read
+# without a request to the exchange and without scanning the fills, and they
+# survive a restart of the bot. The pnl is the one of linear contracts:
+# (exit - entry) * amount * contract size.
+#
+# usage: python -m botlib.ledger [--path data_dir/ledger.db] [--trades 10]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fills (
+    exchange TEXT NOT NULL, id TEXT NOT NULL, symbol TEXT NOT NULL, order_id TEXT, side TEXT NOT NULL,
+    price REAL NOT NULL, amount REAL NOT NULL, fee REAL NOT NULL, fee_currency TEXT,
+    timestamp INTEGER NOT NULL, strategy TEXT,
+    PRIMARY KEY (exchange, id)
+);
+CREATE INDEX IF NOT EXISTS fills_symbol ON fills (exchange, symbol, timestamp);
+CREATE TABLE IF NOT EXISTS positions (
+    exchange TEXT NOT NULL, symbol TEXT NOT NULL, strategy TEXT, contract_size REAL NOT NULL,
+    size REAL NOT NULL, entry REAL NOT NULL, opened INTEGER, max_size REAL NOT NULL,
+    exit_amount REAL NOT NULL, exit_value REAL NOT NULL, pnl REAL NOT NULL, fees REAL NOT NULL,
+    realized REAL NOT NULL, total_fees REAL NOT NULL,
+    PRIMARY KEY (exchange, symbol)
+);
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, exchange TEXT NOT NULL, symbol TEXT NOT NULL, strategy TEXT,
+    long INTEGER NOT NULL, size REAL NOT NULL, entry REAL NOT NULL, exit REAL NOT NULL,
+    pnl REAL NOT NULL, fees REAL NOT NULL, opened INTEGER, closed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trades_symbol ON trades (exchange, symbol, closed);
+CREATE INDEX IF NOT EXISTS trades_strategy ON trades (strategy, closed);
+CREATE TABLE IF NOT EXISTS strategies (
+    strategy TEXT PRIMARY KEY, trades INTEGER NOT NULL, wins INTEGER NOT NULL, losses INTEGER NOT NULL,
+    pnl REAL NOT NULL, fees REAL NOT NULL, best REAL, worst REAL
+);
+CREATE TABLE IF NOT EXISTS watermarks (
+    exchange TEXT NOT NULL, symbol TEXT NOT NULL, since INTEGER NOT NULL,
+    PRIMARY KEY (exchange, symbol)
+);
+"""
+
+POSITION_COLUMNS = [ 'exchange', 'symbol', 'strategy', 'contract_size', 'size', 'entry', 'opened', 'max_size',
+                     'exit_amount', 'exit_value', 'pnl', 'fees', 'realized', 'total_fees' ]
+
+# a size below is flat (float rounding of partial fills)
+EPSILON = 1e-12
+
+# a fill of the exchange in the ccxt trade structure: with the trade id (the
+# key of the ledger) and the price of the fill
+def is_trade(fill: dict) -> bool:
+    return fill.get('id') is not None and fill.get('price') is not None and fill.get('timestamp') is not None
+
+class TradeLedger(BaseClass):
+
+    def __init__(self, path: str = 'data_dir/ledger.db'):
+
+        self._path: str = path
+
+        directory = os.path.dirname(path)
+        if directory != '':
+            os.makedirs(directory, exist_ok=True)
+
+        # bots of one process may share the ledger, other processes use their own connection
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(SCHEMA)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def close(self):
+        self._db.close()
+
+    # the timestamp of the last fill synced with fetch_my_trades, None before the first sync
+    def watermark(self, exchange: str, symbol: str) -> int:
+
+        with self._lock:
+            row = self._db.execute('SELECT since FROM watermarks WHERE exchange = ? AND symbol = ?', (exchange, symbol)).fetchone()
+        return row['since'] if row is not None else None
+
+    # the new fills (ccxt trade structure) of fetch_my_trades since the watermark,
+    # returns the closed trades
+    def sync(self, ea, symbol: str, strategy: str = None) -> list:
+
+        since = self.watermark(ea.id, symbol)
+        fills = ea.fetch_my_trades(symbol, since=since) or []
+
+        # the fills at the watermark are fetched again and skipped by id
+        trades = self.ingest(ea.id, symbol, fills, strategy=strategy, contract_size=ea.get_contract_size(symbol))
+
+        if len(fills) > 0:
+            with self._lock, self._db:
+                self._db.execute('INSERT INTO watermarks (exchange, symbol, since) VALUES (?, ?, ?) '
+                                 'ON CONFLICT (exchange, symbol) DO UPDATE SET since = max(since, excluded.since)',
+                                 (ea.id, symbol, max(f['timestamp'] for f in fills)))
+
+        return trades
+
+    # fills in the ccxt trade structure, the ones already in the ledger are
+    # skipped - returns the trades closed by the new fills. Without contract
+    # size the one of the position is kept (1 for a new position)
+    def ingest(self, exchange: str, symbol: str, fills: list, strategy: str = None, contract_size: float = None) -> list:
+        log_prefix = f"({self.class_name()}.ingest) symbol {symbol}:"
+
+        closed = []
+
+        with self._lock, self._db:
+            position = self._position(exchange, symbol, strategy, contract_size)
+
+            for fill in sorted([ f for f in fills if is_trade(f) ], key=lambda f: f['timestamp']):
+                fee = fill.get('fee') or {}
+                cursor = self._db.execute('INSERT OR IGNORE INTO fills (exchange, id, symbol, order_id, side, price, amount, fee, '
+                                          'fee_currency, timestamp, strategy) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                          (exchange, str(fill['id']), symbol, fill.get('order'), fill['side'], float(fill['price']),
+                                           float(fill['amount']), float(fee.get('cost') or 0), fee.get('currency'),
+                                           int(fill['timestamp']), strategy))
+                if cursor.rowcount == 0:
+                    continue
+
+                trade = self._apply(position, fill)
+                if trade is not None:
+                    self._close(trade)
+                    closed.append(trade)
+
+            self._db.execute(f"INSERT OR REPLACE INTO positions ({', '.join(POSITION_COLUMNS)}) "
+                             f"VALUES ({', '.join('?' * len(POSITION_COLUMNS))})", [ position[c] for c in POSITION_COLUMNS ])
+
+        for trade in closed:
+            logger.info('%s Trade closed: %s %s entry %s exit %s pnl %s fees %s', log_prefix, 'long' if trade['long'] else 'short',
+                        trade['size'], trade['entry'], trade['exit'], trade['pnl'], trade['fees'])
+
+        return closed
+
+    def _position(self, exchange: str, symbol: str, strategy: str, contract_size: float) -> dict:
+
+        row = self._db.execute('SELECT * FROM positions WHERE exchange = ? AND symbol = ?', (exchange, symbol)).fetchone()
+        if row is not None:
+            position = dict(row)
+            position['strategy'] = strategy if strategy is not None else position['strategy']
+            position['contract_size'] = contract_size if contract_size is not None else position['contract_size']
+            return position
+
+        position = { c: 0.0 for c in POSITION_COLUMNS }
+        position.update({ 'exchange': exchange, 'symbol': symbol, 'strategy': strategy,
+                          'contract_size': contract_size if contract_size is not None else 1.0, 'opened': None })
+        return position
+
+    # one fill on the position (signed size, short < 0), returns the trade it closed
+    def _apply(self, position: dict, fill: dict) -> dict:
+
+        price = float(fill['price'])
+        amount = float(fill['amount'])
+        fee = float((fill.get('fee') or {}).get('cost') or 0)
+        direction = 1 if fill['side'] == 'buy' else -1
+        size = position['size']
+        trade = None
+
+        position['total_fees'] += fee
+
+        if abs(size) < EPSILON or math.copysign(1, size) == direction:
+            # opens or adds to the position
+            if abs(size) < EPSILON:
+                self._open(position, fill['timestamp'])
+            position['entry'] = (position['entry'] * abs(size) + price * amount) / (abs(size) + amount)
+            position['size'] = size + direction * amount
+            position['max_size'] = max(position['max_size'], abs(position['size']))
+            position['fees'] += fee
+            return None
+
+        # reduces the position, a rest of the fill flips it
+        closing = min(amount, abs(size))
+        pnl = (price - position['entry']) * closing * position['contract_size'] * (1 if size > 0 else -1)
+        closing_fee = fee * closing / amount
+
+        position['pnl'] += pnl
+        position['realized'] += pnl
+        position['fees'] += closing_fee
+        position['exit_amount'] += closing
+        position['exit_value'] += price * closing
+        position['size'] = size + direction * closing
+
+        if abs(position['size']) < EPSILON:
+            trade = { 'exchange': position['exchange'], 'symbol': position['symbol'], 'strategy': position['strategy'],
+                      'long': size > 0, 'size': position['max_size'], 'entry': position['entry'],
+                      'exit': position['exit_value'] / position['exit_amount'], 'pnl': position['pnl'],
+                      'fees': position['fees'], 'opened': position['opened'], 'closed': int(fill['timestamp']) }
+            self._open(position, None)
+            position['entry'] = 0.0
+
+            if amount > closing:
+                self._open(position, fill['timestamp'])
+                position['entry'] = price
+                position['size'] = direction * (amount - closing)
+                position['max_size'] = amount - closing
+                position['fees'] = fee - closing_fee
+
+        return trade
+
+    def _open(self, position: dict, timestamp: int):
+
+        position.update({ 'size': 0.0, 'opened': timestamp, 'max_size': 0.0, 'exit_amount': 0.0,
+                          'exit_value': 0.0, 'pnl': 0.0, 'fees': 0.0 })
+
+    def _close(self, trade: dict):
+
+        net = trade['pnl'] - trade['fees']
+
+        cursor = self._db.execute('INSERT INTO trades (exchange, symbol, strategy, long, size, entry, exit, pnl, fees, opened, closed) '
+                                  'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                  (trade['exchange'], trade['symbol'], trade['strategy'], int(trade['long']), trade['size'],
+                                   trade['entry'], trade['exit'], trade['pnl'], trade['fees'], trade['opened'], trade['closed']))
+        trade['id'] = cursor.lastrowid
+
+        self._db.execute('INSERT INTO strategies (strategy, trades, wins, losses, pnl, fees, best, worst) VALUES (?, 1, ?, ?, ?, ?, ?, ?) '
+                         'ON CONFLICT (strategy) DO UPDATE SET trades = trades + 1, wins = wins + excluded.wins, '
+                         'losses = losses + excluded.losses, pnl = pnl + excluded.pnl, fees = fees + excluded.fees, '
+                         'best = max(best, excluded.best), worst = min(worst, excluded.worst)',
+                         (trade['strategy'] or '', int(net > 0), int(net <= 0), trade['pnl'], trade['fees'], net, net))
+
+    # --- reporting, without requests to the exchange ---
+
+    def position(self, exchange: str, symbol: str) -> dict:
+
+        with self._lock:
+            row = self._db.execute('SELECT * FROM positions WHERE exchange = ? AND symbol = ?', (exchange, symbol)).fetchone()
+        return dict(row) if row is not None else None
+
+    def unrealized(self, exchange: str, symbol: str, price: float) -> float:
+
+        position = self.position(exchange, symbol)
+        if position is None or abs(position['size']) < EPSILON:
+            return 0.0
+
+        return (price - position['entry']) * position['size'] * position['contract_size']
+
+    # realized pnl and fees of all fills of a symbol (or all symbols)
+    def realized(self, exchange: str = None, symbol: str = None) -> dict:
+
+        with self._lock:
+            row = self._db.execute('SELECT coalesce(sum(realized), 0) AS pnl, coalesce(sum(total_fees), 0) AS fees FROM positions '
+                                   'WHERE (? IS NULL OR exchange = ?) AND (? IS NULL OR symbol = ?)',
+                                   (exchange, exchange, symbol, symbol)).fetchone()
+        return { 'pnl': row['pnl'], 'fees': row['fees'], 'net': row['pnl'] - row['fees'] }
+
+    # closed trades, the last ones first
+    def trades(self, exchange: str = None, symbol: str = None, strategy: str = None, limit: int = 100) -> list:
+
+        with self._lock:
+            rows = self._db.execute('SELECT * FROM trades WHERE (? IS NULL OR exchange = ?) AND (? IS NULL OR symbol = ?) '
+                                    'AND (? IS NULL OR strategy = ?) ORDER BY closed DESC, id DESC LIMIT ?',
+                                    (exchange, exchange, symbol, symbol, strategy, strategy, limit)).fetchall()
+        return [ dict(r, long=bool(r['long'])) for r in rows ]
+
+    def last_trade(self, exchange: str, symbol: str) -> dict:
+
+        trades = self.trades(exchange, symbol, limit=1)
+        return trades[0] if len(trades) > 0 else None
+
+    # stats per strategy (net pnl is after fees)
+    def stats(self, strategy: str = None) -> dict:
+
+        with self._lock:
+            rows = self._db.execute('SELECT * FROM strategies WHERE ? IS NULL OR strategy = ?', (strategy, strategy)).fetchall()
+
+        stats = {}
+        for r in rows:
+            net = r['pnl'] - r['fees']
+            stats[r['strategy']] = { 'trades': r['trades'], 'wins': r['wins'], 'losses': r['losses'],
+                                     'win_rate': r['wins'] / r['trades'], 'pnl': r['pnl'], 'fees': r['fees'],
+                                     'net': net, 'avg_net': net / r['trades'], 'best': r['best'], 'worst': r['worst'] }
+        return stats
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(prog='python -m botlib.ledger')
+    parser.add_argument('--path', default='data_dir/ledger.db', help='sqlite file of the ledger')
+    parser.add_argument('--trades', type=int, default=10, help='number of the last trades')
+    args = parser.parse_args()
+
+    ledger = TradeLedger(args.path)
+
+    for strategy, s in ledger.stats().items():
+        print(f"{strategy or '-':30s} trades {s['trades']:5d}  win rate {s['win_rate']:6.1%}  "
+              f"pnl {s['pnl']:12.4f}  fees {s['fees']:10.4f}  net {s['net']:12.4f}  best {s['best']:10.4f}  worst {s['worst']:10.4f}")
+
+    for t in ledger.trades(limit=args.trades):
+        print(f"{t['symbol']:20s} {'long ' if t['long'] else 'short'} size {t['size']:10.4f}  entry {t['entry']:12.4f}  "
+              f"exit {t['exit']:12.4f}  pnl {t['pnl']:12.4f}  fees {t['fees']:10.4f}")
+
+    ledger.close()
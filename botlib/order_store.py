@@ -0,0 +1,213 @@
+import logging
+
+from base import BaseClass
+from .price_levels import PriceLevelIndex
+
+logger = logging.getLogger(__name__)
+
+# changes of the own open orders
+NEW = 'new'
+FILLED = 'filled'          # (partially) filled, still open or closed
+CANCELLED = 'cancelled'
+AMENDED = 'amended'        # price, stop price or amount changed
+CLOSED = 'closed'          # vanished from the open orders (polling), filled or cancelled
+
+CHANGE_TYPES = [ NEW, FILLED, CANCELLED, AMENDED, CLOSED ]
+
+class OrderStore(BaseClass):
+
+    # the open orders of a bot with the indexes the bot needs, updated with
+    # the differences instead of being rebuilt on every tick:
+    #  - sync(open_orders) with the result of a fetch_open_orders (polling)
+    #  - apply(order) with a single order update of a stream
+    # both return the changes (dicts with type, order and previous order) and
+    # pass them to the listeners. Limit orders are indexed by price and id per
+    # side, stop orders (type 'Stop') by stop price and id per side, the price
+    # indexes are PriceLevelIndex with the tick size of the market. The index
+    # dicts are never replaced, so references to them stay valid.
+
+    def __init__(self, symbol: str, tick_size: float = None):
+
+        self._symbol: str = symbol
+
+        self._orders: dict = {}
+
+        self.limit_by_price: dict = { 'sell': PriceLevelIndex(tick_size), 'buy': PriceLevelIndex(tick_size) }
+        self.limit_by_id: dict = { 'sell': {}, 'buy': {} }
+        self.stop_by_price: dict = { 'sell': PriceLevelIndex(tick_size), 'buy': PriceLevelIndex(tick_size) }
+        self.stop_by_id: dict = { 'sell': {}, 'buy': {} }
+
+        self._listeners: list = []
+        self._last_changes: list = []
+
+    @property
+    def symbol(self) -> str:
+        return self._symbol
+
+    @property
+    def orders(self) -> dict:
+        return self._orders
+
+    # changes of the last sync or apply
+    @property
+    def last_changes(self) -> list:
+        return self._last_changes
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def __contains__(self, order_id) -> bool:
+        return order_id in self._orders
+
+    def get(self, order_id: str) -> dict:
+        return self._orders.get(order_id)
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    # limit orders of a side in the order they were seen
+    def limit_orders(self, side: str) -> list:
+        return list(self.limit_by_id[side].values())
+
+    # stop orders of a side in the order they were seen
+    def stop_orders(self, side: str) -> list:
+        return list(self.stop_by_id[side].values())
+
+    def _indexes(self, order: dict) -> tuple:
+
+        side = order.get('side')
+        if side not in ('buy', 'sell'):
+            return None
+
+        if order.get('type') == 'limit':
+            return self.limit_by_price[side], self.limit_by_id[side], order.get('price')
+
+        if order.get('type') == 'Stop':
+            return self.stop_by_price[side], self.stop_by_id[side], order.get('stopPrice')
+
+        return None
+
+    def _add(self, order: dict):
+
+        self._orders[order['id']] = order
+        indexes = self._indexes(order)
+        if indexes is not None:
+            by_price, by_id, price = indexes
+            if price is not None:
+                by_price.add(price, order)
+            by_id[order['id']] = order
+
+    def _remove(self, order: dict):
+
+        self._orders.pop(order['id'], None)
+        indexes = self._indexes(order)
+        if indexes is not None:
+            by_price, by_id, price = indexes
+            if price is not None:
+                by_price.remove(price, order['id'])
+            by_id.pop(order['id'], None)
+
+    @staticmethod
+    def _change(type: str, order: dict, previous: dict = None) -> dict:
+        return { 'type': type, 'order': order, 'previous': previous }
+
+    def _diff(self, order: dict, previous: dict) -> list:
+
+        changes = []
+
+        if (order.get('filled') or 0) != (previous.get('filled') or 0):
+            changes.append(self._change(FILLED, order, previous))
+
+        if (order.get('price'), order.get('stopPrice'), order.get('amount')) != (previous.get('price'), previous.get('stopPrice'), previous.get('amount')):
+            changes.append(self._change(AMENDED, order, previous))
+
+        return changes
+
+    def _update(self, order: dict, previous: dict):
+
+        self._remove(previous)
+        self._add(order)
+
+    def _notify(self, changes: list) -> list:
+
+        self._last_changes = changes
+
+        # the changes are only formatted if they are logged
+        if len(changes) > 0 and logger.isEnabledFor(logging.DEBUG):
+            logger.debug('(%s._notify) symbol %s: Order changes: %s', self.class_name(), self._symbol,
+                         [ (c['type'], c['order']['id']) for c in changes ])
+
+        for listener in list(self._listeners):
+            for change in changes:
+                listener(change)
+
+        return changes
+
+    # the open orders of a fetch_open_orders - returns the changes
+    def sync(self, open_orders: list) -> list:
+
+        changes = []
+        seen = set()
+
+        for order in open_orders:
+            seen.add(order['id'])
+            previous = self._orders.get(order['id'])
+
+            if previous is None:
+                self._add(order)
+                changes.append(self._change(NEW, order))
+
+            elif order is not previous:
+                changes += self._diff(order, previous)
+                self._update(order, previous)
+
+        for order_id in [ id for id in self._orders if id not in seen ]:
+            previous = self._orders[order_id]
+            self._remove(previous)
+            changes.append(self._change(CLOSED, previous, previous))
+
+        return self._notify(changes)
+
+    # a single order update (ccxt order structure with status) - returns the changes
+    def apply(self, order: dict) -> list:
+
+        previous = self._orders.get(order['id'])
+        status = order.get('status', 'open')
+        changes = []
+
+        if status == 'open':
+            if previous is None:
+                changes.append(self._change(NEW, order))
+                if (order.get('filled') or 0) > 0:
+                    changes.append(self._change(FILLED, order))
+                self._add(order)
+            else:
+                changes += self._diff(order, previous)
+                self._update(order, previous)
+
+        elif previous is not None:
+            self._remove(previous)
+            if (order.get('filled') or 0) != (previous.get('filled') or 0) or status == 'closed':
+                changes.append(self._change(FILLED, order, previous))
+            if status != 'closed':
+                changes.append(self._change(CANCELLED, order, previous))
+
+        return self._notify(changes)
+
+    # an order cancelled by the bot itself, removed from all indexes at once
+    # instead of waiting for the next sync - returns the changes
+    def remove(self, order_id: str) -> list:
+
+        previous = self._orders.get(order_id)
+        if previous is None:
+            return self._notify([])
+
+        self._remove(previous)
+        return self._notify([ self._change(CANCELLED, previous, previous) ])
+
+    def clear(self) -> list:
+        return self.sync([])
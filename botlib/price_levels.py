@@ -0,0 +1,95 @@
+import bisect
+
+from base import BaseClass
+
+class PriceLevelIndex(BaseClass):
+
+    # orders by price level, the level of a price is its integer number of ticks,
+    # so prices computed in different ways (e.g. by an order model and by
+    # price_to_precision) find the same level. A level holds any number of
+    # orders, the sorted levels allow nearest level and range queries.
+
+    def __init__(self, tick_size: float = None):
+
+        # without a tick size float noise is still removed
+        self._tick_size: float = tick_size if tick_size else 1e-8
+
+        # ticks -> { order id: order }
+        self._levels: dict = {}
+        self._sorted: list = []
+
+    @property
+    def tick_size(self) -> float:
+        return self._tick_size
+
+    def ticks(self, price: float) -> int:
+        return int(round(price / self._tick_size))
+
+    def price(self, ticks: int) -> float:
+        return round(ticks * self._tick_size, 12)
+
+    def __len__(self) -> int:
+        return sum(len(orders) for orders in self._levels.values())
+
+    def __contains__(self, price: float) -> bool:
+        return price is not None and self.ticks(price) in self._levels
+
+    def add(self, price: float, order: dict):
+
+        level = self.ticks(price)
+        if level not in self._levels:
+            self._levels[level] = {}
+            bisect.insort(self._sorted, level)
+
+        self._levels[level][order['id']] = order
+
+    def remove(self, price: float, order_id: str):
+
+        level = self.ticks(price)
+        orders = self._levels.get(level)
+        if orders is None:
+            return
+
+        orders.pop(order_id, None)
+        if len(orders) == 0:
+            del self._levels[level]
+            self._sorted.pop(bisect.bisect_left(self._sorted, level))
+
+    # the orders at the level of price
+    def get(self, price: float) -> list:
+
+        if price is None:
+            return []
+
+        return list(self._levels.get(self.ticks(price), {}).values())
+
+    # price and orders of the level nearest to price, within max_ticks if given
+    def nearest(self, price: float, max_ticks: int = None) -> tuple:
+
+        if len(self._sorted) == 0:
+            return None, []
+
+        level = self.ticks(price)
+        i = bisect.bisect_left(self._sorted, level)
+        candidates = self._sorted[max(i - 1, 0):i + 1]
+        nearest = min(candidates, key=lambda l: abs(l - level))
+
+        if max_ticks is not None and abs(nearest - level) > max_ticks:
+            return None, []
+
+        return self.price(nearest), list(self._levels[nearest].values())
+
+    # all orders with a price between low and high (inclusive), by price
+    def range(self, low: float, high: float) -> list:
+
+        start = bisect.bisect_left(self._sorted, self.ticks(low))
+        end = bisect.bisect_right(self._sorted, self.ticks(high))
+
+        return [ o for level in self._sorted[start:end] for o in self._levels[level].values() ]
+
+    def levels(self) -> list:
+        return [ self.price(level) for level in self._sorted ]
+
+    def clear(self):
+        self._levels = {}
+        self._sorted = []
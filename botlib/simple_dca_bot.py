@@ -6,6 +6,8 @@ from order_models import DCAOrderModel
 from exchange_adapters import ExchangeAdapter
 from signal_generators import ExtendedSignalGenerator
 
+logger = logging.getLogger(__name__)
+
 # import pprint
 # pp = pprint.PrettyPrinter(indent=4)
 
@@ -64,14 +66,29 @@ class SimpleDCABot(BaseBot):
     def min_roe(self, value):
         self._min_roe = value
 
+    def get_state(self) -> dict:
+
+        state = super().get_state()
+        state['models'] = { 'long': self._dca_model_long.get_state(), 'short': self._dca_model_short.get_state() }
+        return state
+
+    def set_state(self, state: dict):
+
+        super().set_state(state)
+        models = state.get('models', {})
+        if 'long' in models:
+            self._dca_model_long.set_state(models['long'])
+        if 'short' in models:
+            self._dca_model_short.set_state(models['short'])
+
     def housekeeping_handler(self):
 
         # the parent class takes care for stop loss and take profit orders
         super().housekeeping_handler()
 
-        log_prefix = f"({self.class_name()}.housekeeping) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('housekeeping')
 
-        logging.info(f'{log_prefix} Cancel current DCA Orders ... ')
+        logger.info('%s Cancel current DCA Orders ... ', log_prefix)
         try:
             
             if self._not_trading == False:
@@ -83,9 +100,9 @@ class SimpleDCABot(BaseBot):
                     self.cancel_orders_based_on_model(self._dca_model_short.model_df)
                         
         except Exception as e:
-            logging.exception(f'{log_prefix} WARN: Could not cancel existing DCA orders')
+            logger.exception('%s WARN: Could not cancel existing DCA orders', log_prefix)
         else:
-            logging.info(f'{log_prefix} Success Current DCA Orders canceled... ')
+            logger.info('%s Success Current DCA Orders canceled... ', log_prefix)
             self._dca_model_long.remove_df_file()
             self._dca_model_short.remove_df_file()
             self._dca_model_long.model_df = None
@@ -107,20 +124,21 @@ class SimpleDCABot(BaseBot):
                 self._ea.cancel_order_based_on_model(o)
 
     def preparation_handler(self):
-        log_prefix=f"({self.class_name()}.preparation_handler) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('preparation_handler')
 
-        logging.debug(f'{log_prefix} Prepare to run the main loop')
+        logger.debug('%s Prepare to run the main loop', log_prefix)
         self.leverage = self._ea.set_leverage_for_symbol(self.symbol, 50)
-        logging.info(f'{log_prefix} Leverage is now {self.leverage}')
+        logger.info('%s Leverage is now %s', log_prefix, self.leverage)
 
     def restore_handler(self):
         
-        log_prefix = f"({self.class_name()}.restore_handler) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('restore_handler')
         
         # TODO - Find order with the longest delta (max aks, min bid) and use this order as id
-        # TODO - Dont query the _open_sl_orders_[long|short] lists directly
-        sl_order_bid = self._open_sl_orders_long[0] if len(self._open_sl_orders_long) > 0 else None
-        sl_order_ask = self._open_sl_orders_short[0] if len(self._open_sl_orders_short) > 0 else None
+        sl_orders_long = self.open_stop_orders('sell')
+        sl_orders_short = self.open_stop_orders('buy')
+        sl_order_bid = sl_orders_long[0] if len(sl_orders_long) > 0 else None
+        sl_order_ask = sl_orders_short[0] if len(sl_orders_short) > 0 else None
         self._was_restored = False
 
         # RESTORE
@@ -128,24 +146,24 @@ class SimpleDCABot(BaseBot):
         if self._dca_model_long.model_df is None:
             if sl_order_bid is not None:
                 o_id = sl_order_bid['id']
-                logging.info(f'{log_prefix} Have an open sl_order_bid {o_id} ... restoring df ...')
+                logger.info('%s Have an open sl_order_bid %s ... restoring df ...', log_prefix, o_id)
                 self._dca_model_long.restore_df(o_id)
                 self._was_restored = True
         else:
-            logging.debug(f'{log_prefix} Have an existing long model from previous run...')
+            logger.debug('%s Have an existing long model from previous run...', log_prefix)
 
         if self._dca_model_short.model_df is None:
             if sl_order_ask is not None:
                 o_id = sl_order_ask['id']
-                logging.info(f'{log_prefix} Have an open sl_order_ask {o_id} ... restoring df ...')
+                logger.info('%s Have an open sl_order_ask %s ... restoring df ...', log_prefix, o_id)
                 self._dca_model_short.restore_df(o_id)
                 self._was_restored = True
         else:
-            logging.debug(f'{log_prefix} Have an existing short model from previous run...')
+            logger.debug('%s Have an existing short model from previous run...', log_prefix)
         
         
     def exit_position_handler(self):
-        log_prefix = f"({self.class_name()}.exit_position_handler) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('exit_position_handler')
         
         exit_signal = False
         
@@ -156,7 +174,7 @@ class SimpleDCABot(BaseBot):
         if self._current_long == True:
             long_short = "long"
             model = self._dca_model_long
-            logging.debug(f'{log_prefix} {long_short} Exit signal? {signal}')
+            logger.debug('%s %s Exit signal? %s', log_prefix, long_short, signal)
             if 'sell' in signal and not 'buy' in signal:
                 self.maintain_tp_order(ask)
                 exit_signal = True
@@ -165,7 +183,7 @@ class SimpleDCABot(BaseBot):
         else:
             long_short = "short"
             model = self._dca_model_short
-            logging.debug(f'{log_prefix} {long_short} Exit signal? {signal}')
+            logger.debug('%s %s Exit signal? %s', log_prefix, long_short, signal)
             if 'buy' in signal and not 'sell' in signal:
                 self.maintain_tp_order(bid)
                 exit_signal = True
@@ -174,19 +192,21 @@ class SimpleDCABot(BaseBot):
         if not exit_signal:
             # MAINTAIN TRAILING SL TO TAKE MININUM PROFIT
             [trig_price, tr_value] = model.get_trsl_price_value(self._current_size)
-            logging.debug(f'{log_prefix} {long_short} Trailing stop loss will be triggered at {trig_price} with trail value of {tr_value}')
+            logger.debug('%s %s Trailing stop loss will be triggered at %s with trail value of %s', log_prefix, long_short, trig_price, tr_value)
             
             self.maintain_trail_sl(trigger_price=trig_price, trail_value=tr_value)
         
         if self._exiting:
-            logging.info(f'{log_prefix} Exiting the {long_short} position at {self._entryPrice} with size {self._current_size}')
+            logger.info('%s Exiting the %s position at %s with size %s', log_prefix, long_short, self._entryPrice, self._current_size)
             
 
     def inposition_handler(self):
-        log_prefix = f"({self.class_name()}.inposition_handler) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('inposition_handler')
         
-        logging.debug(f'{log_prefix} I am in a position (1): current_size: {self._current_size}, long: {self._current_long}, entryPrice: {self._entryPrice}, leverage {self._position_leverage}')
-        logging.debug(f'{log_prefix} I am in a position (2): last_tp_order_id: {self._last_tp_order_id}, last_sl_order_id: {self._last_sl_order_id}')
+        logger.debug('%s I am in a position (1): current_size: %s, long: %s, entryPrice: %s, leverage %s',
+                     log_prefix, self._current_size, self._current_long, self._entryPrice, self._position_leverage)
+        logger.debug('%s I am in a position (2): last_tp_order_id: %s, last_sl_order_id: %s',
+                     log_prefix, self._last_tp_order_id, self._last_sl_order_id)
 
         # CLEAN UP OPPOSITE ORDERS
         # point to the right model and clean up the opposite side, this is not a grid bot
@@ -197,7 +217,7 @@ class SimpleDCABot(BaseBot):
 
             # clean up the short side if needed
             if self._dca_model_short.model_df is not None:
-                logging.info(f'{log_prefix} I entered a long position ... cleaning up opposite sell orders ...')
+                logger.info('%s I entered a long position ... cleaning up opposite sell orders ...', log_prefix)
                 self.cancel_orders_based_on_model(self._dca_model_short.model_df)
                 self._dca_model_short.model_df = None
 
@@ -208,11 +228,11 @@ class SimpleDCABot(BaseBot):
 
             # clean up the long side if needed
             if self._dca_model_long.model_df is not None:
-                logging.info(f'{log_prefix} I entered a short position ... cleaning up opposite buy orders ...')
+                logger.info('%s I entered a short position ... cleaning up opposite buy orders ...', log_prefix)
                 self.cancel_orders_based_on_model(self._dca_model_long.model_df)
                 self._dca_model_long.model_df = None
         else:
-            logging.warning(f'{log_prefix} WARN 1: SOMETHING WRONG IN MMR FUNCTION +++')
+            logger.warning('%s WARN 1: SOMETHING WRONG IN MMR FUNCTION +++', log_prefix)
             raise
 
         # ONLY OVERRIDE IF THE MODEL WAS RESTORED FROM FILE
@@ -242,14 +262,18 @@ class SimpleDCABot(BaseBot):
 
         # PRINT INFO
         if self._open_position_bool and self._current_size != self._last_position_size:
-            logging.info(f'{log_prefix} I am in a {long_short} position at {self._entryPrice} with size {self._current_size}, take profit at {limit_tp} and stop loss at {limit_sl}')
+            logger.info('%s I am in a %s position at %s with size %s, take profit at %s and stop loss at %s', log_prefix, long_short, self._entryPrice, self._current_size, limit_tp, limit_sl)
     
 
     def finishtrade_handler(self):
 
         super().finishtrade_handler()
 
-        log_prefix=f"({self.class_name()}.finishtrade_handler) symbol {self.symbol}:"
+        # the ledger reported the pnl of the trade
+        if self._ledger is not None:
+            return
+
+        log_prefix = self.log_prefix('finishtrade_handler')
 
         r_pnl = 0
         chk_tp_order = None
@@ -261,10 +285,10 @@ class SimpleDCABot(BaseBot):
             if self.last_sl_order_id is not None:
                 chk_sl_order = self._ea.fetch_order(self.symbol, self.last_sl_order_id)
         except Exception as err:
-            logging.warning(f'{log_prefix} Cannot fetch order: {err} ...')    
+            logger.warning('%s Cannot fetch order: %s ...', log_prefix, err)    
         else:
             if chk_tp_order and chk_tp_order['status'] == 'closed':
-                logging.info(f'{log_prefix}: TAKE PROFIT ORDER GOT EXECUTED :-) ...')
+                logger.info('%s: TAKE PROFIT ORDER GOT EXECUTED :-) ...', log_prefix)
                 if self._last_current_long == True:
                     df = self._dca_model_long.model_df
                     r_pnl = df['r_pnl'].loc[ (df['tp_order_id'] == self._last_tp_order_id) ].values[0]
@@ -272,10 +296,10 @@ class SimpleDCABot(BaseBot):
                     df = self._dca_model_short.model_df
                     r_pnl = df['r_pnl'].loc[ (df['tp_order_id'] == self._last_tp_order_id) ].values[0]
                 else:
-                    logging.warning(f'{log_prefix}: Something wrong with {self._last_current_long} ...')
+                    logger.warning('%s: Something wrong with %s ...', log_prefix, self._last_current_long)
 
             elif chk_sl_order and chk_sl_order['status'] == 'closed':
-                logging.info(f'{log_prefix}: STOP LOSS ORDER GOT EXECUTED :-( ...')
+                logger.info('%s: STOP LOSS ORDER GOT EXECUTED :-( ...', log_prefix)
                 if self._last_current_long == True:
                     df = self._dca_model_long.model_df
                     r_pnl = df['r_pnl'].loc[ (df['order_id'] == self._last_sl_order_id) ].values[0]
@@ -283,20 +307,20 @@ class SimpleDCABot(BaseBot):
                     df = self._dca_model_short.model_df
                     r_pnl = df['r_pnl'].loc[ (df['order_id'] == self._last_sl_order_id) ].values[0]
                 else:
-                    logging.warning(f'{log_prefix}: Something wrong with {self._last_current_long} ...')
+                    logger.warning('%s: Something wrong with %s ...', log_prefix, self._last_current_long)
             else:
-                logging.warning(f'{log_prefix}: Something else has happend ...')
+                logger.warning('%s: Something else has happend ...', log_prefix)
 
             pl = "profit" if r_pnl > 0 else "loss"
             self._cum_pnl = self._cum_pnl + r_pnl
-            logging.info(f'{log_prefix}: Potential {pl} of last trade {r_pnl}. Cumulative PNL while running the bot: {self._cum_pnl}')
+            logger.info('%s: Potential %s of last trade %s. Cumulative PNL while running the bot: %s', log_prefix, pl, r_pnl, self._cum_pnl)
 
 
     def enter_position_handler(self):
         
-        log_prefix=f"({self.class_name()}.enter_position_handler) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('enter_position_handler')
 
-        logging.info(f'{log_prefix} I am not in a position - waiting for entry signals and new order checks!')
+        logger.info('%s I am not in a position - waiting for entry signals and new order checks!', log_prefix)
  
         try:
             # check balance
@@ -304,11 +328,11 @@ class SimpleDCABot(BaseBot):
             
         except Exception as e:
 
-            logging.warning(f'{log_prefix} ERROR: Could not check current balance ... retry next time')
+            logger.warning('%s ERROR: Could not check current balance ... retry next time', log_prefix)
 
         else:
             max_risk_per_trade = ( total_balance * self.max_account_risk_per_trade ) 
-            logging.info(f'{log_prefix} symbol {self.symbol} Total account balance: {total_balance} Max risk per trade: {max_risk_per_trade}')
+            logger.info('%s symbol %s Total account balance: %s Max risk per trade: %s', log_prefix, self.symbol, total_balance, max_risk_per_trade)
 
             try:
                 
@@ -317,7 +341,7 @@ class SimpleDCABot(BaseBot):
                 signal = self.signal(ask, bid)
 
             except Exception as e:
-                logging.warning(f'{log_prefix} WARN: Could not get bid ask price or signal')
+                logger.warning('%s WARN: Could not get bid ask price or signal', log_prefix)
                 return                
                 
             # creating the ask bid orders considering the trend (from strategy)
@@ -333,16 +357,14 @@ class SimpleDCABot(BaseBot):
                                                         min_roe=self.min_roe)
                 
                 if self._not_trading:
-                    logging.info(f'{log_prefix} NOT TRADING: DCA Model Order Dataframe for asks (simulation):')
-                    print(self._dca_model_short.model_df)
+                    logger.info('%s NOT TRADING: DCA Model Order Dataframe for asks (simulation):\n%s', log_prefix, self._dca_model_short.model_df)
                 else:
                     try:
                         self.create_orders_based_on_model(self._dca_model_short.model_df)
                     except:
-                        logging.warning(f'{log_prefix} WARN: Could not create sell orders')
+                        logger.warning('%s WARN: Could not create sell orders', log_prefix)
                     else:
-                        print(f'{log_prefix} DCA Model Order Dataframe for asks (executed):')
-                        print(self._dca_model_short.model_df)
+                        logger.info('%s DCA Model Order Dataframe for asks (executed):\n%s', log_prefix, self._dca_model_short.model_df)
                         self._dca_model_short.store_df()
 
             if 'buy' in signal:
@@ -357,16 +379,14 @@ class SimpleDCABot(BaseBot):
                                                        min_roe=self.min_roe)
 
                 if self._not_trading:
-                    logging.info(f'{log_prefix} NOT TRADING: DCA Model Order Dataframe for bids (simulation):')
-                    print(self._dca_model_long.model_df)
+                    logger.info('%s NOT TRADING: DCA Model Order Dataframe for bids (simulation):\n%s', log_prefix, self._dca_model_long.model_df)
                 else:
                     try:
                         self.create_orders_based_on_model(self._dca_model_long.model_df)
                     except:
-                        logging.warning(f'{log_prefix} WARN: Could not create buy orders')
+                        logger.warning('%s WARN: Could not create buy orders', log_prefix)
                     else:
-                        print(f'{log_prefix} DCA Model Order Dataframe for bids (executed):')
-                        print(self._dca_model_long.model_df)
+                        logger.info('%s DCA Model Order Dataframe for bids (executed):\n%s', log_prefix, self._dca_model_long.model_df)
                         self._dca_model_long.store_df()
 
 
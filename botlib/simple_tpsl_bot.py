@@ -5,6 +5,8 @@ from exchange_adapters import ExchangeAdapter
 from signal_generators import ExtendedSignalGenerator
 from order_models import FixedTPSLModel
 
+logger = logging.getLogger(__name__)
+
 # import pprint
 # pp = pprint.PrettyPrinter(indent=4)
 
@@ -49,48 +51,67 @@ class SimpleTPSLBot(BaseBot):
     def max_account_risk_per_trade(self, value):
         self._max_account_risk_per_trade = value
         
+    def get_state(self) -> dict:
+
+        state = super().get_state()
+        state['models'] = { 'long': self._long_model.get_state(), 'short': self._short_model.get_state() }
+        state['current_buy_order_id'] = self._current_buy_order_id
+        state['current_sell_order_id'] = self._current_sell_order_id
+        return state
+
+    def set_state(self, state: dict):
+
+        super().set_state(state)
+        models = state.get('models', {})
+        if 'long' in models:
+            self._long_model.set_state(models['long'])
+        if 'short' in models:
+            self._short_model.set_state(models['short'])
+        self._current_buy_order_id = state.get('current_buy_order_id')
+        self._current_sell_order_id = state.get('current_sell_order_id')
+
     def preparation_handler(self):
-        log_prefix=f"({self.class_name()}.preparation_handler) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('preparation_handler')
 
-        logging.debug(f'{log_prefix} Prepare to run the main loop')
+        logger.debug('%s Prepare to run the main loop', log_prefix)
         self.leverage = self._ea.set_leverage_for_symbol(self.symbol, self.leverage)
-        logging.info(f'{log_prefix} Leverage is now {self.leverage}')
+        logger.info('%s Leverage is now %s', log_prefix, self.leverage)
     
     def _cancel_current_buy(self):
         
-        log_prefix = f"({self.class_name()}._cancel_current_buy) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('_cancel_current_buy')
         
        
         if self._current_buy_order_id is not None:
 
             if self.matching_order_by_id(self._current_buy_order_id, 'limit', 'buy'):
 
-                logging.info(f'{log_prefix} Cancel current buy order {self._current_buy_order_id}')
+                logger.info('%s Cancel current buy order %s', log_prefix, self._current_buy_order_id)
                 
                 try:
                     self._ea.cancel_order(self._current_buy_order_id, self.symbol)
                 except Exception as e:
-                    logging.exception(f'{log_prefix} WARN: Could not cancel existing buy order {self._current_buy_order_id}')
+                    logger.exception('%s WARN: Could not cancel existing buy order %s', log_prefix, self._current_buy_order_id)
                 else:
-                    logging.info(f'{log_prefix} Current buy order {self._current_buy_order_id} cancelled')
+                    logger.info('%s Current buy order %s cancelled', log_prefix, self._current_buy_order_id)
                     self._current_buy_order_id = None
         
     def _cancel_current_sell(self):
         
-        log_prefix = f"({self.class_name()}._cancel_current_sell) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('_cancel_current_sell')
         
         if self._current_sell_order_id is not None:
 
             if self.matching_order_by_id(self._current_sell_order_id, 'limit', 'sell'):
 
-                logging.info(f'{log_prefix} Cancel current sell order {self._current_sell_order_id}')
+                logger.info('%s Cancel current sell order %s', log_prefix, self._current_sell_order_id)
                 
                 try:
                     self._ea.cancel_order(self._current_sell_order_id, self.symbol)
                 except Exception as e:
-                    logging.exception(f'{log_prefix} WARN: Could not cancel existing sell order {self._current_sell_order_id}')
+                    logger.exception('%s WARN: Could not cancel existing sell order %s', log_prefix, self._current_sell_order_id)
                 else:
-                    logging.info(f'{log_prefix} Current sell order {self._current_sell_order_id} cancelled')
+                    logger.info('%s Current sell order %s cancelled', log_prefix, self._current_sell_order_id)
                     self._current_sell_order_id = None
                 
 
@@ -98,7 +119,7 @@ class SimpleTPSLBot(BaseBot):
         
         
     def housekeeping_handler(self):
-        log_prefix = f"({self.class_name()}.housekeeping) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('housekeeping')
         
         super().housekeeping_handler()
         
@@ -108,7 +129,7 @@ class SimpleTPSLBot(BaseBot):
                     
         
     def inposition_handler(self):
-        log_prefix = f"({self.class_name()}.inposition_handler) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('inposition_handler')
         
         # only support long:
         if self._current_long == True:
@@ -127,7 +148,7 @@ class SimpleTPSLBot(BaseBot):
             
             # PRINT INFO
             if self._open_position_bool and self._current_size != self._last_position_size:
-                logging.info(f"""{log_prefix} I am in a {long_short} position at {self._entryPrice} with size {self._current_size}, take profit at {price_tp} and stop loss at {price_sl}""")
+                logger.info("%s I am in a %s position at %s with size %s, take profit at %s and stop loss at %s", log_prefix, long_short, self._entryPrice, self._current_size, price_tp, price_sl)
     
         if self._current_long == False:
             
@@ -145,32 +166,32 @@ class SimpleTPSLBot(BaseBot):
             
             # PRINT INFO
             if self._current_size != self._last_position_size:
-                logging.info(f"""{log_prefix} I am in a {long_short} position at {self._entryPrice} with size {self._current_size}, take profit at {price_tp} and stop loss at {price_sl}""")
+                logger.info("%s I am in a %s position at %s with size %s, take profit at %s and stop loss at %s", log_prefix, long_short, self._entryPrice, self._current_size, price_tp, price_sl)
                     
     def enter_position_handler(self):
         
-        log_prefix = f"({self.class_name()}.noposition_handler) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('noposition_handler')
 
-        logging.info(f'{log_prefix} I am not in a position - waiting for entry signals and new order checks!')
+        logger.info('%s I am not in a position - waiting for entry signals and new order checks!', log_prefix)
  
         try:
             # check balance
             total_balance = self._ea.get_total_balance()
         except Exception as e:
 
-            logging.exception(f'{log_prefix} ERROR: Could not check current balance')
+            logger.exception('%s ERROR: Could not check current balance', log_prefix)
             raise Exception(e)
 
         else:
             max_risk_per_trade = ( total_balance * self.max_account_risk_per_trade ) 
-            logging.info(f'{log_prefix} Total account balance: {total_balance} Max risk per trade: {max_risk_per_trade}')
+            logger.info('%s Total account balance: %s Max risk per trade: %s', log_prefix, total_balance, max_risk_per_trade)
 
             try:
                 [ask, bid] = self._ea.ask_bid(self.symbol)
                 signal = self.signal(ask, bid)
                 
             except Exception as e:
-                logging.exception(f'{log_prefix} WARN: Could not get bid ask price or signal')
+                logger.exception('%s WARN: Could not get bid ask price or signal', log_prefix)
                 return
 
             if 'buy' in signal:
@@ -182,15 +203,15 @@ class SimpleTPSLBot(BaseBot):
                     sl = self._long_model.get_sl_price_size(size, price)[0]
                     
                     if self._not_trading:
-                        logging.info(f'{log_prefix} NOT TRADING: Buy order of size: {size} at price: {price} would have been created - with fixed sl at {sl} and tp at {tp}')
+                        logger.info('%s NOT TRADING: Buy order of size: %s at price: %s would have been created - with fixed sl at %s and tp at %s', log_prefix, size, price, sl, tp)
                     else:
-                        logging.info(f'{log_prefix} Create Buy order of size: {size} at price: {price} created - with fixed sl at {sl} and tp at {tp}')
+                        logger.info('%s Create Buy order of size: %s at price: %s created - with fixed sl at %s and tp at %s', log_prefix, size, price, sl, tp)
                         order = self._ea.create_limit_buy_order(self.symbol, size=size, price=price)
                         self._current_buy_order_id = order['id']
-                        logging.info(f'{log_prefix} Buy order id: {self._current_buy_order_id}')
+                        logger.info('%s Buy order id: %s', log_prefix, self._current_buy_order_id)
                                     
                 except Exception as e:
-                    logging.exception(f'{log_prefix} WARN: Could not execute the buy order')
+                    logger.exception('%s WARN: Could not execute the buy order', log_prefix)
 
             if 'sell' in signal:
                 try:
@@ -202,19 +223,19 @@ class SimpleTPSLBot(BaseBot):
                     sl = self._short_model.get_sl_price_size(size, price)[0]
                     
                     if self._not_trading:
-                        logging.info(f'{log_prefix} NOT TRADING: Sell order of size: {size} at price: {price} would have been created - with fixed sl at {sl} and tp at {tp}')    
+                        logger.info('%s NOT TRADING: Sell order of size: %s at price: %s would have been created - with fixed sl at %s and tp at %s', log_prefix, size, price, sl, tp)    
                     else:
-                        logging.info(f'{log_prefix} Create Sell order of size: {size} at price: {price} created - with fixed sl at {sl} and tp at {tp}')
+                        logger.info('%s Create Sell order of size: %s at price: %s created - with fixed sl at %s and tp at %s', log_prefix, size, price, sl, tp)
                         order = self._ea.create_limit_sell_order(self.symbol, size=size, price=price)
                         self._current_sell_order_id = order['id']
-                        logging.info(f'{log_prefix} Sell order id: {self._current_sell_order_id}')
+                        logger.info('%s Sell order id: %s', log_prefix, self._current_sell_order_id)
                                     
                 except Exception as e:
-                    logging.exception(f'{log_prefix} WARN: Could not execute the sell order')
+                    logger.exception('%s WARN: Could not execute the sell order', log_prefix)
 
     def exit_position_handler(self):
         
-        log_prefix = f"({self.class_name()}.exit_position_handler) symbol {self.symbol}:"
+        log_prefix = self.log_prefix('exit_position_handler')
         
         exit_signal = False
         
@@ -225,7 +246,7 @@ class SimpleTPSLBot(BaseBot):
         if self._current_long == True:
             long_short = "long"
             model = self._long_model
-            logging.debug(f'{log_prefix} Long Exit signal? {signal}')
+            logger.debug('%s Long Exit signal? %s', log_prefix, signal)
             if 'sell' in signal and not 'buy' in signal:
                 self.maintain_tp_order(ask)
                 exit_signal = True
@@ -233,7 +254,7 @@ class SimpleTPSLBot(BaseBot):
         else:
             long_short = "short"
             model = self._short_model
-            logging.debug(f'{log_prefix} Short Exit signal? {signal}')
+            logger.debug('%s Short Exit signal? %s', log_prefix, signal)
             if 'buy' in signal and not 'sell' in signal:
                 self.maintain_tp_order(bid)
                 exit_signal = True
@@ -242,12 +263,12 @@ class SimpleTPSLBot(BaseBot):
         if not exit_signal:
             # MAINTAIN TRAILING SL TO TAKE MININUM PROFIT
             [trig_price, tr_value] = model.get_trsl_price_value(self._current_size, self._entryPrice)
-            logging.debug(f'{log_prefix} {long_short} Trailing stop loss will be triggered at {trig_price} with trail value of {tr_value}')
+            logger.debug('%s %s Trailing stop loss will be triggered at %s with trail value of %s', log_prefix, long_short, trig_price, tr_value)
             
             self.maintain_trail_sl(trigger_price=trig_price, trail_value=tr_value)
         
         if self._exiting:
-            logging.info(f'{log_prefix} Exiting the {long_short} position at {self._entryPrice} with size {self._current_size}')
+            logger.info('%s Exiting the %s position at %s with size %s', log_prefix, long_short, self._entryPrice, self._current_size)
             
 
     
@@ -0,0 +1,113 @@
+import json
+import logging
+import os
+
+from base import BaseClass
+from base import Clock
+from base import system_clock
+
+logger = logging.getLogger(__name__)
+
+STATE_VERSION = 1
+
+class StateStore(BaseClass):
+
+    # snapshots of the runtime state of a bot (see BaseBot.get_state) in a local
+    # JSON file, so a restarted bot resumes from it instead of inferring its
+    # state from the exchange:
+    #  - save writes at most every interval seconds (force for the shutdown)
+    #    and only if the state changed
+    #  - the file is replaced atomically (written to a temporary file first and
+    #    moved with os.replace), a crash never leaves a half written snapshot
+
+    def __init__(self, path: str, interval: float = 10.0, clock: Clock = None):
+
+        self._path: str = path
+        self._interval: int = int(interval * 1000)
+        self._clock: Clock = clock if clock is not None else system_clock
+
+        self._next_save: int = 0
+        self._last_data: str = None
+        self._saves: int = 0
+
+        directory = os.path.dirname(path)
+        if directory != '':
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def interval(self) -> float:
+        return self._interval / 1000
+
+    @interval.setter
+    def interval(self, value: float):
+        self._interval = int(value * 1000)
+
+    @property
+    def saves(self) -> int:
+        return self._saves
+
+    def is_due(self, timestamp: int = None) -> bool:
+        return (timestamp if timestamp is not None else self._clock.ms()) >= self._next_save
+
+    # returns True if the snapshot was written
+    def save(self, state: dict, force: bool = False) -> bool:
+        log_prefix = f"({self.class_name()}.save) path {self._path}:"
+
+        timestamp = self._clock.ms()
+        if not force and not self.is_due(timestamp):
+            return False
+
+        self._next_save = timestamp + self._interval
+
+        data = json.dumps(state, separators=(',', ':'), sort_keys=True, default=str)
+        if data == self._last_data:
+            return False
+
+        snapshot = json.dumps({ 'version': STATE_VERSION, 'saved': timestamp, 'state': state },
+                              separators=(',', ':'), sort_keys=True, default=str)
+
+        tmp = f'{self._path}.tmp'
+        try:
+            with open(tmp, 'w') as f:
+                f.write(snapshot)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self._path)
+        except OSError as e:
+            logger.warning('%s WARN: Could not save the state snapshot: %s', log_prefix, e)
+            return False
+
+        self._last_data = data
+        self._saves += 1
+        return True
+
+    # the state of the last snapshot, None if there is none or it is unreadable
+    def load(self) -> dict:
+        log_prefix = f"({self.class_name()}.load) path {self._path}:"
+
+        if not os.path.exists(self._path):
+            return None
+
+        try:
+            with open(self._path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning('%s WARN: Could not read the state snapshot: %s', log_prefix, e)
+            return None
+
+        if snapshot.get('version') != STATE_VERSION:
+            logger.warning("%s WARN: Snapshot version %s is not %s - ignored", log_prefix, snapshot.get('version'), STATE_VERSION)
+            return None
+
+        logger.info("%s Loaded the state snapshot of %s", log_prefix, snapshot['saved'])
+        return snapshot['state']
+
+    def clear(self):
+
+        if os.path.exists(self._path):
+            os.remove(self._path)
+        self._last_data = None
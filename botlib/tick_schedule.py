@@ -0,0 +1,83 @@
+from base import BaseClass
+
+# the states of a bot for the tick schedule
+FLAT = 'flat'            # no position and no open orders, waiting for the entry refresh
+ORDERS = 'orders'        # no position, resting entry orders
+IN_POSITION = 'position' # in a position with tp, sl, trailing stop or dca orders
+
+STATES = [ FLAT, ORDERS, IN_POSITION ]
+
+# min and max interval in seconds per state
+DEFAULT_INTERVALS = {
+    FLAT: (3.0, 30.0),
+    ORDERS: (1.0, 10.0),
+    IN_POSITION: (0.5, 5.0),
+}
+
+class TickSchedule(BaseClass):
+
+    # adaptive tick interval of the main loop instead of the fixed ticks:
+    #  - per state a min and a max interval in seconds
+    #  - the price at a relative distance of at most near to the closest
+    #    critical level (sl, tp, trailing stop trigger or price, the next dca
+    #    order) ticks with the min interval, from far on with the max interval
+    #    and linear in between
+    #  - without a position the bot sleeps until the entry refresh is due
+    #    (refresh_timeout), at most the max interval of the state
+    # The intervals chosen are counted per state (see stats).
+
+    def __init__(self, intervals: dict = None, near: float = 0.002, far: float = 0.01):
+
+        if near >= far:
+            raise ValueError(f'({self.class_name()}.__init__) near {near} must be below far {far}')
+
+        self._intervals: dict = dict(DEFAULT_INTERVALS, **(intervals or {}))
+        self._near: float = near
+        self._far: float = far
+
+        self._ticks: dict = { state: 0 for state in STATES }
+        self._seconds: dict = { state: 0.0 for state in STATES }
+
+    @property
+    def intervals(self) -> dict:
+        return self._intervals
+
+    @property
+    def near(self) -> float:
+        return self._near
+
+    @property
+    def far(self) -> float:
+        return self._far
+
+    # relative distance of the price to the closest level, None without levels
+    @staticmethod
+    def distance(price: float, levels: list) -> float:
+
+        distances = [ abs(level - price) / price for level in levels if level ]
+        return min(distances) if len(distances) > 0 and price else None
+
+    def interval(self, state: str, price: float = None, levels: list = None, until_refresh: float = None) -> float:
+
+        [ low, high ] = self._intervals[state]
+        distance = self.distance(price, levels or [])
+
+        if state == FLAT or distance is None or distance >= self._far:
+            interval = high
+        elif distance <= self._near:
+            interval = low
+        else:
+            interval = low + (high - low) * (distance - self._near) / (self._far - self._near)
+
+        # the entry refresh is not delayed
+        if state != IN_POSITION and until_refresh is not None:
+            interval = min(interval, max(until_refresh, low))
+
+        self._ticks[state] += 1
+        self._seconds[state] += interval
+
+        return interval
+
+    def stats(self) -> dict:
+        return { state: { 'ticks': self._ticks[state], 'mean': self._seconds[state] / self._ticks[state] }
+                 for state in STATES if self._ticks[state] > 0 }
@@ -0,0 +1,246 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from base import BaseClass
+from .events import ExchangeListener
+from .events import PollingWatcher
+from .events import PRICE
+
+logger = logging.getLogger(__name__)
+
+# one step of the trailing stop on a top of book: the stop follows the bid (ask
+# for shorts) at trail_value, once the bid reached the trigger price the stop
+# is triggered and an ask at or below it (bid at or above for shorts) exits -
+# returns triggered, the new stop price and the exit price (None to stay in)
+def trail_step(long: bool, trigger_price: float, trail_value: float, triggered: bool, stop_price: float,
+               ask: float, bid: float) -> tuple:
+
+    exit_price = None
+
+    if long == True:
+
+        if bid >= trigger_price:
+            if not triggered:
+                stop_price = bid - trail_value # resetting
+            triggered = True
+
+        if stop_price:
+            if ask <= stop_price and triggered:
+                exit_price = ask
+            stop_price = max(bid - trail_value, stop_price)
+        else:
+            stop_price = bid - trail_value
+
+    else:
+
+        if ask <= trigger_price:
+            if not triggered:
+                stop_price = ask + trail_value # resetting
+            triggered = True
+
+        if stop_price:
+            if bid >= stop_price and triggered:
+                exit_price = bid
+            stop_price = min(ask + trail_value, stop_price)
+        else:
+            stop_price = ask + trail_value
+
+    return triggered, stop_price, exit_price
+
+class TrailingStopEngine(BaseClass):
+
+    # maintains the trailing stop of the position of a bot on every top of book
+    # update instead of once per main loop tick:
+    #  - the top of book comes from the sources (botlib.events), by default an
+    #    ExchangeListener if the exchange pushes tickers (SimulatedExchange,
+    #    StreamingAdapter) or a PollingWatcher of the price every interval seconds
+    #  - the bot arms the engine with the trigger price and trail value of its
+    #    position in maintain_trail_sl, the trail state (triggered, stop price)
+    #    is kept for the position until it is closed (disarm)
+    #  - when the stop is hit the exit fires at once through maintain_tp_order
+    #    of the bot, under the lock of the bot so it does not interleave with
+    #    the order handling of the main cycle. While the top of book stays past
+    #    the stop the exit order is re-priced with every new exit price, an exit
+    #    which could not be placed is retried with the next top of book
+    # The reaction times (from the detection of a top of book to the end of
+    # its handling) are measured for all updates and for the exits.
+
+    def __init__(self, bot, interval: float = 0.2, sources: list = None):
+
+        self._bot = bot
+        self._ea = bot._ea
+        self._symbol: str = bot.symbol
+        self._interval: float = interval
+        self._sources: list = sources
+
+        # trail state of the position
+        self._lock = threading.Lock()
+        self._armed: bool = False
+        self._long: bool = None
+        self._trigger_price: float = None
+        self._trail_value: float = None
+        self._triggered: bool = False
+        self._stop_price: float = None
+        self._fired: bool = False
+        self._exit_price: float = None
+
+        self._events: queue.Queue = queue.Queue()
+        self._stop = threading.Event()
+        self._thread: threading.Thread = None
+
+        self._updates: deque = deque(maxlen=10000)
+        self._exits: deque = deque(maxlen=1000)
+
+    @property
+    def armed(self) -> bool:
+        return self._armed
+
+    @property
+    def triggered(self) -> bool:
+        return self._triggered
+
+    @property
+    def stop_price(self) -> float:
+        return self._stop_price
+
+    @property
+    def fired(self) -> bool:
+        return self._fired
+
+    # the top of book pushed by the exchange if it can, otherwise polled
+    def default_sources(self) -> list:
+
+        pushing = self._ea if hasattr(self._ea, 'add_listener') else getattr(self._ea, 'exchange', None)
+        if pushing is not None and hasattr(pushing, 'add_listener'):
+            return [ ExchangeListener(pushing, self._symbol) ]
+
+        return [ PollingWatcher(self._ea, self._symbol, interval=self._interval, watch_orders=False, watch_position=False,
+                                lock=self._bot.lock) ]
+
+    def start(self):
+
+        if self._sources is None:
+            self._sources = self.default_sources()
+
+        self._bot.trailing_engine = self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+        for source in self._sources:
+            source.start(self._events)
+
+        return self
+
+    def stop(self):
+
+        for source in self._sources or []:
+            source.stop()
+
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5)
+
+        if self._bot.trailing_engine is self:
+            self._bot.trailing_engine = None
+
+    # trigger price and trail value of the position, a new position (or side)
+    # starts with a fresh trail state
+    def arm(self, long: bool, trigger_price: float, trail_value: float):
+
+        with self._lock:
+            if not self._armed or self._long != long:
+                self._triggered = False
+                self._stop_price = None
+                self._fired = False
+                self._exit_price = None
+
+            self._armed = True
+            self._long = long
+            self._trigger_price = trigger_price
+            self._trail_value = trail_value
+
+    def disarm(self):
+
+        with self._lock:
+            self._armed = False
+            self._long = None
+            self._triggered = False
+            self._stop_price = None
+            self._fired = False
+            self._exit_price = None
+
+    def _run(self):
+        log_prefix = f"({self.class_name()}._run) symbol {self._symbol}:"
+
+        while not self._stop.is_set():
+            try:
+                events = [ self._events.get(timeout=0.5) ]
+            except queue.Empty:
+                continue
+
+            # only the latest top of book matters
+            while not self._events.empty():
+                events.append(self._events.get_nowait())
+
+            prices = [ e for e in events if e['type'] == PRICE ]
+            if len(prices) == 0:
+                continue
+
+            try:
+                self.on_price(prices[-1]['data']['ask'], prices[-1]['data']['bid'], prices[-1]['created'])
+            except Exception as e:
+                logger.warning('%s WARN: Trailing stop update failed: %s', log_prefix, e)
+
+    # one top of book: moves the stop and fires the exit if it was hit, an
+    # exit order already placed at the exit price is not fired again -
+    # returns True if the exit fired
+    def on_price(self, ask: float, bid: float, created: float = None) -> bool:
+
+        created = created if created is not None else time.perf_counter()
+
+        with self._lock:
+            if not self._armed:
+                return False
+
+            prev_price = self._stop_price
+            [ self._triggered, stop_price, exit_price ] = trail_step(self._long, self._trigger_price, self._trail_value,
+                                                                     self._triggered, self._stop_price, ask, bid)
+            self._stop_price = float(self._ea.price_to_precision(self._symbol, stop_price))
+
+            if self._fired and exit_price == self._exit_price:
+                exit_price = None
+
+        if prev_price != self._stop_price:
+            logger.debug('(%s.on_price) symbol %s: Trailing SL triggered %s New trail_sl_price %s',
+                         self.class_name(), self._symbol, self._triggered, self._stop_price)
+
+        if exit_price is not None:
+            logger.info('(%s.on_price) symbol %s: Top of book %s / %s crossed %s - Exiting trailing stop',
+                        self.class_name(), self._symbol, ask, bid, prev_price)
+            placed = self._bot.exit_trailing_stop(exit_price)
+            self._exits.append(time.perf_counter() - created)
+
+            # not placed: fired again with the next top of book past the stop
+            with self._lock:
+                self._fired = placed
+                self._exit_price = exit_price if placed else None
+
+        self._updates.append(time.perf_counter() - created)
+        return exit_price is not None
+
+    # reaction times in seconds of the top of book updates and of the exits
+    def reaction_stats(self) -> dict:
+
+        stats = {}
+        for name, times in [ ('update', self._updates), ('exit', self._exits) ]:
+            if len(times) > 0:
+                t = np.array(times)
+                stats[name] = { 'count': len(t), 'mean': t.mean(), 'p50': np.percentile(t, 50),
+                                'p99': np.percentile(t, 99), 'max': t.max() }
+        return stats
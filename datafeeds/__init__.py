@@ -0,0 +1,6 @@
+from .candle_store import CandleStore
+from .candle_store import timeframe_to_ms
+from .candle_store import candles_to_df
+from .feed_scheduler import FeedScheduler
+from .feed_loader import FeedLoader
+from .feed_worker import FeedWorker
\ No newline at end of file
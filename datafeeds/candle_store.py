@@ -0,0 +1,166 @@
+import logging
+import time
+import pandas as pd
+
+import ccxt
+
+from base import BaseClass
+
+logger = logging.getLogger(__name__)
+
+CANDLE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+# convert a ccxt timeframe string (5m, 15m, 1h, 4h, 1d ...) to milliseconds
+def timeframe_to_ms(timeframe: str) -> int:
+    return int(ccxt.Exchange.parse_timeframe(timeframe) * 1000)
+
+# build a candle dataframe in the same format as ExchangeAdapter.fetch_candles_df
+def candles_to_df(bars) -> pd.DataFrame:
+
+    df = pd.DataFrame(bars, columns=CANDLE_COLUMNS)
+    df['datetime']= pd.to_datetime(df['timestamp'], unit='ms')
+    df.set_index(pd.DatetimeIndex(df['datetime']), inplace=True)
+
+    return df
+
+class CandleStore(BaseClass):
+
+    # keeps the candles of a lower (base) timeframe and derives higher timeframes
+    # by incremental aggregation: only the buckets touched by new or changed base
+    # candles are aggregated again, all older buckets are kept as they are even
+    # after the base candles got evicted from the store
+
+    def __init__(self, timeframe: str, max_bars: int = 1000):
+
+        self._timeframe: str = timeframe
+        self._tf_ms: int = timeframe_to_ms(timeframe)
+        self._max_bars: int = max_bars
+
+        # base candles by timestamp: [ open, high, low, close, volume ]
+        self._bars: dict = {}
+
+        # aggregated buckets per timeframe by bucket timestamp:
+        # [ open, high, low, close, volume, number of base candles ]
+        self._aggregates: dict = {}
+
+    @property
+    def timeframe(self) -> str:
+        return self._timeframe
+
+    @property
+    def max_bars(self) -> int:
+        return self._max_bars
+
+    @max_bars.setter
+    def max_bars(self, value: int):
+        self._max_bars = value
+
+    @property
+    def last_timestamp(self) -> int:
+        return max(self._bars) if self._bars else None
+
+    def __len__(self) -> int:
+        return len(self._bars)
+
+    # merge base candles (dataframe or list of ohlcv lists) into the store
+    # returns the timestamp of the earliest new or changed candle or None
+    def update(self, candles) -> int:
+
+        if candles is None:
+            return None
+
+        if isinstance(candles, pd.DataFrame):
+            candles = candles[CANDLE_COLUMNS].values.tolist()
+
+        first_changed = None
+
+        for c in candles:
+            ts = int(c[0])
+            bar = [ float(c[1]), float(c[2]), float(c[3]), float(c[4]), float(c[5]) ]
+
+            if self._bars.get(ts) != bar:
+                self._bars[ts] = bar
+                if first_changed is None or ts < first_changed:
+                    first_changed = ts
+
+        if first_changed is not None:
+            for timeframe in self._aggregates:
+                self._aggregate(timeframe, first_changed)
+
+        # evict the oldest base candles
+        if len(self._bars) > self._max_bars:
+            for ts in sorted(self._bars)[:len(self._bars) - self._max_bars]:
+                del self._bars[ts]
+
+        return first_changed
+
+    # (re)aggregate all buckets of a timeframe starting with the bucket of since
+    def _aggregate(self, timeframe: str, since: int = None):
+
+        tf_ms = timeframe_to_ms(timeframe)
+        buckets = self._aggregates[timeframe]
+
+        start = 0 if since is None else since - since % tf_ms
+
+        for ts in [ ts for ts in buckets if ts >= start ]:
+            del buckets[ts]
+
+        for ts in sorted(ts for ts in self._bars if ts >= start):
+            [ o, h, l, c, v ] = self._bars[ts]
+            bucket_ts = ts - ts % tf_ms
+            bucket = buckets.get(bucket_ts)
+
+            if bucket is None:
+                buckets[bucket_ts] = [ o, h, l, c, v, 1 ]
+            else:
+                bucket[1] = max(bucket[1], h)
+                bucket[2] = min(bucket[2], l)
+                bucket[3] = c
+                bucket[4] += v
+                bucket[5] += 1
+
+        # the aggregated history does not need to grow forever
+        if len(buckets) > self._max_bars:
+            for ts in sorted(buckets)[:len(buckets) - self._max_bars]:
+                del buckets[ts]
+
+    # returns the candles of a higher timeframe derived from the base candles
+    # a bucket is only returned when all its base candles are in the store,
+    # with only_closed a bucket must be closed as well - otherwise the current
+    # (partial) bucket is returned as the exchange would do it
+    def resample(self, timeframe: str, num_bars: int = None, only_closed: bool = True, now: int = None) -> pd.DataFrame:
+        log_prefix = f"({self.class_name()}.resample) timeframe {self._timeframe} -> {timeframe}:"
+
+        tf_ms = timeframe_to_ms(timeframe)
+
+        if tf_ms < self._tf_ms or tf_ms % self._tf_ms != 0:
+            raise ValueError(f'{log_prefix} Timeframe {timeframe} must be a multiple of the base timeframe {self._timeframe}')
+
+        if timeframe not in self._aggregates:
+            self._aggregates[timeframe] = {}
+            self._aggregate(timeframe)
+
+        if now is None:
+            now = int(time.time() * 1000)
+
+        bars_per_bucket = tf_ms // self._tf_ms
+        last_ts = self.last_timestamp
+
+        bars = []
+        for ts in sorted(self._aggregates[timeframe]):
+            [ o, h, l, c, v, count ] = self._aggregates[timeframe][ts]
+            closed = ts + tf_ms <= now
+
+            if count == bars_per_bucket and (closed or not only_closed):
+                bars.append([ ts, o, h, l, c, v ])
+
+            # the current bucket is still forming - complete since its first base candle
+            elif not only_closed and not closed and ts in self._bars and count == (last_ts - ts) // self._tf_ms + 1:
+                bars.append([ ts, o, h, l, c, v ])
+
+        if num_bars is not None:
+            bars = bars[-num_bars:]
+
+        logger.debug('%s %s candles derived from %s base candles', log_prefix, len(bars), len(self._bars))
+
+        return candles_to_df(bars)
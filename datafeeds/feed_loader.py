@@ -0,0 +1,175 @@
+import logging
+import pandas as pd
+
+from base import BaseClass
+from .candle_store import CandleStore
+from .candle_store import CANDLE_COLUMNS
+from .candle_store import timeframe_to_ms
+from .candle_store import candles_to_df
+from .feed_scheduler import FeedScheduler
+
+logger = logging.getLogger(__name__)
+
+class FeedLoader(BaseClass):
+
+    # loads the data feeds of a signal generator from an exchange adapter and 
+    # calls prepare_df when new data arrived. Used by the bots and by processes
+    # computing signals for many bots (see signalbus)
+
+    def __init__(self, exchange_adapter, symbol: str, signal_generator, feed_scheduler: FeedScheduler = None):
+
+        self._ea = exchange_adapter
+        self._sg = signal_generator
+        self._symbol: str = symbol
+        self._feed_scheduler: FeedScheduler = feed_scheduler if feed_scheduler is not None else FeedScheduler(clock=exchange_adapter.clock)
+
+    @property
+    def symbol(self) -> str:
+        return self._symbol
+
+    @symbol.setter
+    def symbol(self, value):
+        self._symbol = value
+
+    @property
+    def signal_generator(self):
+        return self._sg
+
+    @property
+    def feed_scheduler(self) -> FeedScheduler:
+        return self._feed_scheduler
+
+    @feed_scheduler.setter
+    def feed_scheduler(self, value: FeedScheduler):
+        self._feed_scheduler = value
+
+    # load all feeds which are due - returns True if prepare_df was called
+    def load_data_feeds(self) -> bool:
+        
+        timestamp = self._ea.clock.ms()
+        prepare = False
+
+        if self._feed_scheduler.needs_clock_sync(timestamp):
+            self._feed_scheduler.sync_clock(lambda: self._ea.fetch_server_time(self.symbol), timestamp)
+        
+        # the feed source allows the indicator registry to share indicators
+        # between bots trading the same symbol
+        for feed in self._sg.feeds:
+            self._sg.feeds[feed]['source'] = (self._ea.id, self.symbol, self._sg.feeds[feed]['timeframe'])
+
+        # feeds with a resample_from key are derived from another (lower timeframe) feed
+        # so the feeds they are derived from need to be loaded first
+        for feed in sorted(self._sg.feeds, key=lambda f: 'resample_from' in self._sg.feeds[f]):
+            if 'resample_from' in self._sg.feeds[feed]:
+                prepare = self._derive_data_feed(feed, timestamp, force=prepare) or prepare
+            else:
+                prepare = self._load_data_feed(feed, timestamp) or prepare
+
+        if prepare:
+            self._sg.prepare_df()
+
+        return prepare
+
+    # download a data feed from the exchange - returns True if new data was loaded
+    def _load_data_feed(self, feed: str, timestamp: int) -> bool:
+        
+        log_prefix = f"({self.class_name()}.load_data_feeds) symbol {self.symbol}:"
+        
+        f = self._sg.feeds[feed]
+        tf = f['timeframe']
+        nb = f['num_bars']
+        oc = f['only_closed']
+
+        if self._feed_scheduler.is_due(f, timestamp):
+            logger.info("%s Obtaining datafeed %s timeframe: %s num_bars: %s only_closed: %s", log_prefix, feed, tf, nb, oc)
+            try:
+                f['df'] = self._ea.fetch_candles_df(self.symbol, 
+                                                    timeframe=tf, 
+                                                    num_bars=nb, 
+                                                    only_closed=oc)
+                
+            except Exception as e:
+                logger.exception('%s WARN: Could not load candles for %s', log_prefix, feed)
+                f['df'] = None
+                f['watermark'] = None
+                self._feed_scheduler.loaded(f, timestamp)
+            else:
+                self._feed_scheduler.loaded(f, timestamp, f['df'])
+                f['watermark'] = int(f['df']['timestamp'].iloc[-1]) if len(f['df']) > 0 else None
+                
+                # keep the candles for feeds resampled from this one
+                if 'store' in f:
+                    f['store'].update(f['df'])
+                    
+                logger.info("%s Success datafeed %s obtained. Next refresh %s", log_prefix, feed, f['next_refresh'])
+                return True
+        
+        return False
+
+    # derive a higher timeframe feed from the candle store of its base feed 
+    # the exchange is only asked for candles to seed the feed or if the store 
+    # cannot provide the latest bucket - returns True if the feed changed
+    # with force the dataframe is rebuilt, since prepare_df will modify it
+    def _derive_data_feed(self, feed: str, timestamp: int, force: bool = False) -> bool:
+        
+        log_prefix = f"({self.class_name()}.load_data_feeds) symbol {self.symbol}:"
+        
+        f = self._sg.feeds[feed]
+        base = self._sg.feeds[f['resample_from']]
+        tf = f['timeframe']
+        nb = f['num_bars']
+        oc = f['only_closed']
+        tf_ms = timeframe_to_ms(tf)
+
+        if 'store' not in base:
+            # keep at least two buckets of the derived timeframe 
+            max_bars = max(base['num_bars'], 2 * tf_ms // timeframe_to_ms(base['timeframe']))
+            base['store'] = CandleStore(base['timeframe'], max_bars=max_bars)
+            if base['df'] is not None:
+                base['store'].update(base['df'])
+        
+        seed = f.get('seed')
+        derived = base['store'].resample(tf, num_bars=nb, only_closed=oc, now=timestamp)
+        
+        if seed is not None and len(derived) > 0:
+            # buckets from the store replace or extend the seed candles
+            seed = seed[seed.timestamp < derived['timestamp'].iloc[0]]
+            candles = pd.concat([seed, derived])[CANDLE_COLUMNS].tail(nb)
+        else:
+            candles = seed[CANDLE_COLUMNS] if seed is not None else None
+        
+        # the latest bucket the exchange would return
+        latest = self._feed_scheduler.expected_last_bar(tf, timestamp, oc)
+        up_to_date = candles is not None and len(candles) > 0 and candles['timestamp'].iloc[-1] >= latest
+        
+        if not up_to_date and self._feed_scheduler.is_due(f, timestamp):
+            logger.info("%s Seeding datafeed %s timeframe: %s num_bars: %s only_closed: %s", log_prefix, feed, tf, nb, oc)
+            try:
+                f['seed'] = self._ea.fetch_candles_df(self.symbol, 
+                                                      timeframe=tf, 
+                                                      num_bars=nb, 
+                                                      only_closed=oc)[CANDLE_COLUMNS]
+            except Exception as e:
+                logger.exception('%s WARN: Could not load candles for %s', log_prefix, feed)
+                self._feed_scheduler.loaded(f, timestamp)
+                if candles is None:
+                    f['df'] = None
+                    return False
+            else:
+                self._feed_scheduler.loaded(f, timestamp, f['seed'])
+                candles = f['seed']
+
+        if candles is None:
+            return False
+
+        last = candles['timestamp'].iloc[-1] if len(candles) > 0 else None
+        
+        if not force and f['df'] is not None and f.get('last_resampled') == last:
+            return False
+            
+        f['last_resampled'] = last
+        f['watermark'] = None if last is None else int(last)
+        f['df'] = candles_to_df(candles.values.tolist())
+        logger.info("%s Success datafeed %s resampled from %s, last candle %s", log_prefix, feed, f['resample_from'], last)
+        
+        return True
@@ -0,0 +1,141 @@
+import logging
+
+from base import BaseClass
+from base import Clock
+from base import system_clock
+from .candle_store import timeframe_to_ms
+
+logger = logging.getLogger(__name__)
+
+class FeedScheduler(BaseClass):
+
+    # schedules the download of a data feed just after the close of each bar
+    # instead of polling it every refresh_timeout seconds:
+    #  - the bar close is calculated with the server clock of the exchange
+    #  - grace is the delay in seconds after the bar close, giving the exchange
+    #    some time to publish the closed bar
+    #  - if the closed bar is not published yet the feed is fetched again after
+    #    retry_delay seconds, at most max_retries times per bar
+    #  - feeds with only_closed False are refreshed at least every refresh_timeout
+
+    def __init__(self, grace: float = 2.0, retry_delay: float = 3.0, max_retries: int = 5,
+                 clock_sync_interval: int = 3600, clock: Clock = None):
+
+        self._grace: int = int(grace * 1000)
+        self._retry_delay: int = int(retry_delay * 1000)
+        self._max_retries: int = max_retries
+        self._clock_sync_interval: int = int(clock_sync_interval * 1000)
+        self._clock: Clock = clock if clock is not None else system_clock
+
+        # server time - local time in ms
+        self._clock_offset: int = 0
+        self._next_clock_sync: int = 0
+
+    @property
+    def grace(self) -> float:
+        return self._grace / 1000
+
+    @grace.setter
+    def grace(self, value: float):
+        self._grace = int(value * 1000)
+
+    @property
+    def retry_delay(self) -> float:
+        return self._retry_delay / 1000
+
+    @retry_delay.setter
+    def retry_delay(self, value: float):
+        self._retry_delay = int(value * 1000)
+
+    @property
+    def max_retries(self) -> int:
+        return self._max_retries
+
+    @max_retries.setter
+    def max_retries(self, value: int):
+        self._max_retries = value
+
+    @property
+    def clock(self) -> Clock:
+        return self._clock
+
+    @clock.setter
+    def clock(self, value: Clock):
+        self._clock = value
+
+    @property
+    def clock_offset(self) -> int:
+        return self._clock_offset
+
+    @clock_offset.setter
+    def clock_offset(self, value: int):
+        self._clock_offset = int(value)
+
+    def needs_clock_sync(self, timestamp: int) -> bool:
+        return timestamp >= self._next_clock_sync
+
+    # measure the offset to the exchange clock, server_time is a callable
+    # returning the server time in ms or None if not supported
+    def sync_clock(self, server_time, timestamp: int = None):
+        log_prefix = f"({self.class_name()}.sync_clock)"
+
+        before = self._clock.ms()
+        try:
+            server = server_time()
+        except Exception as e:
+            logger.warning('%s WARN: Could not obtain the server time - keeping offset %s ms', log_prefix, self._clock_offset)
+        else:
+            if server is not None:
+                # assume the server time was taken in the middle of the round trip
+                after = self._clock.ms()
+                self._clock_offset = int(server - (before + after) / 2)
+                logger.info('%s Server clock offset %s ms (round trip %s ms)', log_prefix, self._clock_offset, after - before)
+
+        self._next_clock_sync = (timestamp or before) + self._clock_sync_interval
+
+    # the close of the current bar in local time
+    def next_bar_close(self, timeframe: str, timestamp: int) -> int:
+
+        tf_ms = timeframe_to_ms(timeframe)
+        server_ts = timestamp + self._clock_offset
+
+        return server_ts - server_ts % tf_ms + tf_ms - self._clock_offset
+
+    # the timestamp (open time) of the latest bar the exchange should return
+    def expected_last_bar(self, timeframe: str, timestamp: int, only_closed: bool = True) -> int:
+
+        tf_ms = timeframe_to_ms(timeframe)
+        server_ts = timestamp + self._clock_offset - self._grace
+
+        return server_ts - server_ts % tf_ms - (tf_ms if only_closed else 0)
+
+    def is_due(self, feed: dict, timestamp: int) -> bool:
+        return 'next_refresh' not in feed or timestamp >= feed['next_refresh']
+
+    # schedule the next download of a feed after it was fetched at timestamp
+    def loaded(self, feed: dict, timestamp: int, df = None):
+        log_prefix = f"({self.class_name()}.loaded) timeframe {feed['timeframe']}:"
+
+        tf = feed['timeframe']
+        oc = feed['only_closed']
+        next_refresh = self.next_bar_close(tf, timestamp) + self._grace
+
+        if not oc:
+            next_refresh = min(next_refresh, timestamp + int(feed['refresh_timeout'] * 1000))
+
+        expected = self.expected_last_bar(tf, timestamp, oc)
+        last = int(df['timestamp'].iloc[-1]) if df is not None and len(df) > 0 else None
+
+        if last is None or last < expected:
+            retries = feed.get('retries', 0)
+            if retries < self._max_retries:
+                logger.info('%s Bar %s not published yet (last %s) - retry in %s ms', log_prefix, expected, last, self._retry_delay)
+                feed['retries'] = retries + 1
+                next_refresh = timestamp + self._retry_delay
+            else:
+                logger.warning('%s WARN: Bar %s still not published after %s retries - waiting for the next bar', log_prefix, expected, retries)
+                feed['retries'] = 0
+        else:
+            feed['retries'] = 0
+
+        feed['next_refresh'] = next_refresh
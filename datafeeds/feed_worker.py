@@ -0,0 +1,152 @@
+import copy
+import logging
+import threading
+import time
+import pandas as pd
+
+from base import BaseClass
+from .feed_loader import FeedLoader
+
+logger = logging.getLogger(__name__)
+
+class FeedWorker(BaseClass):
+
+    # loads the data feeds and runs prepare_df in a background thread, so a slow
+    # download (e.g. the Binance reference data of a generator) does not delay the
+    # order maintenance of the trading loop:
+    #  - after each prepare_df a snapshot of the signal generator is published,
+    #    a copy with its own dataframes which the worker never touches again
+    #  - the trading loop takes the latest snapshot without blocking and computes
+    #    the signals on it
+    #  - budget is the latency budget of a load cycle in seconds, cycles exceeding
+    #    it are logged and counted as overruns
+    # The worker uses the exchange adapter of the loader from its own thread, give
+    # it a separate adapter if the exchange instance must not be shared
+
+    def __init__(self, feed_loader: FeedLoader, interval: float = 1.0, budget: float = None):
+
+        self._loader: FeedLoader = feed_loader
+        self._interval: float = interval
+        self._budget: float = budget
+
+        self._snapshot = None
+        self._version: int = 0
+        self._published_at: float = None
+        self._last_duration: float = None
+        self._overruns: int = 0
+
+        self._stop = threading.Event()
+        self._thread: threading.Thread = None
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    @interval.setter
+    def interval(self, value: float):
+        self._interval = value
+
+    @property
+    def budget(self) -> float:
+        return self._budget
+
+    @budget.setter
+    def budget(self, value: float):
+        self._budget = value
+
+    # the latest prepared signal generator or None before the first load
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    # age of the snapshot in seconds
+    @property
+    def age(self) -> float:
+        return None if self._published_at is None else time.time() - self._published_at
+
+    @property
+    def last_duration(self) -> float:
+        return self._last_duration
+
+    @property
+    def overruns(self) -> int:
+        return self._overruns
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = None):
+
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        log_prefix = f"({self.class_name()}._run) symbol {self._loader.symbol}:"
+
+        logger.info('%s Feed worker started', log_prefix)
+
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.exception('%s WARN: Could not load the data feeds', log_prefix)
+
+            self._stop.wait(self._interval)
+
+        logger.info('%s Feed worker stopped', log_prefix)
+
+    # one load cycle, returns True if a new snapshot was published
+    def run_once(self) -> bool:
+        log_prefix = f"({self.class_name()}.run_once) symbol {self._loader.symbol}:"
+
+        start = time.perf_counter()
+        prepared = self._loader.load_data_feeds()
+
+        if prepared or self._snapshot is None:
+            self._snapshot = self.snapshot_of(self._loader.signal_generator)
+            self._published_at = time.time()
+            self._version += 1
+
+        self._last_duration = time.perf_counter() - start
+
+        if self._budget is not None and self._last_duration > self._budget:
+            self._overruns += 1
+            logger.warning('%s WARN: Load cycle took %.3f s - budget %s s', log_prefix, self._last_duration, self._budget)
+
+        return prepared
+
+    # copy of a signal generator with copies of its dataframes and its own
+    # signal cache, the other attributes (indicator registry, candle stores)
+    # are shared. The snapshot belongs to the trading thread: only it computes
+    # and caches signals on it, the worker thread never touches it again. The
+    # cache counters stay shared with the generator, they are only counted by
+    # the trading thread (the worker never computes signals)
+    @staticmethod
+    def snapshot_of(signal_generator):
+
+        snapshot = copy.copy(signal_generator)
+
+        for name, value in vars(signal_generator).items():
+            if isinstance(value, pd.DataFrame):
+                setattr(snapshot, name, value.copy())
+
+        snapshot.feeds = { feed: dict(f, df=f['df'].copy() if f.get('df') is not None else None)
+                           for feed, f in signal_generator.feeds.items() }
+
+        if hasattr(signal_generator, '_signal_cache'):
+            snapshot._signal_cache = {}
+
+        return snapshot
@@ -1,3 +1,10 @@
 from .exchange_adapter import ExchangeAdapter
 from .bitget_adapter import BitgetAdapter
-from .phemex_adapter import PhemexAdapter
\ No newline at end of file
+from .phemex_adapter import PhemexAdapter
+from .simulated_exchange import SimulatedExchange
+from .simulated_adapter import SimulatedAdapter
+from .streaming_adapter import StreamingAdapter
+from .account_aggregator import AccountAggregator
+from .account_aggregator import AggregatedAdapter
+from .recording_adapter import RecordingExchangeAdapter
+from .replay_adapter import ReplayExchangeAdapter
\ No newline at end of file
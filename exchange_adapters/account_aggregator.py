@@ -0,0 +1,247 @@
+import logging
+import threading
+import time
+
+from base import BaseClass
+from .exchange_adapter import ExchangeAdapter
+
+logger = logging.getLogger(__name__)
+
+class AccountAggregator(BaseClass):
+
+    # shares the account level requests of the bots trading on one account in
+    # one process: positions and balance with one fetch_positions and one
+    # fetch_balance per interval, the tickers of all symbols with one ask_bids
+    # per ticker_interval, instead of a request per bot and tick
+    #  - each bot gets its own view with adapter_for(symbol) and uses it as its
+    #    exchange adapter, fetch_open_positions, get_total_balance and ask_bid
+    #    are served from the shared snapshot
+    #  - the data is fetched when a bot needs it and the snapshot is older than
+    #    the interval, concurrent bots wait for the same fetch
+    #  - after an order action of a bot, its next read forces a new fetch, so it
+    #    never sees the position or balance from before its own order
+    #  - if a fetch fails, a snapshot up to max_age seconds old is served, older
+    #    snapshots raise the error like the rest call would
+
+    def __init__(self, exchange_adapter: ExchangeAdapter, interval: float = 2.0, ticker_interval: float = 1.0,
+                 max_age: float = 10.0, share_tickers: bool = True):
+
+        self._ea: ExchangeAdapter = exchange_adapter
+        self._interval: float = interval
+        self._ticker_interval: float = ticker_interval
+        self._max_age: float = max_age
+        self._share_tickers: bool = share_tickers
+
+        self._symbols: list = []
+
+        self._positions: dict = {}
+        self._balance: dict = None
+        self._tickers: dict = {}
+
+        # time of the fetch and of the last own order action per symbol
+        self._fetched: float = 0.0
+        self._tickers_fetched: float = 0.0
+        self._invalidated: dict = {}
+
+        self._lock = threading.Lock()
+        self._ticker_lock = threading.Lock()
+
+        self._reads: int = 0
+        self._fetches: int = 0
+        self._ticker_reads: int = 0
+        self._ticker_fetches: int = 0
+
+    @property
+    def exchange_adapter(self) -> ExchangeAdapter:
+        return self._ea
+
+    @property
+    def symbols(self) -> list:
+        return self._symbols
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    @interval.setter
+    def interval(self, value: float):
+        self._interval = value
+
+    @property
+    def max_age(self) -> float:
+        return self._max_age
+
+    @max_age.setter
+    def max_age(self, value: float):
+        self._max_age = value
+
+    # age of the account snapshot in seconds
+    @property
+    def age(self) -> float:
+        return time.time() - self._fetched
+
+    def stats(self) -> dict:
+        return { 'symbols': len(self._symbols), 'reads': self._reads, 'fetches': self._fetches,
+                 'ticker_reads': self._ticker_reads, 'ticker_fetches': self._ticker_fetches }
+
+    def register(self, symbol: str):
+
+        with self._lock:
+            if symbol not in self._symbols:
+                self._symbols.append(symbol)
+                # the next read fetches the positions of the new symbol too
+                self._fetched = 0.0
+
+    def adapter_for(self, symbol: str):
+        self.register(symbol)
+        return AggregatedAdapter(self, symbol)
+
+    # an own order action of the bot trading symbol
+    def invalidate(self, symbol: str):
+        self._invalidated[symbol] = time.time()
+
+    def _fresh(self, fetched: float, interval: float, symbol: str) -> bool:
+        return time.time() - fetched < interval and fetched > self._invalidated.get(symbol, 0.0)
+
+    def _fetch(self):
+
+        positions = self._ea._exchange.fetch_positions(symbols=self._symbols, params=self._ea.exchange_params)
+        balance = self._ea._exchange.fetch_balance(params=self._ea.exchange_params)
+
+        by_symbol = { s: [] for s in self._symbols }
+        for p in positions:
+            if p.get('symbol') in by_symbol:
+                by_symbol[p['symbol']].append(p)
+
+        self._positions = by_symbol
+        self._balance = balance
+        self._fetched = time.time()
+        self._fetches += 1
+
+    def _refresh(self, symbol: str):
+        log_prefix = f"({self.class_name()}._refresh) symbol {symbol}:"
+
+        self._reads += 1
+
+        if self._fresh(self._fetched, self._interval, symbol):
+            return
+
+        with self._lock:
+            # another bot fetched meanwhile
+            if self._fresh(self._fetched, self._interval, symbol):
+                return
+
+            try:
+                self._fetch()
+            except Exception as e:
+                if self._balance is None or self.age > self._max_age or self._fetched <= self._invalidated.get(symbol, 0.0):
+                    raise
+                logger.warning('%s WARN: Fetching the account failed, using the snapshot of %.1f s ago: %s', log_prefix, self.age, e)
+
+    def open_position(self, symbol: str):
+
+        self.register(symbol)
+        self._refresh(symbol)
+        return self._ea.open_position_of(symbol, self._positions.get(symbol, []))
+
+    def balance(self, symbol: str = None) -> dict:
+
+        self._refresh(symbol)
+        return self._balance
+
+    def ask_bid(self, symbol: str):
+
+        if not self._share_tickers:
+            return self._ea.ask_bid(symbol)
+
+        self._ticker_reads += 1
+
+        # own order actions don't change the tickers
+        if not self._fresh(self._tickers_fetched, self._ticker_interval, None) or symbol not in self._tickers:
+            with self._ticker_lock:
+                if not self._fresh(self._tickers_fetched, self._ticker_interval, None) or symbol not in self._tickers:
+                    self._tickers = self._ea.ask_bids(self._symbols if symbol in self._symbols else self._symbols + [ symbol ])
+                    self._tickers_fetched = time.time()
+                    self._ticker_fetches += 1
+
+        return self._tickers[symbol]
+
+class AggregatedAdapter(BaseClass):
+
+    # the view of an AccountAggregator for the bot trading symbol, all methods
+    # not served by the aggregator are the ones of the exchange adapter
+
+    def __init__(self, aggregator: AccountAggregator, symbol: str):
+
+        self._aggregator: AccountAggregator = aggregator
+        self._ea: ExchangeAdapter = aggregator.exchange_adapter
+        self._symbol: str = symbol
+
+    def __getattr__(self, name):
+        if name.startswith('__') or '_ea' not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self._ea, name)
+
+    @property
+    def aggregator(self) -> AccountAggregator:
+        return self._aggregator
+
+    @property
+    def exchange_params(self):
+        return self._ea.exchange_params
+
+    @property
+    def maker_fees(self):
+        return self._ea.maker_fees
+
+    @property
+    def taker_fees(self):
+        return self._ea.taker_fees
+
+    def fetch_open_positions(self, symbol):
+        return self._aggregator.open_position(symbol)
+
+    def get_total_balance(self):
+        return self._ea.total_balance_of(self._aggregator.balance(self._symbol))
+
+    def ask_bid(self, symbol):
+        return self._aggregator.ask_bid(symbol)
+
+    # --- order actions, the next read of the bot fetches the account again ---
+
+    def _acted(self, symbol, result):
+        self._aggregator.invalidate(symbol)
+        return result
+
+    def create_limit_buy_order(self, symbol, size, price):
+        return self._acted(symbol, self._ea.create_limit_buy_order(symbol, size, price))
+
+    def create_limit_sell_order(self, symbol, size, price):
+        return self._acted(symbol, self._ea.create_limit_sell_order(symbol, size, price))
+
+    def close_short_limit_order(self, symbol, size, price):
+        return self._acted(symbol, self._ea.close_short_limit_order(symbol, size, price))
+
+    def close_long_limit_order(self, symbol, size, price):
+        return self._acted(symbol, self._ea.close_long_limit_order(symbol, size, price))
+
+    def create_stop_loss_order_by_trigger_price(self, symbol, price, size, direction):
+        return self._acted(symbol, self._ea.create_stop_loss_order_by_trigger_price(symbol, price, size, direction))
+
+    def amend_limit_order(self, symbol, order_id, side, size, price):
+        return self._acted(symbol, self._ea.amend_limit_order(symbol, order_id, side, size, price))
+
+    def amend_stop_order(self, symbol, order_id, side, size, price):
+        return self._acted(symbol, self._ea.amend_stop_order(symbol, order_id, side, size, price))
+
+    def cancel_order(self, order_id, symbol):
+        return self._acted(symbol, self._ea.cancel_order(order_id, symbol))
+
+    def cancel_all_orders(self, symbol):
+        return self._acted(symbol, self._ea.cancel_all_orders(symbol))
+
+    def create_order_based_on_model(self, order):
+        return self._acted(order['symbol'], self._ea.create_order_based_on_model(order))
+
+    def cancel_order_based_on_model(self, order):
+        return self._acted(order['symbol'], self._ea.cancel_order_based_on_model(order))
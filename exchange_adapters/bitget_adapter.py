@@ -9,10 +9,13 @@ import ccxt
 
 from .exchange_adapter import ExchangeAdapter        
 
+logger = logging.getLogger(__name__)
+
 class BitgetAdapter(ExchangeAdapter):
 
-    def __init__(self, connect_params, exchange_params):
-        exchange = ccxt.bitget(connect_params)
+    # exchange: a ccxt bitget compatible instance to use instead (e.g. a ReplayExchange)
+    def __init__(self, connect_params, exchange_params, exchange=None):
+        exchange = exchange if exchange is not None else ccxt.bitget(connect_params)
         super().__init__(exchange, exchange_params)
 
         # current defaults
@@ -23,6 +26,13 @@ class BitgetAdapter(ExchangeAdapter):
         # self._trade_params_kill = self._trade_params
         self._trade_params_kill = { 'timeInForce': 'post_only', 'post_only': True, 'reduceOnly': True }
 
+        # smallest depth of the mix order book endpoint
+        self._top_of_book_limit = 5
+
+        # edit_order of ccxt is emulated (cancel + create), only the loss plan
+        # orders have a native modify endpoint
+        self._amend_types = [ 'stop' ]
+
         # for low level api access 
         self._api_endpoint = 'https://api.bitget.com'
         self._api_key = connect_params['apiKey']
@@ -39,6 +49,11 @@ class BitgetAdapter(ExchangeAdapter):
     def pre_hash(self, timestamp: str, method: str, request_path: str, body: str) -> str:
         return str(timestamp) + str.upper(method) + request_path + body
 
+    # the http requests outside of ccxt - returns status code and text
+    def _http_get(self, url: str, headers: dict) -> tuple:
+        r = requests.get(url, headers=headers)
+        return r.status_code, r.text
+
     def bitget_fetch_open_stoploss_orders(self, symbol: str) -> list:
 
         symbol_id = self._markets[symbol]['id']
@@ -59,19 +74,19 @@ class BitgetAdapter(ExchangeAdapter):
         
         orders = []
         try:
-            r = requests.get(f"{self._api_endpoint}{method}{get_params}", headers=headers)
+            [ status_code, text ] = self._http_get(f"{self._api_endpoint}{method}{get_params}", headers)
 
-            if r.status_code != 200:
-                raise Exception(f'(bitget_fetch_open_stoploss_orders) Could not fetch open_stoploss_orders - HTTP status code: {r.status_code}: Response: {r.text}')
+            if status_code != 200:
+                raise Exception(f'(bitget_fetch_open_stoploss_orders) Could not fetch open_stoploss_orders - HTTP status code: {status_code}: Response: {text}')
 
         except Exception as e:
 
-            logging.exception ('(bitget_fetch_open_stoploss_orders) ERROR:', Exception(e))
+            logger.exception('(bitget_fetch_open_stoploss_orders) ERROR: %s', e)
             return None
 
         else:
             
-            response_dict = json.loads(r.text)
+            response_dict = json.loads(text)
             order_list = response_dict['data']
 
             if response_dict['msg'] == 'success':
@@ -117,8 +132,7 @@ class BitgetAdapter(ExchangeAdapter):
 
     ### low level functions end
     
-    def get_total_balance(self):
-        balance=self._exchange.fetch_balance(params=self._exchange_params)
+    def total_balance_of(self, balance):
         # changed to free - since 'total' is not working anymore 
         total = float(balance.get('free').get(self._exchange_params['code']))
         return total
@@ -134,12 +148,12 @@ class BitgetAdapter(ExchangeAdapter):
   
         # set margin and margin mode to cross
         try:
-            logging.info(f'{log_prefix} Initial margin requirement {initialMargin:.2%} -> max leverage {maxLeverage}')
-            logging.info(f'{log_prefix} Setting leverage mode to crossed')
+            logger.info('%s Initial margin requirement %.2f%% -> max leverage %s', log_prefix, initialMargin * 100, maxLeverage)
+            logger.info('%s Setting leverage mode to crossed', log_prefix)
             marginModeResponse = self._exchange.set_margin_mode('crossed', symbol)
             leverageResponse = self._exchange.set_leverage(maxLeverage, symbol)
         except Exception as e:
-            logging.exception(log_prefix, e)
+            logger.exception(log_prefix, e)
             raise e
 
         return maxLeverage
@@ -151,12 +165,12 @@ class BitgetAdapter(ExchangeAdapter):
 
         margincoin = self._exchange_params['code']
         
-        logging.info(f'{log_prefix} Cancelling bitget loss plan orders ...')
+        logger.info('%s Cancelling bitget loss plan orders ...', log_prefix)
 
         bg_open_sl = self.bitget_fetch_open_stoploss_orders(symbol)
         params = { 'stop': True, 'code': margincoin, 'planType': 'loss_plan' }
         for o in bg_open_sl:
-            logging.info(f"{log_prefix} Cancelling bitget loss plan order id {o['id']}")
+            logger.info("%s Cancelling bitget loss plan order id %s", log_prefix, o['id'])
             self._exchange.cancel_order(o['id'], symbol, params)
 
     def fetch_open_orders(self, symbol):
@@ -169,11 +183,37 @@ class BitgetAdapter(ExchangeAdapter):
             open_orders += self._exchange.fetch_open_orders(symbol, params={'stop': True})
             open_orders += self.bitget_fetch_open_stoploss_orders(symbol)
         except Exception as err:
-            logging.exception(f"{log_prefix} Unexpected {err=}, {type(err)=}")
+            logger.exception("%s Unexpected err=%r, type(err)=%r", log_prefix, err, type(err))
             raise err
         else:
             return open_orders
 
+    # the modify endpoint of plan orders changes the trigger price only
+    def can_amend(self, type, order, size):
+        return type in self._amend_types and order.get('amount') is not None and float(order['amount']) == float(size)
+
+    def amend_stop_order(self, symbol, order_id, side, size, price):
+        log_prefix = f"({self.class_name()}.amend_stop_order) symbol {symbol}:"
+
+        params = {
+            'symbol': self._markets[symbol]['id'],
+            'marginCoin': self._exchange_params['code'],
+            'orderId': order_id,
+            'triggerPrice': self.price_to_precision(symbol, price),
+            'planType': 'pos_loss'
+        }
+
+        response = self._exchange.privateMixPostPlanModifyTPSLPlan(params)
+
+        if response.get('msg') != 'success':
+            raise Exception(f"{log_prefix} Could not modify loss plan order {order_id} - API message: {response.get('msg')}")
+
+        logger.info('%s Modified loss plan order %s to trigger price %s', log_prefix, order_id, price)
+
+        # same structure as bitget_fetch_open_stoploss_orders
+        return { 'symbol': symbol, 'info': response, 'id': (response.get('data') or {}).get('orderId', order_id), 'amount': float(size),
+                 'stopPrice': float(price), 'type': 'Stop', 'price': None, 'side': side }
+
     def create_stop_loss_order_by_trigger_price(self, symbol, price, size, direction):
         log_prefix = f"({self.class_name()}.create_stop_loss_order_by_trigger_price) symbol {symbol}:"
 
@@ -195,7 +235,7 @@ class BitgetAdapter(ExchangeAdapter):
             if (price < ask):
                 # -- bitget plan logic: makes a stopLoss for existing buy_order
                 order = self._exchange.create_order(symbol, 'market', 'buy', size, price, sl_params) 
-                logging.info(f'{log_prefix} Just made a SELL STOP LOSS order of {size} {symbol} at trigger price {price:.2f}: ')
+                logger.info('%s Just made a SELL STOP LOSS order of %s %s at trigger price %.2f: ', log_prefix, size, symbol, price)
                 return order
             else:
                 raise Exception(f'{log_prefix} Trigger price {price} above {ask} - no order placed - would trigger immediately')
@@ -205,7 +245,7 @@ class BitgetAdapter(ExchangeAdapter):
             if (price > bid):
                 # -- bitget plan logic: makes a stopLoss for existing sell_orders 
                 order = self._exchange.create_order(symbol, 'market', 'sell', size, price, sl_params)   
-                logging.info(f'{log_prefix} Just made a BUY STOP LOSS order of {size} {symbol} at trigger price {price:.2f}: ')
+                logger.info('%s Just made a BUY STOP LOSS order of %s %s at trigger price %.2f: ', log_prefix, size, symbol, price)
                 return order
             else:
                 raise Exception(f'{log_prefix} Trigger price {price} below {bid} - no order placed - would trigger immediately')
@@ -225,16 +265,16 @@ class BitgetAdapter(ExchangeAdapter):
         type = order['type']
 
         if order['exchange_id'] == self._exchange.id:
-            logging.info(f'{log_prefix} Cancel {dir} {type} order of {symbol} with order_id {order_id}')
+            logger.info('%s Cancel %s %s order of %s with order_id %s', log_prefix, dir, type, symbol, order_id)
             try:
 
                 if type == 'stop':
                         params = { 'stop': True, 'code': margincoin, 'planType': 'loss_plan' }        
-                        logging.info(f'{log_prefix} Cancelling bitget loss plan order id {order_id}')
+                        logger.info('%s Cancelling bitget loss plan order id %s', log_prefix, order_id)
                         self._exchange.cancel_order(order_id, symbol, params)
                 else:
                     self._exchange.cancel_order(order_id, symbol)
 
             except Exception as e:
-                logging.exception(log_prefix, Exception(e))
+                logger.exception(log_prefix, Exception(e))
                 raise e
@@ -1,5 +1,4 @@
 import logging
-import time
 import pandas as pd
 
 import ccxt
@@ -8,6 +7,10 @@ import ccxt
 # pp = pprint.PrettyPrinter(indent=4)
 
 from base import BaseClass
+from base import Clock
+from base import system_clock
+
+logger = logging.getLogger(__name__)
 
 class ExchangeAdapter(BaseClass):
 
@@ -19,12 +22,31 @@ class ExchangeAdapter(BaseClass):
         self._trade_params = { 'timeInForce': 'PostOnly' }
         self._trade_params_kill = { 'timeInForce': 'PostOnly', 'reduceOnly': True }
 
+        # how ask_bid gets the top of book (see top_of_book_method) and the
+        # smallest depth the order book endpoint of the exchange accepts
+        self._top_of_book_method: str = None
+        self._top_of_book_limit: int = None
+
+        # order types ('limit', 'stop') amended in one request (edit_order)
+        # instead of cancelled and created again, see can_amend
+        self._amend_types: list = [ 'limit', 'stop' ] if self._exchange.has.get('editOrder') is True else []
+
+        # the time of the bots and feeds using the adapter
+        self._clock: Clock = system_clock
+
+        # the last top of book of ask_bid per symbol: (ask, bid, ms of the clock)
+        self._last_ask_bid: dict = {}
+
         self._markets = self._exchange.load_markets()
 
     @property
     def id(self) -> str:
         return self._exchange.id
 
+    @property
+    def exchange(self):
+        return self._exchange
+
     @property
     def exchange_params(self):
         return self._exchange_params
@@ -33,6 +55,14 @@ class ExchangeAdapter(BaseClass):
     def exchange_params(self, value):
         self._exchange_params = value
 
+    @property
+    def clock(self) -> Clock:
+        return self._clock
+
+    @clock.setter
+    def clock(self, value: Clock):
+        self._clock = value
+
     @property
     def maker_fees(self):
         return self._maker_fees
@@ -55,19 +85,138 @@ class ExchangeAdapter(BaseClass):
     def amount_to_precision(self, symbol, amount):
         return self._exchange.amount_to_precision(symbol, amount)
 
+    # the price tick of a market, None if the market has no price precision
+    def get_tick_size(self, symbol):
+
+        precision = self._markets[symbol]['precision'].get('price')
+        if precision is None:
+            return None
+
+        if self._exchange.precisionMode == ccxt.TICK_SIZE:
+            return float(precision)
+
+        # DECIMAL_PLACES or SIGNIFICANT_DIGITS
+        return 10 ** -int(precision)
+
     def get_total_balance(self):
         balance=self._exchange.fetch_balance(params=self._exchange_params)
+        return self.total_balance_of(balance)
+
+    # the total balance of the margin coin in a ccxt balance structure
+    def total_balance_of(self, balance):
         total = float(balance.get('total').get(self._exchange_params['code']))
         return total
 
+    # server time of the exchange in ms - exchanges without a time endpoint
+    # return the timestamp of the order book, None if not available
+    def fetch_server_time(self, symbol=None):
+
+        if self._exchange.has.get('fetchTime'):
+            return self._exchange.fetch_time()
+
+        if symbol is not None:
+            return self._exchange.fetch_order_book(symbol).get('timestamp')
+        
+        return None
+
+    # the cheapest endpoint for the top of book, chosen by exchange.has:
+    #  - ticker: fetch_ticker if the exchange has it, its bid and ask are the top of book
+    #  - depth:  fetch_order_book with the smallest depth the exchange accepts
+    # ask_bids of many symbols uses fetch_bids_asks or fetch_tickers if available
+    @property
+    def top_of_book_method(self) -> str:
+
+        if self._top_of_book_method is None:
+            self._top_of_book_method = 'ticker' if self._exchange.has.get('fetchTicker') else 'depth'
+
+        return self._top_of_book_method
+
+    @top_of_book_method.setter
+    def top_of_book_method(self, value: str):
+        self._top_of_book_method = value
+
+    @property
+    def top_of_book_limit(self) -> int:
+        return self._top_of_book_limit
+
+    @top_of_book_limit.setter
+    def top_of_book_limit(self, value: int):
+        self._top_of_book_limit = value
+
     # order book ask and bid
     def ask_bid(self, symbol):
 
-        ob = self._exchange.fetch_order_book(symbol)
+        if self.top_of_book_method == 'ticker':
+            ticker = self._exchange.fetch_ticker(symbol)
+            if ticker.get('ask') and ticker.get('bid'):
+                self._last_ask_bid[symbol] = (ticker['ask'], ticker['bid'], self._clock.ms())
+                return ticker['ask'], ticker['bid']
+
+            # the ticker of some markets comes without bid and ask
+            logger.warning('(%s.ask_bid) symbol %s: WARN: Ticker without bid and ask - using the order book', self.class_name(), symbol)
+            self._top_of_book_method = 'depth'
+
+        ob = self._exchange.fetch_order_book(symbol, limit=self._top_of_book_limit)
         ask = ob['asks'][0][0]
         bid = ob['bids'][0][0]
+        self._last_ask_bid[symbol] = (ask, bid, self._clock.ms())
         return ask, bid
 
+    # the last ask and bid of ask_bid without a request, None if there is none
+    # or it is older than max_age seconds
+    def last_ask_bid(self, symbol, max_age: float = None):
+
+        if symbol not in self._last_ask_bid:
+            return None
+
+        [ ask, bid, ms ] = self._last_ask_bid[symbol]
+        if max_age is not None and self._clock.ms() - ms > max_age * 1000:
+            return None
+
+        return ask, bid
+
+    # ask and bid of many symbols with as few requests as possible
+    def ask_bids(self, symbols: list) -> dict:
+
+        tickers = None
+        if self._exchange.has.get('fetchBidsAsks'):
+            tickers = self._exchange.fetch_bids_asks(symbols)
+        elif self._exchange.has.get('fetchTickers'):
+            tickers = self._exchange.fetch_tickers(symbols)
+
+        top = {}
+        for symbol in symbols:
+            ticker = tickers.get(symbol, {}) if tickers is not None else {}
+            if ticker.get('ask') and ticker.get('bid'):
+                top[symbol] = (ticker['ask'], ticker['bid'])
+            else:
+                top[symbol] = self.ask_bid(symbol)
+
+        return top
+
+    @property
+    def amend_types(self) -> list:
+        return self._amend_types
+
+    @amend_types.setter
+    def amend_types(self, value: list):
+        self._amend_types = value
+
+    # True if the open order of type ('limit' or 'stop') can be amended to size
+    # and a new price in one request, otherwise it has to be cancelled and created
+    def can_amend(self, type, order, size):
+        return type in self._amend_types
+
+    # amend price and size of an open limit order, the order id is kept
+    def amend_limit_order(self, symbol, order_id, side, size, price):
+        order = self._exchange.edit_order(order_id, symbol, None, None, size, price)
+        return order
+
+    # amend trigger price and size of an open stop order, the order id is kept
+    def amend_stop_order(self, symbol, order_id, side, size, price):
+        order = self._exchange.edit_order(order_id, symbol, None, None, size, None, { 'stopPrice': price })
+        return order
+
     # pass through cancel order
     def cancel_order(self, order_id, symbol):
         self._exchange.cancel_order(order_id, symbol)
@@ -90,7 +239,18 @@ class ExchangeAdapter(BaseClass):
 
     # get open futures/contract positions
     def fetch_open_positions(self, symbol):
-        log_prefix = f"({self.class_name()}.fetch_open_orders) symbol {symbol}:" 
+
+        try:
+            positions = self._exchange.fetch_positions(symbols=[symbol], params=self._exchange_params)
+        except Exception as err:
+            # logger.exception(f"({self.class_name()}.fetch_open_positions) symbol {symbol}: Unexpected {err=}, {type(err)=}")
+            raise      
+        else:
+            return self.open_position_of(symbol, positions)
+
+    # position, openpos_bool, openpos_size, long, entry_price, leverage of the 
+    # positions of a symbol in the ccxt structure (also used by the streaming adapter)
+    def open_position_of(self, symbol, positions):
 
         entry_price = 0.0
         openpos_size = 0.0
@@ -99,48 +259,41 @@ class ExchangeAdapter(BaseClass):
         openpos_bool = False
         long = True
 
-        try:
-            positions = self._exchange.fetch_positions(symbols=[symbol], params=self._exchange_params)
-        except Exception as err:
-            # logging.exception(f"{log_prefix} Unexpected {err=}, {type(err)=}")
-            raise      
-        else:
-
-            # find the open position ... bitget with heding mode returns always two records, one for long and one for short
-            for pos in positions:
-                entry_price = float(pos['entryPrice'] or 0)
-                if entry_price > 0:
-                    position = pos
-                    break
+        # find the open position ... bitget with heding mode returns always two records, one for long and one for short
+        for pos in positions:
+            entry_price = float(pos['entryPrice'] or 0)
+            if entry_price > 0:
+                position = pos
+                break
 
-            # no position found
-            if position is None:
-                return None, openpos_bool, openpos_size, long, entry_price, leverage
+        # no position found
+        if position is None:
+            return None, openpos_bool, openpos_size, long, entry_price, leverage
 
-            openpos_size = float(position[self._openpos_size_field] or 0)
-            openpos_side = position['side']
-        
-            # some exchanges such as phemex returns negative levarage, convert to positve
-            leverage = abs(float(position['leverage'] or 0))
-
-            if openpos_size > 0:
-                openpos_bool = True
-                if openpos_side == 'long':
-                    long = True
-                elif openpos_side == 'short':
-                    long = False
-            else:
-                openpos_bool = False
-                long = None
+        openpos_size = float(position[self._openpos_size_field] or 0)
+        openpos_side = position['side']
+    
+        # some exchanges such as phemex returns negative levarage, convert to positve
+        leverage = abs(float(position['leverage'] or 0))
+
+        if openpos_size > 0:
+            openpos_bool = True
+            if openpos_side == 'long':
+                long = True
+            elif openpos_side == 'short':
+                long = False
+        else:
+            openpos_bool = False
+            long = None
 
-            logging.debug(f'{log_prefix} openpos_bool: {openpos_bool}, openpos_size: {openpos_size}, long: {long}, entry_price: {entry_price}, leverage: {leverage}')
+        logger.debug('(%s.fetch_open_orders) symbol %s: openpos_bool: %s, openpos_size: %s, long: %s, entry_price: %s, leverage: %s',
+                     self.class_name(), symbol, openpos_bool, openpos_size, long, entry_price, leverage)
 
-            return position, openpos_bool, openpos_size, long, entry_price, leverage
+        return position, openpos_bool, openpos_size, long, entry_price, leverage
 
     def fetch_candles_df(self, symbol, timeframe='5m', num_bars=50, only_closed=True):
-        log_prefix = f"({self.class_name()}.fetch_candles) symbol {symbol}:"
 
-        logging.debug(f'{log_prefix} Fetching {num_bars} candles: {timeframe}')
+        logger.debug('(%s.fetch_candles) symbol %s: Fetching %s candles: %s', self.class_name(), symbol, num_bars, timeframe)
         bars = self._exchange.fetch_ohlcv(symbol, timeframe=timeframe, limit=num_bars)
 
         df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
@@ -150,7 +303,7 @@ class ExchangeAdapter(BaseClass):
 
         # obtain only closed frames (5min * 60 * 1000)
         if only_closed == True:
-            df = df[df.timestamp < int(time.time() * 1000) - tf_to_mins[timeframe] * 60 * 1000]
+            df = df[df.timestamp < self._clock.ms() - tf_to_mins[timeframe] * 60 * 1000]
     
         df['datetime']= pd.to_datetime(df['timestamp'], unit='ms')
         df.set_index(pd.DatetimeIndex(df['datetime']), inplace=True)
@@ -163,13 +316,12 @@ class ExchangeAdapter(BaseClass):
 
     # standard call to fetch open orders
     def fetch_open_orders(self, symbol):
-        log_prefix = f"({self.class_name()}.fetch_open_orders) symbol {symbol}:"
 
         try:
             open_orders = self._exchange.fetch_open_orders(symbol) 
 
         except Exception as err:
-            logging.exception(f"{log_prefix} Unexpected {err=}, {type(err)=}")
+            logger.exception("(%s.fetch_open_orders) symbol %s: Unexpected err=%r, type(err)=%r", self.class_name(), symbol, err, type(err))
             raise
 
         else:
@@ -219,7 +371,7 @@ class ExchangeAdapter(BaseClass):
                 size = order['size']
                 limit = order['price']
 
-                logging.info(f'{log_prefix} Limit order of size {size} at {limit} for {symbol}')
+                logger.info('%s Limit order of size %s at %s for %s', log_prefix, size, limit, symbol)
 
                 try:
                     if dir == 'sell':
@@ -229,7 +381,7 @@ class ExchangeAdapter(BaseClass):
                         order_response = self._exchange.create_limit_buy_order(symbol, size, limit, self._trade_params)
 
                 except Exception as e:
-                    logging.exception(log_prefix, Exception(e))
+                    logger.exception(log_prefix, Exception(e))
 
                 else:
                     return str(order_response['id'])
@@ -239,13 +391,13 @@ class ExchangeAdapter(BaseClass):
                 stop_price = order['price']
                 stop_size  = order['pos_size']
                                             
-                logging.info(f'{log_prefix} Create stop {dir} order of size {stop_size} at {stop_price} for {symbol}')
+                logger.info('%s Create stop %s order of size %s at %s for %s', log_prefix, dir, stop_size, stop_price, symbol)
                 
                 try:
                     order_response = self.create_stop_loss_order_by_trigger_price(symbol, stop_price, stop_size, dir)
 
                 except Exception as e:
-                    logging.exception(log_prefix, Exception(e))
+                    logger.exception(log_prefix, Exception(e))
                 
                 else:
                     return str(order_response['id'])
@@ -262,10 +414,10 @@ class ExchangeAdapter(BaseClass):
         type = order['type']
 
         if order['exchange_id'] == self._exchange.id:
-            logging.info(f'{log_prefix} Cancel {dir} {type} order of {symbol} with order_id {order_id}')
+            logger.info('%s Cancel %s %s order of %s with order_id %s', log_prefix, dir, type, symbol, order_id)
             try:
                 self._exchange.cancel_order(order_id, symbol)
 
             except Exception as e:
-                logging.exception(log_prefix, Exception(e))
+                logger.exception(log_prefix, Exception(e))
     
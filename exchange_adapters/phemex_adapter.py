@@ -4,10 +4,13 @@ import ccxt
 
 from .exchange_adapter import ExchangeAdapter
 
+logger = logging.getLogger(__name__)
+
 class PhemexAdapter(ExchangeAdapter):
 
-    def __init__(self, connect_params, exchange_params):
-        exchange = ccxt.phemex(connect_params)
+    # exchange: a ccxt phemex compatible instance to use instead (e.g. a ReplayExchange)
+    def __init__(self, connect_params, exchange_params, exchange=None):
+        exchange = exchange if exchange is not None else ccxt.phemex(connect_params)
         super().__init__(exchange, exchange_params)
 
         # current defaults
@@ -28,11 +31,11 @@ class PhemexAdapter(ExchangeAdapter):
   
         # set margin and margin mode to cross
         try:
-            logging.info(f'{log_prefix} Initial margin requirement {initialMargin:.2%} -> max leverage {maxLeverage}')
-            logging.info(f'{log_prefix} Setting leverage mode to cross')
+            logger.info('%s Initial margin requirement %.2f%% -> max leverage %s', log_prefix, initialMargin * 100, maxLeverage)
+            logger.info('%s Setting leverage mode to cross', log_prefix)
             leverageResponse  = self._exchange.set_margin_mode('cross', symbol)
         except Exception as e:
-            logging.exception(log_prefix, e)
+            logger.exception(log_prefix, e)
             raise e
 
         return maxLeverage
@@ -46,6 +49,20 @@ class PhemexAdapter(ExchangeAdapter):
         params = { 'untriggered': True, 'code': margincoin }
         self._exchange.cancel_all_orders(symbol, params)
 
+    # amend by the replace endpoint (PUT /orders/replace), contracts as orderQty
+    def amend_limit_order(self, symbol, order_id, side, size, price):
+
+        params = { 'orderQty': int(size) }
+        order = self._exchange.edit_order(order_id, symbol, None, None, None, price, params)
+        return order
+
+    def amend_stop_order(self, symbol, order_id, side, size, price):
+
+        trigger_price_phe = int(round(price * 10000)) # same scaling as create_stop_loss_order_by_trigger_price
+        params = { 'orderQty': int(size), 'stopPxEp': trigger_price_phe }
+        order = self._exchange.edit_order(order_id, symbol, None, None, None, None, params)
+        return order
+
     def create_stop_loss_order_by_trigger_price(self, symbol, price, size, direction):
         log_prefix=f"({self.class_name()}.create_stop_loss_order_by_trigger_price) symbol {symbol}:"
         
@@ -65,20 +82,20 @@ class PhemexAdapter(ExchangeAdapter):
 
             if (price < ask):
                 order = self._exchange.create_order(symbol, 'market', 'sell', size, price, sl_params) 
-                logging.info(f'{log_prefix} Just made a SELL STOP LOSS order of {size} {symbol} at trigger price {price:.4f} phemex={trigger_price_phe}')
+                logger.info('%s Just made a SELL STOP LOSS order of %s %s at trigger price %.4f phemex=%s', log_prefix, size, symbol, price, trigger_price_phe)
                 return order
             else:
-                logging.exception(f'{log_prefix} Trigger price {price} above {ask} - no order placed - would trigger immediately')
+                logger.exception('%s Trigger price %s above %s - no order placed - would trigger immediately', log_prefix, price, ask)
                 raise Exception(f'{log_prefix} Trigger price {price} above {ask} - no order placed - would trigger immediately')
 
         elif direction == 'buy':
 
             if (price > bid):
                 order = self._exchange.create_order(symbol, 'market', 'buy', size, price, sl_params)   
-                logging.info(f'{log_prefix} Just made a BUY STOP LOSS order of {size} {symbol} at trigger price {price:.4f} phemex={trigger_price_phe}')
+                logger.info('%s Just made a BUY STOP LOSS order of %s %s at trigger price %.4f phemex=%s', log_prefix, size, symbol, price, trigger_price_phe)
                 return order
             else:
-                logging.exception(f'{log_prefix} Trigger price {price} below {bid} - no order placed - would trigger immediately')
+                logger.exception('%s Trigger price %s below %s - no order placed - would trigger immediately', log_prefix, price, bid)
                 raise Exception(f'{log_prefix} Trigger price {price} below {bid} - no order placed - would trigger immediately')
     
         else:
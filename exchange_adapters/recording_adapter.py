@@ -0,0 +1,122 @@
+import json
+import logging
+import time
+
+from base import BaseClass
+from streaming import StreamRecorder
+from .exchange_adapter import ExchangeAdapter
+
+logger = logging.getLogger(__name__)
+
+# Recordings of exchange sessions are recordings like the ones of websocket
+# streams (see streaming.recorder), the first message is the header
+#   { "header": { "adapter", "id", "exchange_params", "markets", "start" } }
+# followed by one message per request
+#   { "m": method, "a": args, "k": kwargs, "r": result, "l": latency }
+# with "e": [ error class, message ] instead of "r" if the request failed
+
+# the ccxt methods which send a request, all others are computed locally
+REQUEST_PREFIXES = ( 'fetch', 'create', 'cancel', 'edit', 'load_markets', 'set_leverage', 'set_margin_mode',
+                     'set_position_mode', 'setLeverage', 'setMarginMode', 'setPositionMode', 'private', 'public' )
+
+def is_request(method: str) -> bool:
+    return method.startswith(REQUEST_PREFIXES)
+
+# requests with the same method and arguments have the same key
+def request_key(method: str, args, kwargs) -> str:
+    return method + json.dumps([ list(args), kwargs ], sort_keys=True, separators=(',', ':'), default=str)
+
+class RecordingExchange(BaseClass):
+
+    # wraps a ccxt exchange and records each request with its response and
+    # latency, everything else is passed through
+
+    def __init__(self, exchange, recorder: StreamRecorder):
+
+        self._exchange = exchange
+        self._recorder: StreamRecorder = recorder
+
+    def __getattr__(self, name):
+
+        if name.startswith('__') or '_exchange' not in self.__dict__:
+            raise AttributeError(name)
+
+        attribute = getattr(self._exchange, name)
+        if callable(attribute) and is_request(name):
+            return lambda *args, **kwargs: self.call(name, list(args), kwargs, lambda: attribute(*args, **kwargs))
+
+        return attribute
+
+    def call(self, method: str, args: list, kwargs: dict, request):
+
+        start = time.perf_counter()
+        try:
+            result = request()
+        except Exception as e:
+            self._recorder.record({ 'm': method, 'a': args, 'k': kwargs, 'e': [ type(e).__name__, str(e) ],
+                                    'l': round(time.perf_counter() - start, 6) })
+            raise
+
+        self._recorder.record({ 'm': method, 'a': args, 'k': kwargs, 'r': result, 'l': round(time.perf_counter() - start, 6) })
+        return result
+
+class RecordingExchangeAdapter(BaseClass):
+
+    # records the requests of an exchange adapter (the calls of its ccxt
+    # exchange and its own http requests, like the plan orders of bitget) to
+    # a compressed (.gz) append-only recording, which a ReplayExchangeAdapter
+    # serves back offline. All methods are the ones of the wrapped adapter.
+    # The credentials are never recorded, the signed headers of the own http
+    # requests neither.
+
+    def __init__(self, exchange_adapter: ExchangeAdapter, path: str, append: bool = True):
+        log_prefix = f"({self.class_name()}.__init__):"
+
+        self._ea: ExchangeAdapter = exchange_adapter
+        self._recorder: StreamRecorder = StreamRecorder(path, append=append)
+
+        self._recorder.record({ 'header': { 'adapter': exchange_adapter.class_name(), 'id': exchange_adapter.id,
+                                            'exchange_params': exchange_adapter.exchange_params,
+                                            'markets': exchange_adapter._markets, 'start': time.time() } })
+
+        self._exchange = RecordingExchange(exchange_adapter._exchange, self._recorder)
+        exchange_adapter._exchange = self._exchange
+
+        if hasattr(exchange_adapter, '_http_get'):
+            http_get = exchange_adapter._http_get
+            exchange_adapter._http_get = lambda url, headers: self._exchange.call('http_get', [ url ], {}, lambda: http_get(url, headers))
+
+        logger.info('%s Recording the requests of %s to %s', log_prefix, exchange_adapter.class_name(), path)
+
+    def __getattr__(self, name):
+        if name.startswith('__') or '_ea' not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self._ea, name)
+
+    @property
+    def exchange_adapter(self) -> ExchangeAdapter:
+        return self._ea
+
+    @property
+    def path(self) -> str:
+        return self._recorder.path
+
+    # number of recorded requests
+    @property
+    def count(self) -> int:
+        return self._recorder.count - 1
+
+    @property
+    def exchange_params(self):
+        return self._ea.exchange_params
+
+    @property
+    def maker_fees(self):
+        return self._ea.maker_fees
+
+    @property
+    def taker_fees(self):
+        return self._ea.taker_fees
+
+    def close(self):
+        self._recorder.close()
@@ -0,0 +1,211 @@
+import builtins
+import copy
+import logging
+from collections import deque
+
+import ccxt
+
+from base import BaseClass
+from base import Clock
+from base import system_clock
+from streaming import load_recording
+from .exchange_adapter import ExchangeAdapter
+from .bitget_adapter import BitgetAdapter
+from .phemex_adapter import PhemexAdapter
+from .simulated_adapter import SimulatedAdapter
+from .simulated_exchange import SimulatedExchange
+from .recording_adapter import is_request
+from .recording_adapter import request_key
+
+logger = logging.getLogger(__name__)
+
+# adapters of a recording by class name, built on a ReplayExchange
+ADAPTERS = {
+    'PhemexAdapter': lambda exchange, params: PhemexAdapter({}, params, exchange=exchange),
+    'BitgetAdapter': lambda exchange, params: BitgetAdapter({ 'apiKey': '', 'secret': '', 'password': '' }, params, exchange=exchange),
+    'SimulatedAdapter': lambda exchange, params: SimulatedAdapter(exchange, params),
+}
+
+class ReplayExchange(BaseClass):
+
+    # serves the responses of a recording (see RecordingExchangeAdapter) in
+    # place of a ccxt exchange, deterministically and without network:
+    #  - a request gets the next unserved response of the same method and
+    #    arguments, else the next unserved one of the method (the bot of another
+    #    code version asked a bit differently, e.g. another price), else the
+    #    last one served again (it asks more often)
+    #  - recorded errors are raised again, a method never recorded raises
+    #    ccxt.ExchangeError
+    #  - with latency the recorded latency is slept on the clock
+    # Everything not requested from the exchange (precision, markets, ...) is
+    # computed by an offline instance of the exchange with the recorded markets.
+
+    def __init__(self, path: str, latency: bool = False, clock: Clock = None):
+
+        self._path: str = path
+        self._latency: bool = latency
+        self._clock: Clock = clock if clock is not None else system_clock
+
+        self._header: dict = None
+        self._by_key: dict = {}
+        self._by_method: dict = {}
+        self._last_by_key: dict = {}
+        self._last_by_method: dict = {}
+        self._served: set = set()
+        self._records: int = 0
+
+        for i, message in enumerate(m['msg'] for m in load_recording(path)):
+            if 'header' in message:
+                # appended sessions: the first header wins
+                self._header = self._header or message['header']
+                continue
+
+            message['i'] = i
+            self._by_key.setdefault(request_key(message['m'], message['a'], message['k']), deque()).append(message)
+            self._by_method.setdefault(message['m'], deque()).append(message)
+            self._records += 1
+
+        if self._header is None:
+            raise ValueError(f'({self.class_name()}.__init__): {path} is not a recording of an exchange adapter')
+
+        self._exchange = self._offline_exchange(self._header['id'], self._header['markets'])
+
+        self._exact: int = 0
+        self._inexact: int = 0
+        self._missing: int = 0
+
+    @staticmethod
+    def _offline_exchange(id: str, markets: dict):
+
+        if id == SimulatedExchange.id:
+            exchange = SimulatedExchange()
+            exchange.markets = markets
+        else:
+            exchange = getattr(ccxt, id)()
+            exchange.set_markets(markets)
+
+        return exchange
+
+    def __getattr__(self, name):
+
+        if name.startswith('__') or '_exchange' not in self.__dict__:
+            raise AttributeError(name)
+
+        if is_request(name):
+            return lambda *args, **kwargs: self.serve(name, args, kwargs)
+
+        return getattr(self._exchange, name)
+
+    @property
+    def header(self) -> dict:
+        return self._header
+
+    def stats(self) -> dict:
+        return { 'records': self._records, 'served': len(self._served), 'exact': self._exact,
+                 'inexact': self._inexact, 'missing': self._missing, 'unserved': self._records - len(self._served) }
+
+    def _take(self, records: deque) -> dict:
+
+        while records is not None and len(records) > 0:
+            record = records.popleft()
+            if record['i'] not in self._served:
+                self._served.add(record['i'])
+                return record
+
+        return None
+
+    @staticmethod
+    def _error(name: str, message: str) -> Exception:
+
+        error = getattr(ccxt, name, None) or getattr(builtins, name, None)
+        if not isinstance(error, type) or not issubclass(error, Exception):
+            error = Exception
+
+        return error(message)
+
+    def serve(self, method: str, args, kwargs: dict):
+        log_prefix = f"({self.class_name()}.serve) method {method}:"
+
+        key = request_key(method, args, kwargs)
+
+        record = self._take(self._by_key.get(key))
+        if record is not None:
+            self._exact += 1
+        else:
+            record = self._take(self._by_method.get(method)) or self._last_by_key.get(key) or self._last_by_method.get(method)
+
+            if record is None:
+                # the markets were loaded before the recording started
+                if method == 'load_markets':
+                    return copy.deepcopy(self._header['markets'])
+
+                self._missing += 1
+                raise ccxt.ExchangeError(f'{log_prefix} No recorded response in {self._path}')
+
+            self._inexact += 1
+
+        self._last_by_key[key] = record
+        self._last_by_method[method] = record
+
+        if self._latency:
+            self._clock.sleep(record['l'])
+
+        if 'e' in record:
+            raise self._error(*record['e'])
+
+        return copy.deepcopy(record['r'])
+
+    # the own http requests of an adapter (BitgetAdapter._http_get)
+    def http_get(self, url: str, headers: dict) -> tuple:
+        return self.serve('http_get', [ url ], {})
+
+class ReplayExchangeAdapter(BaseClass):
+
+    # the exchange adapter of a recording (PhemexAdapter, BitgetAdapter, ...)
+    # on a ReplayExchange, to run bots offline on the recorded traffic, e.g.
+    # to benchmark ticks or compare the decisions of two code versions. All
+    # methods are the ones of the adapter.
+
+    def __init__(self, path: str, latency: bool = False, clock: Clock = None):
+        log_prefix = f"({self.class_name()}.__init__):"
+
+        self._replay: ReplayExchange = ReplayExchange(path, latency=latency, clock=clock)
+
+        header = self._replay.header
+        if header['adapter'] not in ADAPTERS:
+            raise ValueError(f"{log_prefix} No replay for adapter {header['adapter']} of {path}")
+
+        self._ea: ExchangeAdapter = ADAPTERS[header['adapter']](self._replay, header['exchange_params'])
+
+        if hasattr(self._ea, '_http_get'):
+            self._ea._http_get = self._replay.http_get
+
+        logger.info("%s Replaying %s requests of %s from %s", log_prefix, self._replay.stats()['records'], header['adapter'], path)
+
+    def __getattr__(self, name):
+        if name.startswith('__') or '_ea' not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self._ea, name)
+
+    @property
+    def exchange_adapter(self) -> ExchangeAdapter:
+        return self._ea
+
+    @property
+    def replay(self) -> ReplayExchange:
+        return self._replay
+
+    @property
+    def exchange_params(self):
+        return self._ea.exchange_params
+
+    @property
+    def maker_fees(self):
+        return self._ea.maker_fees
+
+    @property
+    def taker_fees(self):
+        return self._ea.taker_fees
+
+    def stats(self) -> dict:
+        return self._replay.stats()
@@ -0,0 +1,66 @@
+import logging
+
+from .exchange_adapter import ExchangeAdapter
+from .simulated_exchange import SimulatedExchange
+
+logger = logging.getLogger(__name__)
+
+class SimulatedAdapter(ExchangeAdapter):
+
+    # adapter for the in-memory SimulatedExchange, behaves like the phemex
+    # adapter (stop orders of type 'Stop', post only limit orders)
+
+    def __init__(self, exchange: SimulatedExchange = None, exchange_params: dict = None):
+
+        exchange = exchange if exchange is not None else SimulatedExchange()
+        super().__init__(exchange, exchange_params or { 'type': 'swap', 'code': 'USD' })
+
+        self._maker_fees = exchange._maker_fees
+        self._taker_fees = exchange._taker_fees
+        self._openpos_size_field = 'contracts'
+        self._trade_params = { 'timeInForce': 'PostOnly' }
+        self._top_of_book_limit = 1
+
+        # bots and feeds run on the time of the exchange
+        self._clock = exchange.clock
+
+    @property
+    def exchange(self) -> SimulatedExchange:
+        return self._exchange
+
+    def get_contract_size(self, symbol: str):
+        return self._markets[symbol]['contractSize']
+
+    def set_leverage_for_symbol(self, symbol, leverage):
+        log_prefix = f"({self.class_name()}.set_leverage_for_symbol) symbol {symbol}:"
+
+        maxLeverage = self._markets[symbol]['limits']['leverage']['max']
+        self._exchange.set_leverage(maxLeverage, symbol)
+        logger.info('%s Max leverage %s', log_prefix, maxLeverage)
+
+        return maxLeverage
+
+    def cancel_all_orders(self, symbol):
+        self._exchange.cancel_all_orders(symbol, params=self._exchange_params)
+
+    def create_stop_loss_order_by_trigger_price(self, symbol, price, size, direction):
+        log_prefix=f"({self.class_name()}.create_stop_loss_order_by_trigger_price) symbol {symbol}:"
+
+        [ ask, bid ] = self.ask_bid(symbol)
+        sl_params = { 'stopPrice': price, 'reduceOnly': True }
+
+        if direction == 'sell':
+            if price >= ask:
+                raise Exception(f'{log_prefix} Trigger price {price} above {ask} - no order placed - would trigger immediately')
+
+        elif direction == 'buy':
+            if price <= bid:
+                raise Exception(f'{log_prefix} Trigger price {price} below {bid} - no order placed - would trigger immediately')
+
+        else:
+            raise ValueError(f'{log_prefix} +++ Parameter direction must be either sell or buy +++')
+
+        order = self._exchange.create_order(symbol, 'market', direction, size, price, sl_params)
+        logger.info('%s Just made a %s STOP LOSS order of %s %s at trigger price %s', log_prefix, direction.upper(), size, symbol, price)
+
+        return order
@@ -0,0 +1,506 @@
+import logging
+import math
+import threading
+
+import ccxt
+
+from base import BaseClass
+from base import Clock
+from base import system_clock
+
+logger = logging.getLogger(__name__)
+
+class SimulatedExchange(BaseClass):
+
+    # an in-memory exchange with the subset of the ccxt unified API used by the
+    # exchange adapters, to run bots without an account or network:
+    #  - prices are set with set_price, resting orders are matched against them:
+    #    limit buys fill at their price once the ask reaches it, limit sells once
+    #    the bid reaches it, stop orders (type 'Stop' like phemex) trigger on the
+    #    bid (sell) or ask (buy) and fill at market
+    #  - one net position per symbol, the realized pnl and fees go to the balance
+    #  - 1m candles are built from the prices, fetch_ohlcv aggregates them
+    #  - listeners are called with (event, payload) for 'ticker', 'order',
+    #    'trade' and 'position' changes, e.g. by streaming adapters
+    # Orders returned by the API are copies in the ccxt order structure.
+
+    id = 'simulated'
+    precisionMode = ccxt.TICK_SIZE
+
+    has = {
+        'fetchTime': True,
+        'fetchTicker': True,
+        'fetchTickers': True,
+        'fetchBidsAsks': True,
+        'fetchOrderBook': True,
+        'fetchOHLCV': True,
+        'fetchOrder': True,
+        'fetchOrders': True,
+        'fetchOpenOrders': True,
+        'fetchMyTrades': True,
+        'fetchPositions': True,
+        'fetchBalance': True,
+        'editOrder': True,
+        'cancelAllOrders': True,
+    }
+
+    def __init__(self, markets: dict = None, balance: float = 10000.0, code: str = 'USD',
+                 maker_fees: float = 0.0001, taker_fees: float = 0.0006, clock: Clock = None):
+
+        self._clock: Clock = clock if clock is not None else system_clock
+        self._code: str = code
+        self._balance: float = balance
+        self._maker_fees: float = maker_fees
+        self._taker_fees: float = taker_fees
+
+        # symbol -> { tick_size, amount_step, contract_size, max_leverage }
+        markets = markets or { 'ETH/USD:USD': {} }
+        self.markets: dict = { symbol: self._market(symbol, m) for symbol, m in markets.items() }
+
+        self._tickers: dict = {}
+        self._candles: dict = { symbol: {} for symbol in self.markets }
+        self._orders: dict = {}
+        self._open: dict = {}
+        self._trades: list = []
+        self._positions: dict = {}
+        self._leverage: dict = {}
+
+        self._next_id: int = 1
+        self._listeners: list = []
+        self._lock = threading.RLock()
+
+        self.calls: dict = {}
+
+    def _market(self, symbol: str, m: dict) -> dict:
+
+        tick_size = m.get('tick_size', 0.01)
+        max_leverage = m.get('max_leverage', 100)
+
+        return {
+            'id': symbol.split(':')[0].replace('/', ''),
+            'symbol': symbol,
+            'contractSize': m.get('contract_size', 1.0),
+            'precision': { 'price': tick_size, 'amount': m.get('amount_step', 1.0) },
+            'limits': { 'leverage': { 'max': max_leverage } },
+            'info': { 'riskLimits': [ { 'initialMargin': f'{100 / max_leverage}%' } ] }
+        }
+
+    @property
+    def clock(self) -> Clock:
+        return self._clock
+
+    @property
+    def balance(self) -> float:
+        return self._balance
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _emit(self, event: str, payload: dict):
+        for listener in list(self._listeners):
+            listener(event, dict(payload))
+
+    def _count(self, method: str):
+        self.calls[method] = self.calls.get(method, 0) + 1
+
+    def _order_id(self) -> str:
+        order_id = str(self._next_id)
+        self._next_id += 1
+        return order_id
+
+    # --- market data ---
+
+    def load_markets(self, reload: bool = False, params: dict = {}) -> dict:
+        self._count('load_markets')
+        return self.markets
+
+    def fetch_time(self, params: dict = {}) -> int:
+        self._count('fetch_time')
+        return self._clock.ms()
+
+    # set the top of book of a symbol, resting orders are matched against it
+    def set_price(self, symbol: str, bid: float, ask: float = None, volume: float = 0.0):
+
+        if ask is None:
+            ask = bid + self.markets[symbol]['precision']['price']
+
+        with self._lock:
+            timestamp = self._clock.ms()
+            self._tickers[symbol] = { 'symbol': symbol, 'bid': bid, 'ask': ask, 'last': (bid + ask) / 2,
+                                      'bidVolume': 1.0, 'askVolume': 1.0, 'timestamp': timestamp }
+            self._update_candle(symbol, timestamp, (bid + ask) / 2, volume)
+            self._emit('ticker', self._tickers[symbol])
+            self._match(symbol)
+
+    def _update_candle(self, symbol: str, timestamp: int, price: float, volume: float):
+
+        ts = timestamp - timestamp % 60000
+        candle = self._candles[symbol].get(ts)
+
+        if candle is None:
+            self._candles[symbol][ts] = [ ts, price, price, price, price, volume ]
+        else:
+            candle[2] = max(candle[2], price)
+            candle[3] = min(candle[3], price)
+            candle[4] = price
+            candle[5] += volume
+
+    # seed the history with 1m candles [ timestamp, open, high, low, close, volume ]
+    def load_candles(self, symbol: str, candles: list):
+        for c in candles:
+            self._candles[symbol][int(c[0])] = [ int(c[0]) ] + [ float(v) for v in c[1:6] ]
+
+    def _ticker(self, symbol: str) -> dict:
+
+        if symbol not in self._tickers:
+            raise ccxt.ExchangeNotAvailable(f'{self.id} no price for {symbol} yet')
+
+        return self._tickers[symbol]
+
+    def fetch_ticker(self, symbol: str, params: dict = {}) -> dict:
+        self._count('fetch_ticker')
+        return dict(self._ticker(symbol))
+
+    def fetch_tickers(self, symbols: list = None, params: dict = {}) -> dict:
+        self._count('fetch_tickers')
+        return { s: dict(t) for s, t in self._tickers.items() if symbols is None or s in symbols }
+
+    def fetch_bids_asks(self, symbols: list = None, params: dict = {}) -> dict:
+        self._count('fetch_bids_asks')
+        return { s: dict(t) for s, t in self._tickers.items() if symbols is None or s in symbols }
+
+    # a synthetic book: depth levels one tick apart around the top of book
+    def fetch_order_book(self, symbol: str, limit: int = None, params: dict = {}) -> dict:
+        self._count('fetch_order_book')
+
+        ticker = self._ticker(symbol)
+        tick = self.markets[symbol]['precision']['price']
+        depth = limit or 25
+
+        return { 'symbol': symbol,
+                 'asks': [ [ ticker['ask'] + i * tick, 1.0 ] for i in range(depth) ],
+                 'bids': [ [ ticker['bid'] - i * tick, 1.0 ] for i in range(depth) ],
+                 'timestamp': ticker['timestamp'],
+                 'nonce': None }
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', since: int = None, limit: int = None, params: dict = {}) -> list:
+        self._count('fetch_ohlcv')
+
+        tf_ms = int(ccxt.Exchange.parse_timeframe(timeframe) * 1000)
+        buckets = {}
+
+        with self._lock:
+            for ts in sorted(self._candles[symbol]):
+                [ _, o, h, l, c, v ] = self._candles[symbol][ts]
+                bucket_ts = ts - ts % tf_ms
+                bucket = buckets.get(bucket_ts)
+                if bucket is None:
+                    buckets[bucket_ts] = [ bucket_ts, o, h, l, c, v ]
+                else:
+                    bucket[2] = max(bucket[2], h)
+                    bucket[3] = min(bucket[3], l)
+                    bucket[4] = c
+                    bucket[5] += v
+
+        bars = [ buckets[ts] for ts in sorted(buckets) if since is None or ts >= since ]
+
+        if limit is not None:
+            bars = bars[:limit] if since is not None else bars[-limit:]
+
+        return bars
+
+    # --- precision ---
+
+    def price_to_precision(self, symbol: str, price) -> str:
+
+        tick = self.markets[symbol]['precision']['price']
+        decimals = max(0, -int(math.floor(math.log10(tick))))
+
+        return f'{round(round(float(price) / tick) * tick, decimals):.{decimals}f}'
+
+    def amount_to_precision(self, symbol: str, amount) -> str:
+
+        step = self.markets[symbol]['precision']['amount']
+        decimals = max(0, -int(math.floor(math.log10(step))))
+
+        # amounts are truncated like ccxt does
+        return f'{round(math.floor(float(amount) / step + 1e-9) * step, decimals):.{decimals}f}'
+
+    # --- account ---
+
+    def set_margin_mode(self, margin_mode: str, symbol: str = None, params: dict = {}):
+        self._count('set_margin_mode')
+        return { 'marginMode': margin_mode }
+
+    def set_leverage(self, leverage: float, symbol: str = None, params: dict = {}):
+        self._count('set_leverage')
+        self._leverage[symbol] = leverage
+        return { 'leverage': leverage }
+
+    def fetch_balance(self, params: dict = {}) -> dict:
+        self._count('fetch_balance')
+
+        with self._lock:
+            return { 'total': { self._code: self._balance }, 'free': { self._code: self._balance }, 'used': { self._code: 0.0 } }
+
+    def _position(self, symbol: str) -> dict:
+
+        p = self._positions.get(symbol, { 'size': 0.0, 'side': None, 'entry': 0.0 })
+
+        return { 'symbol': symbol,
+                 'side': p['side'],
+                 'contracts': p['size'],
+                 'contractSize': self.markets[symbol]['contractSize'],
+                 'entryPrice': p['entry'] if p['size'] > 0 else 0.0,
+                 'leverage': self._leverage.get(symbol, 1),
+                 'timestamp': self._clock.ms(),
+                 'info': {} }
+
+    def fetch_positions(self, symbols: list = None, params: dict = {}) -> list:
+        self._count('fetch_positions')
+
+        with self._lock:
+            return [ self._position(s) for s in self.markets if symbols is None or s in symbols ]
+
+    # --- orders ---
+
+    def _new_order(self, symbol: str, type: str, side: str, amount: float, price: float, params: dict) -> dict:
+
+        timestamp = self._clock.ms()
+        stop_price = params.get('stopPrice', params.get('triggerPrice'))
+
+        if stop_price is None and 'stopPxEp' in params:
+            stop_price = params['stopPxEp'] / 10000
+
+        if stop_price is not None:
+            type = 'Stop'
+
+        return { 'id': self._order_id(),
+                 'clientOrderId': None,
+                 'symbol': symbol,
+                 'type': type,
+                 'side': side,
+                 'amount': float(amount),
+                 'filled': 0.0,
+                 'remaining': float(amount),
+                 'price': float(price) if price is not None and type == 'limit' else None,
+                 'stopPrice': float(stop_price) if stop_price is not None else None,
+                 'triggerPrice': float(stop_price) if stop_price is not None else None,
+                 'average': None,
+                 'cost': 0.0,
+                 'status': 'open',
+                 'timeInForce': params.get('timeInForce', 'GTC'),
+                 'postOnly': params.get('timeInForce') == 'PostOnly',
+                 'reduceOnly': bool(params.get('reduceOnly', False)),
+                 'timestamp': timestamp,
+                 'datetime': ccxt.Exchange.iso8601(timestamp),
+                 'lastTradeTimestamp': None,
+                 'fee': None,
+                 'trades': [],
+                 'info': {} }
+
+    def create_order(self, symbol: str, type: str, side: str, amount: float, price: float = None, params: dict = {}) -> dict:
+        self._count('create_order')
+
+        if symbol not in self.markets:
+            raise ccxt.BadSymbol(f'{self.id} unknown symbol {symbol}')
+
+        if side not in [ 'buy', 'sell' ] or amount is None or amount <= 0:
+            raise ccxt.InvalidOrder(f'{self.id} invalid order {side} {amount}')
+
+        with self._lock:
+            order = self._new_order(symbol, type, side, amount, price, params)
+            ticker = self._tickers.get(symbol)
+
+            if order['type'] == 'limit':
+                if price is None:
+                    raise ccxt.InvalidOrder(f'{self.id} limit order without price')
+                crosses = ticker is not None and ((side == 'buy' and price >= ticker['ask']) or (side == 'sell' and price <= ticker['bid']))
+                if crosses and order['postOnly']:
+                    raise ccxt.OrderImmediatelyFillable(f'{self.id} post only {side} order at {price} would be filled immediately')
+
+            self._orders[order['id']] = order
+            self._open[order['id']] = order
+            self._emit('order', order)
+
+            if order['type'] == 'market':
+                self._fill(order, self._ticker(symbol)['ask' if side == 'buy' else 'bid'], taker=True)
+            else:
+                self._match(symbol)
+
+            return dict(order)
+
+    def create_limit_buy_order(self, symbol: str, amount: float, price: float, params: dict = {}) -> dict:
+        return self.create_order(symbol, 'limit', 'buy', amount, price, params)
+
+    def create_limit_sell_order(self, symbol: str, amount: float, price: float, params: dict = {}) -> dict:
+        return self.create_order(symbol, 'limit', 'sell', amount, price, params)
+
+    # replace price and / or amount of an open order in place, the id is kept
+    def edit_order(self, id: str, symbol: str, type: str, side: str, amount: float = None, price: float = None, params: dict = {}) -> dict:
+        self._count('edit_order')
+
+        with self._lock:
+            order = self._open.get(str(id))
+            if order is None:
+                raise ccxt.OrderNotFound(f'{self.id} order {id} not found')
+
+            if amount is not None:
+                order['amount'] = float(amount)
+                order['remaining'] = float(amount) - order['filled']
+
+            if order['type'] == 'Stop':
+                stop_price = params.get('stopPrice', params.get('triggerPrice', price))
+                if 'stopPxEp' in params:
+                    stop_price = params['stopPxEp'] / 10000
+                if stop_price is not None:
+                    order['stopPrice'] = order['triggerPrice'] = float(stop_price)
+            elif price is not None:
+                order['price'] = float(price)
+
+            order['timestamp'] = self._clock.ms()
+            self._emit('order', order)
+            self._match(symbol)
+
+            return dict(order)
+
+    def cancel_order(self, id: str, symbol: str = None, params: dict = {}) -> dict:
+        self._count('cancel_order')
+
+        with self._lock:
+            order = self._open.pop(str(id), None)
+            if order is None:
+                raise ccxt.OrderNotFound(f'{self.id} order {id} not found')
+
+            order['status'] = 'canceled'
+            self._emit('order', order)
+
+            return dict(order)
+
+    def cancel_all_orders(self, symbol: str = None, params: dict = {}) -> list:
+        self._count('cancel_all_orders')
+
+        with self._lock:
+            return [ self.cancel_order(o['id'], symbol) for o in list(self._open.values()) if symbol is None or o['symbol'] == symbol ]
+
+    def fetch_open_orders(self, symbol: str = None, since: int = None, limit: int = None, params: dict = {}) -> list:
+        self._count('fetch_open_orders')
+
+        with self._lock:
+            return [ dict(o) for o in self._open.values() if symbol is None or o['symbol'] == symbol ]
+
+    def fetch_order(self, id: str, symbol: str = None, params: dict = {}) -> dict:
+        self._count('fetch_order')
+
+        with self._lock:
+            if str(id) not in self._orders:
+                raise ccxt.OrderNotFound(f'{self.id} order {id} not found')
+            return dict(self._orders[str(id)])
+
+    def fetch_orders(self, symbol: str = None, since: int = None, limit: int = None, params: dict = {}) -> list:
+        self._count('fetch_orders')
+
+        with self._lock:
+            orders = [ dict(o) for o in self._orders.values() if (symbol is None or o['symbol'] == symbol) and (since is None or o['timestamp'] >= since) ]
+
+        return orders[-limit:] if limit is not None else orders
+
+    def fetch_my_trades(self, symbol: str = None, since: int = None, limit: int = None, params: dict = {}) -> list:
+        self._count('fetch_my_trades')
+
+        with self._lock:
+            trades = [ dict(t) for t in self._trades if (symbol is None or t['symbol'] == symbol) and (since is None or t['timestamp'] >= since) ]
+
+        return trades[-limit:] if limit is not None else trades
+
+    # --- matching ---
+
+    def _match(self, symbol: str):
+
+        ticker = self._tickers.get(symbol)
+        if ticker is None:
+            return
+
+        for order in sorted([ o for o in self._open.values() if o['symbol'] == symbol ], key=lambda o: o['timestamp']):
+            if order['id'] not in self._open:
+                continue
+
+            if order['type'] == 'limit':
+                if order['side'] == 'buy' and ticker['ask'] <= order['price']:
+                    self._fill(order, order['price'], taker=False)
+                elif order['side'] == 'sell' and ticker['bid'] >= order['price']:
+                    self._fill(order, order['price'], taker=False)
+
+            elif order['type'] == 'Stop':
+                if order['side'] == 'sell' and ticker['bid'] <= order['stopPrice']:
+                    self._fill(order, ticker['bid'], taker=True)
+                elif order['side'] == 'buy' and ticker['ask'] >= order['stopPrice']:
+                    self._fill(order, ticker['ask'], taker=True)
+
+    def _fill(self, order: dict, price: float, taker: bool):
+
+        symbol = order['symbol']
+        p = self._positions.setdefault(symbol, { 'size': 0.0, 'side': None, 'entry': 0.0 })
+        side = 'long' if order['side'] == 'buy' else 'short'
+        amount = order['remaining']
+
+        # reduce only orders never open or flip a position
+        if order['reduceOnly']:
+            if p['size'] == 0 or p['side'] == side:
+                self._open.pop(order['id'], None)
+                order['status'] = 'canceled'
+                self._emit('order', order)
+                return
+            amount = min(amount, p['size'])
+
+        contract_size = self.markets[symbol]['contractSize']
+        fee = amount * price * contract_size * (self._taker_fees if taker else self._maker_fees)
+        pnl = 0.0
+
+        if p['size'] == 0 or p['side'] == side:
+            p['entry'] = (p['entry'] * p['size'] + price * amount) / (p['size'] + amount)
+            p['size'] += amount
+            p['side'] = side
+        else:
+            closed = min(amount, p['size'])
+            direction = 1 if p['side'] == 'long' else -1
+            pnl = (price - p['entry']) * closed * contract_size * direction
+            p['size'] -= closed
+
+            if amount > closed:
+                p['size'] = amount - closed
+                p['side'] = side
+                p['entry'] = price
+            elif p['size'] == 0:
+                p['side'] = None
+                p['entry'] = 0.0
+
+        self._balance += pnl - fee
+
+        timestamp = self._clock.ms()
+        trade = { 'id': str(len(self._trades) + 1), 'order': order['id'], 'symbol': symbol, 'side': order['side'],
+                  'type': order['type'], 'takerOrMaker': 'taker' if taker else 'maker', 'price': price,
+                  'amount': amount, 'cost': amount * price * contract_size, 'realizedPnl': pnl,
+                  'fee': { 'cost': fee, 'currency': self._code }, 'timestamp': timestamp,
+                  'datetime': ccxt.Exchange.iso8601(timestamp), 'info': {} }
+        self._trades.append(trade)
+
+        order['filled'] += amount
+        order['remaining'] = order['amount'] - order['filled']
+        order['average'] = price
+        order['cost'] += trade['cost']
+        order['lastTradeTimestamp'] = timestamp
+        order['trades'].append(trade['id'])
+        order['status'] = 'closed'
+        self._open.pop(order['id'], None)
+
+        logger.debug('(%s._fill) symbol %s: %s %s order %s filled %s at %s - position %s %s at %s', self.class_name(), symbol,
+                     order['type'], order['side'], order['id'], amount, price, p['side'], p['size'], p['entry'])
+
+        self._emit('trade', trade)
+        self._emit('order', order)
+        self._emit('position', self._position(symbol))
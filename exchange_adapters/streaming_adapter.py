@@ -0,0 +1,371 @@
+import logging
+import threading
+import time
+
+from base import BaseClass
+from streaming import LocalOrderBook
+from streaming import StreamClient
+from streaming import StreamRecorder
+from streaming import StreamProtocol
+from streaming import PROTOCOLS
+from streaming import BOOK
+from streaming import ORDERS
+from streaming import POSITIONS
+from streaming import CHANNELS
+from .exchange_adapter import ExchangeAdapter
+
+logger = logging.getLogger(__name__)
+
+class StreamingAdapter(BaseClass):
+
+    # wraps an exchange adapter and serves ask_bid, fetch_open_orders and
+    # fetch_open_positions from state kept up to date by a websocket stream
+    # (like the watch_order_book, watch_orders and watch_positions of ccxt.pro):
+    #  - a local order book per symbol, invalidated on a sequence gap, checksum
+    #    mismatch or crossed book and rebuilt from a new snapshot (resubscribe)
+    #  - open orders and positions, loaded by REST after each (re)connect and
+    #    every resync_interval seconds, updated by the stream in between
+    #  - orders created or cancelled through the adapter are tracked at once,
+    #    so the bot sees its own orders before the stream reports them
+    #  - while disconnected or without a valid book the calls go to the REST
+    #    api of the wrapped adapter
+    #  - listeners get the same (event, payload) calls as with the SimulatedExchange
+    #    ('ticker', 'order', 'trade', 'position'), see botlib.events.ExchangeListener
+    # All other methods are the ones of the wrapped adapter. The private channels
+    # (orders, positions) need the credentials (apiKey, secret, password) of the
+    # account; url can point to a ReplayServer to test offline.
+
+    def __init__(self, exchange_adapter: ExchangeAdapter, symbols: list, url: str = None,
+                 protocol: StreamProtocol = None, credentials: dict = None, channels: list = None,
+                 resync_interval: float = 60.0, reconnect_delay: float = 1.0, record_to: str = None):
+
+        self._ea: ExchangeAdapter = exchange_adapter
+        self._symbols: list = symbols
+        self._channels: list = channels if channels is not None else CHANNELS
+        self._resync_interval: float = resync_interval
+
+        self._protocol: StreamProtocol = protocol if protocol is not None else PROTOCOLS[exchange_adapter.id](exchange_adapter._markets)
+
+        self._books: dict = { s: LocalOrderBook(s) for s in symbols }
+        self._resubscribed: dict = { s: False for s in symbols }
+        self._orders: dict = { s: {} for s in symbols }
+        self._positions: dict = { s: {} for s in symbols }
+        self._synced: dict = { s: False for s in symbols }
+        self._last_resync: dict = { s: 0.0 for s in symbols }
+
+        self._lock = threading.RLock()
+        self._listeners: list = []
+
+        self._served: int = 0
+        self._fallbacks: int = 0
+        self._resyncs: int = 0
+
+        self._recorder: StreamRecorder = StreamRecorder(record_to) if record_to is not None else None
+        self._client: StreamClient = StreamClient(url if url is not None else self._protocol.url, self._protocol, self,
+                                                  { s: self._channels for s in symbols },
+                                                  credentials=credentials, reconnect_delay=reconnect_delay,
+                                                  recorder=self._recorder)
+
+    # everything not served from the stream is passed to the wrapped adapter
+    def __getattr__(self, name):
+        if name.startswith('__') or '_ea' not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self._ea, name)
+
+    @property
+    def exchange_adapter(self) -> ExchangeAdapter:
+        return self._ea
+
+    @property
+    def client(self) -> StreamClient:
+        return self._client
+
+    @property
+    def exchange_params(self):
+        return self._ea.exchange_params
+
+    @property
+    def maker_fees(self):
+        return self._ea.maker_fees
+
+    @property
+    def taker_fees(self):
+        return self._ea.taker_fees
+
+    def start(self):
+        self._client.start()
+        return self
+
+    def close(self):
+
+        self._client.close()
+        if self._recorder is not None:
+            self._recorder.close()
+
+    # True when connected and the books of all symbols are valid
+    def wait_ready(self, timeout: float = 10.0) -> bool:
+
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self._client.connected and (BOOK not in self._channels or all(b.valid for b in self._books.values())):
+                return True
+            time.sleep(0.01)
+
+        return False
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _emit(self, event: str, payload: dict):
+        for listener in list(self._listeners):
+            listener(event, dict(payload))
+
+    def stats(self) -> dict:
+        return { 'messages': self._client.messages, 'reconnects': self._client.reconnects,
+                 'gaps': sum(b.gaps for b in self._books.values()), 'resyncs': self._resyncs,
+                 'served': self._served, 'fallbacks': self._fallbacks }
+
+    # --- the adapter api served from the stream ---
+
+    def ask_bid(self, symbol):
+
+        with self._lock:
+            book = self._books.get(symbol)
+            top = book.top() if book is not None and book.valid and self._client.connected else None
+
+        if top is not None:
+            self._served += 1
+            return top
+
+        self._fallbacks += 1
+        return self._ea.ask_bid(symbol)
+
+    def ask_bids(self, symbols: list) -> dict:
+
+        top = { s: self.ask_bid(s) for s in symbols if s in self._books }
+        missing = [ s for s in symbols if s not in top ]
+
+        if len(missing) > 0:
+            top.update(self._ea.ask_bids(missing))
+
+        return top
+
+    def order_book(self, symbol, limit=None) -> dict:
+
+        with self._lock:
+            book = self._books.get(symbol)
+            if book is not None and book.valid and self._client.connected:
+                return book.order_book(limit)
+
+        return None
+
+    def _streamed(self, symbol: str, channel: str) -> bool:
+        return symbol in self._synced and channel in self._channels and self._client.connected
+
+    def _resync_due(self, symbol: str) -> bool:
+        return not self._synced[symbol] or time.time() - self._last_resync[symbol] > self._resync_interval
+
+    def fetch_open_orders(self, symbol):
+
+        if not self._streamed(symbol, ORDERS):
+            self._fallbacks += 1
+            return self._ea.fetch_open_orders(symbol)
+
+        if self._resync_due(symbol):
+            self.resync(symbol)
+
+        with self._lock:
+            self._served += 1
+            return [ dict(o) for o in self._orders[symbol].values() ]
+
+    def fetch_open_positions(self, symbol):
+
+        if not self._streamed(symbol, POSITIONS):
+            self._fallbacks += 1
+            return self._ea.fetch_open_positions(symbol)
+
+        if self._resync_due(symbol):
+            self.resync(symbol)
+
+        with self._lock:
+            self._served += 1
+            positions = [ dict(p) for p in self._positions[symbol].values() ]
+
+        return self._ea.open_position_of(symbol, positions)
+
+    # load open orders and positions by REST
+    def resync(self, symbol: str):
+        log_prefix = f"({self.class_name()}.resync) symbol {symbol}:"
+
+        orders = self._ea.fetch_open_orders(symbol) if ORDERS in self._channels else []
+        positions = self._ea._exchange.fetch_positions(symbols=[symbol], params=self._ea.exchange_params) if POSITIONS in self._channels else []
+
+        with self._lock:
+            self._orders[symbol] = { str(o['id']): o for o in orders }
+            self._positions[symbol] = { p.get('side') or 'none': p for p in positions }
+            self._synced[symbol] = True
+            self._last_resync[symbol] = time.time()
+            self._resyncs += 1
+
+        logger.debug('%s %s open orders and %s positions loaded', log_prefix, len(orders), len(positions))
+
+    # --- orders through the adapter, tracked before the stream reports them ---
+
+    def _track(self, order: dict) -> dict:
+
+        if order is None or order.get('symbol') not in self._orders:
+            return order
+
+        with self._lock:
+            # some exchanges only return the id, the next call resyncs then
+            if order.get('amount') is None or (order.get('price') is None and order.get('stopPrice') is None):
+                self._synced[order['symbol']] = False
+            elif order.get('status') in (None, 'open'):
+                self._orders[order['symbol']][str(order['id'])] = dict(order, status='open')
+
+        return order
+
+    def create_limit_buy_order(self, symbol, size, price):
+        return self._track(self._ea.create_limit_buy_order(symbol, size, price))
+
+    def create_limit_sell_order(self, symbol, size, price):
+        return self._track(self._ea.create_limit_sell_order(symbol, size, price))
+
+    def close_short_limit_order(self, symbol, size, price):
+        return self._track(self._ea.close_short_limit_order(symbol, size, price))
+
+    def close_long_limit_order(self, symbol, size, price):
+        return self._track(self._ea.close_long_limit_order(symbol, size, price))
+
+    def create_stop_loss_order_by_trigger_price(self, symbol, price, size, direction):
+        return self._track(self._ea.create_stop_loss_order_by_trigger_price(symbol, price, size, direction))
+
+    def amend_limit_order(self, symbol, order_id, side, size, price):
+        return self._track(self._ea.amend_limit_order(symbol, order_id, side, size, price))
+
+    def amend_stop_order(self, symbol, order_id, side, size, price):
+        return self._track(self._ea.amend_stop_order(symbol, order_id, side, size, price))
+
+    def cancel_order(self, order_id, symbol):
+
+        self._ea.cancel_order(order_id, symbol)
+        with self._lock:
+            self._orders.get(symbol, {}).pop(str(order_id), None)
+
+    def cancel_all_orders(self, symbol):
+
+        self._ea.cancel_all_orders(symbol)
+        with self._lock:
+            if symbol in self._orders:
+                self._orders[symbol] = {}
+
+    # --- stream handler, called from the thread of the client ---
+
+    def on_connect(self):
+
+        for symbol in self._symbols:
+            if ORDERS in self._channels or POSITIONS in self._channels:
+                self.resync(symbol)
+
+    def on_disconnect(self):
+
+        with self._lock:
+            for symbol in self._symbols:
+                self._books[symbol].invalidate('Disconnected')
+                self._resubscribed[symbol] = False
+                self._synced[symbol] = False
+
+    def on_event(self, event: dict):
+
+        if event['channel'] == BOOK:
+            self._on_book(event)
+        elif event['channel'] == ORDERS:
+            self._on_orders(event)
+        elif event['channel'] == POSITIONS:
+            self._on_positions(event)
+
+    def _on_book(self, event: dict):
+        log_prefix = f"({self.class_name()}._on_book) symbol {event['symbol']}:"
+
+        symbol = event['symbol']
+        book = self._books.get(symbol)
+        if book is None:
+            return
+
+        with self._lock:
+            top = book.top() if book.valid else None
+
+            if event['snapshot']:
+                book.reset(event['bids'], event['asks'], event['seq'], event['timestamp'])
+                self._resubscribed[symbol] = False
+                ok = True
+            else:
+                ok = book.apply(event['bids'], event['asks'], event['seq'], event['prev_seq'],
+                                event['timestamp'], event['checksum'], self._protocol.contiguous)
+
+            new_top = book.top() if book.valid else None
+
+        if not ok and not self._resubscribed[symbol]:
+            logger.warning('%s WARN: %s - requesting a new snapshot', log_prefix, book.last_error)
+            self._resubscribed[symbol] = True
+            self._client.resubscribe(symbol, BOOK)
+
+        if new_top is not None and new_top != top:
+            self._emit('ticker', { 'symbol': symbol, 'ask': new_top[0], 'bid': new_top[1], 'timestamp': book.timestamp })
+
+    def _on_orders(self, event: dict):
+
+        emitted = []
+
+        with self._lock:
+            if event['snapshot']:
+                for symbol in self._symbols:
+                    self._orders[symbol] = {}
+
+            for order in event['orders']:
+                orders = self._orders.get(order['symbol'])
+                if orders is None:
+                    continue
+
+                previous = orders.get(order['id'])
+                filled = (order['filled'] or 0) - ((previous.get('filled') or 0) if previous is not None else 0)
+
+                if order['status'] == 'open':
+                    orders[order['id']] = order
+                else:
+                    orders.pop(order['id'], None)
+
+                emitted.append(('order', order))
+                if filled > 0:
+                    emitted.append(('trade', { 'symbol': order['symbol'], 'order': order['id'], 'side': order['side'],
+                                               'amount': filled, 'price': order['price'], 'timestamp': order['timestamp'] }))
+
+        for event_type, payload in emitted:
+            self._emit(event_type, payload)
+
+    def _on_positions(self, event: dict):
+
+        emitted = []
+
+        with self._lock:
+            if event['snapshot']:
+                for symbol in self._symbols:
+                    self._positions[symbol] = {}
+
+            for position in event['positions']:
+                positions = self._positions.get(position['symbol'])
+                if positions is None:
+                    continue
+
+                # a closed position has no side on some exchanges
+                if position['side'] is None:
+                    positions.clear()
+                positions[position['side'] or 'none'] = position
+                emitted.append(position)
+
+        for position in emitted:
+            self._emit('position', position)
@@ -0,0 +1,5 @@
+from .dialects import MockDialect
+from .dialects import PhemexDialect
+from .dialects import BitgetDialect
+from .dialects import DIALECTS
+from .mock_server import MockExchangeServer
\ No newline at end of file
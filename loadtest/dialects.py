@@ -0,0 +1,482 @@
+import math
+
+import ccxt
+
+from base import BaseClass
+from exchange_adapters import BitgetAdapter
+from exchange_adapters import ExchangeAdapter
+from exchange_adapters import PhemexAdapter
+from exchange_adapters import SimulatedExchange
+from sharding import preload
+
+# the timeframe of a candle resolution in seconds (phemex resolution, bitget granularity)
+def timeframe_of(seconds: int) -> str:
+
+    for unit, length in [ ('w', 604800), ('d', 86400), ('h', 3600), ('m', 60) ]:
+        if seconds % length == 0:
+            return f'{seconds // length}{unit}'
+
+    raise ValueError(f'(timeframe_of) No timeframe of {seconds} seconds')
+
+class MockDialect(BaseClass):
+
+    # the REST dialect of an exchange spoken by the MockExchangeServer: the
+    # routes (method, path) -> (handler, private, envelope) with handlers
+    # working on a SimulatedExchange (the market for public routes, the account
+    # of the api key for private ones), the response envelopes, the errors and
+    # the adapter of a bot pointed at the server. Handlers get the query and
+    # body parameters as one dict (query values are strings) and return the
+    # data of the response. Only the endpoints the adapters and ccxt use for
+    # the bots are spoken.
+
+    id = None
+    settle = None
+    ok_code = None
+    error_status = 200
+
+    def __init__(self):
+
+        self._symbols: dict = {}
+        self._routes: dict = {}
+        self._exact: dict = getattr(ccxt, self.id)().exceptions['exact']
+
+    @property
+    def routes(self) -> dict:
+        return self._routes
+
+    def route(self, method: str, path: str, handler, private: bool = False, envelope=None):
+        self._routes[(method, path)] = (handler, private, envelope or self.response)
+
+    def symbol_of(self, base: str) -> str:
+        return f'{base}/{self.settle}:{self.settle}'
+
+    def market_id(self, symbol: str) -> str:
+        return symbol.split(':')[0].replace('/', '')
+
+    def add_market(self, symbol: str):
+        self._symbols[self.market_id(symbol)] = symbol
+
+    def symbol(self, market_id: str) -> str:
+
+        if market_id not in self._symbols:
+            raise ccxt.BadSymbol(f'{self.id} unknown symbol {market_id}')
+
+        return self._symbols[market_id]
+
+    def api_key(self, headers) -> str:
+        pass
+
+    def response(self, data) -> dict:
+        return { 'code': self.ok_code, 'msg': '', 'data': data }
+
+    # the exact error code of ccxt for the exception (or a base class of it)
+    def error(self, e: Exception) -> tuple:
+
+        for cls in type(e).__mro__:
+            code = next((c for c, error in self._exact.items() if error is cls and c.isdigit()), None)
+            if code is not None:
+                return self.error_status, { 'code': code, 'msg': str(e), 'data': None }
+
+        return self.error_status, { 'code': '1', 'msg': str(e), 'data': None }
+
+    def urls(self, url: str) -> dict:
+        pass
+
+    # the adapter of a bot on the mock server, with the metadata of a
+    # SharedMarkets it does not load the markets from the server
+    def adapter(self, url: str, api_key: str, metadata: dict = None) -> ExchangeAdapter:
+        pass
+
+class PhemexDialect(MockDialect):
+
+    # phemex contracts: prices scaled by 10^4 (Ep), values by 10^4 (Ev)
+
+    id = 'phemex'
+    settle = 'USD'
+    ok_code = 0
+    price_scale = 4
+    value_scale = 4
+
+    def __init__(self):
+        super().__init__()
+
+        self.route('GET', '/exchange/public/cfg/v2/products', self.products)
+        self.route('GET', '/v1/exchange/public/products', lambda exchange, params: [])
+        self.route('GET', '/v1/md/orderbook', self.order_book, envelope=self.result)
+        self.route('GET', '/exchange/public/md/kline', self.kline)
+        self.route('GET', '/md/v2/ticker/24hr', self.ticker, envelope=self.result)
+        self.route('GET', '/accounts/accountPositions', self.account_positions, private=True)
+        self.route('PUT', '/positions/leverage', lambda exchange, params: 'OK', private=True)
+        self.route('POST', '/orders', self.create_order, private=True)
+        self.route('PUT', '/orders/replace', self.replace_order, private=True)
+        self.route('DELETE', '/orders/cancel', self.cancel_order, private=True)
+        self.route('DELETE', '/orders/all', self.cancel_all_orders, private=True)
+        self.route('GET', '/orders/activeList', self.active_orders, private=True)
+        self.route('GET', '/exchange/order', self.fetch_order, private=True)
+        self.route('GET', '/exchange/order/list', self.fetch_orders, private=True)
+
+    def api_key(self, headers) -> str:
+        return headers.get('x-phemex-access-token')
+
+    # the envelope of the market data endpoints
+    def result(self, data) -> dict:
+        return { 'error': None, 'id': 0, 'result': data }
+
+    def ep(self, price: float) -> int:
+        return int(round(price * 10 ** self.price_scale)) if price is not None else 0
+
+    def from_ep(self, ep) -> float:
+        return int(ep) / 10 ** self.price_scale
+
+    def products(self, exchange: SimulatedExchange, params: dict) -> dict:
+
+        products = []
+        risk_limits = []
+
+        for symbol, market in exchange.markets.items():
+            base = symbol.split('/')[0]
+            products.append({ 'symbol': market['id'], 'type': 'Perpetual', 'baseCurrency': base,
+                              'contractUnderlyingAssets': base, 'quoteCurrency': self.settle, 'settleCurrency': self.settle,
+                              'contractSize': f"{market['contractSize']} {base}", 'lotSize': market['precision']['amount'],
+                              'tickSize': market['precision']['price'], 'priceScale': self.price_scale, 'ratioScale': 8,
+                              'valueScale': self.value_scale, 'minPriceEp': 1, 'maxPriceEp': 2000000000,
+                              'makerFeeRateEr': 10000, 'takerFeeRateEr': 60000, 'maxOrderQty': 1000000,
+                              'maxLeverage': market['limits']['leverage']['max'], 'status': 'Listed' })
+            risk_limits.append({ 'symbol': market['id'], 'riskLimits': market['info']['riskLimits'] })
+
+        return { 'currencies': [ { 'currency': self.settle, 'name': self.settle, 'valueScale': self.value_scale,
+                                   'minValueEv': 1, 'maxValueEv': 5000000000000000 } ],
+                 'products': products, 'riskLimits': risk_limits }
+
+    def order_book(self, exchange: SimulatedExchange, params: dict) -> dict:
+
+        book = exchange.fetch_order_book(self.symbol(params['symbol']))
+
+        return { 'book': { 'asks': [ [ self.ep(p), q ] for p, q in book['asks'] ],
+                           'bids': [ [ self.ep(p), q ] for p, q in book['bids'] ] },
+                 'timestamp': book['timestamp'] * 1000000, 'sequence': book['timestamp'] }
+
+    # rows [ timestamp (s), interval, last close, open, high, low, close (Ep), volume, turnover ]
+    def kline(self, exchange: SimulatedExchange, params: dict) -> dict:
+
+        resolution = int(params['resolution'])
+        bars = exchange.fetch_ohlcv(self.symbol(params['symbol']), timeframe_of(resolution), since=int(params['from']) * 1000)
+        bars = [ b for b in bars if b[0] < int(params['to']) * 1000 ]
+
+        return { 'rows': [ [ b[0] // 1000, resolution, self.ep(b[1]), self.ep(b[1]), self.ep(b[2]), self.ep(b[3]), self.ep(b[4]),
+                             b[5], 0 ] for b in bars ] }
+
+    def ticker(self, exchange: SimulatedExchange, params: dict) -> dict:
+
+        ticker = exchange.fetch_ticker(self.symbol(params['symbol']))
+
+        return { 'symbol': params['symbol'], 'timestamp': ticker['timestamp'] * 1000000, 'lastEp': self.ep(ticker['last']),
+                 'bidEp': self.ep(ticker['bid']), 'askEp': self.ep(ticker['ask']), 'openEp': self.ep(ticker['last']),
+                 'highEp': self.ep(ticker['last']), 'lowEp': self.ep(ticker['last']), 'volume': 0, 'turnoverEv': 0 }
+
+    def account_positions(self, exchange: SimulatedExchange, params: dict) -> dict:
+
+        balance = exchange.fetch_balance()['total'][self.settle]
+        positions = []
+
+        for p in exchange.fetch_positions():
+            value = p['contracts'] * p['entryPrice'] * p['contractSize']
+            positions.append({ 'symbol': exchange.markets[p['symbol']]['id'], 'currency': self.settle,
+                               'side': { 'long': 'Buy', 'short': 'Sell' }.get(p['side'], 'None'), 'size': p['contracts'],
+                               'avgEntryPrice': str(p['entryPrice']), 'leverage': str(p['leverage']),
+                               'markPrice': str(exchange.fetch_ticker(p['symbol'])['last']), 'value': str(value),
+                               'positionMargin': str(value / p['leverage']), 'assignedPosBalance': str(value / p['leverage']),
+                               'maintMarginReq': '0.005', 'liquidationPrice': '0' })
+
+        return { 'account': { 'currency': self.settle, 'accountBalanceEv': int(round(balance * 10 ** self.value_scale)),
+                              'totalUsedBalanceEv': 0 },
+                 'positions': positions }
+
+    def order(self, exchange: SimulatedExchange, o: dict) -> dict:
+
+        if o['status'] == 'closed':
+            status = 'Filled'
+        elif o['status'] == 'canceled':
+            status = 'Canceled'
+        elif o['type'] == 'Stop':
+            status = 'Untriggered'
+        else:
+            status = 'PartiallyFilled' if o['filled'] > 0 else 'New'
+
+        return { 'orderID': o['id'], 'clOrdID': o['clientOrderId'] or '', 'symbol': exchange.markets[o['symbol']]['id'],
+                 'side': o['side'].capitalize(), 'orderType': { 'limit': 'Limit', 'market': 'Market' }.get(o['type'], o['type']),
+                 'ordStatus': status, 'priceEp': self.ep(o['price']), 'orderQty': o['amount'], 'cumQty': o['filled'],
+                 'leavesQty': o['remaining'], 'cumValue': o['cost'], 'stopPx': o['stopPrice'], 'stopPxEp': self.ep(o['stopPrice']),
+                 'timeInForce': 'PostOnly' if o['postOnly'] else 'GoodTillCancel', 'reduceOnly': o['reduceOnly'],
+                 'actionTimeNs': o['timestamp'] * 1000000, 'transactTimeNs': 0, 'closedPnl': 0 }
+
+    def create_order(self, exchange: SimulatedExchange, params: dict) -> dict:
+
+        symbol = self.symbol(params['symbol'])
+        order_params = { 'timeInForce': params.get('timeInForce'), 'reduceOnly': params.get('reduceOnly', False) }
+
+        if 'stopPxEp' in params:
+            order_params['stopPxEp'] = int(params['stopPxEp'])
+
+        price = self.from_ep(params['priceEp']) if 'priceEp' in params else None
+        o = exchange.create_order(symbol, params['ordType'].lower(), params['side'].lower(), float(params['orderQty']), price, order_params)
+        o['clientOrderId'] = params.get('clOrdID')
+
+        return self.order(exchange, o)
+
+    def replace_order(self, exchange: SimulatedExchange, params: dict) -> dict:
+
+        symbol = self.symbol(params['symbol'])
+        order_params = { 'stopPxEp': int(params['stopPxEp']) } if 'stopPxEp' in params else {}
+        amount = float(params['orderQty']) if 'orderQty' in params else None
+        price = self.from_ep(params['priceEp']) if 'priceEp' in params else None
+
+        return self.order(exchange, exchange.edit_order(params['orderID'], symbol, None, None, amount, price, order_params))
+
+    def cancel_order(self, exchange: SimulatedExchange, params: dict) -> dict:
+        return self.order(exchange, exchange.cancel_order(params['orderID'], self.symbol(params['symbol'])))
+
+    # active orders by default, the conditional (stop) orders with untriggered
+    def cancel_all_orders(self, exchange: SimulatedExchange, params: dict) -> int:
+
+        symbol = self.symbol(params['symbol'])
+        untriggered = str(params.get('untriggered', 'false')).lower() == 'true'
+        orders = [ o for o in exchange.fetch_open_orders(symbol) if (o['type'] == 'Stop') == untriggered ]
+
+        for o in orders:
+            exchange.cancel_order(o['id'], symbol)
+
+        return len(orders)
+
+    def active_orders(self, exchange: SimulatedExchange, params: dict) -> dict:
+        return { 'rows': [ self.order(exchange, o) for o in exchange.fetch_open_orders(self.symbol(params['symbol'])) ] }
+
+    def fetch_order(self, exchange: SimulatedExchange, params: dict) -> list:
+        return [ self.order(exchange, exchange.fetch_order(params['orderID'], self.symbol(params['symbol']))) ]
+
+    def fetch_orders(self, exchange: SimulatedExchange, params: dict) -> dict:
+
+        since = int(params['start']) if 'start' in params else None
+        limit = int(params['limit']) if 'limit' in params else None
+
+        return { 'rows': [ self.order(exchange, o) for o in exchange.fetch_orders(self.symbol(params['symbol']), since, limit) ] }
+
+    def urls(self, url: str) -> dict:
+        return { 'v1': f'{url}/v1', 'v2': url, 'public': f'{url}/exchange/public', 'private': url }
+
+    def adapter(self, url: str, api_key: str, metadata: dict = None) -> ExchangeAdapter:
+
+        exchange = preload(ccxt.phemex({ 'apiKey': api_key, 'secret': 'mock', 'urls': { 'api': self.urls(url) } }), metadata)
+        return PhemexAdapter({}, { 'type': 'swap', 'code': self.settle }, exchange=exchange)
+
+class BitgetDialect(MockDialect):
+
+    # bitget usdt margined contracts (product type umcbl), one way positions
+    # as two records (long and short) like the hedge mode of the account
+
+    id = 'bitget'
+    settle = 'USDT'
+    ok_code = '00000'
+    error_status = 400
+
+    def __init__(self):
+        super().__init__()
+
+        self._plan_types: dict = {}
+
+        self.route('GET', '/api/spot/v1/public/currencies', lambda exchange, params: [ { 'coinId': '2', 'coinName': self.settle, 'chains': [] } ])
+        self.route('GET', '/api/spot/v1/public/products', lambda exchange, params: [])
+        self.route('GET', '/api/spot/v1/public/time', lambda exchange, params: str(exchange.fetch_time()))
+        self.route('GET', '/api/mix/v1/market/contracts', self.contracts)
+        self.route('GET', '/api/mix/v1/market/depth', self.depth)
+        self.route('GET', '/api/mix/v1/market/ticker', self.ticker)
+        self.route('GET', '/api/mix/v1/market/candles', self.candles)
+        self.route('GET', '/api/mix/v1/account/accounts', self.accounts, private=True)
+        self.route('POST', '/api/mix/v1/account/setMarginMode', lambda exchange, params: params, private=True)
+        self.route('POST', '/api/mix/v1/account/setLeverage', lambda exchange, params: params, private=True)
+        self.route('GET', '/api/mix/v1/position/allPosition', self.all_positions, private=True)
+        self.route('POST', '/api/mix/v1/order/placeOrder', self.place_order, private=True)
+        self.route('POST', '/api/mix/v1/order/cancel-order', self.cancel_order, private=True)
+        self.route('POST', '/api/mix/v1/order/cancel-all-orders', self.cancel_all_orders, private=True)
+        self.route('GET', '/api/mix/v1/order/current', self.current_orders, private=True)
+        self.route('GET', '/api/mix/v1/order/detail', self.order_detail, private=True)
+        self.route('POST', '/api/mix/v1/plan/placeTPSL', self.place_tpsl, private=True)
+        self.route('POST', '/api/mix/v1/plan/modifyTPSLPlan', self.modify_tpsl, private=True)
+        self.route('POST', '/api/mix/v1/plan/cancelPlan', self.cancel_order, private=True)
+        self.route('POST', '/api/mix/v1/plan/cancelAllPlan', self.cancel_all_plans, private=True)
+        self.route('GET', '/api/mix/v1/plan/currentPlan', self.current_plans, private=True)
+
+    def market_id(self, symbol: str) -> str:
+        return super().market_id(symbol) + '_UMCBL'
+
+    def api_key(self, headers) -> str:
+        return headers.get('ACCESS-KEY')
+
+    def response(self, data) -> dict:
+        return { 'code': self.ok_code, 'msg': 'success', 'requestTime': 0, 'data': data }
+
+    def contracts(self, exchange: SimulatedExchange, params: dict) -> list:
+
+        if params.get('productType', '').lower() != 'umcbl':
+            return []
+
+        contracts = []
+
+        for symbol, market in exchange.markets.items():
+            tick = market['precision']['price']
+            place = max(0, -int(math.floor(math.log10(tick))))
+            contracts.append({ 'symbol': self.market_id(symbol), 'baseCoin': symbol.split('/')[0], 'quoteCoin': self.settle,
+                               'supportMarginCoins': [ self.settle ], 'minTradeNum': f"{market['precision']['amount']:g}",
+                               'priceEndStep': str(int(round(tick * 10 ** place))), 'pricePlace': str(place),
+                               'volumePlace': '0', 'sizeMultiplier': f"{market['contractSize']:g}",
+                               'makerFeeRate': '0.0002', 'takerFeeRate': '0.0006', 'status': 'normal' })
+
+        return contracts
+
+    def depth(self, exchange: SimulatedExchange, params: dict) -> dict:
+
+        book = exchange.fetch_order_book(self.symbol(params['symbol']), int(params.get('limit', 100)))
+
+        return { 'asks': [ [ str(p), str(q) ] for p, q in book['asks'] ], 'bids': [ [ str(p), str(q) ] for p, q in book['bids'] ],
+                 'timestamp': str(book['timestamp']) }
+
+    def ticker(self, exchange: SimulatedExchange, params: dict) -> dict:
+
+        ticker = exchange.fetch_ticker(self.symbol(params['symbol']))
+
+        return { 'symbol': params['symbol'], 'last': str(ticker['last']), 'bestBid': str(ticker['bid']),
+                 'bestAsk': str(ticker['ask']), 'high24h': str(ticker['last']), 'low24h': str(ticker['last']),
+                 'timestamp': str(ticker['timestamp']), 'baseVolume': '0', 'quoteVolume': '0' }
+
+    # [ timestamp, open, high, low, close, base volume, quote volume ] as strings
+    def candles(self, exchange: SimulatedExchange, params: dict) -> list:
+
+        bars = exchange.fetch_ohlcv(self.symbol(params['symbol']), timeframe_of(int(params['granularity'])),
+                                    since=int(params['startTime']))
+
+        return [ [ str(v) for v in b ] + [ '0' ] for b in bars if b[0] <= int(params['endTime']) ]
+
+    def accounts(self, exchange: SimulatedExchange, params: dict) -> list:
+
+        balance = exchange.fetch_balance()['free'][self.settle]
+
+        return [ { 'marginCoin': self.settle, 'available': str(balance), 'frozen': '0', 'lock': '0', 'locked': '0',
+                   'equity': str(balance), 'usdtEquity': str(balance) } ]
+
+    def all_positions(self, exchange: SimulatedExchange, params: dict) -> list:
+
+        positions = []
+
+        for p in exchange.fetch_positions():
+            for side in [ 'long', 'short' ]:
+                held = p['side'] == side
+                positions.append({ 'symbol': self.market_id(p['symbol']), 'marginCoin': self.settle, 'holdSide': side,
+                                   'openDelegateCount': '0', 'total': str(p['contracts'] if held else 0.0),
+                                   'available': str(p['contracts'] if held else 0.0),
+                                   'averageOpenPrice': str(p['entryPrice'] if held else 0.0), 'leverage': p['leverage'],
+                                   'marginMode': 'crossed', 'holdMode': 'double_hold', 'unrealizedPL': '0', 'margin': '0',
+                                   'liquidationPrice': '0', 'cTime': str(p['timestamp']) })
+
+        return positions
+
+    def order(self, exchange: SimulatedExchange, o: dict) -> dict:
+
+        side = { ('buy', False): 'open_long', ('buy', True): 'close_short',
+                 ('sell', False): 'open_short', ('sell', True): 'close_long' }[(o['side'], o['reduceOnly'])]
+
+        return { 'orderId': o['id'], 'clientOid': o['clientOrderId'], 'symbol': self.market_id(o['symbol']),
+                 'marginCoin': self.settle, 'size': str(o['amount']), 'filledQty': str(o['filled']),
+                 'price': str(o['price']) if o['price'] is not None else None, 'priceAvg': str(o['average'] or 0),
+                 'orderType': o['type'], 'side': side, 'timeInForce': 'post_only' if o['postOnly'] else 'normal',
+                 'state': { 'open': 'new', 'closed': 'filled' }.get(o['status'], o['status']),
+                 'cTime': str(o['timestamp']), 'uTime': str(o['timestamp']) }
+
+    def place_order(self, exchange: SimulatedExchange, params: dict) -> dict:
+
+        symbol = self.symbol(params['symbol'])
+        side = 'buy' if params['side'] in [ 'open_long', 'close_short' ] else 'sell'
+        order_params = { 'reduceOnly': params['side'].startswith('close'),
+                         'timeInForce': 'PostOnly' if params.get('timeInForceValue') == 'post_only' else 'GTC' }
+
+        price = float(params['price']) if 'price' in params else None
+        o = exchange.create_order(symbol, params['orderType'], side, float(params['size']), price, order_params)
+
+        return { 'orderId': o['id'], 'clientOid': params.get('clientOid') }
+
+    # a stop of the position: a reduce only market order at the trigger price
+    def place_tpsl(self, exchange: SimulatedExchange, params: dict) -> dict:
+
+        symbol = self.symbol(params['symbol'])
+        side = 'sell' if params['holdSide'] == 'long' else 'buy'
+
+        o = exchange.create_order(symbol, 'market', side, float(params['size']), None,
+                                  { 'triggerPrice': float(params['triggerPrice']), 'reduceOnly': True })
+        self._plan_types[o['id']] = params.get('planType', 'loss_plan')
+
+        return { 'orderId': o['id'], 'clientOid': params.get('clientOid') }
+
+    def modify_tpsl(self, exchange: SimulatedExchange, params: dict) -> dict:
+
+        o = exchange.fetch_order(params['orderId'])
+        exchange.edit_order(o['id'], o['symbol'], None, None, None, None, { 'triggerPrice': float(params['triggerPrice']) })
+
+        return { 'orderId': o['id'], 'clientOid': None }
+
+    def cancel_order(self, exchange: SimulatedExchange, params: dict) -> dict:
+
+        o = exchange.cancel_order(params['orderId'], self.symbol(params['symbol']))
+        return { 'orderId': o['id'], 'clientOid': o['clientOrderId'] }
+
+    # like the api: all orders of the product type, not only of a symbol
+    def cancel_all_orders(self, exchange: SimulatedExchange, params: dict) -> dict:
+
+        orders = [ o for o in exchange.fetch_open_orders() if o['type'] != 'Stop' ]
+        for o in orders:
+            exchange.cancel_order(o['id'], o['symbol'])
+
+        return { 'order_ids': [ o['id'] for o in orders ], 'fail_infos': [] }
+
+    def cancel_all_plans(self, exchange: SimulatedExchange, params: dict) -> dict:
+
+        orders = [ o for o in exchange.fetch_open_orders() if o['type'] == 'Stop' ]
+        for o in orders:
+            exchange.cancel_order(o['id'], o['symbol'])
+
+        return { 'order_ids': [ o['id'] for o in orders ], 'fail_infos': [] }
+
+    def current_orders(self, exchange: SimulatedExchange, params: dict) -> list:
+        return [ self.order(exchange, o) for o in exchange.fetch_open_orders(self.symbol(params['symbol'])) if o['type'] != 'Stop' ]
+
+    def order_detail(self, exchange: SimulatedExchange, params: dict) -> dict:
+        return self.order(exchange, exchange.fetch_order(params['orderId'], self.symbol(params['symbol'])))
+
+    # the stops are tp/sl plans (isPlan=profit_loss), the plain plan orders are not used
+    def current_plans(self, exchange: SimulatedExchange, params: dict) -> list:
+
+        if params.get('isPlan') != 'profit_loss':
+            return []
+
+        return [ { 'orderId': o['id'], 'symbol': params['symbol'], 'marginCoin': self.settle, 'size': str(o['amount']),
+                   'triggerPrice': str(o['stopPrice']), 'executePrice': '0', 'orderType': 'market',
+                   'planType': self._plan_types.get(o['id'], 'loss_plan'), 'status': 'not_trigger',
+                   'side': 'close_long' if o['side'] == 'sell' else 'close_short', 'triggerType': 'fill_price',
+                   'cTime': str(o['timestamp']) }
+                 for o in exchange.fetch_open_orders(self.symbol(params['symbol'])) if o['type'] == 'Stop' ]
+
+    def urls(self, url: str) -> dict:
+        return { 'spot': url, 'mix': url }
+
+    def adapter(self, url: str, api_key: str, metadata: dict = None) -> ExchangeAdapter:
+
+        connect_params = { 'apiKey': api_key, 'secret': 'mock', 'password': 'mock' }
+        exchange = preload(ccxt.bitget(dict(connect_params, urls={ 'api': self.urls(url) })), metadata)
+
+        ea = BitgetAdapter(connect_params, { 'type': 'swap', 'code': self.settle }, exchange=exchange)
+        ea._api_endpoint = url
+
+        return ea
+
+DIALECTS = {
+    'phemex': PhemexDialect,
+    'bitget': BitgetDialect,
+}
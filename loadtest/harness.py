@@ -0,0 +1,252 @@
+import argparse
+import io
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import tempfile
+import threading
+import time
+import warnings
+from contextlib import redirect_stdout
+
+import numpy as np
+
+from regression.golden_traces import BOTS
+from regression.golden_traces import GENERATORS
+from regression.golden_traces import offline_feeds
+from botlib import TickSchedule
+from signal_generators import IndicatorRegistry
+from .dialects import DIALECTS
+from .mock_server import MockExchangeServer
+
+# Load test harness: runs many bots with their real adapters and ccxt against
+# a local MockExchangeServer, to see how the stack behaves with hundreds of
+# bots and a slow, failing or rate limiting exchange:
+#  - the bots (SimpleTPSLBot or SimpleDCABot like the launch scripts, one api
+#    key i.e. account each) are spread over the symbols and over worker
+#    processes, each bot runs its main cycle every tick seconds in a thread
+#  - measured: the requests per second per endpoint and status on the server,
+#    the tick latency distribution (main_cycle incl. requests), the errors
+#    raised in the cycles by type, the startup time of a bot (markets, leverage)
+#    and the cpu time and max rss of the workers and of the server process
+#  - with --adaptive the bots sleep the interval of a TickSchedule (the state
+#    of the bot and the distance of the price to its levels) instead of tick
+# The summary is printed and written as JSON.
+#
+# usage: python -m loadtest.harness [--exchange phemex|bitget] [--bots 10] [--symbols 4] [--processes n]
+#                                   [--duration 60] [--tick 1.0] [--bot simple_tpsl] [--generator ext_mm]
+#                                   [--latency 0.0] [--jitter 0.0] [--error-rate 0.0] [--rate-limit n]
+#                                   [--adaptive] [--output loadtest_results.json]
+
+def percentiles(samples: list) -> dict:
+
+    if len(samples) == 0:
+        return { 'samples': 0 }
+
+    a = np.array(samples) * 1000
+    return { 'unit': 'ms', 'samples': len(a), 'median': float(np.median(a)), 'p95': float(np.percentile(a, 95)),
+             'p99': float(np.percentile(a, 99)), 'max': float(a.max()), 'mean': float(a.mean()) }
+
+# cpu time (user + system) in seconds and max rss in MB of the calling process
+def usage() -> dict:
+
+    r = resource.getrusage(resource.RUSAGE_SELF)
+    return { 'cpu_s': r.ru_utime + r.ru_stime, 'max_rss_mb': r.ru_maxrss / 1024 }
+
+class BotRunner(threading.Thread):
+
+    # one bot on the mock server: the preparation and then a main cycle every
+    # tick seconds (the first one at a random offset) until the deadline
+
+    def __init__(self, args, url: str, index: int, symbol: str, data_dir: str, deadline: float):
+        super().__init__(daemon=True)
+
+        self._args = args
+        self._url: str = url
+        self._index: int = index
+        self._symbol: str = symbol
+        self._data_dir: str = data_dir
+        self._deadline: float = deadline
+
+        self.startup: float = None
+        self.latencies: list = []
+        self.errors: dict = {}
+
+    def error(self, e: Exception):
+        self.errors[type(e).__name__] = self.errors.get(type(e).__name__, 0) + 1
+
+    def run(self):
+
+        start = time.perf_counter()
+
+        try:
+            ea = DIALECTS[self._args.exchange]().adapter(self._url, f'bot-{self._index}')
+
+            sg = GENERATORS[self._args.generator](self._symbol)
+            sg.indicator_registry = IndicatorRegistry()
+            offline_feeds(sg, ea, self._symbol)
+
+            bot = BOTS[self._args.bot](ea, self._symbol, sg, self._data_dir)
+            if self._args.adaptive:
+                bot.tick_schedule = TickSchedule()
+            bot.preparation_handler()
+
+        except Exception as e:
+            self.error(e)
+            return
+
+        self.startup = time.perf_counter() - start
+        time.sleep(random.uniform(0, self._args.tick))
+
+        while time.time() < self._deadline:
+            loop_start = time.perf_counter()
+
+            try:
+                bot.main_cycle()
+            except Exception as e:
+                self.error(e)
+
+            try:
+                interval = bot.next_tick() if self._args.adaptive else self._args.tick
+            except Exception as e:
+                self.error(e)
+                interval = self._args.tick
+
+            self.latencies.append(time.perf_counter() - loop_start)
+            time.sleep(max(0.0, interval - (time.perf_counter() - loop_start)))
+
+def worker(args, url: str, bots: list, deadline: float, results: multiprocessing.Queue):
+
+    # the bots log the rejected orders and print their models, the summary has the errors
+    logging.basicConfig(level=logging.CRITICAL)
+    warnings.filterwarnings('ignore', category=RuntimeWarning)
+
+    with tempfile.TemporaryDirectory() as data_dir, redirect_stdout(io.StringIO()):
+
+        runners = [ BotRunner(args, url, index, symbol, data_dir, deadline) for index, symbol in bots ]
+        for runner in runners:
+            runner.start()
+
+        # cycles after the deadline (a bot waiting after an exit) are not waited for
+        for runner in runners:
+            runner.join(max(0.0, deadline - time.time()) + 2 * args.tick + 10)
+
+    errors = {}
+    for runner in runners:
+        for name, n in runner.errors.items():
+            errors[name] = errors.get(name, 0) + n
+
+    results.put({ 'bots': len(runners), 'started': sum(r.startup is not None for r in runners),
+                  'startup': [ r.startup for r in runners if r.startup is not None ],
+                  'latencies': [ l for r in runners for l in r.latencies ], 'errors': errors, 'usage': usage() })
+
+def run(args) -> dict:
+
+    dialect = DIALECTS[args.exchange]()
+    symbols = [ dialect.symbol_of(f'S{i}') for i in range(args.symbols) ]
+
+    server = MockExchangeServer(dialect, symbols, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                                rate_limit=args.rate_limit).start()
+    server_usage = usage()
+
+    processes = args.processes or min(args.bots, os.cpu_count())
+    shares = [ [ (i, symbols[i % len(symbols)]) for i in range(args.bots) if i % processes == p ] for p in range(processes) ]
+
+    # the bots start up within the duration, the deadline is the same for all workers
+    started = time.time()
+    deadline = started + args.duration
+
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    workers = [ context.Process(target=worker, args=(args, server.url, share, deadline, results)) for share in shares ]
+    for w in workers:
+        w.start()
+
+    reports = [ results.get() for _ in workers ]
+    for w in workers:
+        w.join()
+
+    elapsed = time.time() - started
+    stats = server.stats()
+    server.close()
+
+    latencies = [ l for r in reports for l in r['latencies'] ]
+    errors = {}
+    for r in reports:
+        for name, n in r['errors'].items():
+            errors[name] = errors.get(name, 0) + n
+
+    usage_now = usage()
+
+    return { 'meta': { 'exchange': args.exchange, 'bots': args.bots, 'symbols': args.symbols, 'processes': processes,
+                       'duration': args.duration, 'tick': args.tick, 'bot': args.bot, 'generator': args.generator,
+                       'latency': args.latency, 'jitter': args.jitter, 'error_rate': args.error_rate,
+                       'rate_limit': args.rate_limit, 'adaptive': args.adaptive, 'python': platform.python_version(), 'cpus': os.cpu_count(),
+                       'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(started)) },
+             'requests': { 'total': stats['requests'], 'per_s': stats['requests'] / elapsed,
+                           'statuses': stats['statuses'],
+                           'endpoints': { e: { 'total': n, 'per_s': n / elapsed } for e, n in sorted(stats['endpoints'].items()) } },
+             'bots': { 'started': sum(r['started'] for r in reports), 'ticks': len(latencies),
+                       'ticks_per_s': len(latencies) / elapsed, 'errors': errors },
+             'tick_latency': percentiles(latencies),
+             'startup': percentiles([ s for r in reports for s in r['startup'] ]),
+             'workers': [ r['usage'] for r in reports ],
+             'server': { 'cpu_s': usage_now['cpu_s'] - server_usage['cpu_s'], 'max_rss_mb': usage_now['max_rss_mb'] } }
+
+def summary(result: dict) -> str:
+
+    meta = result['meta']
+    lines = [ f"{meta['bots']} {meta['bot']} bots ({meta['generator']}) on {meta['symbols']} symbols of a mock {meta['exchange']}"
+              f" in {meta['processes']} processes for {meta['duration']} s, tick {'adaptive' if meta['adaptive'] else str(meta['tick']) + ' s'}",
+              f"requests  {result['requests']['total']:8d}  {result['requests']['per_s']:9.1f} /s  statuses {result['requests']['statuses']}" ]
+
+    for endpoint, r in result['requests']['endpoints'].items():
+        lines.append(f"  {endpoint:50s} {r['total']:8d}  {r['per_s']:9.1f} /s")
+
+    bots = result['bots']
+    lines.append(f"bots      {bots['started']} started  {bots['ticks']} ticks  {bots['ticks_per_s']:.1f} ticks/s  errors {bots['errors']}")
+
+    for name in [ 'tick_latency', 'startup' ]:
+        s = result[name]
+        if s['samples'] > 0:
+            lines.append(f"{name:13s} median {s['median']:8.1f} ms  p95 {s['p95']:8.1f} ms  p99 {s['p99']:8.1f} ms  max {s['max']:8.1f} ms")
+
+    cpu = sum(w['cpu_s'] for w in result['workers'])
+    rss = sum(w['max_rss_mb'] for w in result['workers'])
+    lines.append(f"workers   cpu {cpu:8.1f} s ({cpu / meta['duration']:.0%} of a core)  max rss {rss:8.1f} MB"
+                 f" ({rss / max(bots['started'], 1):.1f} MB per bot)")
+    lines.append(f"server    cpu {result['server']['cpu_s']:8.1f} s ({result['server']['cpu_s'] / meta['duration']:.0%} of a core)"
+                 f"  max rss {result['server']['max_rss_mb']:8.1f} MB")
+
+    return '\n'.join(lines)
+
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.CRITICAL)
+
+    parser = argparse.ArgumentParser(prog='python -m loadtest.harness')
+    parser.add_argument('--exchange', choices=list(DIALECTS), default='phemex', help='dialect of the mock exchange')
+    parser.add_argument('--bots', type=int, default=10, help='number of bots')
+    parser.add_argument('--symbols', type=int, default=4, help='number of symbols the bots are spread over')
+    parser.add_argument('--processes', type=int, help='worker processes (default one per cpu)')
+    parser.add_argument('--duration', type=float, default=60.0, help='seconds to run')
+    parser.add_argument('--tick', type=float, default=1.0, help='seconds between the main cycles of a bot')
+    parser.add_argument('--bot', choices=list(BOTS), default='simple_tpsl')
+    parser.add_argument('--generator', choices=list(GENERATORS), default='ext_mm')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds before each response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='uniform random seconds on top of the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with HTTP 503')
+    parser.add_argument('--rate-limit', type=float, help='requests per second per api key, above HTTP 429')
+    parser.add_argument('--adaptive', action='store_true', help='tick interval of a TickSchedule instead of tick')
+    parser.add_argument('--output', default='loadtest_results.json', help='JSON file of the results')
+    args = parser.parse_args()
+
+    result = run(args)
+    print(summary(result))
+
+    with open(args.output, 'w') as f:
+        json.dump(result, f, indent=2)
@@ -0,0 +1,257 @@
+import asyncio
+import json
+import logging
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+from aiohttp import web
+
+from base import BaseClass
+from base import system_clock
+from exchange_adapters import SimulatedExchange
+from .dialects import MockDialect
+from .dialects import DIALECTS
+
+logger = logging.getLogger(__name__)
+
+class MockExchangeServer(BaseClass):
+
+    # local http server speaking the REST dialect of an exchange (see
+    # loadtest.dialects) on SimulatedExchanges, to run many bots with their
+    # real adapters and ccxt against it:
+    #  - one market with the public data (prices, order books, candles) and one
+    #    account (SimulatedExchange) per api key, created on its first request
+    #  - the prices make a seeded random walk every interval seconds, resting
+    #    orders of all accounts are matched against them
+    #  - faults: latency (seconds, plus a uniform jitter) before each response,
+    #    error_rate (share of requests answered with HTTP 503) and rate_limit
+    #    (private requests per second per api key, above it HTTP 429) - ccxt
+    #    raises ExchangeNotAvailable and RateLimitExceeded for them
+    #  - rejections of the simulated exchange are the error responses of the
+    #    dialect, e.g. OrderNotFound the exact error code of ccxt
+    # Requests are counted per endpoint (method and path) and status.
+
+    def __init__(self, dialect: MockDialect, symbols: list, host: str = '127.0.0.1', port: int = 0,
+                 price: float = 1500.0, tick_size: float = 0.01, volatility: float = 0.0005, interval: float = 1.0,
+                 history_days: int = 2, balance: float = 100000.0, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, rate_limit: float = None, seed: int = 1):
+
+        self._dialect: MockDialect = dialect
+        self._symbols: list = symbols
+        self._host: str = host
+        self._port: int = port
+        self._volatility: float = volatility
+        self._interval: float = interval
+        self._balance: float = balance
+        self._latency: float = latency
+        self._jitter: float = jitter
+        self._error_rate: float = error_rate
+        self._rate_limit: float = rate_limit
+
+        self._rng = np.random.RandomState(seed)
+        self._random = random.Random(seed)
+
+        self._markets: dict = { symbol: { 'tick_size': tick_size } for symbol in symbols }
+        self._market = SimulatedExchange(markets=self._markets, balance=balance, code=dialect.settle, clock=system_clock)
+        self._accounts: dict = {}
+        self._prices: dict = {}
+
+        for symbol in symbols:
+            dialect.add_market(symbol)
+            self._market.load_candles(symbol, self._history(history_days, price, tick_size))
+            self._prices[symbol] = price
+            self._market.set_price(symbol, price)
+
+        self._buckets: dict = {}
+        self._endpoints: dict = {}
+        self._statuses: dict = {}
+
+        self._loop: asyncio.AbstractEventLoop = None
+        self._runner: web.AppRunner = None
+        self._thread: threading.Thread = None
+        self._walker: asyncio.Task = None
+        self._ready = threading.Event()
+
+    @property
+    def url(self) -> str:
+        return f'http://{self._host}:{self._port}'
+
+    @property
+    def dialect(self) -> MockDialect:
+        return self._dialect
+
+    @property
+    def market(self) -> SimulatedExchange:
+        return self._market
+
+    @property
+    def accounts(self) -> dict:
+        return self._accounts
+
+    def stats(self) -> dict:
+        return { 'requests': sum(self._endpoints.values()), 'endpoints': dict(self._endpoints),
+                 'statuses': { str(s): n for s, n in sorted(self._statuses.items()) }, 'accounts': len(self._accounts) }
+
+    # 5m candles (loaded as 1m candles every 5 minutes) of a random walk ending now
+    def _history(self, days: int, price: float, tick_size: float) -> list:
+
+        n = days * 288
+        closes = np.exp(np.cumsum(self._rng.normal(0, 0.002, n)))
+        closes = closes * price / closes[-1]
+        now = system_clock.ms()
+        start = now - now % 300000 - n * 300000
+
+        history = []
+        for i in range(n):
+            o = closes[i - 1] if i > 0 else closes[0]
+            c = closes[i]
+            [ o, h, l, c ] = [ round(round(p / tick_size) * tick_size, 10) for p in [ o, max(o, c), min(o, c), c ] ]
+            history.append([ start + i * 300000, o, h, l, c, float(self._rng.lognormal(3, 0.5)) ])
+
+        return history
+
+    def account(self, api_key: str) -> SimulatedExchange:
+
+        if api_key not in self._accounts:
+            account = SimulatedExchange(markets=self._markets, balance=self._balance, code=self._dialect.settle, clock=system_clock)
+            for symbol, price in self._prices.items():
+                account.set_price(symbol, price)
+            self._accounts[api_key] = account
+
+        return self._accounts[api_key]
+
+    def start(self):
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait(10)
+        return self
+
+    def close(self):
+
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(10)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(10)
+
+    def _run(self):
+
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+
+        app = web.Application()
+        app.router.add_route('*', '/{path:.*}', self._handle)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, self._host, self._port)
+        self._loop.run_until_complete(site.start())
+
+        # the port chosen by the os if port was 0
+        self._port = site._server.sockets[0].getsockname()[1]
+        self._ready.set()
+
+        self._walker = self._loop.create_task(self._walk())
+        self._loop.run_forever()
+
+    async def _shutdown(self):
+        self._walker.cancel()
+        await self._runner.cleanup()
+
+    async def _walk(self):
+
+        while True:
+            await asyncio.sleep(self._interval)
+
+            for symbol in self._symbols:
+                tick_size = self._markets[symbol]['tick_size']
+                price = self._prices[symbol] * float(np.exp(self._rng.normal(0, self._volatility)))
+                self._prices[symbol] = round(round(price / tick_size) * tick_size, 10)
+
+                volume = float(self._rng.lognormal(0, 0.5))
+                self._market.set_price(symbol, self._prices[symbol], volume=volume)
+                for account in self._accounts.values():
+                    account.set_price(symbol, self._prices[symbol], volume=volume)
+
+    # token bucket per client of rate_limit requests per second
+    def _limited(self, client: str) -> bool:
+
+        if self._rate_limit is None:
+            return False
+
+        now = time.monotonic()
+        [ tokens, last ] = self._buckets.get(client, [ self._rate_limit, now ])
+        tokens = min(self._rate_limit, tokens + (now - last) * self._rate_limit)
+
+        self._buckets[client] = [ tokens - 1, now ] if tokens >= 1 else [ tokens, now ]
+        return tokens < 1
+
+    def _count(self, endpoint: str, status: int):
+        self._endpoints[endpoint] = self._endpoints.get(endpoint, 0) + 1
+        self._statuses[status] = self._statuses.get(status, 0) + 1
+
+    async def _handle(self, request):
+        log_prefix = f"({self.class_name()}._handle) url {self.url}:"
+
+        endpoint = f'{request.method} {request.path}'
+        route = self._dialect.routes.get((request.method, request.path))
+
+        if route is None:
+            logger.warning('%s WARN: No route for %s', log_prefix, endpoint)
+            self._count(endpoint, 404)
+            return web.Response(status=404, text='Not Found')
+
+        [ handler, private, envelope ] = route
+        api_key = self._dialect.api_key(request.headers) if private else None
+
+        if self._latency > 0 or self._jitter > 0:
+            await asyncio.sleep(self._latency + self._random.uniform(0, self._jitter))
+
+        # the faults are plain text, ccxt maps them by the http status
+        if private and self._limited(api_key):
+            self._count(endpoint, 429)
+            return web.Response(status=429, text='Too Many Requests')
+
+        if self._error_rate > 0 and self._random.random() < self._error_rate:
+            self._count(endpoint, 503)
+            return web.Response(status=503, text='Service Unavailable')
+
+        params = dict(request.query)
+        if request.body_exists:
+            body = await request.text()
+            params.update(json.loads(body) if body else {})
+
+        exchange = self.account(api_key) if private else self._market
+
+        try:
+            status, body = 200, envelope(handler(exchange, params))
+        except Exception as e:
+            logger.debug('%s %s rejected: %s %s', log_prefix, endpoint, type(e).__name__, e)
+            status, body = self._dialect.error(e)
+
+        self._count(endpoint, status)
+        return web.Response(status=status, text=json.dumps(body), content_type='application/json')
+
+# usage: python -m loadtest.mock_server [phemex|bitget] [port] [symbols]
+#   e.g. python -m loadtest.mock_server phemex 8080 ETH,BTC
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.INFO)
+
+    dialect = DIALECTS[sys.argv[1] if len(sys.argv) > 1 else 'phemex']()
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8080
+    bases = sys.argv[3].split(',') if len(sys.argv) > 3 else [ 'ETH' ]
+
+    server = MockExchangeServer(dialect, [ dialect.symbol_of(base) for base in bases ], port=port).start()
+    logger.info("Mock %s exchange on %s with %s", dialect.id, server.url, ', '.join(bases))
+
+    try:
+        while True:
+            time.sleep(60)
+            logger.info('%s', server.stats())
+    except KeyboardInterrupt:
+        server.close()
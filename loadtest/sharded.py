@@ -0,0 +1,89 @@
+import argparse
+import json
+import logging
+import tempfile
+import time
+
+from regression.golden_traces import BOTS
+from regression.golden_traces import GENERATORS
+from regression.golden_traces import offline_feeds
+from sharding import ShardSupervisor
+from signal_generators import IndicatorRegistry
+from .dialects import DIALECTS
+from .harness import usage
+from .mock_server import MockExchangeServer
+
+# Scaling run of the ShardSupervisor on a local MockExchangeServer: the same
+# bots (one per symbol and api key) with 1, 2, ... worker processes, to see the
+# throughput (main cycles per second) and the requests to the exchange per
+# worker count. connect and build are the callables of the workers.
+#
+# usage: python -m loadtest.sharded [--exchange phemex|bitget] [--symbols 8] [--workers 1,2,4]
+#                                   [--duration 30] [--tick 0.5] [--bot simple_tpsl] [--generator ext_mm]
+#                                   [--no-sharing] [--output sharded_results.json]
+
+def connect(symbol: str, options: dict, metadata: dict = None):
+
+    dialect = DIALECTS[options['exchange']]()
+    return dialect.adapter(options['url'], f'bot-{symbol}' if symbol is not None else 'supervisor', metadata)
+
+def build(exchange_adapter, symbol: str, options: dict):
+
+    sg = GENERATORS[options['generator']](symbol)
+    sg.indicator_registry = IndicatorRegistry()
+    offline_feeds(sg, exchange_adapter, symbol)
+
+    bot = BOTS[options['bot']](exchange_adapter, symbol, sg, tempfile.mkdtemp(prefix='sharded_'))
+    bot.ticks = options['tick']
+    return bot
+
+def run(args, workers: int) -> dict:
+
+    dialect = DIALECTS[args.exchange]()
+    symbols = [ dialect.symbol_of(f'S{i}') for i in range(args.symbols) ]
+    server = MockExchangeServer(dialect, symbols).start()
+
+    options = { 'exchange': args.exchange, 'url': server.url, 'bot': args.bot, 'generator': args.generator, 'tick': args.tick }
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        supervisor = ShardSupervisor('loadtest.sharded:connect', 'loadtest.sharded:build', symbols, workers=workers,
+                                     options=options, state_dir=state_dir, report_interval=2.0,
+                                     share_markets=args.sharing, share_feeds=args.sharing)
+        started = time.time()
+        stats = supervisor.run(args.duration)
+        elapsed = time.time() - started
+
+    requests = server.stats()
+    server.close()
+
+    ticks = sum(w['ticks'] for w in stats['workers'].values())
+    return { 'workers': workers, 'ticks': ticks, 'ticks_per_s': ticks / elapsed,
+             'requests': requests['requests'], 'requests_per_s': requests['requests'] / elapsed,
+             'endpoints': requests['endpoints'], 'broker': stats['broker'], 'shards': stats['workers'],
+             'cpu_s': usage()['cpu_s'] }
+
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.CRITICAL)
+
+    parser = argparse.ArgumentParser(prog='python -m loadtest.sharded')
+    parser.add_argument('--exchange', choices=list(DIALECTS), default='phemex', help='dialect of the mock exchange')
+    parser.add_argument('--symbols', type=int, default=8, help='number of symbols, one bot each')
+    parser.add_argument('--workers', default='1,2', help='comma separated worker counts')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds per run')
+    parser.add_argument('--tick', type=float, default=0.5, help='seconds between the main cycles of a bot')
+    parser.add_argument('--bot', choices=list(BOTS), default='simple_tpsl')
+    parser.add_argument('--generator', choices=list(GENERATORS), default='ext_mm')
+    parser.add_argument('--no-sharing', dest='sharing', action='store_false', help='workers load markets and feeds themselves')
+    parser.add_argument('--output', default='sharded_results.json', help='JSON file of the results')
+    args = parser.parse_args()
+
+    results = [ run(args, int(workers)) for workers in args.workers.split(',') ]
+
+    for r in results:
+        markets = sum(n for e, n in r['endpoints'].items() if 'products' in e or 'contracts' in e)
+        print(f"workers {r['workers']:3d}  ticks {r['ticks']:7d}  {r['ticks_per_s']:8.1f} ticks/s  "
+              f"requests {r['requests_per_s']:8.1f} /s  market loads {markets}  broker {r['broker']}")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
@@ -7,6 +7,8 @@ from dotenv import load_dotenv
 
 from .order_model import OrderModel
 
+logger = logging.getLogger(__name__)
+
 load_dotenv()
 DCAORDERMODEL_DATADIR=os.getenv('DCAORDERMODEL_DATADIR', 'data_dir')
 
@@ -89,10 +91,10 @@ class DCAOrderModel(OrderModel):
         
         # not loosely coupled any more
         if (init != True):
-            logging.debug(f'({self.class_name()}._dca_price_after_periods) Symbol {self.symbol} Calc price with exchange precision')
+            logger.debug('(%s._dca_price_after_periods) Symbol %s Calc price with exchange precision', self.class_name(), self.symbol)
             o_price = self.ea.price_to_precision(self.symbol, o_price)
         
-        logging.debug(f'({self.class_name()}._dca_price_after_periods) start price {asset_price} o_price: {o_price} after periods: {period}')
+        logger.debug('(%s._dca_price_after_periods) start price %s o_price: %s after periods: %s', self.class_name(), asset_price, o_price, period)
 
         return float(o_price)
 
@@ -170,7 +172,8 @@ class DCAOrderModel(OrderModel):
 
         avg_entry = np.dot(o_prices, o_sizes) / pos_size
         delta = avg_entry / o_price
-        logging.debug(f'{self.class_name()}._dca_base_size) symbol {self.symbol} Model coefficents: Average entry price: {avg_entry} pos_size: {pos_size} last price: {o_price} delta: {delta}')
+        logger.debug('(%s._dca_base_size) symbol %s Model coefficents: Average entry price: %s pos_size: %s last price: %s delta: %s',
+                     self.class_name(), self.symbol, avg_entry, pos_size, o_price, delta)
         d = { 'idx': o_idxs, 'type': o_types, 'direction': o_dirs, 'price': o_prices, 'size': o_sizes, 'pos_size': o_pos_sizes, 'o_vol': o_volumes, 'open_volume': o_pos_volumes}
         df = pd.DataFrame(data=d)
         df.set_index('idx', inplace=True)
@@ -197,7 +200,8 @@ class DCAOrderModel(OrderModel):
             asset_last_size = (risk_per_trade / delta) 
             asset_base_size = float(asset_last_size / self.size_divisor / self.ea.get_contract_size(self.symbol))
 
-            logging.debug(f'({self.class_name()}._dca_base_size) Symbol {self.symbol} sl_price: {sl_price} avg_entry_price: {avg_entry_price} delta: {delta} asset_base_size: {asset_base_size}')
+            logger.debug('(%s._dca_base_size) Symbol %s sl_price: %s avg_entry_price: %s delta: %s asset_base_size: %s',
+                         self.class_name(), self.symbol, sl_price, avg_entry_price, delta, asset_base_size)
 
             return asset_base_size
         else:
@@ -353,6 +357,28 @@ class DCAOrderModel(OrderModel):
         self.model_df.loc[ ( self.model_df['price'] == price), 'order_id' ] = new_id
         self.store_df()
 
+    # the model dataframe for a snapshot of the bot, restored without the csv file
+    def get_state(self) -> dict:
+
+        if self.model_df is None:
+            return { 'model_df': None, 'file_save_name': self.file_save_name }
+
+        # python types keep the floats exact in JSON, NaN is stored as None
+        df = self.model_df.astype(object).where(self.model_df.notna(), None)
+        return { 'model_df': { 'index': df.index.tolist(), 'columns': df.columns.tolist(), 'data': df.values.tolist() },
+                 'index_name': self.model_df.index.name, 'file_save_name': self.file_save_name }
+
+    def set_state(self, state: dict):
+
+        split = state.get('model_df')
+        if split is not None:
+            self.model_df = pd.DataFrame(split['data'], index=split['index'], columns=split['columns']).infer_objects()
+            self.model_df.index.name = state.get('index_name')
+        else:
+            self.model_df = None
+
+        self.file_save_name = state.get('file_save_name')
+
     # the following four functions manage the persistence of the specific data frame for this model:
     # 1. create a unique file name hash
     def _file_name_hash(self, identifier):
@@ -365,7 +391,7 @@ class DCAOrderModel(OrderModel):
     def remove_df_file(self):
         
         if self.file_save_name and os.path.exists(self.file_path + "/" + self.file_save_name):
-            logging.debug(f'({self.class_name()}.remove_df_file) symbol {self.symbol} Removing df file: {self.file_save_name}')
+            logger.debug('(%s.remove_df_file) symbol %s Removing df file: %s', self.class_name(), self.symbol, self.file_save_name)
             os.remove(self.file_path + "/" + self.file_save_name)
 
     # 3. store a dataframe with an order model to a csv file
@@ -375,11 +401,11 @@ class DCAOrderModel(OrderModel):
 
         file_hash = self._file_name_hash(identifier)
         self.file_save_name = self.file_prefix + file_hash + ".csv"
-        logging.info(f'({self.class_name()}.store_df) symbol {self.symbol} Saving orders df to {self.file_save_name}')
+        logger.info('(%s.store_df) symbol %s Saving orders df to %s', self.class_name(), self.symbol, self.file_save_name)
         try:
             self.model_df.to_csv(self.file_path + "/" + self.file_save_name)
         except Exception as err:
-            logging.exception(f"({self.class_name()}.store_df) symbol {self.symbol} Unexpected {err}, {type(err)}")
+            logger.exception("(%s.store_df) symbol %s Unexpected %s, %s", self.class_name(), self.symbol, err, type(err))
             raise Exception(err)
 
     # 4. restore a dataframe with an order model from a csv file
@@ -389,12 +415,12 @@ class DCAOrderModel(OrderModel):
         self.file_save_name = self.file_prefix + file_hash + ".csv"
 
         if os.path.exists(self.file_path + "/" + self.file_save_name):
-            logging.info(f'({self.class_name()}.restore_df) symbol {self.symbol}: Trying to restore last matching order model from {self.file_save_name} ...')
+            logger.info('(%s.restore_df) symbol %s: Trying to restore last matching order model from %s ...', self.class_name(), self.symbol, self.file_save_name)
             self.model_df = pd.read_csv(self.file_path + "/" + self.file_save_name)
             self.model_df.set_index('idx', inplace=True)
             print (self.model_df)
         else:
-            logging.exception(f'({self.class_name()}.restore_df) symbol {self.symbol}: No valid file for last orders found {self.file_save_name} ...')
+            logger.exception('(%s.restore_df) symbol %s: No valid file for last orders found %s ...', self.class_name(), self.symbol, self.file_save_name)
             raise Exception(f'({self.class_name()}.restore_df) symbol {self.symbol}: No valid file for last orders found {self.file_save_name} ...') 
 
 
@@ -53,6 +53,13 @@ class FixedTPSLModel(OrderModel):
     @sl_perc.setter
     def tp_perc(self, value: float):
         self._tp_perc = value
+
+    def get_state(self) -> dict:
+        return { 'sl_fixed': self._sl_fixed, 'tp_fixed': self._tp_fixed }
+
+    def set_state(self, state: dict):
+        self._sl_fixed = state.get('sl_fixed')
+        self._tp_fixed = state.get('tp_fixed')
     
     
     def get_trsl_price_value(self, input_size: float = None, input_price: float = None) -> tuple[float, float]:
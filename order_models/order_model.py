@@ -14,4 +14,11 @@ class OrderModel(BaseClass):
 
     @property
     def exchange_symbol_str(self):
-        return self.ea.id + "_" + self.symbol
\ No newline at end of file
+        return self.ea.id + "_" + self.symbol
+
+    # the state of the model for a snapshot of the bot (see botlib.StateStore)
+    def get_state(self) -> dict:
+        return {}
+
+    def set_state(self, state: dict):
+        pass
\ No newline at end of file
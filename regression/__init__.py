@@ -0,0 +1,4 @@
+from .scenarios import Scenario
+from .scenarios import SCENARIOS
+from .scenarios import synthetic_scenario
+from .scenarios import recorded_scenario
\ No newline at end of file
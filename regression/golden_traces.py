@@ -0,0 +1,262 @@
+import argparse
+import fnmatch
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import warnings
+from contextlib import redirect_stdout
+
+from base import BaseClass
+from base import Clock
+from botlib import SimpleDCABot
+from botlib import SimpleTPSLBot
+from exchange_adapters.recording_adapter import RecordingExchange
+from exchange_adapters import SimulatedAdapter
+from order_models import DCAOrderModel
+from order_models import FixedTPSLModel
+from signal_generators import ExtMMSignalGenerator
+from signal_generators import SMA_15m_1d_SignalGenerator
+from signal_generators import VectorCandleSignalGenerator
+from signal_generators import HeikinAshiSignalGenerator
+from signal_generators import IndicatorRegistry
+from .scenarios import SCENARIOS
+from .scenarios import Scenario
+from .scenarios import recorded_scenario
+
+# Golden trace regression suite: runs SimpleDCABot and SimpleTPSLBot with each
+# signal generator on deterministic scenarios (regression.scenarios) on the
+# SimulatedExchange with a VirtualClock, records the order actions of the bot
+# (create, edit, cancel with virtual time and arguments) and compares them to
+# the golden traces in regression/golden. A run which decides differently
+# fails with the first differing action, a run without any order action fails
+# too (it would compare nothing). The wall time of each run is printed
+# next to the one of the golden trace, to see the speed of a change on the
+# same decisions.
+#
+# usage: python -m regression.golden_traces [--update] [--only pattern] [--recording path ...]
+#   --update     write the traces of this run as the golden traces
+#   --only       runs to do, fnmatch pattern on bot-generator-scenario
+#   --recording  add a scenario from a recording of a RecordingExchangeAdapter
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+
+# the requests of a bot which are decisions
+ORDER_ACTIONS = [ 'create_order', 'create_limit_buy_order', 'create_limit_sell_order', 'edit_order',
+                  'cancel_order', 'cancel_all_orders' ]
+
+# as in the launch scripts (test_bots_simpledca.py, test_bots_simpletpsl.py)
+GENERATORS = {
+    'ext_mm': lambda symbol: ExtMMSignalGenerator(ask_spread=0.0005, bid_spread=0.0005, sl_buffer=0.001),
+    'sma_15m_1d': lambda symbol: SMA_15m_1d_SignalGenerator(),
+    'vector_candle': lambda symbol: VectorCandleSignalGenerator(binance_symbol=symbol),
+    'heikin_ashi': lambda symbol: HeikinAshiSignalGenerator(binance_symbol=symbol),
+}
+
+def dca_bot(ea: SimulatedAdapter, symbol: str, sg, data_dir: str) -> SimpleDCABot:
+
+    models = []
+    for direction in [ 'long', 'short' ]:
+        model = DCAOrderModel(ea, symbol, direction, num_trades=3, price_dev=0.025, save_scale=2.0)
+        model.file_path = data_dir
+        models.append(model)
+
+    return SimpleDCABot(ea, symbol, sg, models[0], models[1], refresh_timeout=120)
+
+def tpsl_bot(ea: SimulatedAdapter, symbol: str, sg, data_dir: str) -> SimpleTPSLBot:
+
+    [ long_model, short_model ] = [ FixedTPSLModel(ea, symbol, direction, tp_perc=0.01, sl_perc=0.0066,
+                                                   tp_trigger_perc=0.005, tp_trail_perc=0.0045)
+                                    for direction in [ 'long', 'short' ] ]
+
+    return SimpleTPSLBot(ea, symbol, sg, long_model, short_model, refresh_timeout=120)
+
+BOTS = {
+    'simple_dca': dca_bot,
+    'simple_tpsl': tpsl_bot,
+}
+
+def _normalize(value):
+
+    if isinstance(value, float):
+        return float(f'{value:.10g}')
+    if isinstance(value, (list, tuple)):
+        return [ _normalize(v) for v in value ]
+    if isinstance(value, dict):
+        return { k: _normalize(v) for k, v in value.items() }
+
+    return value
+
+class TraceRecorder(BaseClass):
+
+    # the recorder of a RecordingExchange which keeps the order actions with
+    # the virtual time since the start of the scenario
+
+    def __init__(self, clock: Clock, start: float):
+
+        self._clock: Clock = clock
+        self._start: float = start
+        self.actions: list = []
+
+    def record(self, message: dict):
+
+        if message.get('m') not in ORDER_ACTIONS:
+            return
+
+        action = { 't': round(self._clock.time() - self._start, 3), 'action': message['m'],
+                   'args': _normalize(message['a']), 'kwargs': _normalize(message['k']) }
+
+        if 'e' in message:
+            action['error'] = message['e'][0]
+        elif isinstance(message.get('r'), dict):
+            action['id'] = message['r'].get('id')
+
+        self.actions.append(action)
+
+    def exception(self, e: Exception):
+        self.actions.append({ 't': round(self._clock.time() - self._start, 3), 'action': 'exception',
+                              'error': type(e).__name__ })
+
+# the binance feeds of VectorCandle and HeikinAshi are served from the
+# simulated market, the scenarios run without network
+def offline_feeds(sg, ea: SimulatedAdapter, symbol: str):
+
+    if not hasattr(sg, '_fetch_binance_df'):
+        return
+
+    def fetch_binance_df(since: int = None):
+        df = ea.fetch_candles_df(symbol, timeframe=sg.timeframe, num_bars=sg.num_bars, only_closed=sg.only_closed)
+        return df[df.timestamp >= since] if since is not None else df
+
+    sg._fetch_binance_df = fetch_binance_df
+
+def run(bot_name: str, generator_name: str, scenario: Scenario) -> dict:
+
+    exchange = scenario.exchange()
+    trace = TraceRecorder(exchange.clock, scenario.start)
+    ea = SimulatedAdapter(RecordingExchange(exchange, trace), { 'type': 'swap', 'code': 'USD' })
+
+    sg = GENERATORS[generator_name](scenario.symbol)
+    sg.indicator_registry = IndicatorRegistry()
+    offline_feeds(sg, ea, scenario.symbol)
+
+    start = time.perf_counter()
+
+    with tempfile.TemporaryDirectory() as data_dir, redirect_stdout(io.StringIO()):
+
+        bot = BOTS[bot_name](ea, scenario.symbol, sg, data_dir)
+        bot.preparation_handler()
+
+        for price, volume in scenario.steps():
+            exchange.clock.advance(scenario.step)
+            exchange.set_price(scenario.symbol, price, volume=volume)
+
+            # the bot would crash in the main loop, the trace notes it and goes on
+            try:
+                bot.main_cycle()
+            except Exception as e:
+                trace.exception(e)
+
+    position = exchange.fetch_positions([ scenario.symbol ])
+    balance = exchange.fetch_balance()
+
+    return { 'bot': bot_name, 'generator': generator_name, 'scenario': scenario.name, 'steps': len(scenario),
+             'wall_time': round(time.perf_counter() - start, 3), 'actions': trace.actions,
+             'final': _normalize({ 'contracts': sum(p['contracts'] or 0 for p in position),
+                                   'balance': balance['total'].get('USD') }) }
+
+def golden_path(name: str) -> str:
+    return os.path.join(GOLDEN_DIR, f'{name}.json')
+
+# one action per line, the diff of an updated golden trace shows the changed decisions
+def write_golden(path: str, trace: dict):
+
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+
+    fields = [ f'  {json.dumps(k)}: {json.dumps(v)}' for k, v in trace.items() if k != 'actions' ]
+    actions = ',\n'.join(f'    {json.dumps(a)}' for a in trace['actions'])
+
+    with open(path, 'w') as f:
+        f.write('{\n' + ',\n'.join(fields) + ',\n  "actions": [\n' + actions + '\n  ]\n}\n')
+
+# the first difference of the decisions of two traces or None
+def compare(golden: dict, trace: dict) -> str:
+
+    for i, (expected, actual) in enumerate(zip(golden['actions'], trace['actions'])):
+        if expected != actual:
+            return f'action {i}: expected {expected}, got {actual}'
+
+    if len(golden['actions']) != len(trace['actions']):
+        i = min(len(golden['actions']), len(trace['actions']))
+        extra = golden['actions'][i] if len(golden['actions']) > i else trace['actions'][i]
+        return f"{len(trace['actions'])} actions instead of {len(golden['actions'])}, first unmatched {extra}"
+
+    if golden['final'] != trace['final']:
+        return f"final state {trace['final']} instead of {golden['final']}"
+
+    return None
+
+def main(args) -> int:
+
+    scenarios = { name: build for name, build in SCENARIOS.items() }
+    for path in args.recording or []:
+        name = os.path.basename(path).split('.')[0]
+        scenarios[name] = lambda path=path, name=name: recorded_scenario(path, name=name)
+
+    failed = 0
+    built = {}
+
+    for scenario_name in scenarios:
+        for bot_name in BOTS:
+            for generator_name in GENERATORS:
+
+                name = f'{bot_name}-{generator_name}-{scenario_name}'
+                if args.only and not fnmatch.fnmatch(name, args.only):
+                    continue
+
+                if scenario_name not in built:
+                    built[scenario_name] = scenarios[scenario_name]()
+
+                trace = run(bot_name, generator_name, built[scenario_name])
+                path = golden_path(name)
+
+                golden = None
+                if os.path.exists(path):
+                    with open(path) as f:
+                        golden = json.load(f)
+
+                # a run without orders compares nothing, the scenario has to be changed
+                if len(trace['actions']) == 0:
+                    result = 'NO ACTIONS'
+                    failed += 1
+                elif args.update:
+                    write_golden(path, trace)
+                    result = 'UPDATED'
+                elif golden is None:
+                    result = 'NO GOLDEN TRACE'
+                    failed += 1
+                else:
+                    difference = compare(golden, trace)
+                    result = 'OK' if difference is None else f'DIFF {difference}'
+                    failed += difference is not None
+
+                speed = f" (golden {golden['wall_time']:7.2f} s, x{trace['wall_time'] / max(golden['wall_time'], 1e-9):5.2f})" if golden else ''
+                print(f"{name:45s} actions {len(trace['actions']):4d}  wall {trace['wall_time']:7.2f} s{speed}  {result}", flush=True)
+
+    return 1 if failed > 0 else 0
+
+if __name__ == '__main__':
+
+    # the bots log the rejected orders and print their models, the traces have the decisions
+    logging.basicConfig(level=logging.CRITICAL)
+    warnings.filterwarnings('ignore', category=RuntimeWarning)
+
+    parser = argparse.ArgumentParser(prog='python -m regression.golden_traces')
+    parser.add_argument('--update', action='store_true', help='write the traces of this run as the golden traces')
+    parser.add_argument('--only', help='fnmatch pattern of the runs (bot-generator-scenario)')
+    parser.add_argument('--recording', action='append', help='scenario from a recording of a RecordingExchangeAdapter')
+
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,190 @@
+import numpy as np
+
+from base import BaseClass
+from base import VirtualClock
+from exchange_adapters import SimulatedExchange
+from streaming import load_recording
+
+# start of the scenarios on the virtual clock (2023-01-01 00:00 UTC)
+START = 1672531200.0
+
+class Scenario(BaseClass):
+
+    # a market to run a bot on: the candle history before the start and one
+    # price (bid) and volume per step of step seconds after it. exchange()
+    # returns a new SimulatedExchange on a VirtualClock at the start with the
+    # history loaded, the runner moves the clock and sets the prices.
+
+    def __init__(self, name: str, symbol: str, history: list, prices: list, volumes: list = None,
+                 step: int = 60, start: float = START, tick_size: float = 0.01, balance: float = 1000000.0):
+
+        self._name: str = name
+        self._symbol: str = symbol
+        self._history: list = history
+        self._prices: list = prices
+        self._volumes: list = volumes if volumes is not None else [ 0.0 ] * len(prices)
+        self._step: int = step
+        self._start: float = start
+        self._tick_size: float = tick_size
+        self._balance: float = balance
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def symbol(self) -> str:
+        return self._symbol
+
+    @property
+    def step(self) -> int:
+        return self._step
+
+    @property
+    def start(self) -> float:
+        return self._start
+
+    def __len__(self) -> int:
+        return len(self._prices)
+
+    def steps(self):
+        return zip(self._prices, self._volumes)
+
+    # with symbols the market of the scenario is there under each of the symbols
+    def exchange(self, symbols: list = None) -> SimulatedExchange:
+
+        symbols = symbols or [ self._symbol ]
+
+        exchange = SimulatedExchange(markets={ s: { 'tick_size': self._tick_size } for s in symbols }, balance=self._balance,
+                                     clock=VirtualClock(self._start))
+        for symbol in symbols:
+            exchange.load_candles(symbol, self._history)
+
+        return exchange
+
+def _round(prices: np.ndarray, tick_size: float) -> list:
+    return [ round(round(p / tick_size) * tick_size, 10) for p in prices ]
+
+# a random walk of 5m candles (loaded as 1m candles every 5 minutes) ending at the start
+def _history(rng: np.random.RandomState, days: int, price: float, tick_size: float) -> list:
+
+    n = days * 288
+    closes = np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    closes = closes * price / closes[-1]
+    opens = np.concatenate([ [ closes[0] ], closes[:-1] ])
+    wicks = np.abs(rng.normal(0, 0.001, (n, 2))) * closes[:, None]
+    volumes = rng.lognormal(3, 0.5, n)
+
+    history = []
+    for i in range(n):
+        timestamp = int(START * 1000) - (n - i) * 300000
+        high = max(opens[i], closes[i]) + wicks[i, 0]
+        low = min(opens[i], closes[i]) - wicks[i, 1]
+        [ o, h, l, c ] = _round(np.array([ opens[i], high, low, closes[i] ]), tick_size)
+        history.append([ timestamp, o, h, l, c, float(volumes[i]) ])
+
+    return history
+
+# synthetic scenarios: 1m steps of a random walk with a drift per day, a mean
+# reverting range or a crash (drop of 8% within an hour in the middle, half recovered).
+# swing adds waves of swing (relative) every swing_period steps, the pullbacks
+# to the moving averages the heikin-ashi and vector candle signals wait for
+def synthetic_scenario(name: str, kind: str, seed: int, days: int = 1, history_days: int = 55,
+                       price: float = 1500.0, drift: float = 0.0, tick_size: float = 0.01,
+                       symbol: str = 'ETH/USD:USD', swing: float = 0.0, swing_period: int = 360) -> Scenario:
+
+    rng = np.random.RandomState(seed)
+    history = _history(rng, history_days, price, tick_size)
+
+    n = days * 1440
+    noise = rng.normal(0, 0.0009, n)
+
+    if kind == 'trend':
+        log_prices = np.cumsum(noise + drift / 1440)
+
+    elif kind == 'range':
+        log_prices = np.zeros(n)
+        for i in range(1, n):
+            log_prices[i] = log_prices[i - 1] * 0.98 + noise[i]
+
+    elif kind == 'crash':
+        moves = noise.copy()
+        middle = n // 2
+        moves[middle:middle + 60] += np.log(0.92) / 60
+        moves[middle + 60:middle + 240] -= np.log(0.92) / 2 / 180
+        log_prices = np.cumsum(moves)
+
+    else:
+        raise ValueError(f'(synthetic_scenario) Unknown scenario kind {kind}')
+
+    log_prices = log_prices + swing * np.sin(2 * np.pi * np.arange(n) / swing_period)
+
+    prices = _round(price * np.exp(log_prices), tick_size)
+
+    # the volume grows with the size of the move, spikes on the large moves
+    moves = np.abs(np.diff(log_prices, prepend=0))
+    volumes = rng.lognormal(1.5, 0.5, n) * (1 + (moves / 0.0009) ** 2) * (1 + 20 * (moves > 0.003))
+
+    return Scenario(name, symbol, history, prices, [ float(v) for v in volumes ], tick_size=tick_size)
+
+# the shipped scenarios, each call builds the same scenario
+SCENARIOS = {
+    'trend_up': lambda: synthetic_scenario('trend_up', 'trend', seed=1, drift=0.06, swing=0.008),
+    'trend_down': lambda: synthetic_scenario('trend_down', 'trend', seed=2, drift=-0.06, swing=0.006),
+    'range': lambda: synthetic_scenario('range', 'range', seed=3, swing=0.008),
+    'crash': lambda: synthetic_scenario('crash', 'crash', seed=4, swing=0.006),
+}
+
+# a scenario of the market recorded by a RecordingExchangeAdapter: the history
+# from the largest fetch_ohlcv response, one step per step seconds with the last
+# recorded bid (tickers and order books) before it
+def recorded_scenario(path: str, symbol: str = None, step: int = 60, name: str = None) -> Scenario:
+    log_prefix = f'(recorded_scenario) {path}:'
+
+    messages = load_recording(path)
+    header = next((m['msg']['header'] for m in messages if 'header' in m['msg']), None)
+    if header is None:
+        raise ValueError(f'{log_prefix} Not a recording of an exchange adapter')
+
+    bids = []
+    candles = []
+
+    for m in messages:
+        record = m['msg']
+        if 'header' in record or 'r' not in record or record['r'] is None:
+            continue
+
+        result = record['r']
+        args = record['a']
+
+        if record['m'] == 'fetch_ohlcv' and (symbol is None or args[0] == symbol) and len(result) > len(candles):
+            symbol = args[0]
+            candles = result
+
+        elif record['m'] == 'fetch_ticker' and (symbol is None or result.get('symbol') == symbol) and result.get('bid'):
+            symbol = result['symbol']
+            bids.append((m['t'], result['bid']))
+
+        elif record['m'] in ('fetch_tickers', 'fetch_bids_asks') and symbol in result and result[symbol].get('bid'):
+            bids.append((m['t'], result[symbol]['bid']))
+
+        elif record['m'] == 'fetch_order_book' and args[0] == symbol and len(result.get('bids', [])) > 0:
+            bids.append((m['t'], result['bids'][0][0]))
+
+    if symbol is None or len(bids) == 0:
+        raise ValueError(f'{log_prefix} No recorded prices')
+
+    start = header['start'] + bids[0][0]
+    history = [ [ int(c[0]) ] + [ float(v) for v in c[1:6] ] for c in candles if c[0] < start * 1000 ]
+
+    prices = []
+    i = 0
+    for t in np.arange(bids[0][0], bids[-1][0], step):
+        while i + 1 < len(bids) and bids[i + 1][0] <= t:
+            i += 1
+        prices.append(bids[i][1])
+
+    market = header['markets'][symbol]
+
+    return Scenario(name or path, symbol, history, prices, step=step, start=start,
+                    tick_size=float(market['precision']['price']))
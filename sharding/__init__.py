@@ -0,0 +1,7 @@
+from .hash_ring import HashRing
+from .shared_markets import SharedMarkets
+from .shared_markets import preload
+from .feed_broker import FeedBroker
+from .feed_broker import FeedClient
+from .feed_broker import BrokeredAdapter
+from .supervisor import ShardSupervisor
\ No newline at end of file
@@ -0,0 +1,187 @@
+import logging
+import threading
+from multiprocessing.connection import Client
+from multiprocessing.connection import Listener
+
+from base import BaseClass
+from datafeeds import FeedScheduler
+
+logger = logging.getLogger(__name__)
+
+class FeedBroker(BaseClass):
+
+    # local broker of the candle feeds for the workers of a supervisor: a
+    # feed (symbol, timeframe, only_closed) is downloaded once and served to
+    # all workers asking for it until the close of its next bar (plus grace)
+    # or, for feeds with the open bar, for live_ttl seconds. Concurrent
+    # requests of the same feed wait for one download. The workers connect
+    # with a FeedClient (see BrokeredAdapter) to the local address.
+
+    def __init__(self, exchange_adapter, address=None, authkey: bytes = None, family: str = 'AF_UNIX',
+                 live_ttl: float = 2.0, feed_scheduler: FeedScheduler = None):
+
+        self._ea = exchange_adapter
+        self._address = address
+        self._authkey: bytes = authkey
+        self._family: str = family
+        self._live_ttl: int = int(live_ttl * 1000)
+        self._feed_scheduler: FeedScheduler = feed_scheduler if feed_scheduler is not None else FeedScheduler(clock=exchange_adapter.clock)
+
+        self._listener: Listener = None
+        self._cache: dict = {}
+        self._locks: dict = {}
+        self._lock = threading.Lock()
+
+        self._requests: int = 0
+        self._downloads: int = 0
+
+    @property
+    def address(self):
+        return self._listener.address if self._listener is not None else self._address
+
+    def stats(self) -> dict:
+        return { 'requests': self._requests, 'downloads': self._downloads, 'feeds': len(self._cache) }
+
+    def start(self):
+        log_prefix = f"({self.class_name()}.start)"
+
+        self._listener = Listener(self._address, family=self._family, authkey=self._authkey)
+        threading.Thread(target=self._accept, daemon=True).start()
+        logger.info('%s Serving feeds of %s on %s', log_prefix, self._ea.id, self.address)
+        return self
+
+    def close(self):
+
+        listener = self._listener
+        self._listener = None
+        if listener is not None:
+            listener.close()
+
+    def _accept(self):
+        log_prefix = f"({self.class_name()}._accept)"
+
+        while self._listener is not None:
+            try:
+                conn = self._listener.accept()
+            except Exception as e:
+                if self._listener is not None:
+                    logger.warning('%s WARN: Accept failed: %s', log_prefix, e)
+                continue
+
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+
+        while True:
+            try:
+                [ symbol, timeframe, num_bars, only_closed ] = conn.recv()
+            except (EOFError, OSError):
+                break
+
+            try:
+                conn.send(('ok', self.candles(symbol, timeframe, num_bars, only_closed)))
+            except Exception as e:
+                conn.send(('error', e))
+
+        conn.close()
+
+    def candles(self, symbol: str, timeframe: str, num_bars: int, only_closed: bool):
+
+        key = (symbol, timeframe, only_closed)
+        with self._lock:
+            self._requests += 1
+            lock = self._locks.setdefault(key, threading.Lock())
+
+        with lock:
+            now = self._ea.clock.ms()
+            cached = self._cache.get(key)
+
+            if cached is None or now >= cached['expires'] or cached['num_bars'] < num_bars:
+                df = self._ea.fetch_candles_df(symbol, timeframe=timeframe, num_bars=num_bars, only_closed=only_closed)
+                self._downloads += 1
+
+                # a closed bar not published yet is asked for again after the retry delay
+                expires = now + self._live_ttl
+                if only_closed:
+                    expires = self._feed_scheduler.next_bar_close(timeframe, now) + int(self._feed_scheduler.grace * 1000)
+                    if len(df) == 0 or int(df['timestamp'].iloc[-1]) < self._feed_scheduler.expected_last_bar(timeframe, now):
+                        expires = now + int(self._feed_scheduler.retry_delay * 1000)
+
+                cached = { 'df': df, 'num_bars': num_bars, 'expires': expires }
+                self._cache[key] = cached
+
+        return cached['df'].tail(num_bars).copy()
+
+class FeedClient(BaseClass):
+
+    # connection of a worker to a FeedBroker, shared by the bot threads
+
+    def __init__(self, address, authkey: bytes = None, family: str = 'AF_UNIX'):
+
+        self._address = address
+        self._authkey: bytes = authkey
+        self._family: str = family
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def candles(self, symbol: str, timeframe: str, num_bars: int, only_closed: bool):
+
+        with self._lock:
+            if self._conn is None:
+                self._conn = Client(self._address, family=self._family, authkey=self._authkey)
+
+            try:
+                self._conn.send((symbol, timeframe, num_bars, only_closed))
+                [ status, result ] = self._conn.recv()
+            except (EOFError, OSError):
+                self._conn = None
+                raise
+
+        if status == 'error':
+            raise result
+        return result
+
+    def close(self):
+
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+class BrokeredAdapter(BaseClass):
+
+    # the exchange adapter of a bot in a worker: the candles come from the
+    # FeedBroker of the supervisor, everything else from the adapter. If the
+    # broker cannot be reached the candles are downloaded directly
+
+    def __init__(self, exchange_adapter, feed_client: FeedClient):
+
+        self._ea = exchange_adapter
+        self._feed_client: FeedClient = feed_client
+        self._brokered: int = 0
+        self._direct: int = 0
+
+    def __getattr__(self, name):
+        if name.startswith('__') or '_ea' not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self._ea, name)
+
+    @property
+    def exchange_adapter(self):
+        return self._ea
+
+    def stats(self) -> dict:
+        return { 'brokered': self._brokered, 'direct': self._direct }
+
+    def fetch_candles_df(self, symbol, timeframe='5m', num_bars=50, only_closed=True):
+        log_prefix = f"({self.class_name()}.fetch_candles_df) symbol {symbol}:"
+
+        try:
+            df = self._feed_client.candles(symbol, timeframe, num_bars, only_closed)
+        except (EOFError, OSError) as e:
+            logger.warning('%s WARN: Feed broker not reachable (%s) - downloading %s directly', log_prefix, e, timeframe)
+            self._direct += 1
+            return self._ea.fetch_candles_df(symbol, timeframe=timeframe, num_bars=num_bars, only_closed=only_closed)
+
+        self._brokered += 1
+        return df
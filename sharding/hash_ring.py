@@ -0,0 +1,98 @@
+import bisect
+import hashlib
+
+from base import BaseClass
+
+def ring_hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+class HashRing(BaseClass):
+
+    # consistent hashing of keys (symbols) to nodes (workers) with virtual
+    # nodes: adding or removing a node only moves the keys of its share of the
+    # ring. assign balances by cost (consistent hashing with bounded loads):
+    # a key goes to the first node clockwise whose load stays within
+    # (1 + balance) times the mean load, so an expensive key pushes the next
+    # keys to the following nodes instead of piling up on one node
+
+    def __init__(self, nodes: list = None, replicas: int = 160):
+
+        self._replicas: int = replicas
+        self._nodes: list = []
+        self._points: list = []
+        self._owners: list = []
+
+        for node in nodes or []:
+            self.add(node)
+
+    @property
+    def nodes(self) -> list:
+        return list(self._nodes)
+
+    def add(self, node):
+
+        if node in self._nodes:
+            return
+
+        self._nodes.append(node)
+        for i in range(self._replicas):
+            point = ring_hash(f'{node}#{i}')
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove(self, node):
+
+        if node not in self._nodes:
+            return
+
+        self._nodes.remove(node)
+        keep = [ i for i, owner in enumerate(self._owners) if owner != node ]
+        self._points = [ self._points[i] for i in keep ]
+        self._owners = [ self._owners[i] for i in keep ]
+
+    # the nodes clockwise from the position of the key, each once
+    def walk(self, key: str) -> list:
+
+        if len(self._points) == 0:
+            return []
+
+        start = bisect.bisect(self._points, ring_hash(key))
+        nodes = []
+        for i in range(len(self._points)):
+            owner = self._owners[(start + i) % len(self._points)]
+            if owner not in nodes:
+                nodes.append(owner)
+                if len(nodes) == len(self._nodes):
+                    break
+
+        return nodes
+
+    def node_for(self, key: str):
+
+        nodes = self.walk(key)
+        return nodes[0] if len(nodes) > 0 else None
+
+    # node per key, costs per key (default 1) bound the load of a node to
+    # (1 + balance) times the mean, the most expensive keys are placed first
+    def assign(self, keys: list, costs: dict = None, balance: float = 0.25) -> dict:
+
+        costs = costs or {}
+        cost = { key: costs.get(key) or 1.0 for key in keys }
+        total = sum(cost.values())
+        capacity = (1 + balance) * total / max(len(self._nodes), 1)
+
+        loads = { node: 0.0 for node in self._nodes }
+        assignment = {}
+
+        for key in sorted(keys, key=lambda k: (-cost[k], k)):
+            nodes = self.walk(key)
+            if len(nodes) == 0:
+                break
+
+            # a key more expensive than the capacity still needs a node
+            node = next((n for n in nodes if loads[n] + cost[key] <= capacity), min(nodes, key=lambda n: loads[n]))
+            assignment[key] = node
+            loads[node] += cost[key]
+
+        return assignment
@@ -0,0 +1,61 @@
+import logging
+import pickle
+from multiprocessing import shared_memory
+
+from base import BaseClass
+
+logger = logging.getLogger(__name__)
+
+class SharedMarkets(BaseClass):
+
+    # the exchange metadata (markets and currencies of ccxt) loaded once by the
+    # supervisor and published in a shared memory block, the workers attach to
+    # it by name and set it on their exchanges instead of each calling
+    # load_markets (see preload)
+
+    def __init__(self, name: str = None):
+
+        self._name: str = name
+        self._shm: shared_memory.SharedMemory = None
+
+    @property
+    def name(self) -> str:
+        return self._shm.name if self._shm is not None else self._name
+
+    # the supervisor: copy the metadata of an exchange into a new block
+    def publish(self, exchange) -> str:
+        log_prefix = f"({self.class_name()}.publish) exchange {exchange.id}:"
+
+        data = pickle.dumps({ 'markets': exchange.markets, 'currencies': exchange.currencies }, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self._shm = shared_memory.SharedMemory(name=self._name, create=True, size=len(data) + 8)
+        self._shm.buf[:8] = len(data).to_bytes(8, 'big')
+        self._shm.buf[8:len(data) + 8] = data
+
+        logger.info('%s Published %s markets (%s bytes) in %s', log_prefix, len(exchange.markets), len(data), self.name)
+        return self.name
+
+    # a worker: the metadata of the block
+    def load(self) -> dict:
+
+        shm = shared_memory.SharedMemory(name=self._name)
+        try:
+            size = int.from_bytes(bytes(shm.buf[:8]), 'big')
+            return pickle.loads(bytes(shm.buf[8:size + 8]))
+        finally:
+            shm.close()
+
+    def close(self):
+
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+# sets the metadata on a ccxt exchange, its load_markets returns it without a request
+def preload(exchange, metadata: dict):
+
+    if metadata is not None:
+        exchange.set_markets(metadata['markets'], metadata.get('currencies'))
+
+    return exchange
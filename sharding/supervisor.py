@@ -0,0 +1,290 @@
+import argparse
+import logging
+import multiprocessing
+import os
+import queue
+import tempfile
+import time
+
+import numpy as np
+
+from base import BaseClass
+from .feed_broker import FeedBroker
+from .hash_ring import HashRing
+from .shared_markets import SharedMarkets
+from .worker import ADD
+from .worker import REMOVE
+from .worker import REMOVED
+from .worker import STATS
+from .worker import STOP
+from .worker import import_callable
+from .worker import worker_main
+
+logger = logging.getLogger(__name__)
+
+# Supervisor spreading the bots of many symbols over worker processes (cores):
+#  - the symbols are assigned to the workers by consistent hashing with
+#    bounded loads (HashRing), weighted by the cpu time per second of each
+#    bot's main cycles measured by the workers. Every rebalance interval the
+#    symbols are reassigned if the most loaded worker is above (1 + balance)
+#    times the mean, only the symbols whose worker changed move: the old
+#    worker stops the bot and writes its state snapshot, the new one resumes
+#    from it
+#  - a crashed worker is started again with its symbols, the bots resume from
+#    their last snapshots (StateStore, every checkpoint seconds)
+#  - the exchange metadata is loaded once and shared with the workers in
+#    shared memory (SharedMarkets), the candle feeds are downloaded once per
+#    bar for all workers by a local FeedBroker
+#  - connect and build are callables given as 'module:name':
+#      connect(symbol, options, metadata) -> exchange adapter (symbol None for
+#                                            the adapter of the supervisor)
+#      build(exchange_adapter, symbol, options) -> bot
+#
+# usage: python -m sharding.supervisor --connect module:name --build module:name --symbols s1,s2,...
+#                                      [--workers n] [--duration s] [--state-dir data_dir/state]
+
+class ShardSupervisor(BaseClass):
+
+    def __init__(self, connect: str, build: str, symbols: list, workers: int = None, options: dict = None,
+                 state_dir: str = 'data_dir/state', checkpoint: float = 10.0, report_interval: float = 5.0,
+                 rebalance_interval: float = 60.0, balance: float = 0.25, share_markets: bool = True,
+                 share_feeds: bool = True, authkey: bytes = None, log_level: int = logging.WARNING):
+
+        self._connect: str = connect
+        self._build: str = build
+        self._symbols: list = list(symbols)
+        self._workers: int = workers or os.cpu_count()
+        self._options: dict = options or {}
+        self._state_dir: str = state_dir
+        self._checkpoint: float = checkpoint
+        self._report_interval: float = report_interval
+        self._rebalance_interval: float = rebalance_interval
+        self._balance: float = balance
+        self._share_markets: bool = share_markets
+        self._share_feeds: bool = share_feeds
+        self._authkey: bytes = authkey
+        self._log_level: int = log_level
+
+        self._context = multiprocessing.get_context('spawn')
+        self._ring: HashRing = HashRing(list(range(self._workers)))
+        self._assignment: dict = {}
+        self._moves: dict = {}
+
+        self._processes: dict = {}
+        self._commands: dict = {}
+        self._reports = None
+
+        self._costs: dict = {}
+        self._stats: dict = {}
+        self._ticks: dict = { i: 0 for i in range(self._workers) }
+        self._restarts: dict = { i: 0 for i in range(self._workers) }
+        self._rebalances: int = 0
+        self._next_rebalance: float = 0.0
+
+        self._ea = None
+        self._markets: SharedMarkets = None
+        self._broker: FeedBroker = None
+        self._tmp_dir: str = None
+
+    @property
+    def assignment(self) -> dict:
+        return dict(self._assignment)
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    # symbols per worker
+    def shards(self) -> dict:
+
+        shards = { i: [] for i in range(self._workers) }
+        for symbol, worker in self._assignment.items():
+            shards[worker].append(symbol)
+        return shards
+
+    # cost per symbol, symbols not measured yet count as the mean of the measured ones
+    def costs(self) -> dict:
+
+        measured = [ c for c in self._costs.values() if c > 0 ]
+        default = float(np.mean(measured)) if len(measured) > 0 else 1.0
+        return { symbol: self._costs.get(symbol) or default for symbol in self._symbols }
+
+    def loads(self) -> dict:
+
+        costs = self.costs()
+        loads = { i: 0.0 for i in range(self._workers) }
+        for symbol, worker in self._assignment.items():
+            loads[worker] += costs[symbol]
+        return loads
+
+    def start(self):
+        log_prefix = f"({self.class_name()}.start)"
+
+        os.makedirs(self._state_dir, exist_ok=True)
+        self._tmp_dir = tempfile.mkdtemp(prefix='shards_')
+
+        if self._share_markets or self._share_feeds:
+            self._ea = import_callable(self._connect)(None, self._options, None)
+
+        if self._share_markets:
+            self._markets = SharedMarkets()
+            self._markets.publish(self._ea.exchange)
+
+        if self._share_feeds:
+            self._broker = FeedBroker(self._ea, address=os.path.join(self._tmp_dir, 'feeds'), authkey=self._authkey).start()
+
+        self._reports = self._context.Queue()
+        self._assignment = self._ring.assign(self._symbols, self.costs(), self._balance)
+
+        for worker in range(self._workers):
+            self._spawn(worker)
+
+        self._next_rebalance = time.time() + self._rebalance_interval
+        logger.info('%s %s symbols on %s workers: %s', log_prefix, len(self._symbols), self._workers,
+                    { w: len(s) for w, s in self.shards().items() })
+        return self
+
+    def _spawn(self, worker: int):
+
+        # symbols moving to the worker are added once the old worker removed them
+        symbols = [ s for s in self.shards()[worker] if s not in self._moves ]
+
+        config = { 'connect': self._connect, 'build': self._build, 'options': self._options, 'symbols': symbols,
+                   'markets': self._markets.name if self._markets is not None else None,
+                   'broker': self._broker.address if self._broker is not None else None, 'authkey': self._authkey,
+                   'state_dir': self._state_dir, 'checkpoint': self._checkpoint,
+                   'report_interval': self._report_interval, 'log_level': self._log_level }
+
+        self._commands[worker] = self._context.Queue()
+        self._processes[worker] = self._context.Process(target=worker_main, args=(worker, config, self._commands[worker], self._reports),
+                                                        name=f'shard-worker-{worker}', daemon=True)
+        self._processes[worker].start()
+
+    # one round of the supervision: reports, crashed workers and the rebalance
+    def poll(self):
+        log_prefix = f"({self.class_name()}.poll)"
+
+        while True:
+            try:
+                [ kind, worker, data ] = self._reports.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == STATS:
+                for symbol, s in data.items():
+                    # exponentially weighted, a busy bot has more than one sample
+                    previous = self._costs.get(symbol)
+                    self._costs[symbol] = s['cost'] if previous is None else 0.7 * previous + 0.3 * s['cost']
+                    self._stats[symbol] = s
+                    self._ticks[worker] += s['ticks']
+            elif kind == REMOVED:
+                self._moved(data)
+
+        for worker, process in self._processes.items():
+            if not process.is_alive():
+                logger.warning('%s WARN: Worker %s exited with %s - restarting it with its symbols', log_prefix, worker, process.exitcode)
+                self._crashed(worker)
+                self._restarts[worker] += 1
+                self._spawn(worker)
+
+        if time.time() >= self._next_rebalance:
+            self._next_rebalance = time.time() + self._rebalance_interval
+            self.rebalance()
+
+    def _moved(self, symbol: str):
+
+        if symbol in self._moves:
+            target = self._moves.pop(symbol)
+            self._assignment[symbol] = target
+            self._commands[target].put((ADD, symbol))
+
+    # moves away from a crashed worker are done, its last snapshots are on disk
+    def _crashed(self, worker: int):
+
+        for symbol in [ s for s, target in self._moves.items() if self._assignment[s] == worker ]:
+            self._moved(symbol)
+
+    # returns the number of symbols moved
+    def rebalance(self, force: bool = False) -> int:
+        log_prefix = f"({self.class_name()}.rebalance)"
+
+        loads = self.loads()
+        mean = sum(loads.values()) / self._workers
+        if len(self._moves) > 0 or (not force and max(loads.values()) <= (1 + self._balance) * mean):
+            return 0
+
+        assignment = self._ring.assign(self._symbols, self.costs(), self._balance)
+        moves = { s: w for s, w in assignment.items() if self._assignment.get(s) != w }
+
+        for symbol, target in moves.items():
+            self._moves[symbol] = target
+            self._commands[self._assignment[symbol]].put((REMOVE, symbol))
+
+        if len(moves) > 0:
+            self._rebalances += 1
+            logger.info('%s Moving %s symbols, loads %s', log_prefix, len(moves), loads)
+
+        return len(moves)
+
+    def kill(self, worker: int):
+        self._processes[worker].kill()
+
+    def stop(self, timeout: float = 60.0):
+
+        for worker, commands in self._commands.items():
+            if self._processes[worker].is_alive():
+                commands.put((STOP, None))
+
+        deadline = time.time() + timeout
+        for process in self._processes.values():
+            process.join(max(0.0, deadline - time.time()))
+            if process.is_alive():
+                process.terminate()
+
+        if self._broker is not None:
+            self._broker.close()
+        if self._markets is not None:
+            self._markets.close()
+
+    def stats(self) -> dict:
+
+        return { 'workers': { w: { 'symbols': len(s), 'load': self.loads()[w], 'ticks': self._ticks[w],
+                                   'restarts': self._restarts[w] } for w, s in self.shards().items() },
+                 'symbols': dict(self._stats), 'rebalances': self._rebalances,
+                 'broker': self._broker.stats() if self._broker is not None else None }
+
+    # supervise for duration seconds (until interrupted without)
+    def run(self, duration: float = None):
+
+        self.start()
+        deadline = time.time() + duration if duration is not None else None
+
+        try:
+            while deadline is None or time.time() < deadline:
+                time.sleep(1.0)
+                self.poll()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.poll()
+            self.stop()
+
+        return self.stats()
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(prog='python -m sharding.supervisor')
+    parser.add_argument('--connect', required=True, help='module:name of connect(symbol, options, metadata)')
+    parser.add_argument('--build', required=True, help='module:name of build(exchange_adapter, symbol, options)')
+    parser.add_argument('--symbols', required=True, help='comma separated symbols')
+    parser.add_argument('--workers', type=int, help='worker processes (default one per cpu)')
+    parser.add_argument('--duration', type=float, help='seconds to run (default until interrupted)')
+    parser.add_argument('--state-dir', default='data_dir/state', help='directory of the state snapshots')
+    parser.add_argument('--rebalance', type=float, default=60.0, help='seconds between the rebalances')
+    args = parser.parse_args()
+
+    logging.basicConfig(format='%(asctime)s %(levelname)s [%(process)d] %(message)s', level=logging.INFO)
+
+    supervisor = ShardSupervisor(args.connect, args.build, args.symbols.split(','), workers=args.workers,
+                                 state_dir=args.state_dir, rebalance_interval=args.rebalance, log_level=logging.INFO)
+    print(supervisor.run(args.duration))
@@ -0,0 +1,171 @@
+import importlib
+import logging
+import os
+import queue
+import threading
+import time
+
+from botlib import StateStore
+from .feed_broker import BrokeredAdapter
+from .feed_broker import FeedClient
+from .shared_markets import SharedMarkets
+
+logger = logging.getLogger(__name__)
+
+# commands of the supervisor to a worker and reports of a worker
+ADD = 'add'
+REMOVE = 'remove'
+STOP = 'stop'
+STATS = 'stats'
+REMOVED = 'removed'
+
+# a callable given as 'module:name', importable in a spawned process
+def import_callable(spec: str):
+
+    [ module, name ] = spec.split(':')
+    return getattr(importlib.import_module(module), name)
+
+def state_path(state_dir: str, exchange_id: str, symbol: str) -> str:
+    return os.path.join(state_dir, f"{exchange_id}_{symbol.replace('/', '_').replace(':', '_')}.json")
+
+class BotThread(threading.Thread):
+
+    # one bot of a worker: the preparation, the restore of its snapshot and
+    # then the main cycles with the ticks of the bot. The cpu time of the
+    # cycles is the cost the supervisor balances the workers by
+
+    def __init__(self, bot):
+        super().__init__(daemon=True)
+
+        self.bot = bot
+        self._stop_event = threading.Event()
+
+        self.ticks: int = 0
+        self.cpu: float = 0.0
+        self.busy: float = 0.0
+        self.errors: dict = {}
+
+    def error(self, e: Exception):
+        self.errors[type(e).__name__] = self.errors.get(type(e).__name__, 0) + 1
+
+    def run(self):
+        log_prefix = f"({self.__class__.__name__}.run) symbol {self.bot.symbol}:"
+
+        try:
+            self.bot.preparation_handler()
+            self.bot.restore_state()
+        except Exception as e:
+            logger.exception('%s WARN: Could not prepare the bot', log_prefix)
+            self.error(e)
+            return
+
+        while not self._stop_event.is_set():
+            cpu_start = time.thread_time()
+            start = time.perf_counter()
+
+            try:
+                self.bot.main_cycle()
+            except Exception as e:
+                logger.warning('%s WARN: Main cycle failed: %s %s', log_prefix, type(e).__name__, e)
+                self.error(e)
+
+            self.ticks += 1
+            self.cpu += time.thread_time() - cpu_start
+            self.busy += time.perf_counter() - start
+
+            try:
+                interval = self.bot.next_tick()
+            except Exception as e:
+                self.error(e)
+                interval = self.bot.ticks
+
+            self._stop_event.wait(max(0.0, interval - (time.perf_counter() - start)))
+
+    def stop(self, timeout: float = 30.0):
+
+        self._stop_event.set()
+        self.join(timeout)
+        self.bot.checkpoint(force=True)
+
+def worker_main(index: int, config: dict, commands, reports):
+
+    logging.basicConfig(level=config.get('log_level', logging.WARNING),
+                        format=f'%(asctime)s %(levelname)s [worker {index}] %(message)s')
+    log_prefix = f"(worker_main) worker {index}:"
+
+    connect = import_callable(config['connect'])
+    build = import_callable(config['build'])
+    options = config.get('options') or {}
+
+    metadata = SharedMarkets(config['markets']).load() if config.get('markets') else None
+    feed_client = FeedClient(config['broker'], authkey=config.get('authkey')) if config.get('broker') else None
+
+    threads: dict = {}
+    reported: dict = {}
+
+    def add(symbol: str):
+
+        if symbol in threads:
+            return
+
+        try:
+            ea = connect(symbol, options, metadata)
+            if feed_client is not None:
+                ea = BrokeredAdapter(ea, feed_client)
+
+            bot = build(ea, symbol, options)
+            bot.state_store = StateStore(state_path(config['state_dir'], ea.id, symbol), interval=config['checkpoint'])
+        except Exception as e:
+            logger.exception('%s WARN: Could not start the bot of %s', log_prefix, symbol)
+            return
+
+        threads[symbol] = BotThread(bot)
+        threads[symbol].start()
+
+    def report(elapsed: float):
+
+        stats = {}
+        for symbol, t in threads.items():
+            [ cpu, busy, ticks ] = reported.get(symbol, (0.0, 0.0, 0))
+            stats[symbol] = { 'cost': (t.cpu - cpu) / elapsed, 'busy': (t.busy - busy) / elapsed,
+                              'ticks': t.ticks - ticks, 'errors': dict(t.errors) }
+            reported[symbol] = (t.cpu, t.busy, t.ticks)
+
+        reports.put((STATS, index, stats))
+
+    for symbol in config['symbols']:
+        add(symbol)
+
+    last_report = time.perf_counter()
+
+    while True:
+        try:
+            command = commands.get(timeout=max(0.0, last_report + config['report_interval'] - time.perf_counter()))
+        except queue.Empty:
+            command = None
+
+        if command is not None:
+            [ action, symbol ] = command
+
+            if action == ADD:
+                add(symbol)
+            elif action == REMOVE:
+                if symbol in threads:
+                    threads.pop(symbol).stop()
+                    reported.pop(symbol, None)
+                reports.put((REMOVED, index, symbol))
+            elif action == STOP:
+                break
+
+        if time.perf_counter() >= last_report + config['report_interval']:
+            now = time.perf_counter()
+            report(now - last_report)
+            last_report = now
+
+    for t in threads.values():
+        t._stop_event.set()
+    for t in threads.values():
+        t.stop()
+
+    if feed_client is not None:
+        feed_client.close()
@@ -7,3 +7,7 @@ from .mm_signalgenerator import ExtMMSignalGenerator
 from .sma_15m_1d_signalgenerator import SMA_15m_1d_SignalGenerator
 from .vectorcandle_signalgenerator import VectorCandleSignalGenerator
 from .heikinashi_signalgenerator import HeikinAshiSignalGenerator
+from .remote_signalgenerator import RemoteSignalGenerator
+
+from .indicator_registry import IndicatorRegistry
+from .indicator_registry import shared_registry
\ No newline at end of file
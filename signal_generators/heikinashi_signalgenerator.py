@@ -1,10 +1,14 @@
 import logging
 import pandas as pd
-import time
 
 import ccxt
 
+from datafeeds import timeframe_to_ms
 from .signal_generator import ExtendedSignalGenerator
+from .incremental import IncrementalHeikinAshi
+from .incremental import rows_to_df
+
+logger = logging.getLogger(__name__)
 
 class HeikinAshiSignalGenerator(ExtendedSignalGenerator):
     
@@ -15,7 +19,7 @@ class HeikinAshiSignalGenerator(ExtendedSignalGenerator):
     generates_tp = False     # generates a take profit price proposal with each signal
     
     # 
-    def __init__(self, binance_symbol: str, sl_buffer: float = 0.001):
+    def __init__(self, binance_symbol: str, sl_buffer: float = 0.001, incremental: bool = False):
         
         super().__init__()
         
@@ -33,6 +37,27 @@ class HeikinAshiSignalGenerator(ExtendedSignalGenerator):
                     }
                 }
         
+        # indicators computed by the shared indicator registry, the binance
+        # indicators are based on the Heikin-Ashi candles
+        ha_close = ('ha', {}, 'HA_close')
+        self.indicators = {
+                'default': {
+                    'HIGH_48': ('rolling_max', { 'column': 'high', 'length': 48 }),
+                    'LOW_48': ('rolling_min', { 'column': 'low', 'length': 48 }),
+                    },
+                'binance': {
+                    'HA_open': ('ha', {}, 'HA_open'),
+                    'HA_high': ('ha', {}, 'HA_high'),
+                    'HA_low': ('ha', {}, 'HA_low'),
+                    'HA_close': ha_close,
+                    'EMA_50': ('ema', { 'column': ha_close, 'length': 50 }),
+                    'EMA_200': ('ema', { 'column': ha_close, 'length': 200 }),
+                    'PVO_5_10_9': ('pvo', { 'fast': 5, 'slow': 10, 'signal': 9 }, 'PVO_5_10_9'),
+                    'PVOh_5_10_9': ('pvo', { 'fast': 5, 'slow': 10, 'signal': 9 }, 'PVOh_5_10_9'),
+                    'PVOs_5_10_9': ('pvo', { 'fast': 5, 'slow': 10, 'signal': 9 }, 'PVOs_5_10_9'),
+                    },
+                }
+        
         self._ema_fast_slow_delta: float = 0.03 / 100
         self._volume_treshold: float = 5.0
         self._ema_fast_close_delta: float = 0.06 / 100
@@ -41,14 +66,28 @@ class HeikinAshiSignalGenerator(ExtendedSignalGenerator):
         
         self._sl_buffer = sl_buffer
         
-    def heikinashi_signal(self):
+        # incremental: only the new binance bars are fetched and processed by
+        # the incremental pipeline, the vectorized heikinashi_signal is used otherwise
+        self._incremental: bool = incremental
+        self._pipeline: IncrementalHeikinAshi = None
+        
+    @property
+    def incremental(self) -> bool:
+        return self._incremental
+    
+    @incremental.setter
+    def incremental(self, value: bool):
+        self._incremental = value
+        self._pipeline = None
+        
+    def _fetch_binance_df(self, since: int = None) -> pd.DataFrame:
         
         # get data from binance
         exchange = ccxt.binance({
             'enableRateLimit': True,
         })
         
-        bars = exchange.fetch_ohlcv(self._binance_symbol, timeframe=self.timeframe, limit=self.num_bars)
+        bars = exchange.fetch_ohlcv(self._binance_symbol, timeframe=self.timeframe, since=since, limit=self.num_bars)
 
         df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
         
@@ -56,20 +95,21 @@ class HeikinAshiSignalGenerator(ExtendedSignalGenerator):
     
         # make sure to obtain only closed frames (15min * 60 * 1000)
         if self.only_closed:
-            df = df[df.timestamp < int(time.time() * 1000) - tf_to_mins[self.timeframe] * 60 * 1000]
+            df = df[df.timestamp < self.clock.ms() - tf_to_mins[self.timeframe] * 60 * 1000]
 
         df['datetime']= pd.to_datetime(df['timestamp'], unit='ms')
         df.set_index(pd.DatetimeIndex(df['datetime']), inplace=True)
+        
+        return df
+        
+    def heikinashi_signal(self):
+        
+        df = self._fetch_binance_df()
 
         # create Heikin-Ashi Candles
-        df.ta.ha(append=True)
-
         # Apply EMA 50 and 200 to HA_Close (Heikin-Ashi close value)
-        df.ta.ema(close=df["HA_close"], length=50, append=True)
-        df.ta.ema(close=df["HA_close"], length=200, append=True)
-
         # Percentage Volume Oscilator
-        df.ta.pvo(fast=5, slow=10, append=True)
+        self.apply_indicators('binance', df=df, source=('binance', self._binance_symbol, self.timeframe))
 
         # drop empty EMA, SMA ...    
         df.dropna(inplace=True)
@@ -103,20 +143,52 @@ class HeikinAshiSignalGenerator(ExtendedSignalGenerator):
         ] = 'sell'
 
         return df
+    
+    def _new_pipeline(self) -> IncrementalHeikinAshi:
+        return IncrementalHeikinAshi(self._ema_fast_slow_delta, self._volume_treshold, self._ema_fast_close_delta)
+    
+    # the heikin ashi dataframe updated with the bars closed since the last call,
+    # the pipeline is backfilled with num_bars bars on the first call
+    def heikinashi_signal_incremental(self):
+        log_prefix = f"({self.class_name()}.heikinashi_signal_incremental) symbol {self._binance_symbol}:"
+        
+        if self._pipeline is None or self.df_ha is None:
+            self._pipeline = self._new_pipeline()
+            since = None
+        else:
+            since = self._pipeline.last_timestamp + timeframe_to_ms(self.timeframe)
+            
+        df = self._fetch_binance_df(since=since)
+        df = df[df.timestamp > (self._pipeline.last_timestamp or 0)]
+        
+        rows = [ self._pipeline.update(r.timestamp, r.open, r.high, r.low, r.close, r.volume) for r in df.itertuples() ]
+        
+        if len(rows) == 0:
+            logger.debug('%s No new bars since %s', log_prefix, self._pipeline.last_timestamp)
+            return self.df_ha
+        
+        df_new = rows_to_df(rows).dropna(subset=self._pipeline.indicator_columns)
+        
+        if since is None or self.df_ha is None:
+            return df_new
+        
+        return pd.concat([ self.df_ha, df_new ]).iloc[-self.num_bars:]
 
     def prepare_df(self):
 
-        self.df_ha = self.heikinashi_signal()
+        if self._incremental:
+            self.df_ha = self.heikinashi_signal_incremental()
+        else:
+            self.df_ha = self.heikinashi_signal()
         
         if self.df is not None:
             # logging.warn(f'({self.class_name()}.prepare_df) No default dataframe available - exit function')
             # my dataframe from the exchange to obtain open, high, low, close and tp values ...
-            self.df['HIGH_48'] = self.df.high.rolling(48).max()
-            self.df['LOW_48'] = self.df.low.rolling(48).min()
+            self.apply_indicators('default')
             self.df.dropna(inplace=True)
             
         if self.df_ha is None:
-            logging.warn(f'({self.class_name()}.prepare_df) No df_ha dataframe available')
+            logger.warning('(%s.prepare_df) No df_ha dataframe available', self.class_name())
    
    
     def signal(self, ask: float = None, bid: float = None):
@@ -124,11 +196,11 @@ class HeikinAshiSignalGenerator(ExtendedSignalGenerator):
         signal = {}
         
         if self.df is None:
-            logging.warn(f'({self.class_name()}.signal) No default dataframe available - exit function')
+            logger.warning('(%s.signal) No default dataframe available - exit function', self.class_name())
             return signal
         
         if self.df_ha is None:
-            logging.warn(f'({self.class_name()}.signal) No default df_ha dataframe available - exit function')
+            logger.warning('(%s.signal) No default df_ha dataframe available - exit function', self.class_name())
             return signal
         
         # the vector df from binance
@@ -139,7 +211,7 @@ class HeikinAshiSignalGenerator(ExtendedSignalGenerator):
         recent_swing_high = self.df['HIGH_48'].iloc[-1]
         recent_swing_low = self.df['LOW_48'].iloc[-1]
                
-        logging.info(f'({self.class_name()}.signal) Last Binance data frame: {last_ha_datetime} Last data frame: {last_ha_datetime}')
+        logger.info('(%s.signal) Last Binance data frame: %s Last data frame: %s', self.class_name(), last_ha_datetime, last_ha_datetime)
         
         if self.verbose:
             print(f"==== {self.class_name()}.signal VERBOSE ====")
@@ -155,17 +227,17 @@ class HeikinAshiSignalGenerator(ExtendedSignalGenerator):
         if last_ha_signal == 'sell':
             sl_sell_price = recent_swing_high * (1 + self._sl_buffer)
             signal['sell'] = {  'sl': sl_sell_price }
-            logging.info(f'({self.class_name()}.signal) HeikinAshi signal (sell) detected at binance at: {last_ha_datetime}')
-            logging.info(f'({self.class_name()}.signal) HeikinAshi signal (sell) sl {sl_sell_price}')
+            logger.info('(%s.signal) HeikinAshi signal (sell) detected at binance at: %s', self.class_name(), last_ha_datetime)
+            logger.info('(%s.signal) HeikinAshi signal (sell) sl %s', self.class_name(), sl_sell_price)
         
         elif last_ha_signal == 'buy':
             sl_buy_price = recent_swing_low * (1 - self._sl_buffer)
             signal['buy'] = { 'sl': sl_buy_price }
-            logging.info(f'({self.class_name()}.signal) HeikinAshi signal (buy) detected at binance at: {last_ha_datetime}')
-            logging.info(f'({self.class_name()}.signal) HeikinAshi signal (buy) sl {sl_buy_price}')
+            logger.info('(%s.signal) HeikinAshi signal (buy) detected at binance at: %s', self.class_name(), last_ha_datetime)
+            logger.info('(%s.signal) HeikinAshi signal (buy) sl %s', self.class_name(), sl_buy_price)
             
         else:
-            logging.info(f'({self.class_name()}.signal) No Heikin Ashi signal detected at binance at: {last_ha_datetime}')
+            logger.info('(%s.signal) No Heikin Ashi signal detected at binance at: %s', self.class_name(), last_ha_datetime)
          
         return signal
     
@@ -0,0 +1,242 @@
+import math
+import pandas as pd
+from collections import deque
+
+from base import BaseClass
+from . import indicators
+
+# Incremental versions of the indicator pipelines of the Heikin-Ashi and the
+# vector candle generators. They carry the state of the recursions (Heikin-Ashi
+# open/close, ewm of the EMAs, rma of the RSI) and of the rolling windows forward,
+# so each new bar costs constant time. Fed with the same bars from the start they
+# give the same values as the vectorized functions in indicators, but they keep
+# the history of all bars seen since the backfill instead of a fixed window.
+
+# the rows returned by the pipelines as dataframe like the vectorized versions
+def rows_to_df(rows: list) -> pd.DataFrame:
+
+    df = pd.DataFrame.from_records(rows)
+    df['datetime'] = pd.to_datetime(df['timestamp'], unit='ms')
+    df.set_index(pd.DatetimeIndex(df['datetime']), inplace=True)
+
+    return df
+
+class IncrementalEWM(BaseClass):
+
+    # pandas ewm mean, one value at a time
+    def __init__(self, com: float, adjust: bool, min_periods: int = 0):
+
+        self._com = com
+        self._adjust = adjust
+        self._min_periods = min_periods
+        self._state = None
+
+    def update(self, value: float) -> float:
+
+        out, self._state = indicators.ewm_mean([value], self._com, self._adjust, self._min_periods, self._state)
+        return float(out[0])
+
+class IncrementalEMA(BaseClass):
+
+    # pandas_ta ema: the first length values are collected for the sma seed
+    def __init__(self, length: int):
+
+        self._length = length
+        self._head = []
+        self._ewm = IncrementalEWM(indicators.span_to_com(length), adjust=False)
+
+    def update(self, value: float) -> float:
+
+        if self._head is None:
+            return self._ewm.update(value)
+
+        self._head.append(value)
+        if len(self._head) < self._length:
+            return math.nan
+
+        values = indicators.ema(self._head, self._length)
+        for v in values:
+            self._ewm.update(v)
+        self._head = None
+
+        return float(values[-1])
+
+class IncrementalRSI(BaseClass):
+
+    def __init__(self, length: int = 14, scalar: float = 100):
+
+        self._scalar = scalar
+        self._prev_close = None
+        com = indicators.alpha_to_com(1.0 / length)
+        self._positive = IncrementalEWM(com, adjust=True, min_periods=length)
+        self._negative = IncrementalEWM(com, adjust=True, min_periods=length)
+
+    def update(self, close: float) -> float:
+
+        change = math.nan if self._prev_close is None else close - self._prev_close
+        self._prev_close = close
+
+        positive_avg = self._positive.update(max(change, 0) if change == change else change)
+        negative_avg = self._negative.update(min(change, 0) if change == change else change)
+
+        denominator = positive_avg + abs(negative_avg)
+        if denominator == 0:
+            return math.nan
+
+        return self._scalar * positive_avg / denominator
+
+class IncrementalHeikinAshi(BaseClass):
+
+    # Heikin-Ashi candles, EMAs on HA_close, PVO and the signal of the
+    # HeikinAshiSignalGenerator for one bar after the other
+    def __init__(self, ema_fast_slow_delta: float, volume_treshold: float, ema_fast_close_delta: float,
+                 ema_fast: int = 50, ema_slow: int = 200, pvo_fast: int = 5, pvo_slow: int = 10, pvo_signal: int = 9):
+
+        self._ema_fast_slow_delta = ema_fast_slow_delta
+        self._volume_treshold = volume_treshold
+        self._ema_fast_close_delta = ema_fast_close_delta
+
+        self._ema_fast_col = f'EMA_{ema_fast}'
+        self._ema_slow_col = f'EMA_{ema_slow}'
+        self._pvo_cols = [ f'PVO_{pvo_fast}_{pvo_slow}_{pvo_signal}', f'PVOh_{pvo_fast}_{pvo_slow}_{pvo_signal}',
+                           f'PVOs_{pvo_fast}_{pvo_slow}_{pvo_signal}' ]
+
+        self._ha_open = None
+        self._ha_close = None
+        self._ema_fast = IncrementalEMA(ema_fast)
+        self._ema_slow = IncrementalEMA(ema_slow)
+        self._pvo_fast = IncrementalEMA(pvo_fast)
+        self._pvo_slow = IncrementalEMA(pvo_slow)
+        self._pvo_signal = IncrementalEMA(pvo_signal)
+
+        self.last_timestamp: int = None
+
+    # columns computed before the signal, rows with NaNs are dropped like in the vectorized version
+    @property
+    def indicator_columns(self) -> list:
+        return [ 'HA_open', 'HA_high', 'HA_low', 'HA_close', self._ema_fast_col, self._ema_slow_col ] + self._pvo_cols
+
+    def update(self, timestamp: int, open_: float, high: float, low: float, close: float, volume: float) -> dict:
+
+        ha_close = 0.25 * (open_ + high + low + close)
+        ha_open = 0.5 * (open_ + close) if self._ha_open is None else 0.5 * (self._ha_open + self._ha_close)
+        self._ha_open, self._ha_close = ha_open, ha_close
+
+        ema_fast = self._ema_fast.update(ha_close)
+        ema_slow = self._ema_slow.update(ha_close)
+
+        fast = self._pvo_fast.update(volume)
+        slow = self._pvo_slow.update(volume)
+        pvo = 100.0 * (fast - slow) / slow if slow == slow and slow != 0 else math.nan
+        pvo_signal = self._pvo_signal.update(pvo)
+
+        row = { 'timestamp': timestamp, 'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume,
+                'HA_open': ha_open, 'HA_high': max(ha_open, high, ha_close), 'HA_low': min(ha_open, low, ha_close),
+                'HA_close': ha_close, self._ema_fast_col: ema_fast, self._ema_slow_col: ema_slow,
+                self._pvo_cols[0]: pvo, self._pvo_cols[1]: pvo - pvo_signal, self._pvo_cols[2]: pvo_signal }
+
+        row['EMA_delta_perc'] = abs((ema_fast - ema_slow) / ema_slow) if ema_slow == ema_slow else math.nan
+        row['EMA_fast_trsh'] = ema_fast * self._ema_fast_close_delta
+        row['signal'] = self._signal(row)
+
+        self.last_timestamp = timestamp
+        return row
+
+    def _signal(self, r: dict):
+
+        ema_fast = r[self._ema_fast_col]
+        ema_slow = r[self._ema_slow_col]
+        trsh = r['EMA_fast_trsh']
+        pvo = r[self._pvo_cols[0]]
+
+        if ema_fast > ema_slow and r['EMA_delta_perc'] > self._ema_fast_slow_delta and \
+           r['HA_close'] > r['HA_open'] and r['HA_low'] == r['HA_open'] and \
+           r['HA_open'] >= (ema_fast - trsh) and r['HA_open'] < (ema_fast + trsh) and \
+           pvo >= self._volume_treshold:
+            return 'buy'
+
+        if ema_fast < ema_slow and r['EMA_delta_perc'] > self._ema_fast_slow_delta and \
+           r['HA_close'] < r['HA_open'] and r['HA_high'] == r['HA_open'] and \
+           r['HA_open'] > (ema_fast - trsh) and r['HA_open'] <= (ema_fast + trsh) and \
+           pvo >= self._volume_treshold:
+            return 'sell'
+
+        return None
+
+class IncrementalVectorCandles(BaseClass):
+
+    # vector candle colours and the signal of the VectorCandleSignalGenerator
+    # for one bar after the other
+    def __init__(self, buy_rsi: float, sell_rsi: float, min_change: float,
+                 volume_length: int = 10, spread_length: int = 10, rsi_length: int = 13):
+
+        self._buy_rsi = buy_rsi
+        self._sell_rsi = sell_rsi
+        self._min_change = min_change
+
+        self._rsi_col = f'RSI_{rsi_length}'
+        self._volumes = deque(maxlen=volume_length)
+        self._spreads = deque(maxlen=spread_length)
+        self._rsi = IncrementalRSI(rsi_length)
+
+        self.last_timestamp: int = None
+
+    @property
+    def indicator_columns(self) -> list:
+        return [ 'averageVolume', self._rsi_col, 'volumeSpread', 'highestVolumeSpread', 'changePercent' ]
+
+    def update(self, timestamp: int, open_: float, high: float, low: float, close: float, volume: float) -> dict:
+
+        self._volumes.append(volume)
+        average_volume = sum(self._volumes) / len(self._volumes) if len(self._volumes) == self._volumes.maxlen else math.nan
+
+        # highest spread of the previous bars
+        highest_spread = max(self._spreads) if len(self._spreads) == self._spreads.maxlen else math.nan
+        volume_spread = volume * (high - low)
+        self._spreads.append(volume_spread)
+
+        row = { 'timestamp': timestamp, 'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume,
+                'averageVolume': average_volume, self._rsi_col: self._rsi.update(close),
+                'volumeSpread': volume_spread, 'highestVolumeSpread': highest_spread,
+                'changePercent': (close - open_) / open_ }
+
+        row['VectColor'] = self._color(row)
+        row['signal'] = self._signal(row)
+
+        self.last_timestamp = timestamp
+        return row
+
+    # the order of the checks is important, like in the vectorized version
+    def _color(self, r: dict):
+
+        color = None
+        volume = r['volume']
+        average = r['averageVolume']
+        spread_high = r['volumeSpread'] > r['highestVolumeSpread']
+
+        if r['close'] > r['open']:
+            if volume >= 1.5 * average:
+                color = 'BLUE'
+            if volume >= 2 * average or spread_high:
+                color = 'GREEN'
+
+        if r['close'] < r['open']:
+            if volume >= 1.5 * average:
+                color = 'VIOLET'
+            if volume >= 2 * average or spread_high:
+                color = 'RED'
+
+        return color
+
+    def _signal(self, r: dict):
+
+        rsi = r[self._rsi_col]
+        change = abs(r['changePercent']) >= self._min_change
+
+        if r['VectColor'] == 'RED' and change and rsi < self._buy_rsi:
+            return 'buy'
+
+        if r['VectColor'] == 'GREEN' and change and rsi > self._sell_rsi:
+            return 'sell'
+
+        return None
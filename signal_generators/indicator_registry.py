@@ -0,0 +1,220 @@
+import logging
+import threading
+import time
+import pandas as pd
+
+from base import BaseClass
+from . import indicators
+
+logger = logging.getLogger(__name__)
+
+# indicator functions take the candle dataframe of a feed and the resolved
+# parameters and return either an array or a dict of named arrays
+# (e.g. the Heikin-Ashi candles). Input columns are given by the 'column'
+# parameter, which is either a column of the dataframe or the spec of another
+# indicator: (name, params) or (name, params, output) for dict outputs
+
+def _input(df, column, default):
+    return df[default] if column is None else column
+
+def _sma(df, column=None, length=20):
+    return _input(df, column, 'close').rolling(length).mean().values
+
+def _rolling_max(df, column=None, length=48):
+    return _input(df, column, 'high').rolling(length).max().values
+
+def _rolling_min(df, column=None, length=48):
+    return _input(df, column, 'low').rolling(length).min().values
+
+def _ema(df, column=None, length=10):
+    return indicators.ema(_input(df, column, 'close'), length=length)
+
+def _rsi(df, column=None, length=14):
+    return indicators.rsi(_input(df, column, 'close'), length=length)
+
+def _atr(df, length=14):
+    return indicators.atr(df['high'], df['low'], df['close'], length=length)
+
+def _natr(df, length=14):
+    return indicators.natr(df['high'], df['low'], df['close'], length=length)
+
+def _pvo(df, column=None, fast=12, slow=26, signal=9):
+    return indicators.pvo(_input(df, column, 'volume'), fast=fast, slow=slow, signal=signal)
+
+def _ha(df):
+    return indicators.ha(df['open'], df['high'], df['low'], df['close'])
+
+# indicators which are not ported are taken from pandas_ta by prefixing
+# their name with ta. e.g. ('ta.macd', { 'fast': 12 }), they are called with
+# the input column (close by default) and have to return a Series or DataFrame
+def _pandas_ta(name: str):
+
+    def func(df, column=None, **kwargs):
+        value = indicators.pandas_ta_indicator(name, _input(df, column, 'close'), **kwargs)
+        if isinstance(value, pd.DataFrame):
+            return { c: value[c].values.copy() for c in value.columns }
+        return value.values.copy()
+
+    return func
+
+INDICATORS = {
+    'sma': _sma,
+    'rolling_max': _rolling_max,
+    'rolling_min': _rolling_min,
+    'ema': _ema,
+    'rsi': _rsi,
+    'atr': _atr,
+    'natr': _natr,
+    'pvo': _pvo,
+    'ha': _ha,
+}
+
+class IndicatorRegistry(BaseClass):
+
+    # computes each (feed window, indicator, params) only once, so generators and
+    # bots working on the same feed share the computed series:
+    #  - a feed window is identified by its source (exchange, symbol, timeframe),
+    #    its first and last candle and its length, so it changes with each new bar
+    #  - indicators can use other indicators as input, the nodes of this graph
+    #    are computed once and cached as well
+    #  - the arrays handed out are read-only
+    #  - results for older windows are dropped as soon as a window with a newer
+    #    last candle of the same indicator is computed, indicators nobody asked
+    #    for during max_idle seconds are evicted
+
+    def __init__(self, max_idle: float = 900):
+
+        self._functions: dict = dict(INDICATORS)
+        self._max_idle: float = max_idle
+        self._next_eviction: float = 0
+
+        # (source, indicator, params) -> { window: { 'value', 'last_used' } }
+        self._cache: dict = {}
+        self._lock = threading.RLock()
+
+        self._hits: int = 0
+        self._misses: int = 0
+
+    @property
+    def max_idle(self) -> float:
+        return self._max_idle
+
+    @max_idle.setter
+    def max_idle(self, value: float):
+        self._max_idle = value
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def __len__(self) -> int:
+        return sum(len(windows) for windows in self._cache.values())
+
+    def register(self, name: str, func):
+        self._functions[name] = func
+
+    # hashable key of an indicator spec
+    def _key(self, name: str, params: dict) -> tuple:
+        return (name, tuple(sorted((k, self._key(v[0], v[1]) + tuple(v[2:]) if isinstance(v, tuple) else v) for k, v in params.items())))
+
+    @staticmethod
+    def window(source, df: pd.DataFrame) -> tuple:
+        if len(df) == 0:
+            return (source, None, None, 0)
+        return (source, int(df['timestamp'].iloc[0]), int(df['timestamp'].iloc[-1]), len(df))
+
+    # returns the read-only array (or dict of arrays) of an indicator for a feed
+    # window, without a source the result is computed but not shared
+    def compute(self, source, df: pd.DataFrame, name: str, params: dict = None, window: tuple = None):
+        params = params or {}
+
+        if name not in self._functions and name.startswith('ta.'):
+            self._functions[name] = _pandas_ta(name[3:])
+
+        if name not in self._functions:
+            raise ValueError(f'({self.class_name()}.compute) indicator {name}: Unknown indicator {name}, registered: {list(self._functions)}')
+
+        if source is None:
+            return self._evaluate(None, df, name, params, None)
+
+        if window is None:
+            window = self.window(source, df)
+
+        with self._lock:
+            now = time.time()
+            key = (source, self._key(name, params))
+            windows = self._cache.setdefault(key, {})
+            entry = windows.get(window)
+
+            if entry is not None:
+                self._hits += 1
+            else:
+                self._misses += 1
+                entry = { 'value': self._evaluate(source, df, name, params, window) }
+
+                # windows of the same length ending earlier are outdated
+                for w in [ w for w in windows if w[3] == window[3] and (w[2] or 0) < (window[2] or 0) ]:
+                    del windows[w]
+
+                windows[window] = entry
+
+            entry['last_used'] = now
+
+            if now >= self._next_eviction:
+                self.evict(now)
+
+            return entry['value']
+
+    def _evaluate(self, source, df: pd.DataFrame, name: str, params: dict, window: tuple):
+
+        kwargs = {}
+        for k, v in params.items():
+            if k == 'column':
+                if isinstance(v, tuple):
+                    # another indicator as input
+                    value = self.compute(source, df, v[0], v[1], window)
+                    value = value[v[2]] if len(v) > 2 else value
+                    kwargs[k] = pd.Series(value, index=df.index)
+                else:
+                    kwargs[k] = df[v]
+            else:
+                kwargs[k] = v
+
+        value = self._functions[name](df, **kwargs)
+
+        if isinstance(value, dict):
+            for v in value.values():
+                v.flags.writeable = False
+        else:
+            value.flags.writeable = False
+
+        return value
+
+    # drop all cached indicators not requested since max_idle seconds
+    def evict(self, now: float = None):
+        log_prefix = f"({self.class_name()}.evict)"
+
+        now = now or time.time()
+
+        with self._lock:
+            idle = [ (key, w) for key, windows in self._cache.items() for w, entry in windows.items() if now - entry['last_used'] > self._max_idle ]
+            for key, w in idle:
+                del self._cache[key][w]
+                if len(self._cache[key]) == 0:
+                    del self._cache[key]
+
+            self._next_eviction = now + self._max_idle
+
+        if len(idle) > 0:
+            logger.debug('%s Evicted %s indicators, %s cached', log_prefix, len(idle), len(self))
+
+    def clear(self):
+        with self._lock:
+            self._cache = {}
+
+# the registry shared by all generators in the process
+shared_registry = IndicatorRegistry()
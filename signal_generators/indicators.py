@@ -0,0 +1,222 @@
+import sys
+import numpy as np
+
+# NumPy implementations of the pandas_ta (0.3.14b) indicators used by the
+# signal generators. They follow the pandas_ta calculations step by step,
+# including the pandas ewm recursion, so the results are bit-compatible:
+#  - ema: SMA of the first length values as seed, ewm(span=length, adjust=False)
+#  - rsi: rma (ewm(alpha=1/length, min_periods=length)) of gains and losses
+#  - atr: rma of the true range, natr: 100 / close * ema of the true range
+#  - pvo: ema(fast) and ema(slow) of the volume and an ema(signal) of the pvo
+#  - ha: Heikin-Ashi candles
+# The functions take and return float64 arrays. pandas_ta itself is only
+# imported by pandas_ta_indicator for indicators which are not ported.
+
+def _as_array(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64)
+
+# mean of the first length values ignoring NaNs like pandas Series.mean
+def _head_mean(values: np.ndarray, length: int) -> float:
+
+    head = values[:length].copy()
+    mask = np.isnan(head)
+    head[mask] = 0.0
+    count = len(head) - mask.sum()
+
+    return head.sum() / count if count > 0 else np.nan
+
+# the exponential weighted mean of pandas (Series.ewm(com=...).mean()) without
+# ignore_na, the state (weighted, old_wt, nobs) allows to continue the recursion
+# with new values. Returns the output array and the state
+def ewm_mean(values, com: float, adjust: bool, min_periods: int = 0, state: tuple = None) -> tuple:
+
+    # pandas replaces inf with NaN before the ewm
+    vals = _as_array(values)
+    vals = np.where(np.isinf(vals), np.nan, vals).tolist()
+    out = [np.nan] * len(vals)
+
+    minp = max(int(min_periods), 1)
+    alpha = 1. / (1. + com)
+    old_wt_factor = 1. - alpha
+    new_wt = 1. if adjust else alpha
+
+    start = 0
+    if state is None:
+        if len(vals) == 0:
+            return np.array(out, dtype=np.float64), None
+        weighted = vals[0]
+        nobs = int(weighted == weighted)
+        old_wt = 1.
+        out[0] = weighted if nobs >= minp else np.nan
+        start = 1
+    else:
+        [ weighted, old_wt, nobs ] = state
+
+    for i in range(start, len(vals)):
+        cur = vals[i]
+        is_observation = cur == cur
+        nobs += is_observation
+
+        if weighted == weighted:
+            old_wt *= old_wt_factor
+            if is_observation:
+                # avoid numerical errors on constant series
+                if weighted != cur:
+                    weighted = old_wt * weighted + new_wt * cur
+                    weighted /= (old_wt + new_wt)
+                if adjust:
+                    old_wt += new_wt
+                else:
+                    old_wt = 1.
+        elif is_observation:
+            weighted = cur
+
+        out[i] = weighted if nobs >= minp else np.nan
+
+    return np.array(out, dtype=np.float64), (weighted, old_wt, nobs)
+
+def span_to_com(span: float) -> float:
+    return (span - 1) / 2
+
+def alpha_to_com(alpha: float) -> float:
+    return (1 - alpha) / alpha
+
+# pandas_ta ema with the sma seed
+def ema(close, length: int = 10) -> np.ndarray:
+
+    close = _as_array(close).copy()
+
+    if len(close) < length:
+        return np.full(len(close), np.nan)
+
+    sma_nth = _head_mean(close, length)
+    close[:length - 1] = np.nan
+    close[length - 1] = sma_nth
+
+    return ewm_mean(close, span_to_com(length), adjust=False)[0]
+
+# pandas_ta rma (wilder's moving average)
+def rma(close, length: int = 10) -> np.ndarray:
+
+    alpha = (1.0 / length) if length > 0 else 0.5
+    return ewm_mean(close, alpha_to_com(alpha), adjust=True, min_periods=length)[0]
+
+# gains and losses of the rsi
+def _gains_losses(close: np.ndarray, drift: int = 1) -> tuple:
+
+    negative = np.full(len(close), np.nan)
+    negative[drift:] = close[drift:] - close[:-drift]
+    positive = negative.copy()
+    positive[positive < 0] = 0
+    negative[negative > 0] = 0
+
+    return positive, negative
+
+def rsi(close, length: int = 14, scalar: float = 100) -> np.ndarray:
+
+    close = _as_array(close)
+
+    if len(close) < length:
+        return np.full(len(close), np.nan)
+
+    positive, negative = _gains_losses(close)
+    positive_avg = rma(positive, length=length)
+    negative_avg = rma(negative, length=length)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return scalar * positive_avg / (positive_avg + np.abs(negative_avg))
+
+def true_range(high, low, close, drift: int = 1) -> np.ndarray:
+
+    high = _as_array(high)
+    low = _as_array(low)
+    close = _as_array(close)
+
+    # non zero range
+    high_low_range = high - low
+    if (high_low_range == 0).any():
+        high_low_range = high_low_range + sys.float_info.epsilon
+
+    prev_close = np.full(len(close), np.nan)
+    prev_close[drift:] = close[:-drift]
+
+    # the maximum skipping NaNs
+    tr = np.fmax(np.fmax(np.abs(high_low_range), np.abs(high - prev_close)), np.abs(prev_close - low))
+    tr[:drift] = np.nan
+
+    return tr
+
+def atr(high, low, close, length: int = 14, mamode: str = 'rma') -> np.ndarray:
+
+    if len(close) < length:
+        return np.full(len(close), np.nan)
+
+    tr = true_range(high, low, close)
+
+    if mamode == 'rma':
+        return rma(tr, length=length)
+    if mamode == 'ema':
+        return ema(tr, length=length)
+
+    raise ValueError(f'(indicators.atr) Unsupported mamode {mamode}, must be either rma or ema')
+
+def natr(high, low, close, length: int = 14, scalar: float = 100, mamode: str = 'ema') -> np.ndarray:
+
+    if len(close) < length:
+        return np.full(len(close), np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        natr = scalar / _as_array(close)
+        natr *= atr(high, low, close, length=length, mamode=mamode)
+
+    return natr
+
+# percentage volume oscillator - returns the pvo, histogram and signal by column name
+def pvo(volume, fast: int = 12, slow: int = 26, signal: int = 9, scalar: float = 100) -> dict:
+
+    if slow < fast:
+        fast, slow = slow, fast
+
+    volume = _as_array(volume)
+
+    fastma = ema(volume, length=fast)
+    slowma = ema(volume, length=slow)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pvo = scalar * (fastma - slowma)
+        pvo /= slowma
+
+    signalma = ema(pvo, length=signal)
+    histogram = pvo - signalma
+
+    return { f'PVO_{fast}_{slow}_{signal}': pvo,
+             f'PVOh_{fast}_{slow}_{signal}': histogram,
+             f'PVOs_{fast}_{slow}_{signal}': signalma }
+
+# Heikin-Ashi candles - returns HA_open, HA_high, HA_low and HA_close
+def ha(open_, high, low, close) -> dict:
+
+    open_ = _as_array(open_)
+    high = _as_array(high)
+    low = _as_array(low)
+    close = _as_array(close)
+
+    ha_close = 0.25 * (open_ + high + low + close)
+
+    # the open of each candle depends on the previous one
+    ha_open = []
+    if len(close) > 0:
+        ha_open.append(0.5 * (open_[0] + close[0]))
+        for prev_close in ha_close[:-1].tolist():
+            ha_open.append(0.5 * (ha_open[-1] + prev_close))
+    ha_open = np.array(ha_open, dtype=np.float64)
+
+    ha_high = np.maximum(np.maximum(ha_open, high), ha_close)
+    ha_low = np.minimum(np.minimum(ha_open, low), ha_close)
+
+    return { 'HA_open': ha_open, 'HA_high': ha_high, 'HA_low': ha_low, 'HA_close': ha_close }
+
+# any other pandas_ta indicator, pandas_ta is imported on first use
+def pandas_ta_indicator(name: str, *args, **kwargs):
+
+    import pandas_ta
+    return getattr(pandas_ta, name)(*args, **kwargs)
@@ -1,19 +1,21 @@
 import logging
-import pandas_ta as ta
 
+from . import indicators
 from .signal_generator import SignalGenerator
 from .signal_generator import ExtendedSignalGenerator
 
+logger = logging.getLogger(__name__)
+
 class SimpleMMSignalGenerator(SignalGenerator):
     
     def signal(self, price, df):
 
         trend = None
 
-        df.ta.ema(close=df["close"], length=13, append=True)
-        df.ta.rsi(length=9, append=True)
-        df.ta.atr(length=9, append=True)
-        df.ta.natr(length=9, append=True)
+        df['EMA_13'] = indicators.ema(df['close'], length=13)
+        df['RSI_9'] = indicators.rsi(df['close'], length=9)
+        df['ATRr_9'] = indicators.atr(df['high'], df['low'], df['close'], length=9)
+        df['NATR_9'] = indicators.natr(df['high'], df['low'], df['close'], length=9)
 
         # drop empty EMA, SMA, ATR, RSI ...    
         df.dropna(inplace=True)
@@ -31,10 +33,10 @@ class SimpleMMSignalGenerator(SignalGenerator):
             trend = 'buy'
 
         if (recent_natr < 0.3 and (recent_rsi > 40 and recent_rsi < 60) ):
-            logging.warning(f'({self.class_name()}.signal) natr very small {recent_natr:.2f}% trading in both directions')
+            logger.warning('(%s.signal) natr very small %.2f%% trading in both directions', self.class_name(), recent_natr)
             trend = 'both'
 
-        logging.info(f'({self.class_name()}.signal) ema_5_13 {recent_ema:.4f} rsi {recent_rsi:.4f} mid {price} atr {recent_atr:.4f} natr {recent_natr:.2f}% trend {trend}')
+        logger.info('(%s.signal) ema_5_13 %.4f rsi %.4f mid %s atr %.4f natr %.2f%% trend %s', self.class_name(), recent_ema, recent_rsi, price, recent_atr, recent_natr, trend)
 
         return trend
 
@@ -62,6 +64,20 @@ class ExtMMSignalGenerator(ExtendedSignalGenerator):
                     },
                 }
         
+        # indicators computed by the shared indicator registry
+        self.indicators = {
+                'default': {
+                    'EMA_13': ('ema', { 'length': 13 }),
+                    'RSI_9': ('rsi', { 'length': 9 }),
+                    'ATRr_9': ('atr', { 'length': 9 }),
+                    'NATR_9': ('natr', { 'length': 9 }),
+                    # 5m SMA 40 Periods
+                    'SMA_40': ('sma', { 'column': 'close', 'length': 40 }),
+                    'HIGH_48': ('rolling_max', { 'column': 'high', 'length': 48 }),
+                    'LOW_48': ('rolling_min', { 'column': 'low', 'length': 48 }),
+                    },
+                }
+        
         self.ask_spread = ask_spread
         self.bid_spread = bid_spread   
         self.sl_buffer = sl_buffer
@@ -71,16 +87,7 @@ class ExtMMSignalGenerator(ExtendedSignalGenerator):
         if self.df is not None:
             # logging.warn(f'({self.class_name()}.prepare_df) No default dataframe available - exit function')
             # return
-            self.df.ta.ema(close=self.df["close"], length=13, append=True)
-            self.df.ta.rsi(length=9, append=True)
-            self.df.ta.atr(length=9, append=True)
-            self.df.ta.natr(length=9, append=True)
-            
-            # 5m SMA 20 Periods
-            self.df['SMA_40'] = self.df.close.rolling(40).mean()
-            
-            self.df['HIGH_48'] = self.df.high.rolling(48).max()
-            self.df['LOW_48'] = self.df.low.rolling(48).min()
+            self.apply_indicators('default')
 
             # drop empty EMA, SMA, ATR, RSI ...    
             self.df.dropna(inplace=True)
@@ -91,7 +98,7 @@ class ExtMMSignalGenerator(ExtendedSignalGenerator):
         signal = {}
         
         if self.df is None:
-            logging.warn(f'({self.class_name()}.exit_signal) No default dataframe available - exit function')
+            logger.warning('(%s.exit_signal) No default dataframe available - exit function', self.class_name())
             return signal
         else:
             df = self.df
@@ -120,7 +127,7 @@ class ExtMMSignalGenerator(ExtendedSignalGenerator):
             signal['buy'] = { }
             trend = 'buy'
             
-        logging.info(f'({self.class_name()}.exit_signal) sma_5_40 {recent_sma:.4f} rsi {recent_rsi:.4f} mid {mid} trend {trend}')
+        logger.info('(%s.exit_signal) sma_5_40 %.4f rsi %.4f mid %s trend %s', self.class_name(), recent_sma, recent_rsi, mid, trend)
 
         return signal
             
@@ -130,7 +137,7 @@ class ExtMMSignalGenerator(ExtendedSignalGenerator):
         signal = {}
         
         if self.df is None:
-            logging.warn(f'({self.class_name()}.signal) No default dataframe available - exit function')
+            logger.warning('(%s.signal) No default dataframe available - exit function', self.class_name())
             return signal
         else:
             df = self.df
@@ -189,6 +196,6 @@ class ExtMMSignalGenerator(ExtendedSignalGenerator):
         #     signal['sell'] = { 'li': ask_limit, 'sl': sl_sell_price }
         #     trend = 'both'
 
-        logging.info(f'({self.class_name()}.signal) ema_5_13 {recent_ema:.4f} rsi {recent_rsi:.4f} mid {mid} atr {recent_atr:.4f} natr {recent_natr:.2f}% trend {trend}')
+        logger.info('(%s.signal) ema_5_13 %.4f rsi %.4f mid %s atr %.4f natr %.2f%% trend %s', self.class_name(), recent_ema, recent_rsi, mid, recent_atr, recent_natr, trend)
 
         return signal
\ No newline at end of file
@@ -0,0 +1,94 @@
+import logging
+import time
+
+from signalbus import SignalSubscriber
+from .signal_generator import ExtendedSignalGenerator
+
+logger = logging.getLogger(__name__)
+
+class RemoteSignalGenerator(ExtendedSignalGenerator):
+
+    # drop-in signal generator for the bots which returns the signals published
+    # by a SignalProducer on the signal bus instead of computing them. It has no
+    # feeds, so the bot does not load any candles for it. Signals older than
+    # max_age seconds (e.g. the producer died) are ignored
+
+    def __init__(self, subscriber, topic: str, max_age: float = 60, authkey: bytes = None):
+
+        super().__init__()
+
+        # a subscriber can be shared by the generators of a process
+        if not isinstance(subscriber, SignalSubscriber):
+            subscriber = SignalSubscriber(subscriber, topics=[topic], authkey=authkey)
+
+        self._subscriber: SignalSubscriber = subscriber.start()
+        self._topic: str = topic
+        self._max_age: float = max_age
+
+        self.feeds = {}
+
+    @property
+    def topic(self) -> str:
+        return self._topic
+
+    @property
+    def max_age(self) -> float:
+        return self._max_age
+
+    @max_age.setter
+    def max_age(self, value: float):
+        self._max_age = value
+
+    @property
+    def subscriber(self) -> SignalSubscriber:
+        return self._subscriber
+
+    # the latest message if it is not too old, the capabilities are taken over
+    # from the producing generator
+    def _message(self, name: str) -> dict:
+        log_prefix = f"({self.class_name()}.{name}) topic {self._topic}:"
+
+        message = self._subscriber.latest(self._topic)
+
+        if message is None:
+            logger.warning('%s WARN: No signal received yet', log_prefix)
+            return None
+
+        age = time.time() - message['published']
+        if age > self._max_age:
+            logger.warning('%s WARN: Last signal version %s is %.1f s old - ignored', log_prefix, message["version"], age)
+            return None
+
+        for capability, value in message.get('capabilities', {}).items():
+            setattr(self, capability, value)
+
+        return message
+
+    # the version of the signal is the watermark for the signal cache
+    def watermarks(self) -> tuple:
+
+        message = self._subscriber.latest(self._topic)
+        if message is None:
+            return (None, None, True)
+
+        return (message['epoch'], message['version'], time.time() - message['published'] > self._max_age)
+
+    def signal(self, ask: float = None, bid: float = None) -> dict:
+
+        message = self._message('signal')
+        if message is None:
+            return {}
+
+        if self.verbose:
+            print(f"==== {self.class_name()}.signal VERBOSE ====")
+            print(message)
+
+        return { dir: dict(values) for dir, values in message['signal'].items() }
+
+    def exit_signal(self, ask: float = None, bid: float = None) -> dict:
+
+        message = self._message('exit_signal')
+        if message is None:
+            return {}
+
+        return { dir: dict(values) for dir, values in message['exit_signal'].items() }
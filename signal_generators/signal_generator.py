@@ -1,4 +1,8 @@
 from base import BaseClass
+from base import Clock
+from base import system_clock
+from .indicator_registry import IndicatorRegistry
+from .indicator_registry import shared_registry
 
 import pandas as pd
 
@@ -42,6 +46,23 @@ class ExtendedSignalGenerator(SignalGenerator):
         
         self.verbose = False
         
+        # the time of the closed bars, the bot sets the clock of its exchange adapter
+        self.clock: Clock = system_clock
+        
+        # indicators by feed: { feed: { column: (indicator, params[, output]) } }
+        # they are computed by the (shared) indicator registry in apply_indicators
+        self.indicators = {}
+        self.indicator_registry: IndicatorRegistry = shared_registry
+        
+        # opt-in memoization of signal and exit_signal, see enable_signal_cache
+        self._signal_cache_enabled: bool = False
+        self._quote_threshold: float = 0.0
+        self._signal_cache: dict = {}
+        
+        # hits and misses of the cache, the dict is shared with the snapshots
+        # of a feed worker (see FeedWorker.snapshot_of) to count all of them
+        self._cache_stats: dict = { 'hits': 0, 'misses': 0 }
+        
     @property
     def timeframe(self) -> str:
         return self.feeds['default']['timeframe']
@@ -82,9 +103,98 @@ class ExtendedSignalGenerator(SignalGenerator):
     def df(self, value: pd.DataFrame):
         self.feeds['default']['df'] = value
         
+    @property
+    def cache_hits(self) -> int:
+        return self._cache_stats['hits']
+
+    @property
+    def cache_misses(self) -> int:
+        return self._cache_stats['misses']
+
+    @property
+    def quote_threshold(self) -> float:
+        return self._quote_threshold
+
+    @quote_threshold.setter
+    def quote_threshold(self, value: float):
+        self._quote_threshold = value
+        
     def prepare_df(self):
         # function to prepare the dataframes after loading
         pass
+
+    # add the declared indicators of a feed as columns to its dataframe, df and 
+    # source can be given for dataframes which are not a feed of the generator
+    def apply_indicators(self, feed: str = 'default', df: pd.DataFrame = None, source: tuple = None) -> pd.DataFrame:
+
+        if df is None:
+            df = self.feeds[feed]['df']
+
+        if df is None:
+            return None
+
+        if source is None and feed in self.feeds:
+            source = self.feeds[feed].get('source')
+
+        window = self.indicator_registry.window(source, df) if source is not None else None
+
+        for column, spec in self.indicators.get(feed, {}).items():
+            value = self.indicator_registry.compute(source, df, spec[0], spec[1], window)
+            df[column] = value[spec[2]] if len(spec) > 2 else value
+
+        return df
+
+    # the indicators only change with a new bar, so the signals are cached by the 
+    # last closed bar (watermark) of every feed. Ask and bid only invalidate a cached 
+    # signal if one of them moved more than quote_threshold (relative) since then
+    def enable_signal_cache(self, quote_threshold: float = 0.0):
+        self._signal_cache_enabled = True
+        self._quote_threshold = quote_threshold
+        self._signal_cache = {}
+
+    def disable_signal_cache(self):
+        self._signal_cache_enabled = False
+        self._signal_cache = {}
+
+    def reset_cache_stats(self):
+        self._cache_stats['hits'] = 0
+        self._cache_stats['misses'] = 0
+
+    # watermarks of all feeds, set by the bot when a feed is loaded
+    def watermarks(self) -> tuple:
+        return tuple(self.feeds[feed].get('watermark') for feed in self.feeds)
+
+    def _cached(self, name: str, func, ask: float, bid: float) -> dict:
+
+        if not self._signal_cache_enabled:
+            return func(ask, bid)
+
+        key = self.watermarks()
+        entry = self._signal_cache.get(name)
+
+        if entry is not None and entry['key'] == key and \
+            self._quote_unchanged(entry['ask'], ask) and self._quote_unchanged(entry['bid'], bid):
+            self._cache_stats['hits'] += 1
+        else:
+            self._cache_stats['misses'] += 1
+            entry = { 'key': key, 'ask': ask, 'bid': bid, 'signal': func(ask, bid) }
+            self._signal_cache[name] = entry
+
+        # callers get their own copy of the signal dict
+        return { dir: dict(values) for dir, values in entry['signal'].items() }
+
+    def _quote_unchanged(self, cached: float, quote: float) -> bool:
+
+        if cached is None or quote is None:
+            return cached == quote
+
+        return abs(quote - cached) <= abs(cached) * self._quote_threshold
+
+    def cached_signal(self, ask: float = None, bid: float = None) -> dict:
+        return self._cached('signal', self.signal, ask, bid)
+
+    def cached_exit_signal(self, ask: float = None, bid: float = None) -> dict:
+        return self._cached('exit_signal', self.exit_signal, ask, bid)
         
     def exit_signal(self, ask: float = None, bid: float = None) -> dict:
         
@@ -3,6 +3,8 @@ import pandas as pd
 
 from .signal_generator import ExtendedSignalGenerator
 
+logger = logging.getLogger(__name__)
+
 class SMA_15m_1d_SignalGenerator(ExtendedSignalGenerator):
     
     # capabilities
@@ -16,7 +18,8 @@ class SMA_15m_1d_SignalGenerator(ExtendedSignalGenerator):
         
         super().__init__()
         
-        # this indicator requires two datafeeds
+        # this indicator requires two datafeeds, the daily candles are
+        # resampled from the 15m candles instead of downloading them again
         self.feeds = { 
                 'default': {
                     'timeframe': '15m',
@@ -30,10 +33,23 @@ class SMA_15m_1d_SignalGenerator(ExtendedSignalGenerator):
                     'num_bars': 50, 
                     'only_closed': True,
                     'refresh_timeout': 300,
+                    'resample_from': 'default',
                     'df': None
                     },
                 }
                 
+        # indicators computed by the shared indicator registry
+        self.indicators = {
+                'default': {
+                    # 15m SMA 20 Periods
+                    'sma20_15m': ('sma', { 'column': 'close', 'length': 20 }),
+                    },
+                'daily': {
+                    # Daily SMA 20 Days
+                    'sma20_d': ('sma', { 'column': 'close', 'length': 20 }),
+                    },
+                }
+                
         self.sma20_15_delta = sma20_15_delta
         
     @property
@@ -49,7 +65,7 @@ class SMA_15m_1d_SignalGenerator(ExtendedSignalGenerator):
         
         if self.df is not None:
             # 15m SMA 20 Periods
-            self.df['sma20_15m'] = self.df.close.rolling(20).mean()
+            self.apply_indicators('default')
             # maybe later?
             # df['HIGH_48'] = df.high.rolling(48).max()
             # df['LOW_48'] = df.low.rolling(48).min()
@@ -59,7 +75,7 @@ class SMA_15m_1d_SignalGenerator(ExtendedSignalGenerator):
         
         if self.df_daily is not None:
             # Daily SMA 20 Days
-            self.df_daily['sma20_d'] = self.df_daily.close.rolling(20).mean()
+            self.apply_indicators('daily')
             self.df_daily.dropna(inplace=True)
             # logging.warn(f'({self.class_name()}.prepare_df) No daily dataframe available - exit function')
             # return
@@ -74,11 +90,11 @@ class SMA_15m_1d_SignalGenerator(ExtendedSignalGenerator):
         signal = {}
         
         if self.df is None:
-            logging.warn(f'({self.class_name()}.signal) No default dataframe available - exit function')
+            logger.warning('(%s.signal) No default dataframe available - exit function', self.class_name())
             return signal
             
         if self.df_daily is None:
-            logging.warn(f'({self.class_name()}.signal) No daily dataframe available - exit function')
+            logger.warning('(%s.signal) No daily dataframe available - exit function', self.class_name())
             return signal
         
         mid = float((ask + bid)/2)
@@ -101,12 +117,12 @@ class SMA_15m_1d_SignalGenerator(ExtendedSignalGenerator):
             ask_limit = last_sma20_15m * (1 - self.sma20_15_delta )
             if ask_limit > ask:
                 signal['sell'] = { 'li': ask_limit }
-                logging.info(f'({self.class_name()}.signal) SELL last_sma20_d {last_sma20_d:.4f} last_sma20_15m {last_sma20_15m:.4f} ask_limit {ask_limit:.4f}')     
+                logger.info('(%s.signal) SELL last_sma20_d %.4f last_sma20_15m %.4f ask_limit %.4f', self.class_name(), last_sma20_d, last_sma20_15m, ask_limit)     
         else:
             # buy
             bid_limit = last_sma20_15m * (1 + self.sma20_15_delta )
             if bid_limit < bid:
                 signal['buy'] = { 'li': bid_limit }
-                logging.info(f'({self.class_name()}.signal) BUY last_sma20_d {last_sma20_d:.4f} last_sma20_15m {last_sma20_15m:.4f} bid_limit {bid_limit:.4f}')
+                logger.info('(%s.signal) BUY last_sma20_d %.4f last_sma20_15m %.4f bid_limit %.4f', self.class_name(), last_sma20_d, last_sma20_15m, bid_limit)
                  
         return signal
\ No newline at end of file
@@ -1,10 +1,14 @@
 import logging
 import pandas as pd
-import time
 
 import ccxt
 
+from datafeeds import timeframe_to_ms
 from .signal_generator import ExtendedSignalGenerator
+from .incremental import IncrementalVectorCandles
+from .incremental import rows_to_df
+
+logger = logging.getLogger(__name__)
 
 class VectorCandleSignalGenerator(ExtendedSignalGenerator):
     
@@ -15,7 +19,7 @@ class VectorCandleSignalGenerator(ExtendedSignalGenerator):
     generates_tp = True     # generates a take profit price proposal with each signal
     
     # 
-    def __init__(self, binance_symbol: str):
+    def __init__(self, binance_symbol: str, incremental: bool = False):
         
         super().__init__()
         
@@ -35,21 +39,42 @@ class VectorCandleSignalGenerator(ExtendedSignalGenerator):
                 
         self.df_vector: pd.DataFrame = None
         
+        # indicators computed by the shared indicator registry
+        self.indicators = {
+                'binance': {
+                    'averageVolume': ('sma', { 'column': 'volume', 'length': 10 }),
+                    'RSI_13': ('rsi', { 'length': 13 }),
+                    },
+                }
+        
         # timeframe to obtain from binance ... should be consistent with
         # the actual exchange         
         self._buy_rsi: float = 30
         self._sell_rsi: float = 70
         self._min_change: float = 0.4/100 # change must be at least 0.4%  
+        
+        # incremental: only the new binance bars are fetched and processed by
+        # the incremental pipeline, the vectorized vector_candles is used otherwise
+        self._incremental: bool = incremental
+        self._pipeline: IncrementalVectorCandles = None
 
+    @property
+    def incremental(self) -> bool:
+        return self._incremental
     
-    def vector_candles(self):
+    @incremental.setter
+    def incremental(self, value: bool):
+        self._incremental = value
+        self._pipeline = None
+    
+    def _fetch_binance_df(self, since: int = None) -> pd.DataFrame:
         
         # get data from binance
         exchange = ccxt.binance({
             'enableRateLimit': True,
         })
         
-        bars = exchange.fetch_ohlcv(self._binance_symbol, timeframe=self.timeframe, limit=self.num_bars)
+        bars = exchange.fetch_ohlcv(self._binance_symbol, timeframe=self.timeframe, since=since, limit=self.num_bars)
 
         df = pd.DataFrame(bars, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
         
@@ -57,20 +82,24 @@ class VectorCandleSignalGenerator(ExtendedSignalGenerator):
     
         # make sure to obtain only closed frames (15min * 60 * 1000)
         if self.only_closed:
-            df = df[df.timestamp < int(time.time() * 1000) - tf_to_mins[self.timeframe] * 60 * 1000]
+            df = df[df.timestamp < self.clock.ms() - tf_to_mins[self.timeframe] * 60 * 1000]
 
         df['datetime']= pd.to_datetime(df['timestamp'], unit='ms')
         df.set_index(pd.DatetimeIndex(df['datetime']), inplace=True)
+        
+        return df
+    
+    def vector_candles(self):
+        
+        df = self._fetch_binance_df()
 
-        # Average Volume Last 10 Bars
-        df['averageVolume'] = df.volume.rolling(10).mean()
+        # Average Volume Last 10 Bars and RSI 13
+        self.apply_indicators('binance', df=df, source=('binance', self._binance_symbol, self.timeframe))
+        
         df['volumeSpread'] = df['volume'] * (df['high'] - df['low'])
         df['highestVolumeSpread'] = df.volumeSpread.rolling(10).max().shift().bfill()
         df['changePercent'] = (df['close'] - df['open'])/df['open']
         # df['signal'] = 'none'
-        
-        # RSI 13
-        df.ta.rsi(length=13, append=True)
 
         df.dropna(inplace=True)
 
@@ -135,10 +164,43 @@ class VectorCandleSignalGenerator(ExtendedSignalGenerator):
         ] = 'sell'
         
         return df
+    
+    def _new_pipeline(self) -> IncrementalVectorCandles:
+        return IncrementalVectorCandles(self._buy_rsi, self._sell_rsi, self._min_change)
+    
+    # the vector candle dataframe updated with the bars closed since the last call,
+    # the pipeline is backfilled with num_bars bars on the first call
+    def vector_candles_incremental(self):
+        log_prefix = f"({self.class_name()}.vector_candles_incremental) symbol {self._binance_symbol}:"
+        
+        if self._pipeline is None or self.df_vector is None:
+            self._pipeline = self._new_pipeline()
+            since = None
+        else:
+            since = self._pipeline.last_timestamp + timeframe_to_ms(self.timeframe)
+            
+        df = self._fetch_binance_df(since=since)
+        df = df[df.timestamp > (self._pipeline.last_timestamp or 0)]
+        
+        rows = [ self._pipeline.update(r.timestamp, r.open, r.high, r.low, r.close, r.volume) for r in df.itertuples() ]
+        
+        if len(rows) == 0:
+            logger.debug('%s No new bars since %s', log_prefix, self._pipeline.last_timestamp)
+            return self.df_vector
+        
+        df_new = rows_to_df(rows).dropna(subset=self._pipeline.indicator_columns)
+        
+        if since is None or self.df_vector is None:
+            return df_new
+        
+        return pd.concat([ self.df_vector, df_new ]).iloc[-self.num_bars:]
 
     def prepare_df(self):
 
-        self.df_vector = self.vector_candles()
+        if self._incremental:
+            self.df_vector = self.vector_candles_incremental()
+        else:
+            self.df_vector = self.vector_candles()
         
         # if self.df is None:
         #    logging.warn(f'({self.class_name()}.prepare_df) No default dataframe available - exit function')
@@ -146,7 +208,7 @@ class VectorCandleSignalGenerator(ExtendedSignalGenerator):
             pass
         
         if self.df_vector is None:
-            logging.warn(f'({self.class_name()}.prepare_df) No df_vector dataframe available')
+            logger.warning('(%s.prepare_df) No df_vector dataframe available', self.class_name())
 
             
     def signal(self, ask: float = None, bid: float = None):
@@ -154,11 +216,11 @@ class VectorCandleSignalGenerator(ExtendedSignalGenerator):
         signal = {}
         
         if self.df is None:
-            logging.warn(f'({self.class_name()}.signal) No default dataframe available - exit function')
+            logger.warning('(%s.signal) No default dataframe available - exit function', self.class_name())
             return signal
         
         if self.df_vector is None:
-            logging.warn(f'({self.class_name()}.signal) No df_vector dataframe available - exit function')
+            logger.warning('(%s.signal) No df_vector dataframe available - exit function', self.class_name())
             return signal
         
         # the vector df from binance
@@ -170,7 +232,7 @@ class VectorCandleSignalGenerator(ExtendedSignalGenerator):
         last_open = self.df['open'].loc[ last_vector_datetime ]
         last_close = self.df['close'].loc[ last_vector_datetime ]
         
-        logging.info(f'({self.class_name()}.signal) Last Binance data frame: {last_vector_datetime} Last data frame: {last_df_datetime}')
+        logger.info('(%s.signal) Last Binance data frame: %s Last data frame: %s', self.class_name(), last_vector_datetime, last_df_datetime)
         
         if self.verbose:
             print(f"==== {self.class_name()}.signal VERBOSE ====")
@@ -189,20 +251,20 @@ class VectorCandleSignalGenerator(ExtendedSignalGenerator):
             tp = last_close - (last_close - last_open)/2
             
             signal['sell'] = { 'li': ask_limit, 'tp': tp }
-            logging.info(f'({self.class_name()}.signal) GREEN Vector candle (sell) detected at binance at: {last_vector_datetime}')
-            logging.info(f'({self.class_name()}.signal) GREEN Vector candle (sell) ask_limit {ask_limit} tp {tp}')
+            logger.info('(%s.signal) GREEN Vector candle (sell) detected at binance at: %s', self.class_name(), last_vector_datetime)
+            logger.info('(%s.signal) GREEN Vector candle (sell) ask_limit %s tp %s', self.class_name(), ask_limit, tp)
         
         elif last_vector_signal == 'buy':
             bid_limit = last_close
             tp = last_close + (last_open - last_close)/2
             
             signal['buy'] = { 'li': bid_limit, 'tp': tp }
-            logging.info(f'({self.class_name()}.signal) RED Vector candle (buy) detected at binance at: {last_vector_datetime}')
-            logging.info(f'({self.class_name()}.signal) RED Vector candle (buy) bid_limit {bid_limit} tp {tp}')
+            logger.info('(%s.signal) RED Vector candle (buy) detected at binance at: %s', self.class_name(), last_vector_datetime)
+            logger.info('(%s.signal) RED Vector candle (buy) bid_limit %s tp %s', self.class_name(), bid_limit, tp)
 
         else:
-            logging.info(f'({self.class_name()}.signal) No vector candle detected at binance at: {last_vector_datetime}')
-            logging.info(f'({self.class_name()}.signal) Ignoring last data frame: {last_df_datetime} open {last_open} close {last_close}')
+            logger.info('(%s.signal) No vector candle detected at binance at: %s', self.class_name(), last_vector_datetime)
+            logger.info('(%s.signal) Ignoring last data frame: %s open %s close %s', self.class_name(), last_df_datetime, last_open, last_close)
           
         return signal
     
@@ -0,0 +1,4 @@
+from .publisher import SignalPublisher
+from .subscriber import SignalSubscriber
+from .producer import SignalProducer
+from .producer import signal_topic
\ No newline at end of file
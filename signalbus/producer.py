@@ -0,0 +1,131 @@
+import logging
+import time
+
+from base import BaseClass
+from datafeeds import FeedLoader
+from datafeeds import FeedScheduler
+from .publisher import SignalPublisher
+
+logger = logging.getLogger(__name__)
+
+# the topic of a generator run for a symbol on an exchange
+def signal_topic(exchange_id: str, symbol: str, name: str) -> str:
+    return f'{exchange_id}:{symbol}:{name}'
+
+class SignalProducer(BaseClass):
+
+    # runs signal generators once for many bots: loads their feeds, computes
+    # signal and exit_signal and publishes them. Unchanged signals are published
+    # again after heartbeat seconds, so subscribers can detect a dead producer
+
+    def __init__(self, publisher: SignalPublisher, interval: float = 1.0, heartbeat: float = 10.0):
+
+        self._publisher: SignalPublisher = publisher
+        self._interval: float = interval
+        self._heartbeat: float = heartbeat
+
+        self._generators: dict = {}
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    @interval.setter
+    def interval(self, value: float):
+        self._interval = value
+
+    @property
+    def heartbeat(self) -> float:
+        return self._heartbeat
+
+    @heartbeat.setter
+    def heartbeat(self, value: float):
+        self._heartbeat = value
+
+    @property
+    def topics(self) -> list:
+        return list(self._generators)
+
+    # add a generator and return its topic (name defaults to the generator class)
+    def add(self, exchange_adapter, symbol: str, signal_generator, name: str = None,
+            feed_scheduler: FeedScheduler = None) -> str:
+
+        topic = signal_topic(exchange_adapter.id, symbol, name or signal_generator.class_name())
+
+        self._generators[topic] = {
+            'ea': exchange_adapter,
+            'symbol': symbol,
+            'sg': signal_generator,
+            'loader': FeedLoader(exchange_adapter, symbol, signal_generator, feed_scheduler),
+            'published': 0,
+            'message': None
+        }
+
+        return topic
+
+    # top of book of all symbols, one ask_bids call per exchange adapter
+    def _top_of_books(self) -> dict:
+        log_prefix = f"({self.class_name()}._top_of_books)"
+
+        symbols = {}
+        for g in self._generators.values():
+            symbols.setdefault(id(g['ea']), (g['ea'], []))[1].append(g['symbol'])
+
+        tops = {}
+        for key, (ea, ea_symbols) in symbols.items():
+            try:
+                tops[key] = ea.ask_bids(list(dict.fromkeys(ea_symbols)))
+            except Exception as e:
+                logger.warning('%s WARN: Could not fetch the top of book of %s: %s', log_prefix, ea_symbols, e)
+
+        return tops
+
+    def run_once(self):
+
+        tops = self._top_of_books()
+
+        for topic, g in self._generators.items():
+            log_prefix = f"({self.class_name()}.run_once) topic {topic}:"
+
+            try:
+                g['loader'].load_data_feeds()
+
+                top = tops.get(id(g['ea']), {}).get(g['symbol'])
+                ask, bid = top if top is not None else g['ea'].ask_bid(g['symbol'])
+                sg = g['sg']
+                message = (sg.cached_signal(ask, bid), sg.cached_exit_signal(ask, bid))
+
+            except Exception as e:
+                logger.exception('%s WARN: Could not compute the signals', log_prefix)
+                continue
+
+            now = time.time()
+            if message == g['message'] and now < g['published'] + self._heartbeat:
+                continue
+
+            version = self._publisher.publish(topic, message[0], message[1], ask=ask, bid=bid,
+                                              capabilities={ 'generates_signal': sg.generates_signal,
+                                                             'generates_limit': sg.generates_limit,
+                                                             'generates_sl': sg.generates_sl,
+                                                             'generates_tp': sg.generates_tp },
+                                              watermarks=sg.watermarks())
+
+            if message != g['message']:
+                logger.info('%s Published version %s: %s exit %s', log_prefix, version, message[0], message[1])
+
+            g['message'] = message
+            g['published'] = now
+
+    def run(self):
+        log_prefix = f"({self.class_name()}.run)"
+
+        logger.info('%s Producing signals for %s', log_prefix, self.topics)
+
+        try:
+            while True:
+                self.run_once()
+                time.sleep(self._interval)
+
+        except KeyboardInterrupt:
+            logger.info('%s Shutdown the producer ....', log_prefix)
+            self._publisher.close()
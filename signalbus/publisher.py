@@ -0,0 +1,204 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing.connection import Listener
+
+from base import BaseClass
+
+logger = logging.getLogger(__name__)
+
+class _Subscription(BaseClass):
+
+    # one connected subscriber with its own sender thread, so a slow consumer
+    # never blocks the publisher. Pending messages are conflated by topic:
+    # a newer message replaces a pending older one of the same topic, signals
+    # are state and only the latest version matters
+    def __init__(self, conn, topics: set, max_pending: int):
+
+        self._conn = conn
+        self._topics = topics
+        self._max_pending = max_pending
+        self._pending = OrderedDict()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self.sent: int = 0
+        self.conflated: int = 0
+        self.dropped: int = 0
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def wants(self, topic: str) -> bool:
+        return self._topics is None or topic in self._topics
+
+    def offer(self, message: dict):
+
+        with self._cond:
+            topic = message['topic']
+            if topic in self._pending:
+                del self._pending[topic]
+                self.conflated += 1
+            elif len(self._pending) >= self._max_pending:
+                self._pending.popitem(last=False)
+                self.dropped += 1
+
+            self._pending[topic] = message
+            self._cond.notify()
+
+    def _run(self):
+        log_prefix = f"({self.class_name()}._run)"
+
+        while not self._closed:
+            with self._cond:
+                while len(self._pending) == 0 and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    break
+                _, message = self._pending.popitem(last=False)
+
+            try:
+                self._conn.send(message)
+                self.sent += 1
+            except Exception as e:
+                logger.warning('%s WARN: Subscriber disconnected (%s) - dropping it', log_prefix, e)
+                self.close()
+
+    def close(self):
+
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+        try:
+            self._conn.close()
+        except Exception:
+            pass
+
+class SignalPublisher(BaseClass):
+
+    # publishes versioned signal messages to the subscribers connected to a
+    # local (Unix socket) address. Message structure:
+    # {
+    #     'topic': 'phemex:ETH/USD:USD:5m',
+    #     'version': 12,               # increases with each changed signal
+    #     'epoch': 1674000000.0,       # start of the publisher, versions restart with it
+    #     'published': 1674000000.123, # time.time() of the publisher
+    #     'signal': { 'buy': { 'li': 234.56, 'sl': 123.45, 'tp': 345.67 } },
+    #     'exit_signal': {},
+    #     ... additional fields like ask, bid and the generator capabilities
+    # }
+    # New subscribers get the latest message of their topics right away.
+
+    def __init__(self, address: str, authkey: bytes = None, max_pending: int = 100, family: str = 'AF_UNIX'):
+
+        self._address = address
+        self._authkey = authkey
+        self._max_pending: int = max_pending
+        self._family: str = family
+
+        self._listener: Listener = None
+        self._subscriptions: list = []
+        self._latest: dict = {}
+        self._lock = threading.Lock()
+
+        self._epoch: float = time.time()
+        self._published: int = 0
+
+    @property
+    def address(self):
+        return self._listener.address if self._listener is not None else self._address
+
+    @property
+    def published(self) -> int:
+        return self._published
+
+    @property
+    def subscribers(self) -> int:
+        return len([ s for s in self._subscriptions if not s.closed ])
+
+    def start(self):
+        log_prefix = f"({self.class_name()}.start)"
+
+        self._listener = Listener(self._address, family=self._family, authkey=self._authkey)
+        threading.Thread(target=self._accept, daemon=True).start()
+        logger.info('%s Publishing signals on %s', log_prefix, self.address)
+
+    def _accept(self):
+        log_prefix = f"({self.class_name()}._accept)"
+
+        while self._listener is not None:
+            try:
+                conn = self._listener.accept()
+
+                # the subscriber sends its topics (None for all) first
+                if not conn.poll(5):
+                    raise TimeoutError('no subscription received')
+                topics = conn.recv().get('subscribe')
+
+            except Exception as e:
+                if self._listener is None:
+                    break
+                logger.warning('%s WARN: Could not accept subscriber: %s', log_prefix, e)
+                continue
+
+            subscription = _Subscription(conn, None if topics is None else set(topics), self._max_pending)
+
+            with self._lock:
+                self._subscriptions = [ s for s in self._subscriptions if not s.closed ] + [ subscription ]
+                for topic, message in self._latest.items():
+                    if subscription.wants(topic):
+                        subscription.offer(message)
+
+            logger.info('%s New subscriber for topics %s, %s connected', log_prefix, topics, self.subscribers)
+
+    # publish the signals of a topic, the version is only increased if the signals
+    # changed - unchanged signals are sent again as heartbeat with a new timestamp
+    def publish(self, topic: str, signal: dict, exit_signal: dict = None, **fields) -> int:
+
+        exit_signal = exit_signal or {}
+
+        with self._lock:
+            last = self._latest.get(topic)
+            version = 1 if last is None else last['version']
+
+            if last is not None and (last['signal'] != signal or last['exit_signal'] != exit_signal):
+                version += 1
+
+            message = dict(fields)
+            message.update({ 'topic': topic, 'version': version, 'epoch': self._epoch, 'published': time.time(),
+                             'signal': signal, 'exit_signal': exit_signal })
+            self._latest[topic] = message
+
+            for subscription in self._subscriptions:
+                if not subscription.closed and subscription.wants(topic):
+                    subscription.offer(message)
+
+            self._published += 1
+
+        return version
+
+    # delivery statistics per subscriber
+    def stats(self) -> list:
+        return [ { 'sent': s.sent, 'pending': s.pending, 'conflated': s.conflated, 'dropped': s.dropped, 'closed': s.closed }
+                 for s in self._subscriptions ]
+
+    def close(self):
+
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.close()
+
+        with self._lock:
+            for subscription in self._subscriptions:
+                subscription.close()
+            self._subscriptions = []
@@ -0,0 +1,139 @@
+import logging
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import Client
+
+import numpy as np
+
+from base import BaseClass
+
+logger = logging.getLogger(__name__)
+
+class SignalSubscriber(BaseClass):
+
+    # receives the signal messages of a SignalPublisher in a background thread
+    # and keeps the latest message per topic. Reconnects after reconnect_delay
+    # seconds if the publisher goes away. The publish to consume latency of the
+    # last latency_window messages is kept for latency_stats
+
+    def __init__(self, address: str, topics: list = None, authkey: bytes = None,
+                 reconnect_delay: float = 1.0, latency_window: int = 1000, family: str = 'AF_UNIX'):
+
+        self._address = address
+        self._topics: list = topics
+        self._authkey = authkey
+        self._reconnect_delay: float = reconnect_delay
+        self._family: str = family
+
+        self._latest: dict = {}
+        self._lock = threading.Lock()
+        self._updated = threading.Condition(self._lock)
+        self._latencies = deque(maxlen=latency_window)
+        self._conn = None
+        self._closed: bool = False
+        self._thread: threading.Thread = None
+
+        self._received: int = 0
+        self._reconnects: int = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._conn is not None
+
+    @property
+    def received(self) -> int:
+        return self._received
+
+    @property
+    def reconnects(self) -> int:
+        return self._reconnects
+
+    def start(self):
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+        return self
+
+    def _run(self):
+        log_prefix = f"({self.class_name()}._run) address {self._address}:"
+
+        while not self._closed:
+            try:
+                self._conn = Client(self._address, family=self._family, authkey=self._authkey)
+                self._conn.send({ 'subscribe': self._topics })
+                logger.info('%s Subscribed to topics %s', log_prefix, self._topics)
+
+                while not self._closed:
+                    if self._conn.poll(0.5):
+                        self._received_message(self._conn.recv())
+
+            except Exception as e:
+                if self._closed:
+                    break
+                logger.warning('%s WARN: Connection to the publisher lost (%s) - reconnect in %s s', log_prefix, e, self._reconnect_delay)
+                self._reconnects += 1
+
+            self._disconnect()
+            time.sleep(self._reconnect_delay)
+
+    def _received_message(self, message: dict):
+
+        latency = time.time() - message['published']
+
+        with self._lock:
+            last = self._latest.get(message['topic'])
+
+            # ignore messages older than the current one (after a reconnect),
+            # a restarted publisher starts with a new epoch
+            if last is None or (message['epoch'], message['version']) >= (last['epoch'], last['version']):
+                self._latest[message['topic']] = message
+
+            self._latencies.append(latency)
+            self._received += 1
+            self._updated.notify_all()
+
+    def _disconnect(self):
+
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    # the latest message of a topic or None
+    def latest(self, topic: str) -> dict:
+
+        with self._lock:
+            return self._latest.get(topic)
+
+    # wait until a message of the topic with at least version arrives
+    def wait_for(self, topic: str, version: int = 1, timeout: float = None) -> dict:
+
+        with self._updated:
+            self._updated.wait_for(lambda: topic in self._latest and self._latest[topic]['version'] >= version, timeout)
+            return self._latest.get(topic)
+
+    # publish to consume latency in seconds
+    def latency_stats(self) -> dict:
+
+        with self._lock:
+            latencies = np.array(self._latencies)
+
+        if len(latencies) == 0:
+            return { 'count': 0 }
+
+        return { 'count': len(latencies),
+                 'last': latencies[-1],
+                 'mean': latencies.mean(),
+                 'p50': np.percentile(latencies, 50),
+                 'p99': np.percentile(latencies, 99),
+                 'max': latencies.max() }
+
+    def close(self):
+
+        self._closed = True
+        self._disconnect()
@@ -0,0 +1,15 @@
+from .local_book import LocalOrderBook
+from .protocols import StreamProtocol
+from .protocols import PhemexProtocol
+from .protocols import BitgetProtocol
+from .protocols import PROTOCOLS
+from .protocols import BOOK
+from .protocols import ORDERS
+from .protocols import POSITIONS
+from .protocols import CONTROL
+from .protocols import CHANNELS
+from .recorder import StreamRecorder
+from .recorder import load_recording
+from .stream_client import StreamClient
+from .replay_server import ReplayServer
+from .recorder import open_recording
\ No newline at end of file
@@ -0,0 +1,160 @@
+import zlib
+
+from base import BaseClass
+
+class LocalOrderBook(BaseClass):
+
+    # in-memory order book of a symbol, built from a snapshot and the deltas of
+    # a websocket stream. A delta which does not fit the book invalidates it
+    # until the next snapshot:
+    #  - seq not following prev_seq (or seq + 1 for contiguous streams)
+    #  - checksum (bitget crc32 of the top 25 levels) not matching
+    #  - crossed book (best bid >= best ask), catches missed deltas of any stream
+    # Levels are kept as price -> (amount, raw price, raw amount), the raw strings
+    # are needed for the checksum
+
+    def __init__(self, symbol: str):
+
+        self._symbol: str = symbol
+        self._bids: dict = {}
+        self._asks: dict = {}
+
+        self._seq: int = None
+        self._timestamp: int = None
+        self._valid: bool = False
+
+        self._updates: int = 0
+        self._gaps: int = 0
+        self._last_error: str = None
+
+    @property
+    def symbol(self) -> str:
+        return self._symbol
+
+    @property
+    def valid(self) -> bool:
+        return self._valid
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    @property
+    def timestamp(self) -> int:
+        return self._timestamp
+
+    @property
+    def updates(self) -> int:
+        return self._updates
+
+    @property
+    def gaps(self) -> int:
+        return self._gaps
+
+    @property
+    def last_error(self) -> str:
+        return self._last_error
+
+    @staticmethod
+    def _set_levels(side: dict, levels: list):
+
+        for level in levels:
+            price, amount = float(level[0]), float(level[1])
+            if amount == 0:
+                side.pop(price, None)
+            else:
+                side[price] = (amount, str(level[0]), str(level[1]))
+
+    def reset(self, bids: list, asks: list, seq: int = None, timestamp: int = None):
+
+        self._bids = {}
+        self._asks = {}
+        self._set_levels(self._bids, bids)
+        self._set_levels(self._asks, asks)
+
+        self._seq = seq
+        self._timestamp = timestamp
+        self._valid = True
+        self._updates += 1
+
+    def invalidate(self, reason: str):
+
+        if self._valid:
+            self._gaps += 1
+        self._valid = False
+        self._last_error = reason
+
+    # apply a delta - returns False if the book is (or became) invalid
+    def apply(self, bids: list, asks: list, seq: int = None, prev_seq: int = None,
+              timestamp: int = None, checksum: int = None, contiguous: bool = False) -> bool:
+
+        if not self._valid:
+            return False
+
+        if seq is not None and self._seq is not None:
+
+            # duplicate or late message, e.g. after a resubscribe
+            if seq <= self._seq:
+                return True
+
+            if prev_seq is not None and prev_seq != self._seq:
+                self.invalidate(f'Sequence gap: previous {prev_seq} expected {self._seq}')
+                return False
+
+            if prev_seq is None and contiguous and seq != self._seq + 1:
+                self.invalidate(f'Sequence gap: {seq} expected {self._seq + 1}')
+                return False
+
+        self._set_levels(self._bids, bids)
+        self._set_levels(self._asks, asks)
+
+        self._seq = seq if seq is not None else self._seq
+        self._timestamp = timestamp if timestamp is not None else self._timestamp
+        self._updates += 1
+
+        if checksum is not None and checksum != self.checksum():
+            self.invalidate(f'Checksum mismatch: {checksum} expected {self.checksum()}')
+            return False
+
+        top = self.top()
+        if top is not None and top[1] >= top[0]:
+            self.invalidate(f'Crossed book: bid {top[1]} ask {top[0]}')
+            return False
+
+        return True
+
+    # best ask and bid or None if a side is empty
+    def top(self) -> tuple:
+
+        if len(self._asks) == 0 or len(self._bids) == 0:
+            return None
+
+        return min(self._asks), max(self._bids)
+
+    # the best levels of a side as [ price, amount ] like ccxt
+    def levels(self, side: str, limit: int = None) -> list:
+
+        book = self._bids if side == 'bids' else self._asks
+        prices = sorted(book, reverse=(side == 'bids'))[:limit]
+
+        return [ [ p, book[p][0] ] for p in prices ]
+
+    def order_book(self, limit: int = None) -> dict:
+        return { 'symbol': self._symbol, 'bids': self.levels('bids', limit), 'asks': self.levels('asks', limit),
+                 'timestamp': self._timestamp, 'nonce': self._seq }
+
+    # bitget checksum: signed crc32 of bid:amount:ask:amount... of the top levels
+    def checksum(self, depth: int = 25) -> int:
+
+        bids = sorted(self._bids, reverse=True)[:depth]
+        asks = sorted(self._asks)[:depth]
+
+        values = []
+        for i in range(depth):
+            if i < len(bids):
+                values += [ self._bids[bids[i]][1], self._bids[bids[i]][2] ]
+            if i < len(asks):
+                values += [ self._asks[asks[i]][1], self._asks[asks[i]][2] ]
+
+        crc = zlib.crc32(':'.join(values).encode())
+        return crc - (1 << 32) if crc >= (1 << 31) else crc
@@ -0,0 +1,402 @@
+import base64
+import hashlib
+import hmac
+import time
+
+from base import BaseClass
+
+# The websocket protocols of the exchanges: subscription messages and the
+# parsing of the stream into normalized events (dicts with a channel key):
+#  - book:      symbol, snapshot, bids, asks, seq, prev_seq, checksum, timestamp
+#  - orders:    symbol (None for all), snapshot, orders (ccxt order structure)
+#  - positions: symbol (None for all), snapshot, positions (ccxt position structure)
+#  - control:   event (login, subscribe, pong, error), ok, message
+# The server side (replies to requests, topic of a message) is used by the
+# ReplayServer to play recorded streams.
+
+BOOK = 'book'
+ORDERS = 'orders'
+POSITIONS = 'positions'
+CONTROL = 'control'
+
+CHANNELS = [ BOOK, ORDERS, POSITIONS ]
+
+class StreamProtocol(BaseClass):
+
+    url: str = None
+
+    # sequence numbers of the book increase by one per message
+    contiguous: bool = False
+
+    def __init__(self, markets: dict):
+
+        self._markets: dict = markets
+        self._symbols_by_id: dict = {}
+        for symbol, market in markets.items():
+            self._symbols_by_id[market['id']] = symbol
+            self._symbols_by_id[self.market_id(symbol)] = symbol
+
+        self._request_id: int = 0
+
+    def _next_id(self) -> int:
+        self._request_id += 1
+        return self._request_id
+
+    # id of the market in the stream
+    def market_id(self, symbol: str) -> str:
+        return self._markets[symbol]['id']
+
+    def symbol_of(self, market_id: str) -> str:
+        return self._symbols_by_id.get(market_id)
+
+    def login(self, credentials: dict) -> dict:
+        return None
+
+    def subscribe(self, symbol: str, channel: str) -> list:
+        return []
+
+    def unsubscribe(self, symbol: str, channel: str) -> list:
+        return []
+
+    def ping(self):
+        return None
+
+    def parse(self, message) -> list:
+        return []
+
+    # --- server side ---
+
+    def replies(self, request) -> list:
+        return []
+
+    # (channel, market id, snapshot) of a stream message, None for control messages
+    def topic(self, message) -> tuple:
+        return None
+
+    # (channel, market id) of the topics a request subscribes
+    def subscribed(self, request) -> list:
+        return []
+
+class PhemexProtocol(StreamProtocol):
+
+    # contract api: orderbook.subscribe for the book (prices scaled by
+    # priceScale), aop.subscribe for orders and positions of the account
+
+    url = 'wss://phemex.com/ws'
+
+    ORDER_STATUS = { 'Created': 'open', 'New': 'open', 'PartiallyFilled': 'open', 'Untriggered': 'open',
+                     'Triggered': 'closed', 'Filled': 'closed', 'Canceled': 'canceled', 'Rejected': 'rejected',
+                     'Deactivated': 'canceled' }
+
+    ORDER_TYPES = { 'Limit': 'limit', 'Market': 'market' }
+
+    def _scale(self, symbol: str) -> float:
+        return 10 ** (self._markets[symbol].get('priceScale') or 4)
+
+    def _price(self, symbol: str, price_ep) -> float:
+        return None if price_ep is None else float(price_ep) / self._scale(symbol)
+
+    def login(self, credentials: dict) -> dict:
+
+        expiry = int(time.time()) + 120
+        signature = hmac.new(credentials['secret'].encode(), (credentials['apiKey'] + str(expiry)).encode(), hashlib.sha256).hexdigest()
+
+        return { 'id': self._next_id(), 'method': 'user.auth', 'params': [ 'API', credentials['apiKey'], signature, expiry ] }
+
+    def subscribe(self, symbol: str, channel: str) -> list:
+
+        if channel == BOOK:
+            return [ { 'id': self._next_id(), 'method': 'orderbook.subscribe', 'params': [ self.market_id(symbol) ] } ]
+
+        # orders and positions come with the same account subscription
+        if channel == ORDERS:
+            return [ { 'id': self._next_id(), 'method': 'aop.subscribe', 'params': [] } ]
+
+        return []
+
+    def unsubscribe(self, symbol: str, channel: str) -> list:
+
+        if channel == BOOK:
+            return [ { 'id': self._next_id(), 'method': 'orderbook.unsubscribe', 'params': [ self.market_id(symbol) ] } ]
+
+        return []
+
+    def ping(self):
+        return { 'id': self._next_id(), 'method': 'server.ping', 'params': [] }
+
+    def parse(self, message) -> list:
+
+        if not isinstance(message, dict):
+            return []
+
+        if 'book' in message:
+
+            symbol = self.symbol_of(message['symbol'])
+            if symbol is None:
+                return []
+
+            scale = self._scale(symbol)
+            book = message['book']
+
+            return [ { 'channel': BOOK, 'symbol': symbol,
+                       'snapshot': message.get('type') == 'snapshot',
+                       'bids': [ [ p / scale, q ] for p, q in book.get('bids', []) ],
+                       'asks': [ [ p / scale, q ] for p, q in book.get('asks', []) ],
+                       'seq': message.get('sequence'), 'prev_seq': None, 'checksum': None,
+                       'timestamp': int(message['timestamp'] / 1000000) if message.get('timestamp') else None } ]
+
+        if 'orders' in message or 'positions' in message:
+
+            snapshot = message.get('type') == 'snapshot'
+            events = []
+
+            if 'orders' in message:
+                orders = [ self._order(o) for o in message['orders'] if self.symbol_of(o.get('symbol')) is not None ]
+                events.append({ 'channel': ORDERS, 'symbol': None, 'snapshot': snapshot, 'orders': orders })
+
+            if 'positions' in message:
+                positions = [ self._position(p) for p in message['positions'] if self.symbol_of(p.get('symbol')) is not None ]
+                events.append({ 'channel': POSITIONS, 'symbol': None, 'snapshot': snapshot, 'positions': positions })
+
+            return events
+
+        if 'id' in message and ('result' in message or 'error' in message):
+
+            error = message.get('error')
+            result = message.get('result')
+
+            return [ { 'channel': CONTROL, 'event': 'pong' if result == 'pong' else 'reply', 'ok': error is None,
+                       'message': error if error is not None else result } ]
+
+        return []
+
+    def _order(self, o: dict) -> dict:
+
+        symbol = self.symbol_of(o['symbol'])
+        amount = float(o.get('orderQty') or 0)
+        filled = float(o.get('cumQty') or 0)
+
+        return { 'id': str(o['orderID']), 'clientOrderId': o.get('clOrdID'), 'symbol': symbol,
+                 # stop orders keep the phemex type like the ccxt rest api
+                 'type': self.ORDER_TYPES.get(o.get('ordType'), o.get('ordType')),
+                 'side': (o.get('side') or '').lower(),
+                 'price': self._price(symbol, o.get('priceEp')) or None,
+                 'stopPrice': self._price(symbol, o.get('stopPxEp')) or None,
+                 'amount': amount, 'filled': filled, 'remaining': max(amount - filled, 0),
+                 'status': self.ORDER_STATUS.get(o.get('ordStatus'), 'open'),
+                 'reduceOnly': o.get('execInst') == 'ReduceOnly',
+                 'timestamp': int(int(o.get('actionTimeNs') or o.get('transactTimeNs') or 0) / 1000000),
+                 'info': o }
+
+    def _position(self, p: dict) -> dict:
+
+        symbol = self.symbol_of(p['symbol'])
+        side = { 'Buy': 'long', 'Sell': 'short' }.get(p.get('side'))
+        leverage = p.get('leverageEr')
+
+        return { 'symbol': symbol, 'side': side,
+                 'contracts': float(p.get('size') or 0),
+                 'contractSize': self._markets[symbol].get('contractSize'),
+                 'entryPrice': self._price(symbol, p.get('avgEntryPriceEp')) or 0.0,
+                 'leverage': leverage / 100000000 if leverage is not None else p.get('leverage'),
+                 'info': p }
+
+    def replies(self, request) -> list:
+
+        if not isinstance(request, dict):
+            return []
+
+        if request.get('method') == 'server.ping':
+            return [ { 'id': request.get('id'), 'error': None, 'result': 'pong' } ]
+
+        return [ { 'id': request.get('id'), 'error': None, 'result': { 'status': 'success' } } ]
+
+    def topic(self, message) -> tuple:
+
+        if isinstance(message, dict):
+            if 'book' in message:
+                return BOOK, message['symbol'], message.get('type') == 'snapshot'
+            if 'orders' in message or 'positions' in message:
+                return ORDERS, None, message.get('type') == 'snapshot'
+
+        return None
+
+    def subscribed(self, request) -> list:
+
+        if isinstance(request, dict):
+            if request.get('method') == 'orderbook.subscribe':
+                return [ (BOOK, market_id) for market_id in request.get('params', []) ]
+            if request.get('method') == 'aop.subscribe':
+                return [ (ORDERS, None) ]
+
+        return []
+
+class BitgetProtocol(StreamProtocol):
+
+    # mix (futures) api v1: books with crc32 checksums, orders, ordersAlgo (plan
+    # orders like the stop losses) and positions of the account
+
+    url = 'wss://ws.bitget.com/mix/v1/stream'
+
+    ORDER_STATUS = { 'new': 'open', 'init': 'open', 'partial-fill': 'open', 'full-fill': 'closed',
+                     'cancelled': 'canceled', 'not_trigger': 'open', 'triggered': 'closed', 'fail_trigger': 'rejected',
+                     'cancel': 'canceled' }
+
+    # plan types of stop losses
+    STOP_PLANS = [ 'pos_loss', 'loss_plan', 'normal_plan' ]
+
+    def market_id(self, symbol: str) -> str:
+        market = self._markets[symbol]
+        return market.get('info', {}).get('symbolName') or market['id'].split('_')[0]
+
+    # UMCBL, DMCBL ... from the rest market id
+    def _inst_type(self, symbol: str) -> str:
+        market_id = self._markets[symbol]['id']
+        return market_id.split('_')[1] if '_' in market_id else 'UMCBL'
+
+    def login(self, credentials: dict) -> dict:
+
+        timestamp = str(int(time.time()))
+        sign = base64.b64encode(hmac.new(credentials['secret'].encode(), (timestamp + 'GET' + '/user/verify').encode(), hashlib.sha256).digest())
+
+        return { 'op': 'login', 'args': [ { 'apiKey': credentials['apiKey'], 'passphrase': credentials['password'],
+                                            'timestamp': timestamp, 'sign': sign.decode() } ] }
+
+    def _args(self, symbol: str, channel: str) -> list:
+
+        if channel == BOOK:
+            return [ { 'instType': 'mc', 'channel': 'books', 'instId': self.market_id(symbol) } ]
+
+        inst_type = self._inst_type(symbol)
+
+        if channel == ORDERS:
+            return [ { 'instType': inst_type, 'channel': 'orders', 'instId': 'default' },
+                     { 'instType': inst_type, 'channel': 'ordersAlgo', 'instId': 'default' } ]
+
+        if channel == POSITIONS:
+            return [ { 'instType': inst_type, 'channel': 'positions', 'instId': 'default' } ]
+
+        return []
+
+    def subscribe(self, symbol: str, channel: str) -> list:
+        return [ { 'op': 'subscribe', 'args': self._args(symbol, channel) } ]
+
+    def unsubscribe(self, symbol: str, channel: str) -> list:
+        return [ { 'op': 'unsubscribe', 'args': self._args(symbol, channel) } ] if channel == BOOK else []
+
+    def ping(self):
+        return 'ping'
+
+    def parse(self, message) -> list:
+
+        if message == 'pong':
+            return [ { 'channel': CONTROL, 'event': 'pong', 'ok': True, 'message': None } ]
+
+        if not isinstance(message, dict):
+            return []
+
+        if 'event' in message:
+            return [ { 'channel': CONTROL, 'event': message['event'], 'ok': message['event'] != 'error' and message.get('code', 0) in (0, '0'),
+                       'message': message.get('msg') } ]
+
+        arg = message.get('arg', {})
+        channel = arg.get('channel')
+        data = message.get('data', [])
+        snapshot = message.get('action') == 'snapshot'
+
+        if channel == 'books':
+
+            symbol = self.symbol_of(arg.get('instId'))
+            if symbol is None or len(data) == 0:
+                return []
+
+            book = data[0]
+            checksum = book.get('checksum')
+
+            return [ { 'channel': BOOK, 'symbol': symbol, 'snapshot': snapshot,
+                       'bids': book.get('bids', []), 'asks': book.get('asks', []),
+                       'seq': None, 'prev_seq': None,
+                       'checksum': int(checksum) if checksum is not None else None,
+                       'timestamp': int(book['ts']) if book.get('ts') else None } ]
+
+        if channel in ('orders', 'ordersAlgo'):
+            orders = [ self._order(o, channel == 'ordersAlgo') for o in data ]
+            orders = [ o for o in orders if o is not None ]
+            return [ { 'channel': ORDERS, 'symbol': None, 'snapshot': False, 'orders': orders } ]
+
+        if channel == 'positions':
+            positions = [ self._position(p) for p in data if self.symbol_of(p.get('instId')) is not None ]
+            return [ { 'channel': POSITIONS, 'symbol': None, 'snapshot': snapshot, 'positions': positions } ]
+
+        return []
+
+    def _order(self, o: dict, plan: bool) -> dict:
+
+        symbol = self.symbol_of(o.get('instId'))
+        if symbol is None or (plan and o.get('planType') not in self.STOP_PLANS):
+            return None
+
+        side = o.get('side')
+        side = { 'close_long': 'sell', 'close_short': 'buy' }.get(side, side)
+
+        if plan:
+            # like the stop losses of BitgetAdapter.bitget_fetch_open_stoploss_orders
+            amount = float(o.get('sz') or 0)
+            return { 'id': str(o['id']), 'symbol': symbol, 'type': 'Stop', 'side': side, 'price': None,
+                     'stopPrice': float(o['triggerPx']), 'amount': amount, 'filled': 0, 'remaining': amount,
+                     'status': self.ORDER_STATUS.get(o.get('status'), 'open'), 'reduceOnly': True,
+                     'timestamp': int(o.get('uTime') or o.get('cTime') or 0), 'info': o }
+
+        amount = float(o.get('sz') or 0)
+        filled = float(o.get('accFillSz') or 0)
+
+        return { 'id': str(o['ordId']), 'clientOrderId': o.get('clOrdId'), 'symbol': symbol,
+                 'type': o.get('ordType'), 'side': side,
+                 'price': float(o['px']) if o.get('px') else None, 'stopPrice': None,
+                 'amount': amount, 'filled': filled, 'remaining': max(amount - filled, 0),
+                 'status': self.ORDER_STATUS.get(o.get('status'), 'open'),
+                 'reduceOnly': o.get('reduceOnly', False),
+                 'timestamp': int(o.get('uTime') or o.get('cTime') or 0), 'info': o }
+
+    def _position(self, p: dict) -> dict:
+
+        total = float(p.get('total') or 0)
+
+        # the ccxt rest api (and with it BitgetAdapter) has the size in contractSize
+        return { 'symbol': self.symbol_of(p['instId']), 'side': p.get('holdSide'),
+                 'contracts': total, 'contractSize': total,
+                 'entryPrice': float(p.get('averageOpenPrice') or 0),
+                 'leverage': float(p.get('leverage') or 0),
+                 'info': p }
+
+    def replies(self, request) -> list:
+
+        if request == 'ping':
+            return [ 'pong' ]
+
+        if not isinstance(request, dict):
+            return []
+
+        if request.get('op') == 'login':
+            return [ { 'event': 'login', 'code': 0 } ]
+
+        return [ { 'event': request.get('op'), 'arg': a } for a in request.get('args', []) ]
+
+    def topic(self, message) -> tuple:
+
+        if isinstance(message, dict) and 'arg' in message and 'data' in message:
+            channel = message['arg'].get('channel')
+            if channel == 'books':
+                return BOOK, message['arg'].get('instId'), message.get('action') == 'snapshot'
+            return ORDERS, None, message.get('action') == 'snapshot'
+
+        return None
+
+    def subscribed(self, request) -> list:
+
+        if isinstance(request, dict) and request.get('op') == 'subscribe':
+            return [ (BOOK, a.get('instId')) if a.get('channel') == 'books' else (ORDERS, None) for a in request.get('args', []) ]
+
+        return []
+
+PROTOCOLS = { 'phemex': PhemexProtocol, 'bitget': BitgetProtocol }
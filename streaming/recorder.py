@@ -0,0 +1,52 @@
+import gzip
+import json
+import threading
+import time
+
+from base import BaseClass
+
+# Recordings of websocket streams are JSON lines of { "t": seconds since the
+# start of the recording, "msg": message } - gzip compressed if the file name
+# ends with .gz
+
+def open_recording(path: str, mode: str = 'rt'):
+    return gzip.open(path, mode) if path.endswith('.gz') else open(path, mode)
+
+def load_recording(path: str) -> list:
+
+    with open_recording(path, 'rt') as f:
+        return [ json.loads(line) for line in f if line.strip() ]
+
+class StreamRecorder(BaseClass):
+
+    # writes the received messages of a StreamClient to a recording, with
+    # append the messages are added to an existing recording
+
+    def __init__(self, path: str, append: bool = False):
+
+        self._path: str = path
+        self._file = open_recording(path, 'at' if append else 'wt')
+        self._start: float = None
+        self._count: int = 0
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def record(self, message):
+
+        with self._lock:
+            now = time.time()
+            self._start = now if self._start is None else self._start
+            self._file.write(json.dumps({ 't': round(now - self._start, 6), 'msg': message }, separators=(',', ':'), default=str) + '\n')
+            self._count += 1
+
+    def close(self):
+
+        with self._lock:
+            self._file.close()
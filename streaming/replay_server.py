@@ -0,0 +1,217 @@
+import asyncio
+import json
+import logging
+import sys
+import threading
+
+from aiohttp import web
+from aiohttp import WSMsgType
+
+from base import BaseClass
+from .protocols import StreamProtocol
+from .protocols import PROTOCOLS
+from .recorder import load_recording
+
+logger = logging.getLogger(__name__)
+
+class ReplayServer(BaseClass):
+
+    # local websocket server playing a recorded stream (see StreamRecorder) to
+    # test the streaming adapters offline:
+    #  - requests are answered with the replies of the protocol (login, pings,
+    #    subscriptions), the replay of a connection starts with its first request
+    #  - each connection gets the recording from the start, with the recorded
+    #    timing divided by speed or as fast as possible if speed is None
+    #  - a subscription of a book during the replay (a resync of the client) is
+    #    answered with the last snapshot of the book and its deltas since then
+    #  - faults on the first connection: skip (indices of messages not sent,
+    #    i.e. gaps) and drop_after (the connection is closed after n messages)
+
+    def __init__(self, recording, protocol: StreamProtocol = None, host: str = '127.0.0.1', port: int = 0,
+                 speed: float = None, skip: list = None, drop_after: int = None):
+
+        recording = load_recording(recording) if isinstance(recording, str) else recording
+
+        self._messages: list = [ r['msg'] for r in recording ]
+        self._times: list = [ r['t'] for r in recording ]
+        self._protocol: StreamProtocol = protocol if protocol is not None else StreamProtocol({})
+
+        self._host: str = host
+        self._port: int = port
+        self._speed: float = speed
+        self._skip: set = set(skip or [])
+        self._drop_after: int = drop_after
+
+        self._connections: int = 0
+        self._sent: int = 0
+        self._requests: list = []
+
+        self._loop: asyncio.AbstractEventLoop = None
+        self._runner: web.AppRunner = None
+        self._thread: threading.Thread = None
+        self._ready = threading.Event()
+        self._finished = threading.Event()
+
+    @property
+    def url(self) -> str:
+        return f'ws://{self._host}:{self._port}/ws'
+
+    @property
+    def connections(self) -> int:
+        return self._connections
+
+    @property
+    def sent(self) -> int:
+        return self._sent
+
+    # all requests received, e.g. to check the resubscriptions of a client
+    @property
+    def requests(self) -> list:
+        return self._requests
+
+    # set when a connection sent the whole recording
+    @property
+    def finished(self) -> threading.Event:
+        return self._finished
+
+    def start(self):
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait(10)
+        return self
+
+    def close(self):
+
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(10)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(10)
+
+    def _run(self):
+
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+
+        app = web.Application()
+        app.router.add_get('/ws', self._handle)
+
+        self._runner = web.AppRunner(app)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, self._host, self._port)
+        self._loop.run_until_complete(site.start())
+
+        # the port chosen by the os if port was 0
+        self._port = site._server.sockets[0].getsockname()[1]
+        self._ready.set()
+
+        self._loop.run_forever()
+
+    async def _send(self, ws, message):
+        await ws.send_str(message if isinstance(message, str) else json.dumps(message))
+        self._sent += 1
+
+    async def _handle(self, request):
+        log_prefix = f"({self.class_name()}._handle) url {self.url}:"
+
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        self._connections += 1
+        first = self._connections == 1
+        state = { 'cursor': 0, 'resend': [] }
+        replay: asyncio.Task = None
+
+        logger.info('%s Connection %s', log_prefix, self._connections)
+
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                break
+
+            try:
+                data = json.loads(msg.data)
+            except ValueError:
+                data = msg.data
+
+            self._requests.append(data)
+
+            for reply in self._protocol.replies(data):
+                await self._send(ws, reply)
+
+            if replay is None:
+                replay = asyncio.ensure_future(self._replay(ws, state, first))
+            else:
+                for channel, market_id in self._protocol.subscribed(data):
+                    state['resend'] += self._since_snapshot(channel, market_id, state['cursor'])
+
+        if replay is not None:
+            replay.cancel()
+
+        return ws
+
+    # the last snapshot of a topic before cursor and all its messages since
+    def _since_snapshot(self, channel: str, market_id: str, cursor: int) -> list:
+
+        topics = [ self._protocol.topic(m) for m in self._messages[:cursor] ]
+        start = None
+        for i, topic in enumerate(topics):
+            if topic is not None and topic[:2] == (channel, market_id) and topic[2]:
+                start = i
+
+        if start is None:
+            return []
+
+        return [ self._messages[i] for i in range(start, cursor) if topics[i] is not None and topics[i][:2] == (channel, market_id) ]
+
+    async def _replay(self, ws, state: dict, first: bool):
+
+        sent = 0
+
+        for i, message in enumerate(self._messages):
+
+            if self._speed is not None and i > 0:
+                await asyncio.sleep(max(self._times[i] - self._times[i - 1], 0) / self._speed)
+            else:
+                await asyncio.sleep(0)
+
+            while len(state['resend']) > 0:
+                await self._send(ws, state['resend'].pop(0))
+
+            state['cursor'] = i + 1
+
+            if first and i in self._skip:
+                continue
+
+            await self._send(ws, message)
+            sent += 1
+
+            if first and self._drop_after is not None and sent >= self._drop_after:
+                await ws.close()
+                return
+
+        self._finished.set()
+
+        # resyncs after the end of the recording
+        while not ws.closed:
+            while len(state['resend']) > 0:
+                await self._send(ws, state['resend'].pop(0))
+            await asyncio.sleep(0.05)
+
+# usage: python -m streaming.replay_server recording.jsonl[.gz] [phemex|bitget] [port] [speed]
+if __name__ == '__main__':
+
+    logging.basicConfig(level=logging.INFO)
+
+    path = sys.argv[1]
+    protocol = PROTOCOLS[sys.argv[2]]({}) if len(sys.argv) > 2 else None
+    port = int(sys.argv[3]) if len(sys.argv) > 3 else 8765
+    speed = float(sys.argv[4]) if len(sys.argv) > 4 else 1.0
+
+    server = ReplayServer(path, protocol, port=port, speed=speed).start()
+    print(f'Replaying {path} on {server.url}')
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.close()
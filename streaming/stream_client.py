@@ -0,0 +1,201 @@
+import asyncio
+import collections
+import json
+import logging
+import threading
+import time
+
+import aiohttp
+
+from base import BaseClass
+from .protocols import StreamProtocol
+from .protocols import BOOK
+from .protocols import CONTROL
+from .recorder import StreamRecorder
+
+logger = logging.getLogger(__name__)
+
+class StreamClient(BaseClass):
+
+    # websocket connection running in its own thread with an asyncio loop:
+    #  - logs in (if credentials are given) and subscribes the channels of the
+    #    symbols after each connect, reconnects with an exponential backoff
+    #  - parses the messages with the protocol and passes the events to the
+    #    handler (on_connect, on_event, on_disconnect), called from the thread
+    #    of the client - on_connect runs before the first message is handled
+    #  - resubscribe (thread safe) requests a new snapshot, e.g. after a gap
+    #  - sends the ping of the protocol if nothing was received for ping_interval
+
+    def __init__(self, url: str, protocol: StreamProtocol, handler, subscriptions: dict,
+                 credentials: dict = None, reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0,
+                 ping_interval: float = 20.0, recorder: StreamRecorder = None):
+
+        self._url: str = url
+        self._protocol: StreamProtocol = protocol
+        self._handler = handler
+
+        # symbol -> list of channels
+        self._subscriptions: dict = subscriptions
+        self._credentials: dict = credentials
+
+        self._reconnect_delay: float = reconnect_delay
+        self._max_reconnect_delay: float = max_reconnect_delay
+        self._ping_interval: float = ping_interval
+        self._recorder: StreamRecorder = recorder
+
+        self._pending = collections.deque()
+        self._connected = threading.Event()
+        self._stopping: bool = False
+
+        self._loop: asyncio.AbstractEventLoop = None
+        self._ws = None
+        self._thread: threading.Thread = None
+
+        self._messages: int = 0
+        self._connects: int = 0
+        self._last_message: float = None
+
+    @property
+    def url(self) -> str:
+        return self._url
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    @property
+    def messages(self) -> int:
+        return self._messages
+
+    # number of reconnects after the first connect
+    @property
+    def reconnects(self) -> int:
+        return max(self._connects - 1, 0)
+
+    @property
+    def last_message(self) -> float:
+        return self._last_message
+
+    def start(self):
+
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def wait_connected(self, timeout: float = None) -> bool:
+        return self._connected.wait(timeout)
+
+    def close(self, timeout: float = 5.0):
+
+        self._stopping = True
+        if self._loop is not None and self._ws is not None:
+            asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def resubscribe(self, symbol: str, channel: str = BOOK):
+        self._pending.append((symbol, channel))
+
+    # drops the connection, e.g. to force a resync - the client reconnects
+    def disconnect(self):
+        if self._loop is not None and self._ws is not None:
+            asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+
+    def _run(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        log_prefix = f"({self.class_name()}._main) url {self._url}:"
+
+        self._loop = asyncio.get_running_loop()
+        delay = self._reconnect_delay
+
+        async with aiohttp.ClientSession() as session:
+
+            while not self._stopping:
+                try:
+                    async with session.ws_connect(self._url) as ws:
+                        self._ws = ws
+                        self._connects += 1
+                        logger.info('%s Connected (connect %s)', log_prefix, self._connects)
+
+                        await self._subscribe(ws)
+                        await self._loop.run_in_executor(None, self._handler.on_connect)
+
+                        self._connected.set()
+                        delay = self._reconnect_delay
+
+                        await self._receive(ws)
+
+                except Exception as e:
+                    logger.warning('%s WARN: Connection failed: %s', log_prefix, e)
+
+                finally:
+                    self._ws = None
+                    if self._connected.is_set():
+                        self._connected.clear()
+                        self._handler.on_disconnect()
+
+                if not self._stopping:
+                    logger.info('%s Reconnecting in %.1f s', log_prefix, delay)
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self._max_reconnect_delay)
+
+    async def _send(self, ws, message):
+        await ws.send_str(message if isinstance(message, str) else json.dumps(message))
+
+    async def _subscribe(self, ws):
+
+        if self._credentials is not None:
+            login = self._protocol.login(self._credentials)
+            if login is not None:
+                await self._send(ws, login)
+
+        sent = []
+        for symbol, channels in self._subscriptions.items():
+            for channel in channels:
+                for message in self._protocol.subscribe(symbol, channel):
+                    # account channels are the same for all symbols
+                    if message not in sent or channel == BOOK:
+                        await self._send(ws, message)
+                        sent.append(message)
+
+    async def _receive(self, ws):
+        log_prefix = f"({self.class_name()}._receive) url {self._url}:"
+
+        while not self._stopping:
+
+            while len(self._pending) > 0:
+                symbol, channel = self._pending.popleft()
+                logger.info('%s Resubscribing %s of %s', log_prefix, channel, symbol)
+                for message in self._protocol.unsubscribe(symbol, channel) + self._protocol.subscribe(symbol, channel):
+                    await self._send(ws, message)
+
+            try:
+                msg = await ws.receive(timeout=self._ping_interval)
+            except asyncio.TimeoutError:
+                ping = self._protocol.ping()
+                if ping is not None:
+                    await self._send(ws, ping)
+                continue
+
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                logger.info('%s Connection closed (%s)', log_prefix, msg.type.name)
+                return
+
+            self._messages += 1
+            self._last_message = time.time()
+
+            try:
+                message = json.loads(msg.data)
+            except ValueError:
+                message = msg.data
+
+            if self._recorder is not None:
+                self._recorder.record(message)
+
+            for event in self._protocol.parse(message):
+                if event['channel'] == CONTROL and not event['ok']:
+                    logger.warning('%s WARN: %s failed: %s', log_prefix, event["event"], event["message"])
+                self._handler.on_event(event)
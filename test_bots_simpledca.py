@@ -3,6 +3,7 @@ import os
 import sys
 from dotenv import load_dotenv
 
+from base import setup_logging
 from exchange_adapters import PhemexAdapter
 # from exchange_adapters import BitgetAdapter
 # from order_models import FixedTPSLModel
@@ -28,7 +29,8 @@ PHEMEX_MARGINCOIN=os.getenv('PHEMEX_MARGINCOIN')
 # debugging and testing the models
 if __name__ == '__main__':
 
-    logging.basicConfig(format='%(asctime)s %(levelname)s [%(process)d] %(message)s', level=logging.INFO)
+    # the records are written by a listener thread, per subsystem levels e.g. levels={ 'exchange_adapters': logging.WARNING }
+    setup_logging(logging.INFO)
 
     connect_params = {
         'enableRateLimit': True,
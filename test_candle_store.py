@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from datafeeds import CandleStore
+from datafeeds import candles_to_df
+from datafeeds import timeframe_to_ms
+
+# tests of the CandleStore
+#
+# usage: python -m pytest -q test_candle_store.py
+
+MINUTE = 60000
+START = 1672531200000
+
+def candles(n: int, start: int = START, seed: int = 1) -> list:
+
+    rng = np.random.RandomState(seed)
+    closes = 1000 * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+
+    return [ [ start + i * MINUTE, float(c), float(c) * 1.001, float(c) * 0.999, float(c), float(v) ]
+             for i, (c, v) in enumerate(zip(closes, rng.lognormal(3, 0.5, n))) ]
+
+# the reference: pandas resampling of all base candles
+def resampled(bars: list, timeframe: str) -> pd.DataFrame:
+
+    df = candles_to_df(bars).drop(columns=[ 'datetime' ])
+    df = df.resample(pd.Timedelta(milliseconds=timeframe_to_ms(timeframe))).agg(
+        { 'timestamp': 'first', 'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum' })
+
+    return df
+
+def test_resample_matches_pandas():
+
+    bars = candles(60)
+    store = CandleStore('1m')
+    store.update(bars)
+
+    df = store.resample('5m', now=START + 60 * MINUTE)
+    expected = resampled(bars, '5m')
+
+    assert len(df) == 12
+    assert df['timestamp'].tolist() == expected['timestamp'].astype(int).tolist()
+    for column in [ 'open', 'high', 'low', 'close', 'volume' ]:
+        assert df[column].values == pytest.approx(expected[column].values)
+
+def test_incremental_update_reaggregates_the_changed_buckets():
+
+    bars = candles(30)
+    store = CandleStore('1m')
+    store.update(bars[:20])
+    store.resample('5m', now=START + 30 * MINUTE)
+
+    # a corrected candle of the 3rd bucket and new candles
+    bars[12] = bars[12][:4] + [ bars[12][4] * 1.01, bars[12][5] ]
+    assert store.update(bars) == bars[12][0]
+    assert store.update(bars) is None
+
+    df = store.resample('5m', now=START + 30 * MINUTE)
+    assert df['close'].iloc[2] == pytest.approx(resampled(bars, '5m')['close'].iloc[2])
+    assert df['volume'].values == pytest.approx(resampled(bars, '5m')['volume'].values)
+
+def test_only_closed_and_the_forming_bucket():
+
+    store = CandleStore('1m')
+    store.update(candles(13))
+    now = START + 13 * MINUTE
+
+    # the buckets at 0 and 5 are closed, the one at 10 has 3 of its 5 candles
+    assert store.resample('5m', now=now)['timestamp'].tolist() == [ START, START + 5 * MINUTE ]
+    df = store.resample('5m', only_closed=False, now=now)
+    assert df['timestamp'].tolist() == [ START, START + 5 * MINUTE, START + 10 * MINUTE ]
+    assert df['volume'].iloc[-1] == pytest.approx(sum(c[5] for c in candles(13)[10:]))
+
+def test_incomplete_first_bucket_is_not_returned():
+
+    # the store starts in the middle of a bucket
+    store = CandleStore('1m')
+    store.update(candles(12, start=START + 3 * MINUTE))
+
+    assert store.resample('5m', now=START + 15 * MINUTE)['timestamp'].tolist() == [ START + 5 * MINUTE, START + 10 * MINUTE ]
+
+def test_eviction_keeps_the_aggregated_history():
+
+    store = CandleStore('1m', max_bars=20)
+    bars = candles(60)
+    store.update(bars[:20])
+    store.resample('5m', now=START + 60 * MINUTE)
+
+    for i in range(20, 60, 10):
+        store.update(bars[i:i + 10])
+
+    assert len(store) == 20 and store.last_timestamp == bars[-1][0]
+    df = store.resample('5m', now=START + 60 * MINUTE)
+    assert len(df) == 12
+    assert df['close'].values == pytest.approx(resampled(bars, '5m')['close'].values)
+
+def test_resample_rejects_other_timeframes():
+
+    store = CandleStore('5m')
+    with pytest.raises(ValueError):
+        store.resample('1m')
+    with pytest.raises(ValueError):
+        store.resample('7m')
@@ -0,0 +1,92 @@
+import threading
+
+from base import VirtualClock
+from botlib import BaseBot
+from botlib.events import FILL
+from botlib.events import POSITION
+from botlib.events import PollingWatcher
+from botlib.events import bot_event
+from exchange_adapters import SimulatedAdapter
+from exchange_adapters import SimulatedExchange
+from signal_generators import ExtendedSignalGenerator
+
+# tests of the event dispatch of the BaseBot and the PollingWatcher
+#
+# usage: python -m pytest -q test_events.py
+
+SYMBOL = 'ETH/USD:USD'
+
+class CountingBot(BaseBot):
+
+    def __init__(self, exchange_adapter):
+
+        super().__init__(exchange_adapter, SYMBOL, ExtendedSignalGenerator())
+        self.calls: list = []
+
+    def load_data_feeds(self):
+        self.calls.append('feeds')
+
+    def enter_position_handler(self):
+        self.calls.append('enter')
+
+    def inposition_handler(self):
+        self.calls.append('inposition')
+
+def setup():
+
+    ea = SimulatedAdapter(SimulatedExchange(clock=VirtualClock()))
+    ea.exchange.set_price(SYMBOL, 1000.0)
+
+    return ea, CountingBot(ea)
+
+def test_fill_runs_the_position_handlers_without_the_feeds():
+
+    ea, bot = setup()
+    ea.exchange.create_order(SYMBOL, 'market', 'buy', 1.0)
+
+    bot.dispatch_events([ bot_event(FILL, SYMBOL), bot_event(POSITION, SYMBOL) ])
+
+    assert bot.calls == [ 'inposition' ]
+    assert bot._open_position_bool and bot._current_size == 1.0
+
+def test_closed_position_leaves_the_refresh_due():
+
+    ea, bot = setup()
+    ea.exchange.create_order(SYMBOL, 'market', 'buy', 1.0)
+    bot.dispatch_events([ bot_event(FILL, SYMBOL) ])
+
+    # the trade is finished and the next entry prepared by the next full cycle
+    ea.exchange.create_order(SYMBOL, 'market', 'sell', 1.0, None, { 'reduceOnly': True })
+    bot.dispatch_events([ bot_event(POSITION, SYMBOL) ])
+    assert bot.calls == [ 'inposition' ]
+    assert not bot._open_position_bool and bot._next_refresh == 0
+
+    bot.main_cycle()
+    assert bot.calls == [ 'inposition', 'feeds', 'enter' ]
+
+def test_watcher_polls_under_the_lock_of_the_bot():
+
+    ea, bot = setup()
+
+    polled = threading.Event()
+    holders = []
+    fetch_open_orders = ea.fetch_open_orders
+
+    def fetch(symbol):
+        # the polling thread holds the lock of the bot
+        holders.append(bot.lock._is_owned())
+        polled.set()
+        return fetch_open_orders(symbol)
+
+    ea.fetch_open_orders = fetch
+    watcher = PollingWatcher(ea, SYMBOL, interval=0.01, lock=bot.lock)
+
+    # while the bot thread holds the lock the watcher waits for it
+    with bot.lock:
+        watcher.start(bot._events)
+        assert not polled.wait(0.05)
+
+    assert polled.wait(1.0)
+    watcher.stop()
+
+    assert all(holders)
@@ -0,0 +1,74 @@
+from base import VirtualClock
+from datafeeds import FeedScheduler
+from datafeeds import candles_to_df
+
+# tests of the FeedScheduler
+#
+# usage: python -m pytest -q test_feed_scheduler.py
+
+MINUTE = 60000
+START = 1672531200000
+
+def feed(only_closed: bool = True) -> dict:
+    return { 'timeframe': '5m', 'only_closed': only_closed, 'refresh_timeout': 60 }
+
+def test_scheduler_bar_close_with_server_offset():
+
+    scheduler = FeedScheduler(grace=2.0, clock=VirtualClock(START / 1000))
+    now = START + 7 * MINUTE + 10000
+
+    assert scheduler.next_bar_close('5m', now) == START + 10 * MINUTE
+    assert scheduler.expected_last_bar('5m', now) == START
+    assert scheduler.expected_last_bar('5m', now, only_closed=False) == START + 5 * MINUTE
+
+    # the server clock is 30 s ahead: its bars close 30 s earlier in local time
+    scheduler.clock_offset = 30000
+    assert scheduler.next_bar_close('5m', now) == START + 10 * MINUTE - 30000
+
+def test_scheduler_retries_until_the_bar_is_published():
+
+    scheduler = FeedScheduler(grace=2.0, retry_delay=3.0, max_retries=2)
+    f = feed()
+    now = START + 10 * MINUTE + 2000
+    stale = candles_to_df([ [ START, 1, 1, 1, 1, 1 ] ])
+
+    scheduler.loaded(f, now, stale)
+    assert f['next_refresh'] == now + 3000 and f['retries'] == 1
+    scheduler.loaded(f, now + 3000, stale)
+    assert f['retries'] == 2
+
+    # after max_retries the next bar close is waited for
+    scheduler.loaded(f, now + 6000, stale)
+    assert f['retries'] == 0 and f['next_refresh'] == START + 15 * MINUTE + 2000
+
+    published = candles_to_df([ [ START + 5 * MINUTE, 1, 1, 1, 1, 1 ] ])
+    scheduler.loaded(f, now, published)
+    assert f['next_refresh'] == START + 15 * MINUTE + 2000 and not scheduler.is_due(f, now + 60000)
+    assert scheduler.is_due(f, START + 15 * MINUTE + 2000)
+
+def test_scheduler_refreshes_open_feeds_every_refresh_timeout():
+
+    scheduler = FeedScheduler(grace=2.0)
+    f = feed(only_closed=False)
+    now = START + 10 * MINUTE + 2000
+
+    scheduler.loaded(f, now, candles_to_df([ [ START + 10 * MINUTE, 1, 1, 1, 1, 1 ] ]))
+    assert f['next_refresh'] == now + 60000
+
+def test_scheduler_clock_sync():
+
+    clock = VirtualClock(START / 1000)
+    scheduler = FeedScheduler(clock=clock, clock_sync_interval=3600)
+
+    assert scheduler.needs_clock_sync(clock.ms())
+    scheduler.sync_clock(lambda: clock.ms() + 1500)
+    assert scheduler.clock_offset == 1500
+    assert not scheduler.needs_clock_sync(clock.ms() + 3599000)
+
+    # a failing server time keeps the offset
+    def fail():
+        raise ConnectionError('down')
+
+    scheduler.sync_clock(fail, clock.ms() + 3600000)
+    assert scheduler.clock_offset == 1500
+    assert scheduler.needs_clock_sync(clock.ms() + 7200000)
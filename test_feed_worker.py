@@ -0,0 +1,41 @@
+import pandas as pd
+
+from datafeeds import FeedWorker
+from signal_generators import ExtendedSignalGenerator
+
+# tests of the snapshots of the FeedWorker
+#
+# usage: python -m pytest -q test_feed_worker.py
+
+class CountingGenerator(ExtendedSignalGenerator):
+
+    def __init__(self):
+
+        super().__init__()
+        self.computed: int = 0
+
+    def signal(self, ask: float = None, bid: float = None) -> dict:
+        self.computed += 1
+        return { 'buy': { 'li': bid } }
+
+def test_snapshot_has_its_own_dataframes_and_signal_cache():
+
+    sg = CountingGenerator()
+    sg.df = pd.DataFrame({ 'close': [ 1.0, 2.0 ] })
+    sg.enable_signal_cache()
+    sg.cached_signal(100.0, 99.0)
+
+    snapshot = FeedWorker.snapshot_of(sg)
+
+    assert snapshot.df is not sg.df and snapshot.df.equals(sg.df)
+    assert snapshot._signal_cache is not sg._signal_cache and snapshot._signal_cache == {}
+
+    # the signals cached on the snapshot stay there, the counters are shared
+    snapshot.cached_signal(100.0, 99.0)
+    snapshot.cached_signal(100.0, 99.0)
+    assert list(sg._signal_cache) == [ 'signal' ] and sg._signal_cache['signal']['key'] == sg.watermarks()
+    assert (sg.cache_hits, sg.cache_misses) == (1, 2)
+    assert (snapshot.cache_hits, snapshot.cache_misses) == (1, 2)
+
+    sg.reset_cache_stats()
+    assert snapshot.cache_misses == 0
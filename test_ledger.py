@@ -0,0 +1,129 @@
+import pytest
+
+from base import VirtualClock
+from botlib import BaseBot
+from botlib import TradeLedger
+from exchange_adapters import SimulatedAdapter
+from exchange_adapters import SimulatedExchange
+from signal_generators import ExtendedSignalGenerator
+
+# tests of the TradeLedger on the SimulatedExchange
+#
+# usage: python -m pytest -q test_ledger.py
+
+SYMBOL = 'ETH/USD:USD'
+
+@pytest.fixture
+def ea():
+    ea = SimulatedAdapter(SimulatedExchange(clock=VirtualClock()))
+    ea.exchange.set_price(SYMBOL, 1000.0)
+    return ea
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = TradeLedger(str(tmp_path / 'ledger.db'))
+    yield ledger
+    ledger.close()
+
+def market(ea, side: str, amount: float, price: float, reduce_only: bool = False):
+    ea.exchange.set_price(SYMBOL, price)
+    ea.exchange.create_order(SYMBOL, 'market', side, amount, None, { 'reduceOnly': True } if reduce_only else {})
+
+def test_trade_pnl_matches_the_exchange(ea, ledger):
+
+    market(ea, 'buy', 10, 1000.0)
+    market(ea, 'buy', 10, 1010.0)
+    market(ea, 'sell', 5, 1020.0, reduce_only=True)
+    assert ledger.sync(ea, SYMBOL, 'test') == []
+    assert ledger.position(ea.id, SYMBOL)['size'] == pytest.approx(15)
+
+    # closes the long and flips to a short of 10
+    market(ea, 'sell', 25, 990.0)
+    [ trade ] = ledger.sync(ea, SYMBOL, 'test')
+    assert trade['long'] and trade['size'] == pytest.approx(20)
+    assert ledger.position(ea.id, SYMBOL)['size'] == pytest.approx(-10)
+
+    market(ea, 'buy', 10, 980.0)
+    assert len(ledger.sync(ea, SYMBOL, 'test')) == 1
+
+    fills = ea.exchange.fetch_my_trades(SYMBOL)
+    realized = ledger.realized(ea.id, SYMBOL)
+    assert realized['pnl'] == pytest.approx(sum(f['realizedPnl'] for f in fills))
+    assert realized['fees'] == pytest.approx(sum(f['fee']['cost'] for f in fills))
+
+    stats = ledger.stats('test')['test']
+    assert stats['trades'] == 2 and stats['wins'] + stats['losses'] == 2
+
+def test_duplicate_fill_ids_are_ingested_once(ea, ledger):
+
+    market(ea, 'buy', 1, 1000.0)
+    market(ea, 'sell', 1, 1100.0)
+    fills = ea.exchange.fetch_my_trades(SYMBOL)
+
+    assert len(ledger.ingest(ea.id, SYMBOL, fills)) == 1
+    assert ledger.ingest(ea.id, SYMBOL, fills) == []
+    assert ledger.ingest(ea.id, SYMBOL, fills[:1]) == []
+
+    assert len(ledger.trades(ea.id, SYMBOL)) == 1
+    assert ledger.position(ea.id, SYMBOL)['size'] == 0
+
+def test_watermark_of_the_sync(ea, ledger):
+
+    assert ledger.watermark(ea.id, SYMBOL) is None
+
+    market(ea, 'buy', 1, 1000.0)
+    ledger.sync(ea, SYMBOL)
+    first = ea.exchange.fetch_my_trades(SYMBOL)[-1]['timestamp']
+    assert ledger.watermark(ea.id, SYMBOL) == first
+
+    # nothing new: the fills at the watermark are fetched again and skipped
+    ledger.sync(ea, SYMBOL)
+    assert ledger.position(ea.id, SYMBOL)['size'] == pytest.approx(1)
+
+    ea.exchange.clock.advance(60)
+    market(ea, 'sell', 1, 1100.0)
+    assert len(ledger.sync(ea, SYMBOL)) == 1
+    assert ledger.watermark(ea.id, SYMBOL) > first
+
+def test_state_survives_a_restart(ea, ledger):
+
+    market(ea, 'buy', 1, 1000.0)
+    market(ea, 'sell', 1, 1100.0)
+    ledger.sync(ea, SYMBOL, 'test')
+    realized = ledger.realized(ea.id, SYMBOL)
+    ledger.close()
+
+    reopened = TradeLedger(ledger.path)
+    assert reopened.realized(ea.id, SYMBOL) == realized
+    assert reopened.stats()['test']['trades'] == 1
+    assert reopened.sync(ea, SYMBOL, 'test') == []
+    reopened.close()
+
+def test_stream_fill_without_trade_id_is_left_to_the_sync(ea, ledger):
+
+    bot = BaseBot(ea, SYMBOL, ExtendedSignalGenerator(), ledger=ledger)
+    market(ea, 'buy', 1, 1000.0)
+
+    # the trade event of the StreamingAdapter derived from an order update:
+    # no trade id, no fee and the order price (None for stop orders)
+    order = ea.exchange.fetch_my_trades(SYMBOL)[-1]['order']
+    assert bot.ledger_fill({ 'symbol': SYMBOL, 'order': order, 'side': 'buy', 'amount': 1.0,
+                             'price': None, 'timestamp': ea.exchange.clock.ms() }) == []
+    assert bot.ledger_fill({ 'symbol': SYMBOL, 'order': order, 'side': 'buy', 'amount': 1.0,
+                             'price': 1000.0, 'timestamp': ea.exchange.clock.ms() }) == []
+    assert ledger.position(ea.id, SYMBOL) is None
+
+    bot.sync_ledger()
+    assert ledger.position(ea.id, SYMBOL)['size'] == pytest.approx(1)
+
+def test_stream_fill_with_trade_id_is_not_synced_again(ea, ledger):
+
+    bot = BaseBot(ea, SYMBOL, ExtendedSignalGenerator(), ledger=ledger)
+    market(ea, 'buy', 1, 1000.0)
+
+    # the trade event of the SimulatedExchange is a ccxt trade
+    bot.ledger_fill(ea.exchange.fetch_my_trades(SYMBOL)[-1])
+    assert ledger.position(ea.id, SYMBOL)['size'] == pytest.approx(1)
+
+    bot.sync_ledger()
+    assert ledger.position(ea.id, SYMBOL)['size'] == pytest.approx(1)
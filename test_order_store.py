@@ -0,0 +1,161 @@
+import pytest
+
+from botlib import BaseBot
+from botlib.order_store import AMENDED
+from botlib.order_store import CANCELLED
+from botlib.order_store import CLOSED
+from botlib.order_store import FILLED
+from botlib.order_store import NEW
+from botlib.order_store import OrderStore
+from botlib.price_levels import PriceLevelIndex
+from exchange_adapters import SimulatedAdapter
+from signal_generators import ExtendedSignalGenerator
+
+# tests of the OrderStore and its PriceLevelIndex
+#
+# usage: python -m pytest -q test_order_store.py
+
+SYMBOL = 'ETH/USD:USD'
+
+def limit(id: str, side: str, price: float, amount: float = 1.0, filled: float = 0.0, status: str = 'open') -> dict:
+    return { 'id': id, 'symbol': SYMBOL, 'type': 'limit', 'side': side, 'price': price, 'stopPrice': None,
+             'amount': amount, 'filled': filled, 'status': status }
+
+def stop(id: str, side: str, stop_price: float, amount: float = 1.0) -> dict:
+    return { 'id': id, 'symbol': SYMBOL, 'type': 'Stop', 'side': side, 'price': None, 'stopPrice': stop_price,
+             'amount': amount, 'filled': 0.0, 'status': 'open' }
+
+# every order of the store is in exactly the indexes of its type and side
+def assert_consistent(store: OrderStore):
+
+    indexed = {}
+    for side in ('buy', 'sell'):
+        for by_price, by_id in ((store.limit_by_price[side], store.limit_by_id[side]),
+                                (store.stop_by_price[side], store.stop_by_id[side])):
+            assert len(by_price) == len(by_id)
+            for order in by_id.values():
+                price = order['price'] if order['type'] == 'limit' else order['stopPrice']
+                assert order['id'] in [ o['id'] for o in by_price.get(price) ]
+                indexed[order['id']] = order
+
+    assert indexed == store.orders
+
+def test_sync_adds_updates_and_closes():
+
+    store = OrderStore(SYMBOL, 0.01)
+
+    changes = store.sync([ limit('1', 'buy', 999.0), limit('2', 'sell', 1001.0), stop('3', 'sell', 990.0) ])
+    assert [ c['type'] for c in changes ] == [ NEW, NEW, NEW ]
+    assert_consistent(store)
+
+    # amended price and a partial fill, the order 2 vanished
+    changes = store.sync([ limit('1', 'buy', 998.5, filled=0.5), stop('3', 'sell', 990.0) ])
+    assert sorted((c['type'], c['order']['id']) for c in changes) == [ (AMENDED, '1'), (CLOSED, '2'), (FILLED, '1') ]
+    assert store.limit_by_price['buy'].get(999.0) == []
+    assert [ o['id'] for o in store.limit_by_price['buy'].get(998.5) ] == [ '1' ]
+    assert_consistent(store)
+
+    # the same order objects again - no changes
+    assert store.sync(list(store.orders.values())) == []
+
+def test_apply_stream_updates():
+
+    store = OrderStore(SYMBOL, 0.01)
+
+    assert [ c['type'] for c in store.apply(limit('1', 'buy', 999.0)) ] == [ NEW ]
+    assert [ c['type'] for c in store.apply(limit('1', 'buy', 999.0, filled=1.0, status='closed')) ] == [ FILLED ]
+    assert '1' not in store
+
+    store.apply(limit('2', 'sell', 1001.0))
+    assert [ c['type'] for c in store.apply(limit('2', 'sell', 1001.0, status='canceled')) ] == [ CANCELLED ]
+    assert len(store) == 0
+    assert_consistent(store)
+
+def test_remove_updates_all_indexes():
+
+    store = OrderStore(SYMBOL, 0.01)
+    store.sync([ limit('1', 'sell', 1001.0), limit('2', 'sell', 1001.0), stop('3', 'buy', 1010.0) ])
+
+    changes = store.remove('1')
+    assert [ (c['type'], c['order']['id']) for c in changes ] == [ (CANCELLED, '1') ]
+    assert [ o['id'] for o in store.limit_by_price['sell'].get(1001.0) ] == [ '2' ]
+
+    store.remove('3')
+    assert '3' not in store and len(store.stop_by_price['buy']) == 0
+    assert store.stop_by_price['buy'].levels() == []
+    assert_consistent(store)
+
+    # unknown ids are ignored, the next sync doesn't report the removed orders again
+    assert store.remove('3') == []
+    assert store.sync([ store.get('2') ]) == []
+
+def test_listeners_and_last_changes():
+
+    store = OrderStore(SYMBOL, 0.01)
+    seen = []
+    store.add_listener(seen.append)
+
+    store.sync([ limit('1', 'buy', 999.0) ])
+    store.remove('1')
+    assert [ c['type'] for c in seen ] == [ NEW, CANCELLED ]
+    assert [ c['type'] for c in store.last_changes ] == [ CANCELLED ]
+
+def test_price_level_index():
+
+    index = PriceLevelIndex(0.5)
+
+    # prices computed differently land on the same level
+    index.add(100.0, { 'id': 'a' })
+    index.add(100.0000001, { 'id': 'b' })
+    index.add(101.5, { 'id': 'c' })
+    index.add(98.0, { 'id': 'd' })
+
+    assert sorted(o['id'] for o in index.get(99.9999999)) == [ 'a', 'b' ]
+    assert index.levels() == [ 98.0, 100.0, 101.5 ]
+    assert [ o['id'] for o in index.range(99.0, 102.0) ] == [ 'a', 'b', 'c' ]
+    assert index.nearest(101.2)[0] == 101.5
+    assert index.nearest(104.0, max_ticks=2) == (None, [])
+
+    index.remove(100.0, 'a')
+    index.remove(100.0, 'b')
+    assert 100.0 not in index and index.levels() == [ 98.0, 101.5 ]
+    assert len(index) == 2
+
+    # removing an unknown order or level is a no-op
+    index.remove(100.0, 'a')
+    index.remove(50.0, 'x')
+    assert len(index) == 2
+
+@pytest.mark.parametrize('tick_size', [ None, 0.01, 0.05 ])
+def test_many_orders_stay_consistent(tick_size):
+
+    store = OrderStore(SYMBOL, tick_size)
+    orders = [ limit(str(i), 'buy' if i % 2 else 'sell', 1000.0 + (i % 7) * 0.05) for i in range(50) ]
+
+    store.sync(orders)
+    for i in range(0, 50, 3):
+        store.remove(str(i))
+    store.sync([ o for o in orders if int(o['id']) % 5 != 0 and int(o['id']) % 3 != 0 ])
+
+    assert len(store) == len([ i for i in range(50) if i % 5 != 0 and i % 3 != 0 ])
+    assert_consistent(store)
+
+def test_housekeeping_removes_cancelled_orders_from_the_store():
+
+    ea = SimulatedAdapter()
+    ea.exchange.set_price(SYMBOL, 1000.0)
+    bot = BaseBot(ea, SYMBOL, ExtendedSignalGenerator())
+
+    tp = ea.exchange.create_order(SYMBOL, 'limit', 'sell', 1.0, 1010.0)
+    sl = ea.exchange.create_order(SYMBOL, 'limit', 'buy', 1.0, 990.0)
+    bot.refresh_active_orders()
+    bot.last_tp_order_id = tp['id']
+
+    # the cancelled tp order is gone from all indexes, the next sync has no changes
+    bot.housekeeping_handler()
+
+    assert bot.last_tp_order_id is None
+    assert bot.open_limit_orders('sell') == []
+    assert bot._open_limit_orders_by_price['sell'].get(1010.0) == []
+    assert [ o['id'] for o in bot.open_limit_orders('buy') ] == [ sl['id'] ]
+    assert bot.refresh_active_orders() == []
@@ -0,0 +1,73 @@
+from signal_generators import ExtendedSignalGenerator
+
+# tests of the signal cache of the signal generators
+#
+# usage: python -m pytest -q test_signal_cache.py
+
+class CountingGenerator(ExtendedSignalGenerator):
+
+    def __init__(self):
+
+        super().__init__()
+        self.computed: int = 0
+
+    def signal(self, ask: float = None, bid: float = None) -> dict:
+        self.computed += 1
+        return { 'buy': { 'li': bid }, 'sell': { 'li': ask } }
+
+    def exit_signal(self, ask: float = None, bid: float = None) -> dict:
+        self.computed += 1
+        return { 'sell': { 'tp': ask } }
+
+def test_quotes_within_the_threshold_are_cached():
+
+    sg = CountingGenerator()
+    sg.enable_signal_cache(quote_threshold=0.001)
+
+    assert sg.cached_signal(1000.0, 999.0) == { 'buy': { 'li': 999.0 }, 'sell': { 'li': 1000.0 } }
+
+    # ask and bid moved by at most 0.1 % of the cached quotes
+    assert sg.cached_signal(1000.9, 998.1)['buy']['li'] == 999.0
+    assert sg.cached_signal(999.1, 999.9)['sell']['li'] == 1000.0
+    assert sg.computed == 1
+
+    # the quotes are compared to the cached ones, moving on recomputes
+    assert sg.cached_signal(1001.1, 999.0)['sell']['li'] == 1001.1
+    assert sg.cached_signal(1001.1, 997.9)['buy']['li'] == 997.9
+    assert sg.computed == 3
+    assert (sg.cache_hits, sg.cache_misses) == (2, 3)
+
+def test_changed_watermarks_and_other_signals_recompute():
+
+    sg = CountingGenerator()
+    sg.enable_signal_cache()
+    sg.feeds['default']['watermark'] = 1672531200000
+
+    sg.cached_signal(1000.0, 999.0)
+    sg.cached_signal(1000.0, 999.0)
+    assert sg.computed == 1 and sg._signal_cache['signal']['key'] == (1672531200000,)
+
+    # a new candle of a feed
+    sg.feeds['default']['watermark'] = 1672531260000
+    sg.cached_signal(1000.0, 999.0)
+    assert sg.computed == 2
+
+    # the exit signal has its own entry, without threshold any change recomputes
+    sg.cached_exit_signal(1000.0, 999.0)
+    sg.cached_exit_signal(1000.0, 999.0)
+    sg.cached_signal(1000.01, 999.0)
+    assert sg.computed == 4
+    assert sorted(sg._signal_cache) == [ 'exit_signal', 'signal' ]
+
+def test_callers_get_their_own_copy():
+
+    sg = CountingGenerator()
+    sg.enable_signal_cache()
+
+    sg.cached_signal(1000.0, 999.0)['buy']['li'] = 1.0
+    assert sg.cached_signal(1000.0, 999.0)['buy']['li'] == 999.0
+
+    # without cache every call computes the signal
+    sg.disable_signal_cache()
+    sg.cached_signal(1000.0, 999.0)
+    assert sg.computed == 2
@@ -0,0 +1,106 @@
+import json
+import os
+
+import pytest
+
+from base import VirtualClock
+from botlib import BaseBot
+from botlib.state_store import STATE_VERSION
+from botlib.state_store import StateStore
+from exchange_adapters import SimulatedAdapter
+from exchange_adapters import SimulatedExchange
+from signal_generators import ExtendedSignalGenerator
+
+# tests of the StateStore snapshots
+#
+# usage: python -m pytest -q test_state_store.py
+
+SYMBOL = 'ETH/USD:USD'
+
+@pytest.fixture
+def clock():
+    return VirtualClock()
+
+@pytest.fixture
+def store(tmp_path, clock):
+    return StateStore(str(tmp_path / 'state' / 'bot.json'), interval=10, clock=clock)
+
+def test_save_and_load(store, clock):
+
+    assert store.load() is None
+
+    assert store.save({ 'a': 1 })
+    assert store.load() == { 'a': 1 }
+
+    # not due yet, then due but unchanged
+    assert not store.save({ 'a': 2 })
+    clock.advance(10)
+    assert not store.save({ 'a': 1 })
+    assert store.saves == 1
+
+    assert store.save({ 'a': 2 }, force=True)
+    assert store.load() == { 'a': 2 }
+
+def test_interrupted_save_keeps_the_last_snapshot(store, clock, monkeypatch):
+
+    store.save({ 'a': 1 })
+
+    # the process dies between writing the temporary file and replacing the snapshot
+    def crash(src, dst):
+        raise OSError('interrupted')
+
+    monkeypatch.setattr(os, 'replace', crash)
+    assert not store.save({ 'a': 2 }, force=True)
+    monkeypatch.undo()
+
+    assert os.path.exists(f'{store.path}.tmp')
+    assert store.load() == { 'a': 1 }
+
+    # the state is written again by the next save, the partial file is replaced
+    with open(f'{store.path}.tmp', 'w') as f:
+        f.write('{"version":1,"sta')
+    assert store.save({ 'a': 2 }, force=True)
+    assert store.load() == { 'a': 2 }
+    assert not os.path.exists(f'{store.path}.tmp')
+
+def test_version_mismatch_and_unreadable_snapshots_are_ignored(store):
+
+    with open(store.path, 'w') as f:
+        json.dump({ 'version': STATE_VERSION + 1, 'saved': 0, 'state': { 'a': 1 } }, f)
+    assert store.load() is None
+
+    with open(store.path, 'w') as f:
+        f.write('{"version":1,"saved":0,"state":{"a"')
+    assert store.load() is None
+
+    store.clear()
+    assert not os.path.exists(store.path)
+
+def test_bot_resumes_from_the_snapshot(store):
+
+    ea = SimulatedAdapter(SimulatedExchange(clock=VirtualClock()))
+    ea.exchange.set_price(SYMBOL, 1000.0)
+    ea.exchange.create_order(SYMBOL, 'market', 'buy', 1.0)
+    tp = ea.exchange.create_order(SYMBOL, 'limit', 'sell', 1.0, 1010.0, { 'reduceOnly': True })
+
+    bot = BaseBot(ea, SYMBOL, ExtendedSignalGenerator(), state_store=store)
+    bot.refresh_active_orders()
+    bot.refresh_open_position()
+    bot._last_open_position_bool = True
+    bot._last_current_long = True
+    bot.last_tp_order_id = tp['id']
+    bot._trail_trigger_price = 1005.0
+    bot._trail_value = 2.0
+    bot._cum_pnl = 12.5
+    assert bot.checkpoint(force=True)
+
+    restarted = BaseBot(ea, SYMBOL, ExtendedSignalGenerator(), state_store=store)
+    assert restarted.restore_state()
+    assert restarted.get_state() == bot.get_state()
+
+    # the take profit order was filled or cancelled meanwhile
+    ea.exchange.cancel_order(tp['id'], SYMBOL)
+    restarted = BaseBot(ea, SYMBOL, ExtendedSignalGenerator(), state_store=store)
+    assert restarted.restore_state()
+    assert restarted.last_tp_order_id is None
+    assert restarted.get_state()['trail']['trigger_price'] == 1005.0
@@ -0,0 +1,77 @@
+import pytest
+
+from base import VirtualClock
+from botlib import BaseBot
+from botlib import TickSchedule
+from botlib.tick_schedule import FLAT
+from botlib.tick_schedule import IN_POSITION
+from botlib.tick_schedule import ORDERS
+from exchange_adapters import SimulatedAdapter
+from exchange_adapters import SimulatedExchange
+from signal_generators import ExtendedSignalGenerator
+
+# tests of the TickSchedule intervals and the ticks of the BaseBot
+#
+# usage: python -m pytest -q test_tick_schedule.py
+
+SYMBOL = 'ETH/USD:USD'
+
+def test_interval_by_distance_and_refresh():
+
+    schedule = TickSchedule(near=0.002, far=0.01)
+
+    # near, far and linear in between
+    assert schedule.interval(IN_POSITION, 1000.0, [ 1001.0 ]) == 0.5
+    assert schedule.interval(IN_POSITION, 1000.0, [ 1020.0, None ]) == 5.0
+    assert schedule.interval(IN_POSITION, 1000.0, [ 994.0 ]) == pytest.approx(0.5 + 4.5 * 0.5)
+
+    # without levels or flat the max interval, the entry refresh is not delayed
+    # but does not tick faster than the min interval of the state
+    assert schedule.interval(ORDERS, 1000.0, []) == 10.0
+    assert schedule.interval(FLAT, 1000.0, [ 1000.5 ], until_refresh=12.0) == 12.0
+    assert schedule.interval(ORDERS, 1000.0, [ 1020.0 ], until_refresh=-4.0) == 1.0
+    assert schedule.interval(IN_POSITION, 1000.0, [ 1020.0 ], until_refresh=1.0) == 5.0
+
+    assert schedule.stats()[IN_POSITION] == { 'ticks': 4, 'mean': pytest.approx((0.5 + 5.0 + 2.75 + 5.0) / 4) }
+    assert schedule.stats()[FLAT]['ticks'] == 1
+
+    with pytest.raises(ValueError):
+        TickSchedule(near=0.01, far=0.002)
+
+def test_bot_ticks_across_states():
+
+    clock = VirtualClock()
+    ea = SimulatedAdapter(SimulatedExchange(clock=clock))
+    ea.exchange.set_price(SYMBOL, 999.5, 1000.5)
+
+    bot = BaseBot(ea, SYMBOL, ExtendedSignalGenerator(), tick_schedule=TickSchedule())
+    bot._next_refresh = clock.ms() + 20000
+
+    # flat: sleeps until the entry refresh is due, then ticks with the min interval
+    start = clock.time()
+    bot.tick()
+    assert bot.last_tick == 20.0 and clock.time() - start == pytest.approx(20.0)
+    bot.tick()
+    assert bot.last_tick == 3.0
+
+    # a resting entry order close to the price
+    ea.exchange.create_order(SYMBOL, 'limit', 'buy', 1.0, 999.0)
+    bot.refresh_active_orders()
+    assert bot.tick_state() == ORDERS
+    assert bot.next_tick() == 1.0
+
+    # in a position with a far take profit, then the price runs towards it
+    ea.exchange.create_order(SYMBOL, 'market', 'buy', 1.0)
+    ea.exchange.cancel_all_orders(SYMBOL)
+    ea.exchange.create_order(SYMBOL, 'limit', 'sell', 1.0, 1050.0, { 'reduceOnly': True })
+    bot.refresh_active_orders()
+    bot.refresh_open_position()
+    assert bot.tick_state() == IN_POSITION
+    assert bot.next_tick() == 5.0
+
+    # the top of book seen in the cycle is used for the longest interval of the
+    # state, then the price is requested again
+    ea.exchange.set_price(SYMBOL, 1047.5, 1048.5)
+    assert bot.next_tick() == 5.0
+    clock.advance(5.1)
+    assert bot.next_tick() == 0.5
@@ -0,0 +1,80 @@
+import ccxt
+import pytest
+
+from base import VirtualClock
+from botlib import BaseBot
+from botlib import TrailingStopEngine
+from exchange_adapters import SimulatedAdapter
+from exchange_adapters import SimulatedExchange
+from signal_generators import ExtendedSignalGenerator
+
+# tests of the TrailingStopEngine exits
+#
+# usage: python -m pytest -q test_trailing_stop.py
+
+SYMBOL = 'ETH/USD:USD'
+
+@pytest.fixture
+def ea():
+    ea = SimulatedAdapter(SimulatedExchange(clock=VirtualClock()))
+    ea.exchange.set_price(SYMBOL, 1000.0)
+    ea.exchange.create_order(SYMBOL, 'market', 'buy', 1.0)
+    return ea
+
+@pytest.fixture
+def engine(ea):
+
+    bot = BaseBot(ea, SYMBOL, ExtendedSignalGenerator())
+    engine = TrailingStopEngine(bot, sources=[])
+    bot.trailing_engine = engine
+
+    # long position, triggered at 1005 with a trail of 2
+    bot.refresh_open_position()
+    bot.maintain_trail_sl(trigger_price=1005.0, trail_value=2.0)
+    assert engine.armed
+
+    return engine
+
+# the prices of the open exit (sell limit) orders
+def exits(ea) -> list:
+    return sorted(o['price'] for o in ea.exchange.fetch_open_orders(SYMBOL) if o['side'] == 'sell')
+
+def test_exit_is_retried_and_repriced(ea, engine, monkeypatch):
+
+    assert not engine.on_price(1006.01, 1006.0)
+    assert engine.triggered and engine.stop_price == 1004.0
+
+    # the first placement fails, the exit is fired again with the next top of book
+    def fail(*args, **kwargs):
+        raise ccxt.NetworkError('timeout')
+
+    with monkeypatch.context() as m:
+        m.setattr(ea, 'close_long_limit_order', fail)
+        assert engine.on_price(1003.5, 1003.49)
+    assert not engine.fired and exits(ea) == []
+
+    assert engine.on_price(1003.4, 1003.39)
+    assert engine.fired and exits(ea) == [ 1003.4 ]
+
+    # the same exit price is not fired again, a price moving on re-prices the exit
+    assert not engine.on_price(1003.4, 1003.39)
+    assert engine.on_price(1002.9, 1002.89)
+    assert exits(ea) == [ 1002.9 ]
+
+def test_exit_fires_again_after_the_price_came_back(ea, engine):
+
+    engine.on_price(1006.01, 1006.0)
+    assert engine.on_price(1003.9, 1003.89)
+    assert exits(ea) == [ 1003.9 ]
+
+    # back above the stop the exit order stays, crossing it again re-prices it
+    assert not engine.on_price(1004.5, 1004.49)
+    assert exits(ea) == [ 1003.9 ]
+    assert engine.on_price(1003.0, 1002.99)
+    assert exits(ea) == [ 1003.0 ]
+
+    # the position was closed meanwhile: nothing to place, no retries
+    ea.exchange.create_order(SYMBOL, 'market', 'sell', 1.0, None, { 'reduceOnly': True })
+    assert engine.on_price(1002.0, 1001.99)
+    assert engine.fired
+    assert not engine.on_price(1002.0, 1001.99)